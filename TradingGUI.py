@@ -71,6 +71,7 @@ from PyQt5.QtWidgets import (
 from gui.dialog_base import ThemedMessageBox
 import BaseEnums
 from Utils.common import to_date_str
+from Utils.event_tracer import EV_GUI_REFRESH, tracer
 from Utils.safe_getattr import safe_getattr, safe_setattr, safe_hasattr
 from config import Config
 # IMPORTANT: Use the state manager for all state access
@@ -1184,6 +1185,7 @@ class TradingGUI(QMainWindow):
                 return
 
             position_snapshot = state_manager.get_position_snapshot()
+            tracer.emit(EV_GUI_REFRESH)
 
             status_info = {
                 'fetching_history': False,
@@ -1209,8 +1211,8 @@ class TradingGUI(QMainWindow):
             if safe_hasattr(self.trading_app, '_history_fetch_in_progress'):
                 status_info['fetching_history'] = self.trading_app._history_fetch_in_progress.is_set()
 
-            if safe_hasattr(self.trading_app, '_tick_queue'):
-                status_info['processing'] = not self.trading_app._tick_queue.empty()
+            if safe_hasattr(self.trading_app, '_tick_mailbox') and self.trading_app._tick_mailbox is not None:
+                status_info['processing'] = len(self.trading_app._tick_mailbox) > 0
 
             self.app_status_bar.update_status(status_info, self.trading_mode, actual_running)
 
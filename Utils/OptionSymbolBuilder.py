@@ -48,10 +48,9 @@ LOT SIZES (NSE Circular 176/2025, effective January 2026)
     NIFTY=65, BANKNIFTY=30, FINNIFTY=60, MIDCPNIFTY=120, SENSEX=20.
 """
 
-import calendar
 import logging
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 from Utils.time_utils import IST, ist_now, fmt_display, fmt_stamp
 from typing import Optional, List, Dict
 
@@ -244,61 +243,34 @@ class OptionSymbolBuilder:
 
     # ── Expiry date calculation ───────────────────────────────────────────────
 
-    @classmethod
-    def _last_weekday_of_month(cls, year: int, month: int, weekday: int) -> datetime:
-        """Return the last occurrence of *weekday* in the given month as IST-aware datetime."""
-        last = calendar.monthrange(year, month)[1]
-        dt = datetime(year, month, last)
-        while dt.weekday() != weekday:
-            dt -= timedelta(days=1)
-        # TZ-FIX: localize naive expiry date to IST so comparisons with ist_now() work.
-        from Utils.time_utils import ist_localize
-        return ist_localize(dt)
+    @staticmethod
+    def _calendar(ref: datetime):
+        from Utils.expiry_calendar import get_expiry_calendar
+        return get_expiry_calendar(ref.date())
 
-    @classmethod
-    def _adjust_for_holiday(cls, dt: datetime) -> datetime:
-        """Move *dt* backward until it is not a market holiday."""
-        try:
-            from Utils.common import is_holiday
-            for _ in range(10):
-                if not is_holiday(dt):
-                    break
-                dt -= timedelta(days=1)
-        except ImportError:
-            pass  # No holiday calendar available — use raw date
-        return dt
+    @staticmethod
+    def _as_datetime(d) -> datetime:
+        """Expiry date as an IST-aware midnight datetime (what callers compare against)."""
+        from Utils.time_utils import ist_localize
+        return ist_localize(datetime(d.year, d.month, d.day))
 
     @classmethod
     def monthly_expiry(cls, year: int, month: int, underlying: str) -> datetime:
         """Return the monthly expiry date for *underlying* in the given month."""
-        sym = cls.canonical(underlying)
-        weekday = EXPIRY_WEEKDAY_MAP.get(sym, 1)
-        dt = cls._last_weekday_of_month(year, month, weekday)
-        return cls._adjust_for_holiday(dt)
+        first = datetime(year, month, 1)
+        return cls._as_datetime(cls._calendar(first).expiry(cls.canonical(underlying), first.date(), "monthly"))
 
     @classmethod
     def _next_monthly_expiry(cls, underlying: str, ref: Optional[datetime] = None) -> datetime:
         """Return the next upcoming monthly expiry on or after *ref*."""
         ref = ref or ist_now()
-        sym = cls.canonical(underlying)
-        exp = cls.monthly_expiry(ref.year, ref.month, sym)
-        if exp.date() < ref.date():
-            # This month's expiry already passed — go to next month
-            nm = ref.month + 1
-            ny = ref.year + (1 if nm > 12 else 0)
-            nm = ((nm - 1) % 12) + 1
-            exp = cls.monthly_expiry(ny, nm, sym)
-        return exp
+        return cls._as_datetime(cls._calendar(ref).expiry(cls.canonical(underlying), ref.date(), "monthly"))
 
     @classmethod
     def _next_weekly_expiry(cls, underlying: str, ref: Optional[datetime] = None) -> datetime:
         """Return the next upcoming weekly expiry on or after *ref*."""
         ref = ref or ist_now()
-        sym = cls.canonical(underlying)
-        weekday = EXPIRY_WEEKDAY_MAP.get(sym, 1)
-        days_ahead = (weekday - ref.weekday() + 7) % 7
-        dt = ref + timedelta(days=days_ahead)
-        return cls._adjust_for_holiday(dt)
+        return cls._as_datetime(cls._calendar(ref).expiry(cls.canonical(underlying), ref.date(), "weekly"))
 
     @classmethod
     def expiry_date(cls, underlying: str, weeks_offset: int = 0) -> datetime:
@@ -306,13 +278,16 @@ class OptionSymbolBuilder:
         Return the expiry date for *underlying* with an optional week offset.
 
         For monthly-only indices, ``weeks_offset`` is interpreted as a
-        month offset (0 = current month, 1 = next month, …).
+        month offset (0 = nearest upcoming monthly expiry, 1 = the one
+        after, …).
 
         For weekly-capable indices (NIFTY / SENSEX):
             weeks_offset=0 → nearest upcoming weekly expiry
             weeks_offset=1 → the weekly expiry after that, etc.
             If the target date coincides with the monthly expiry, the
             monthly date-code format will be used automatically.
+
+        Dates come from the precomputed Utils.expiry_calendar table.
         """
         if weeks_offset < 0:
             logger.warning(f"Negative weeks_offset {weeks_offset} - using 0")
@@ -322,27 +297,14 @@ class OptionSymbolBuilder:
             weeks_offset = 52
 
         sym = cls.canonical(underlying)
-        if not cls.has_weekly_expiry(sym):
-            # Monthly-only index
-            ref = ist_now()
-            target_month = ref.month + weeks_offset
-            target_year = ref.year + (target_month - 1) // 12
-            target_month = ((target_month - 1) % 12) + 1
-            return cls.monthly_expiry(target_year, target_month, sym)
-        else:
-            # Weekly-capable index
-            base = cls._next_weekly_expiry(sym)
-            if weeks_offset > 0:
-                base = base + timedelta(weeks=weeks_offset)
-                base = cls._adjust_for_holiday(base)
-            return base
+        kind = "weekly" if cls.has_weekly_expiry(sym) else "monthly"
+        ref = ist_now()
+        return cls._as_datetime(cls._calendar(ref).expiry(sym, ref.date(), kind, offset=weeks_offset))
 
     @classmethod
     def _is_monthly_expiry(cls, dt: datetime, underlying: str) -> bool:
         """True if *dt* is the monthly expiry date for *underlying*."""
-        sym = cls.canonical(underlying)
-        monthly = cls.monthly_expiry(dt.year, dt.month, sym)
-        return dt.date() == monthly.date()
+        return cls._calendar(dt).is_monthly_expiry(cls.canonical(underlying), dt.date())
 
     # ── Main public factory ───────────────────────────────────────────────────
 
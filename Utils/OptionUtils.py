@@ -11,7 +11,7 @@ from Utils.common import (
 # TZ-FIX: All "current time" references in expiry calculations and market-close
 # comparisons must use IST so that weekly/monthly expiry selection and the
 # "has market closed?" checks are correct regardless of the server's system TZ.
-from Utils.time_utils import ist_now
+from Utils.time_utils import ist_localize, ist_now
 
 logger = logging.getLogger(__name__)
 
@@ -148,6 +148,18 @@ class OptionUtils:
         },
     }
 
+    _canonicalizer = None         # Utils.symbol_canonicalizer, bound on first use
+
+    # Exchange / segment prefixes stripped by canonical_symbol(), longest first
+    # so "NSE_INDEX|" is matched before the shorter "NSE|".
+    EXCHANGE_PREFIXES: Tuple[str, ...] = (
+        "NSE_INDEX|", "NSE_FO|", "NSE_EQ|",
+        "BSE_INDEX|", "BSE_FO|", "BSE_EQ|",
+        "MCX_FO|",
+        "NSE|", "NFO|", "BSE|", "MCX|",
+        "NSE:", "NFO:", "BSE:", "MCX:", "CDS:",
+    )
+
     # ── Option symbol prefix per broker ─────────────────────────────────────────
     _OPTION_PREFIX: Dict[str, str] = {
         BROKER_FYERS: "NSE:",
@@ -453,22 +465,47 @@ class OptionUtils:
         state.call_option / state.put_option are always in the format emitted by
         the ACTIVE broker's build_option_symbol().
 
+        Resolved once per distinct string through the memoised
+        Utils.symbol_canonicalizer (same results as _canonical_symbol_scan).
+
         Returns the original symbol unchanged on any error.
         """
+        if not symbol:
+            return ""
+        return (cls._canonicalizer or cls._bind_canonicalizer()).canonical(symbol)
+
+    @classmethod
+    def parse_symbol(cls, symbol: str):
+        """
+        Canonical form plus the parsed contract fields (underlying, expiry
+        code, strike, option type) as a symbol_canonicalizer.CanonicalSymbol;
+        None for an empty symbol.
+        """
+        if not symbol:
+            return None
+        return (cls._canonicalizer or cls._bind_canonicalizer()).resolve(symbol)
+
+    @classmethod
+    def _bind_canonicalizer(cls):
+        # Imported lazily: the canonicalizer builds its tables from this class.
+        from Utils.symbol_canonicalizer import symbol_canonicalizer
+        cls._canonicalizer = symbol_canonicalizer
+        return symbol_canonicalizer
+
+    @classmethod
+    def _canonical_symbol_scan(cls, symbol: str) -> str:
+        """
+        Uncached reference resolution (prefix loop + index-map scan) that
+        canonical_symbol() is memoised from; kept for the equivalence check
+        in benchmarks/scenarios.py.
+        """
         if not symbol:
             return ""
         try:
             # Step 1: strip known exchange/segment prefixes (longest first so
             # "NSE_INDEX|" is matched before the shorter "NSE|").
-            known_prefixes = (
-                "NSE_INDEX|", "NSE_FO|", "NSE_EQ|",
-                "BSE_INDEX|", "BSE_FO|", "BSE_EQ|",
-                "MCX_FO|",
-                "NSE|", "NFO|", "BSE|", "MCX|",
-                "NSE:", "NFO:", "BSE:", "MCX:", "CDS:",
-            )
             bare = symbol
-            for pfx in known_prefixes:
+            for pfx in cls.EXCHANGE_PREFIXES:
                 if symbol.startswith(pfx):
                     bare = symbol[len(pfx):]
                     break
@@ -501,7 +538,7 @@ class OptionUtils:
             return bare
 
         except Exception as e:
-            logger.error(f"[canonical_symbol] Failed for {symbol!r}: {e}", exc_info=True)
+            logger.error(f"[_canonical_symbol_scan] Failed for {symbol!r}: {e}", exc_info=True)
             return symbol
 
     @classmethod
@@ -652,17 +689,11 @@ class OptionUtils:
     def get_monthly_expiry_date(cls, year: int, month: int, derivative: str = "NIFTY") -> datetime:
         """Get the monthly expiry date for the given derivative with holiday adjustment."""
         try:
-            exchange_symbol = cls.get_exchange_symbol(derivative)
-            target_weekday = cls.EXPIRY_WEEKDAY_MAP.get(exchange_symbol, 3)
-            expiry = cls.get_last_expiry_weekday_of_month(year, month, target_weekday)
-
-            max_adjustments = 10
-            adjustments = 0
-            while is_holiday(expiry) and adjustments < max_adjustments:
-                expiry -= timedelta(days=1)
-                adjustments += 1
-
-            return get_time_of_day(0, 0, 0, expiry)
+            from Utils.expiry_calendar import get_expiry_calendar
+            first = datetime(year, month, 1)
+            expiry = get_expiry_calendar(first.date()).expiry(
+                cls.get_exchange_symbol(derivative), first.date(), "monthly")
+            return get_time_of_day(0, 0, 0, ist_localize(datetime(expiry.year, expiry.month, expiry.day)))
         except Exception as e:
             logger.error(f"[get_monthly_expiry_date] Failed for {derivative}: {e}", exc_info=True)
             return ist_now()
@@ -671,31 +702,14 @@ class OptionUtils:
     def get_current_weekly_expiry_date(cls, derivative: str = "NIFTY") -> datetime:
         """Get the current (or next upcoming) weekly expiry date."""
         try:
+            from Utils.expiry_calendar import get_expiry_calendar
             exchange_symbol = cls.get_exchange_symbol(derivative)
-            target_weekday = cls.EXPIRY_WEEKDAY_MAP.get(exchange_symbol, 1)
-
             today = ist_now()
-            days_to_add = (target_weekday - today.weekday() + 7) % 7
-
-            if days_to_add == 0 and is_market_closed_for_the_day():
-                days_to_add = 7
-
-            expiry = today + timedelta(days=days_to_add)
-
-            max_adjustments = 10
-            adjustments = 0
-            while is_holiday(expiry) and adjustments < max_adjustments:
-                expiry -= timedelta(days=1)
-                adjustments += 1
-
-            if expiry.date() < today.date():
-                expiry = today + timedelta(days=(target_weekday - today.weekday() + 7) % 7 + 7)
-                adjustments = 0
-                while is_holiday(expiry) and adjustments < max_adjustments:
-                    expiry -= timedelta(days=1)
-                    adjustments += 1
-
-            return get_time_of_day(0, 0, 0, expiry)
+            cal = get_expiry_calendar(today.date())
+            expiry = cal.expiry(exchange_symbol, today.date(), "weekly")
+            if expiry == today.date() and is_market_closed_for_the_day():
+                expiry = cal.expiry(exchange_symbol, today.date(), "weekly", offset=1)
+            return get_time_of_day(0, 0, 0, ist_localize(datetime(expiry.year, expiry.month, expiry.day)))
         except Exception as e:
             logger.error(f"[get_current_weekly_expiry_date] Failed for {derivative}: {e}", exc_info=True)
             return ist_now()
@@ -0,0 +1,201 @@
+"""
+Utils/event_tracer.py
+=====================
+Always-on, in-memory event tracer for the trading pipeline.
+
+Every thread that emits gets its own fixed-size ring (WS thread, Stage2Worker,
+the TradingApp fetch executor, the Qt main thread, ...), so emitting takes no
+lock and never blocks another thread.  An event is one small tuple:
+
+    (perf_counter_ns, code, a, b)
+
+where *code* is one of the EV_* constants below, *a* an integer argument
+(interned symbol id from Utils.symbol_router.symbol_ids, a count, or a tag() id for a
+short string such as a gate name) and *b* a float (price, duration, ...).
+The oldest events are overwritten once a ring is full; at the default size a
+thread keeps its last 16384 events.
+
+dump() writes the events of the last N seconds from every ring to a
+compressed NumPy file (Data/traces/trace_<stamp>_<reason>.npz) together with
+the thread names, event names, tag strings and the symbol-id table, so the
+file can be read without the app.  dump_on_error() is the same, rate-limited,
+for exception handlers.  Lay a dump out per thread with:
+
+    python -m Utils.trace_viewer Data/traces/trace_....npz
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from Utils.time_utils import fmt_stamp
+
+logger = logging.getLogger(__name__)
+
+now_ns = time.perf_counter_ns
+
+RING_SIZE = 1 << 14                 # events kept per thread (power of two)
+MAX_RINGS = 64                      # rings of finished threads are recycled past this
+DUMP_SECONDS = 60.0
+ERROR_DUMP_INTERVAL_S = 60.0        # at most one dump_on_error() file per interval
+TRACE_DIR = os.path.join("Data", "traces")
+
+# ── Event codes ───────────────────────────────────────────────────────────────
+
+EV_TICK_ROUTED = 1      # a = symbol id, b = ltp               (WS thread)
+EV_BAR_FLUSHED = 2      # a = symbol id, b = close of the tick that sealed it
+EV_STAGE2_BATCH = 3     # a = symbols in the batch
+EV_SIGNAL = 4           # a = tag(trend)
+EV_GATE_PASSED = 5      # a = tag(gate / side)
+EV_GATE_BLOCKED = 6     # a = tag(gate)
+EV_ORDER_SENT = 7       # a = symbol id, b = price
+EV_FILL = 8             # a = orders filled, b = price
+EV_EXIT_SENT = 9        # a = tag(reason), b = price
+EV_FETCH_START = 10     # history fetch + indicator recompute started
+EV_FETCH_DONE = 11      # b = duration in ms
+EV_GUI_REFRESH = 12     # Qt main thread status refresh
+EV_ERROR = 13           # a = tag(where)
+
+EVENT_NAMES: Dict[int, str] = {
+    value: name[3:] for name, value in globals().items() if name.startswith("EV_")
+}
+
+
+class _Ring:
+    __slots__ = ("thread_name", "thread_ident", "events", "pos")
+
+    def __init__(self, size: int):
+        thread = threading.current_thread()
+        self.thread_name = thread.name
+        self.thread_ident = thread.ident
+        self.events: List[Optional[tuple]] = [None] * size
+        self.pos = 0
+
+
+class EventTracer:
+    """Per-thread ring buffers of compact events (see module docstring)."""
+
+    def __init__(self, ring_size: int = RING_SIZE, enabled: bool = True):
+        if ring_size & (ring_size - 1):
+            raise ValueError("ring_size must be a power of two")
+        self.ring_size = ring_size
+        self.enabled = enabled
+        self._mask = ring_size - 1
+        self._local = threading.local()
+        self._rings: List[_Ring] = []
+        self._lock = threading.Lock()
+        self._tags: Dict[str, int] = {}
+        self._last_error_dump = 0.0
+
+    # ── Recording ─────────────────────────────────────────────────────────────
+
+    def emit(self, code: int, a: int = 0, b: float = 0.0) -> None:
+        """Record one event on the calling thread's ring."""
+        if not self.enabled:
+            return
+        ring = getattr(self._local, "ring", None)
+        if ring is None:
+            ring = self._new_ring()
+        pos = ring.pos
+        ring.events[pos & self._mask] = (now_ns(), code, a, b)
+        ring.pos = pos + 1
+
+    def tag(self, text: str) -> int:
+        """Small integer for *text* (gate names, reasons, trends), stable for the session."""
+        tid = self._tags.get(text)
+        if tid is None:
+            with self._lock:
+                tid = self._tags.setdefault(text, len(self._tags) + 1)
+        return tid
+
+    def _new_ring(self) -> _Ring:
+        ring = _Ring(self.ring_size)
+        with self._lock:
+            if len(self._rings) >= MAX_RINGS:
+                alive = {t.ident for t in threading.enumerate()}
+                self._rings = [r for r in self._rings if r.thread_ident in alive]
+            self._rings.append(ring)
+        self._local.ring = ring
+        return ring
+
+    # ── Dumping ───────────────────────────────────────────────────────────────
+
+    def events(self, seconds: Optional[float] = None) -> List[tuple]:
+        """(t_ns, ring index, code, a, b) of the last *seconds* (all kept when None), by time."""
+        with self._lock:
+            rings = list(self._rings)
+        return self._collect(rings, seconds)
+
+    def _collect(self, rings: List[_Ring], seconds: Optional[float]) -> List[tuple]:
+        """Merge the events of *rings*; the thread index is the position in *rings*."""
+        cutoff = now_ns() - int(seconds * 1e9) if seconds else None
+        out = []
+        for idx, ring in enumerate(rings):
+            pos = ring.pos
+            for ev in ring.events[:] if pos > self._mask else ring.events[:pos]:
+                if ev is not None and (cutoff is None or ev[0] >= cutoff):
+                    out.append((ev[0], idx, ev[1], ev[2], ev[3]))
+        out.sort(key=lambda ev: ev[0])
+        return out
+
+    def dump(self, seconds: float = DUMP_SECONDS, reason: str = "manual",
+             path: Optional[str] = None) -> Optional[str]:
+        """Write the last *seconds* of events to an .npz file; returns its path or None."""
+        try:
+            import numpy as np
+
+            # One ring snapshot for both, so each event's thread index names its thread
+            with self._lock:
+                rings = list(self._rings)
+                tags = dict(self._tags)
+            thread_names = [r.thread_name for r in rings]
+            events = self._collect(rings, seconds)
+            data = np.array(events, dtype=[("t_ns", "i8"), ("thread", "i2"), ("code", "i2"),
+                                           ("a", "i8"), ("b", "f8")])
+            try:
+                from Utils.symbol_router import symbol_ids
+                symbols = symbol_ids.names()
+            except Exception:
+                symbols = {}
+
+            path = path or os.path.join(TRACE_DIR, f"trace_{fmt_stamp()}_{reason}.npz")
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            np.savez_compressed(
+                path,
+                events=data,
+                threads=np.array(thread_names, dtype=str),
+                event_codes=np.array(list(EVENT_NAMES), dtype="i2"),
+                event_names=np.array(list(EVENT_NAMES.values()), dtype=str),
+                tag_ids=np.array(list(tags.values()), dtype="i8"),
+                tag_names=np.array(list(tags), dtype=str),
+                symbol_ids=np.array(list(symbols), dtype="i8"),
+                symbol_names=np.array(list(symbols.values()), dtype=str),
+                # perf_counter_ns ↔ wall clock at dump time, for absolute timestamps
+                clock=np.array([now_ns(), time.time_ns()], dtype="i8"),
+                reason=np.array(reason),
+            )
+            logger.info(f"[EventTracer] {len(data)} events from {len(thread_names)} threads written to {path}")
+            return path
+        except Exception as e:
+            logger.error(f"[EventTracer.dump] Failed: {e}", exc_info=True)
+            return None
+
+    def dump_on_error(self, where: str) -> Optional[str]:
+        """Record EV_ERROR and dump, at most once per ERROR_DUMP_INTERVAL_S."""
+        self.emit(EV_ERROR, self.tag(where))
+        now = time.monotonic()
+        if now - self._last_error_dump < ERROR_DUMP_INTERVAL_S:
+            return None
+        self._last_error_dump = now
+        return self.dump(reason="error")
+
+    def clear(self) -> None:
+        with self._lock:
+            for ring in self._rings:
+                ring.events = [None] * self.ring_size
+                ring.pos = 0
+
+
+tracer = EventTracer()
@@ -0,0 +1,339 @@
+"""
+Utils/expiry_calendar.py
+========================
+Precomputed trading-day and expiry table for NSE/BSE index options.
+
+One table covers every calendar day over a multi-year range.  Per day it
+holds:
+
+    is_trading      weekday and not in config/holidays.json
+    sessions        trading sessions up to and including the day (cumulative)
+    weekly / monthly position of the nearest expiry on or after the day, per
+                    expiry weekday (NSE Tuesday, BSE Thursday), with the
+                    holiday roll-back already applied
+
+so expiry, days-to-expiry and trading minutes to expiry are array lookups
+(``date.toordinal() - base`` → index) instead of date arithmetic and
+holiday scans on every call.  Everything is built with numpy in a few
+milliseconds and persisted to ``Data/calendar/expiry_calendar.npz``; the
+file is rebuilt when the holiday list changes or a date outside its range
+is asked for.
+
+Time to expiry is measured in trading minutes (375 per session), so
+overnight gaps, weekends and holidays no longer count as trading time.
+Volatility paired with that T must be on the same trading-time basis:
+realised vol from intraday bars already is (annualised over 252 × 375
+bars), while calendar-time vol such as India VIX goes through
+calendar_to_trading_vol() first.
+
+Typical use::
+
+    cal = get_expiry_calendar()
+    exp = cal.expiry("NIFTY", some_date)                  # nearest weekly
+    nxt = cal.expiry("BANKNIFTY", some_date, "monthly", offset=1)
+    T   = cal.years_to_expiry(bar_time, exp)
+"""
+
+from __future__ import annotations
+
+import calendar as _calendar
+import hashlib
+import logging
+import math
+import os
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from Utils.common import MARKET_CLOSE_HOUR, MARKET_CLOSE_MINUTE, MARKET_OPEN_HOUR, MARKET_OPEN_MINUTE
+from Utils.time_utils import IST, ist_now
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+CALENDAR_PATH = os.path.join("Data", "calendar", "expiry_calendar.npz")
+
+SESSION_OPEN_MINUTE = MARKET_OPEN_HOUR * 60 + MARKET_OPEN_MINUTE
+SESSION_MINUTES = MARKET_CLOSE_HOUR * 60 + MARKET_CLOSE_MINUTE - SESSION_OPEN_MINUTE   # 375
+TRADING_MINUTES_PER_YEAR = 252 * SESSION_MINUTES
+
+DEFAULT_START = date(2018, 1, 1)
+_YEARS_AHEAD = 2          # default coverage past today
+_MAX_ROLLBACK = 10        # holiday roll-back limit, as in the old helpers
+_EXPIRY_KINDS = ("weekly", "monthly")
+
+
+def _expiry_weekday(underlying: str) -> int:
+    from Utils.OptionSymbolBuilder import EXPIRY_WEEKDAY_MAP, OptionSymbolBuilder
+    return EXPIRY_WEEKDAY_MAP.get(OptionSymbolBuilder.canonical(str(underlying).upper()), 1)
+
+
+def _holiday_signature(holidays: Iterable[str]) -> str:
+    joined = "|".join(sorted(str(h) for h in holidays))
+    return hashlib.sha1(f"{FORMAT_VERSION}|{joined}".encode()).hexdigest()
+
+
+def _load_holidays() -> list:
+    try:
+        from Utils.common import get_holidays
+        return list(get_holidays() or [])
+    except Exception as e:
+        logger.warning(f"[ExpiryCalendar] holiday list unavailable: {e}")
+        return []
+
+
+class ExpiryCalendar:
+    """Day-indexed trading-session and expiry table (see module docstring)."""
+
+    def __init__(self, start: date, end: date, holidays: Iterable[str] = ()) -> None:
+        holidays = list(holidays)
+        self.start = start
+        self.end = end
+        self.signature = _holiday_signature(holidays)
+        self._base = start.toordinal()
+        n = end.toordinal() - self._base + 1
+
+        # Build past `end` so every day in range has an expiry after it.
+        pad = 70
+        ords = np.arange(self._base, self._base + n + pad, dtype=np.int64)
+        weekday = (ords - 1) % 7                                 # date.weekday() of an ordinal
+        holiday_ords = np.array(sorted({date.fromisoformat(str(h)).toordinal() for h in holidays
+                                         if _is_iso_date(h)}), dtype=np.int64)
+        trading = (weekday < 5) & ~np.isin(ords, holiday_ords)
+        self._trading_ext = trading
+        self.is_trading = trading[:n]
+        self.sessions = np.cumsum(trading, dtype=np.int32)[:n]
+
+        # Expiry tables per weekday: sorted expiry ordinals + per-day position.
+        self._expiries: Dict[Tuple[int, str], np.ndarray] = {}
+        self._positions: Dict[Tuple[int, str], np.ndarray] = {}
+        for wd in sorted(set(_all_expiry_weekdays())):
+            self._build_weekday(wd, ords[:n])
+        del self._trading_ext
+        self._index_lists()
+
+    def _index_lists(self) -> None:
+        # Plain-list mirrors for the per-bar scalar lookups (list indexing is
+        # several times faster than indexing a numpy array one element at a time).
+        self._trading_list = self.is_trading.astype(int).tolist()
+        self._sessions_list = self.sessions.tolist()
+
+    # ── Construction ──────────────────────────────────────────────────────────
+
+    def _roll_back(self, raw: np.ndarray) -> np.ndarray:
+        """Move each expiry ordinal back to the nearest trading day."""
+        out = raw.copy()
+        idx = out - self._base
+        for _ in range(_MAX_ROLLBACK):
+            inside = (idx >= 0) & (idx < self._trading_ext.size)
+            closed = np.zeros(out.size, dtype=bool)
+            closed[inside] = ~self._trading_ext[idx[inside]]
+            if not closed.any():
+                break
+            out[closed] -= 1
+            idx[closed] -= 1
+        return out
+
+    def _build_weekday(self, wd: int, day_ords: np.ndarray) -> None:
+        # Weekly: every `wd` from the first one on/after start until past the pad.
+        first = self._base + (wd - (self._base - 1) % 7) % 7
+        stop = self._base + self._trading_ext.size
+        raw_weekly = np.arange(first, stop, 7, dtype=np.int64)
+        weekly = np.unique(self._roll_back(raw_weekly))
+
+        # Monthly: last `wd` of each month.
+        raw_monthly = []
+        y, m = self.start.year, self.start.month
+        last = date.fromordinal(stop - 1)
+        while (y, m) <= (last.year, last.month):
+            d = date(y, m, _calendar.monthrange(y, m)[1])
+            d -= timedelta(days=(d.weekday() - wd) % 7)
+            raw_monthly.append(d.toordinal())
+            y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+        monthly = np.unique(self._roll_back(np.array(raw_monthly, dtype=np.int64)))
+
+        for kind, exp in (("weekly", weekly), ("monthly", monthly)):
+            self._expiries[(wd, kind)] = exp
+            self._positions[(wd, kind)] = np.searchsorted(exp, day_ords, side="left").astype(np.int32)
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    def save(self, path: str = CALENDAR_PATH) -> None:
+        arrays = {"meta": np.array([FORMAT_VERSION, self.start.toordinal(), self.end.toordinal()],
+                                   dtype=np.int64),
+                  "signature": np.array(self.signature),
+                  "is_trading": self.is_trading, "sessions": self.sessions}
+        for (wd, kind), exp in self._expiries.items():
+            arrays[f"exp_{wd}_{kind}"] = exp
+            arrays[f"pos_{wd}_{kind}"] = self._positions[(wd, kind)]
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp = path + ".tmp.npz"
+            np.savez(tmp, **arrays)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"[ExpiryCalendar] could not save {path}: {e}")
+
+    @classmethod
+    def load(cls, path: str = CALENDAR_PATH) -> Optional["ExpiryCalendar"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as z:
+                version, start_ord, end_ord = (int(v) for v in z["meta"])
+                if version != FORMAT_VERSION:
+                    return None
+                cal = cls.__new__(cls)
+                cal.start, cal.end = date.fromordinal(start_ord), date.fromordinal(end_ord)
+                cal.signature = str(z["signature"])
+                cal._base = start_ord
+                cal.is_trading = z["is_trading"]
+                cal.sessions = z["sessions"]
+                cal._expiries, cal._positions = {}, {}
+                for name in z.files:
+                    if name.startswith("exp_"):
+                        _, wd, kind = name.split("_")
+                        cal._expiries[(int(wd), kind)] = z[name]
+                        cal._positions[(int(wd), kind)] = z[f"pos_{wd}_{kind}"]
+            cal._index_lists()
+            return cal
+        except Exception as e:
+            logger.warning(f"[ExpiryCalendar] could not load {path}: {e}")
+            return None
+
+    # ── Lookups ───────────────────────────────────────────────────────────────
+
+    def covers(self, d: date) -> bool:
+        return self.start <= d <= self.end
+
+    def _index(self, d: date) -> int:
+        i = d.toordinal() - self._base
+        if i < 0 or i >= self.is_trading.size:
+            raise KeyError(f"{d} outside expiry calendar {self.start}..{self.end}")
+        return i
+
+    def is_trading_day(self, d: date) -> bool:
+        return bool(self.is_trading[self._index(d)])
+
+    def expiry(self, underlying: str, d: date, kind: str = "weekly", offset: int = 0) -> date:
+        """Nearest *kind* expiry on or after *d*; *offset* steps to later ones."""
+        key = (_expiry_weekday(underlying), kind if kind in _EXPIRY_KINDS else "weekly")
+        pos = int(self._positions[key][self._index(d)]) + max(int(offset), 0)
+        exp = self._expiries[key]
+        return date.fromordinal(int(exp[min(pos, exp.size - 1)]))
+
+    def expiries(self, underlying: str, days: np.ndarray, kind: str = "weekly") -> np.ndarray:
+        """Vectorised expiry(): *days* are date ordinals, returns expiry ordinals."""
+        key = (_expiry_weekday(underlying), kind if kind in _EXPIRY_KINDS else "weekly")
+        idx = np.asarray(days, dtype=np.int64) - self._base
+        return self._expiries[key][self._positions[key][idx]]
+
+    def is_monthly_expiry(self, underlying: str, d: date) -> bool:
+        return self.expiry(underlying, d, "monthly") == d
+
+    def days_to_expiry(self, d: date, expiry: date) -> int:
+        """Trading sessions after *d* up to and including *expiry* (0 on expiry day)."""
+        return int(self.sessions[self._index(expiry)] - self.sessions[self._index(d)])
+
+    def trading_minute(self, ts: datetime) -> float:
+        """Trading minutes from the start of the table up to *ts*."""
+        if ts.tzinfo is not None and getattr(ts.tzinfo, "zone", None) != IST.zone:
+            ts = ts.astimezone(IST)
+        i = self._index(ts.date())
+        trading = self._trading_list[i]
+        done = self._sessions_list[i] - trading
+        if not trading:
+            return done * SESSION_MINUTES
+        into = ts.hour * 60 + ts.minute + ts.second / 60.0 - SESSION_OPEN_MINUTE
+        return done * SESSION_MINUTES + min(max(into, 0.0), SESSION_MINUTES)
+
+    def trading_minutes_between(self, start: datetime, end: datetime) -> float:
+        return self.trading_minute(end) - self.trading_minute(start)
+
+    def years_to_expiry(self, ts: datetime, expiry_dt: datetime) -> float:
+        """
+        Trading time from *ts* to *expiry_dt* as a fraction of a 252-session
+        year.  Pair it with trading-time vol (see calendar_to_trading_vol).
+        """
+        return self.trading_minutes_between(ts, expiry_dt) / TRADING_MINUTES_PER_YEAR
+
+    def sessions_per_year(self, d: date) -> int:
+        """Trading sessions in the 365 calendar days ending on *d* (252 near the table start)."""
+        i = self._index(d)
+        if i < 365:
+            return 252
+        return int(self.sessions[i] - self.sessions[i - 365])
+
+    def calendar_to_trading_vol(self, sigma: float, d: date) -> float:
+        """
+        Re-express a calendar-time annual vol (India VIX) on the
+        years_to_expiry basis.  A calendar year's variance accrues over its
+        N sessions, which are N / 252 trading years, so the variance per
+        trading year is sigma² · 252 / N.
+        """
+        return sigma * math.sqrt(252 / max(self.sessions_per_year(d), 1))
+
+
+def _is_iso_date(value) -> bool:
+    try:
+        date.fromisoformat(str(value))
+        return True
+    except ValueError:
+        return False
+
+
+def _all_expiry_weekdays() -> Iterable[int]:
+    from Utils.OptionSymbolBuilder import EXPIRY_WEEKDAY_MAP
+    return list(EXPIRY_WEEKDAY_MAP.values()) + [1]
+
+
+# ── Shared instance ───────────────────────────────────────────────────────────
+
+_instance_lock = threading.Lock()
+_instance: Optional[ExpiryCalendar] = None
+
+
+def get_expiry_calendar(covering: Optional[date] = None) -> ExpiryCalendar:
+    """
+    Process-wide calendar, loaded from disk or built on first use.
+
+    Rebuilt (and re-saved) when the holiday list changed or *covering* lies
+    outside the current range.
+    """
+    global _instance
+    cal = _instance
+    if cal is not None and (covering is None or cal.covers(covering)):
+        return cal
+    with _instance_lock:
+        cal = _instance
+        if cal is not None and (covering is None or cal.covers(covering)):
+            return cal
+        holidays = _load_holidays()
+        signature = _holiday_signature(holidays)
+        if cal is None:
+            cal = ExpiryCalendar.load()
+        if cal is not None and cal.signature == signature and (covering is None or cal.covers(covering)):
+            _instance = cal
+            return cal
+
+        today = ist_now().date()
+        start, end = DEFAULT_START, date(today.year + _YEARS_AHEAD, 12, 31)
+        if cal is not None:
+            start, end = min(start, cal.start), max(end, cal.end)
+        if covering is not None:
+            start = min(start, date(covering.year - 1, 1, 1))
+            end = max(end, date(covering.year + 1, 12, 31))
+        cal = ExpiryCalendar(start, end, holidays)
+        cal.save()
+        logger.info(f"[ExpiryCalendar] built {start}..{end} ({len(holidays)} holidays)")
+        _instance = cal
+        return cal
+
+
+def reset_expiry_calendar() -> None:
+    """Drop the in-memory calendar (e.g. after editing holidays.json)."""
+    global _instance
+    with _instance_lock:
+        _instance = None
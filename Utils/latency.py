@@ -0,0 +1,235 @@
+"""
+Utils/latency.py
+================
+Tick-to-decision latency histograms.
+
+Every tick is stamped with time.perf_counter_ns() when the WebSocket
+callback receives it ("recv_ns" on the normalised tick).  Each stage the
+tick passes records the time since that stamp into its own histogram:
+
+    normalized      after broker.normalize_tick()          (WS thread)
+    market_state    after TradingApp.update_market_state() (WS thread)
+    stage2_dequeue  stage 2 takes the mailbox batch        (oldest tick in it)
+    decision        after evaluate_trend_from_snapshot()
+    order_submit    OrderExecutor hands an order to the broker / paper book
+
+Stage 2 and the order executor do not see the tick itself, so the stage-2
+worker sets the batch's receive time as the thread's *origin* (begin() /
+end()) and record_since_origin() measures from it; a thread without an
+origin (a manual order from the GUI) records nothing.
+
+LatencyHistogram is HDR-style: log-linear buckets with 32 sub-buckets per
+power of two (≈3 % resolution) from 1 ns to ~68 s.  It keeps a ring of
+slots covering the rolling window (60 s by default, rotated every 10 s)
+plus lifetime count / max.  Recording takes no lock — it bumps list
+entries in place, so a sample can be lost if two threads record the same
+stage at once; stage writers are single threads, so in practice they are
+not.  The slot is only re-resolved when the sample time passes the current
+slot's end, so a sample is one compare plus the bucket update.  Measured
+on a shared 1-CPU container: 0.3 µs per record() best case, 0.5–0.7 µs
+typical (0.4 / 0.85–0.9 µs before, with an epoch division per sample).
+
+    tick_latency.stats()      {stage: {count, p50, p90, p99, max, mean}} in µs
+    tick_latency.dump(path)   JSON file with the stats and raw buckets
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from Utils.time_utils import fmt_stamp, ist_now
+
+logger = logging.getLogger(__name__)
+
+now_ns = time.perf_counter_ns
+
+STAGE_NORMALIZED = "normalized"
+STAGE_MARKET_STATE = "market_state"
+STAGE_DEQUEUE = "stage2_dequeue"
+STAGE_DECISION = "decision"
+STAGE_ORDER = "order_submit"
+
+STAGES = (STAGE_NORMALIZED, STAGE_MARKET_STATE, STAGE_DEQUEUE, STAGE_DECISION, STAGE_ORDER)
+
+WINDOW_S = 60.0
+WINDOW_SLOTS = 6
+DUMP_DIR = os.path.join("Data", "latency")
+
+_SUB_BITS = 5                                  # 32 sub-buckets per power of two
+_MAX_BITS = 36                                 # samples up to 2**36 ns ≈ 68 s; longer ones clamp
+_LINEAR_MAX = 2 << _SUB_BITS                   # values below this get their own bucket
+_N_BUCKETS = (_MAX_BITS - _SUB_BITS + 1) << _SUB_BITS
+
+
+def _bucket_value(idx: int) -> float:
+    """Midpoint of bucket *idx* in ns."""
+    if idx < _LINEAR_MAX:
+        return float(idx)
+    shift = (idx >> _SUB_BITS) - 1
+    low = (idx - (shift << _SUB_BITS)) << shift
+    return low + ((1 << shift) - 1) / 2.0
+
+
+class LatencyHistogram:
+    """Rolling log-linear histogram of nanosecond samples (see module docstring)."""
+
+    def __init__(self, window_s: float = WINDOW_S, slots: int = WINDOW_SLOTS):
+        self._slot_ns = int(window_s * 1e9 / slots)
+        self._n_slots = slots
+        self._counts: List[List[int]] = [[0] * _N_BUCKETS for _ in range(slots)]
+        self._epochs: List[int] = [-1] * slots
+        self._slot_max: List[int] = [0] * slots
+        self._rotate_lock = threading.Lock()
+        # Current slot: its bucket list and the perf_counter time it ends at
+        self._slot = 0
+        self._current: List[int] = self._counts[0]
+        self._slot_end = 0
+        self.count = 0
+        self.max_ns = 0
+
+    def record(self, ns: int, at_ns: Optional[int] = None) -> None:
+        """Add one sample of *ns* nanoseconds taken at perf_counter time *at_ns*."""
+        if (at_ns if at_ns is not None else now_ns()) >= self._slot_end:
+            self._rotate(at_ns if at_ns is not None else now_ns())
+        # Log-linear bucket index, inline: this is the per-sample hot path
+        if ns < _LINEAR_MAX:
+            idx = ns if ns > 0 else 0
+        else:
+            shift = ns.bit_length() - _SUB_BITS - 1
+            idx = (shift << _SUB_BITS) + (ns >> shift)
+            if idx >= _N_BUCKETS:
+                idx = _N_BUCKETS - 1
+        self._current[idx] += 1
+        slot_max, slot = self._slot_max, self._slot
+        if ns > slot_max[slot]:
+            slot_max[slot] = ns
+            if ns > self.max_ns:
+                self.max_ns = ns
+        self.count += 1
+
+    def _rotate(self, at_ns: int) -> None:
+        """Make the slot covering *at_ns* current, clearing it if it holds an older epoch."""
+        with self._rotate_lock:
+            if at_ns < self._slot_end:
+                return
+            epoch = at_ns // self._slot_ns
+            slot = epoch % self._n_slots
+            if self._epochs[slot] != epoch:
+                self._counts[slot] = [0] * _N_BUCKETS
+                self._slot_max[slot] = 0
+                self._epochs[slot] = epoch
+            self._slot = slot
+            self._current = self._counts[slot]
+            self._slot_end = (epoch + 1) * self._slot_ns
+
+    def _window(self) -> tuple:
+        """(merged bucket counts, window max) over the slots still inside the window."""
+        oldest = now_ns() // self._slot_ns - self._n_slots + 1
+        live = [slot for slot in range(self._n_slots) if self._epochs[slot] >= oldest]
+        if not live:
+            return [0] * _N_BUCKETS, 0
+        merged = [sum(col) for col in zip(*(self._counts[slot] for slot in live))]
+        return merged, max(self._slot_max[slot] for slot in live)
+
+    def stats(self) -> Dict[str, float]:
+        """Rolling-window count, mean, p50 / p90 / p99 and max (µs), plus lifetime count / max."""
+        merged, window_max = self._window()
+        total = sum(merged)
+        result = {"count": total, "total_count": self.count,
+                  "total_max": round(self.max_ns / 1000, 1)}
+        if not total:
+            result.update(p50=0.0, p90=0.0, p99=0.0, max=0.0, mean=0.0)
+            return result
+        targets = {"p50": 0.50 * total, "p90": 0.90 * total, "p99": 0.99 * total}
+        running, weighted = 0, 0.0
+        for idx, n in enumerate(merged):
+            if not n:
+                continue
+            value = _bucket_value(idx)
+            weighted += value * n
+            running += n
+            for name in [k for k, t in targets.items() if running >= t]:
+                result[name] = round(min(value, window_max) / 1000, 1)
+                del targets[name]
+        result["max"] = round(window_max / 1000, 1)
+        result["mean"] = round(min(weighted / total, window_max) / 1000, 1)
+        return result
+
+    def buckets(self) -> Dict[int, int]:
+        """Non-empty rolling-window buckets as {bucket midpoint ns: count}."""
+        merged, _ = self._window()
+        return {int(_bucket_value(i)): n for i, n in enumerate(merged) if n}
+
+    def reset(self) -> None:
+        with self._rotate_lock:
+            self._counts = [[0] * _N_BUCKETS for _ in range(self._n_slots)]
+            self._epochs = [-1] * self._n_slots
+            self._slot_max = [0] * self._n_slots
+            self._slot = 0
+            self._current = self._counts[0]
+            self._slot_end = 0
+            self.count = 0
+            self.max_ns = 0
+
+
+class TickLatency:
+    """One LatencyHistogram per pipeline stage, measured from WS receive."""
+
+    def __init__(self, stages=STAGES, window_s: float = WINDOW_S):
+        self.window_s = window_s
+        self._hist: Dict[str, LatencyHistogram] = {s: LatencyHistogram(window_s) for s in stages}
+        self._local = threading.local()
+
+    # ── Recording ─────────────────────────────────────────────────────────────
+
+    def record(self, stage: str, recv_ns: Optional[int]) -> None:
+        """Record the time from *recv_ns* (the tick's receive stamp) to now under *stage*."""
+        if recv_ns:
+            t = now_ns()
+            self._hist[stage].record(t - recv_ns, t)
+
+    def begin(self, recv_ns: Optional[int]) -> None:
+        """Make *recv_ns* the origin for record_since_origin() on this thread."""
+        self._local.origin = recv_ns
+
+    def end(self) -> None:
+        self._local.origin = None
+
+    def record_since_origin(self, stage: str) -> None:
+        """record() from this thread's origin; no-op when none is set."""
+        self.record(stage, getattr(self._local, "origin", None))
+
+    # ── Reporting ─────────────────────────────────────────────────────────────
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {stage: hist.stats() for stage, hist in self._hist.items()}
+
+    def dump(self, path: Optional[str] = None) -> Optional[str]:
+        """Write stats and raw buckets to *path* (default Data/latency/latency_<stamp>.json)."""
+        try:
+            path = path or os.path.join(DUMP_DIR, f"latency_{fmt_stamp()}.json")
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            payload = {
+                "generated": ist_now().isoformat(),
+                "window_s": self.window_s,
+                "unit": "us",
+                "stages": {stage: {"stats": hist.stats(), "buckets_ns": hist.buckets()}
+                           for stage, hist in self._hist.items()},
+            }
+            with open(path, "w", encoding="utf-8") as fh:
+                json.dump(payload, fh, indent=2)
+            logger.info(f"[TickLatency] Histograms written to {path}")
+            return path
+        except Exception as e:
+            logger.error(f"[TickLatency.dump] Failed: {e}", exc_info=True)
+            return None
+
+    def reset(self) -> None:
+        for hist in self._hist.values():
+            hist.reset()
+
+
+tick_latency = TickLatency()
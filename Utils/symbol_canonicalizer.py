@@ -0,0 +1,181 @@
+"""
+Utils/symbol_canonicalizer.py
+=============================
+Memoised symbol canonicalisation behind OptionUtils.canonical_symbol().
+
+The original resolution stripped exchange prefixes by trying each of them
+in turn and then scanned every broker's index map on every call; it runs
+from the WebSocket callback, update_market_state and the order code, for
+the same few hundred strings all session.  SymbolCanonicalizer resolves a
+raw string once and keeps the result:
+
+- Exchange prefixes sit in a trie built once from
+  OptionUtils.EXCHANGE_PREFIXES, so stripping is one walk over at most the
+  longest prefix.
+- The index maps are flattened into two dicts (full symbol / bare symbol)
+  that remember the position each entry had in the original scan, so the
+  first match wins exactly as before.
+- Results are CanonicalSymbol tuples (canonical string plus the parsed
+  underlying, expiry code, strike and option type) held in a bounded
+  dict.  A hit is a single dict.get() with no lock; misses resolve outside
+  the lock and only the insert / eviction is locked.  When the cache is
+  full the oldest half is dropped.
+
+stats() reports hits, misses and the hit rate; the counters are plain
+integers bumped without a lock, so they can undercount slightly under
+heavy contention.
+"""
+
+import logging
+import re
+import threading
+from itertools import islice
+from typing import Dict, Iterable, Mapping, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED_SYMBOLS = 50000
+
+# Compact NSE/BSE contract cores (see OptionSymbolBuilder.OptionParams)
+_WEEKLY_OPTION_RE = re.compile(r"^([A-Z&-]+?)(\d{2}[1-9OND]\d{2})(\d+(?:\.\d+)?)(CE|PE)$")
+_MONTHLY_OPTION_RE = re.compile(r"^([A-Z&-]+?)(\d{2}[A-Z]{3})(\d+(?:\.\d+)?)(CE|PE)$")
+_FUTURE_RE = re.compile(r"^([A-Z&-]+?)(\d{2}[A-Z]{3})FUT$")
+
+_END = ""                         # trie key marking the end of a prefix
+
+
+class CanonicalSymbol(NamedTuple):
+    canonical: str                # what canonical_symbol() returns
+    underlying: Optional[str]     # "NIFTY" for the index and its contracts
+    expiry: Optional[str]         # expiry code as written: "25318" weekly, "25MAR" monthly
+    strike: Optional[float]
+    option_type: Optional[str]    # "CE" / "PE" / "FUT"; None for indices and tokens
+    is_index: bool
+
+
+def _parse_contract(bare: str) -> Tuple[Optional[str], Optional[str], Optional[float], Optional[str]]:
+    """(underlying, expiry, strike, type) of a compact contract core, Nones when not one."""
+    m = _WEEKLY_OPTION_RE.match(bare) or _MONTHLY_OPTION_RE.match(bare)
+    if m:
+        return m.group(1), m.group(2), float(m.group(3)), m.group(4)
+    m = _FUTURE_RE.match(bare)
+    if m:
+        return m.group(1), m.group(2), None, "FUT"
+    return None, None, None, None
+
+
+class SymbolCanonicalizer:
+    """Raw symbol → CanonicalSymbol with a lock-free cache (see module docstring)."""
+
+    def __init__(self, prefixes: Iterable[str], symbol_map: Mapping[str, str],
+                 index_maps: Mapping[str, Mapping[str, str]],
+                 max_size: int = MAX_CACHED_SYMBOLS):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._cache: Dict[str, CanonicalSymbol] = {}
+        self.hits = 0
+        self.misses = 0
+
+        # Prefix trie; terminals hold the prefix's position in *prefixes* so the
+        # earliest-listed match wins, as in the sequential check.
+        self._trie: Dict = {}
+        for order, pfx in enumerate(prefixes):
+            node = self._trie
+            for ch in pfx:
+                node = node.setdefault(ch, {})
+            node.setdefault(_END, (order, len(pfx)))
+
+        # Index lookups keyed on the full / bare symbol → (scan position, canonical)
+        self._by_full: Dict[str, Tuple[int, str]] = {}
+        self._by_bare: Dict[str, Tuple[int, str]] = {}
+        for alias, canonical in symbol_map.items():
+            self._by_full.setdefault(alias, (0, canonical))
+            self._by_bare.setdefault(alias, (1, canonical))
+        position = 2
+        for idx_map in index_maps.values():
+            for canonical, broker_sym in idx_map.items():
+                broker_bare = broker_sym.split("|")[-1] if "|" in broker_sym else (
+                              broker_sym.split(":")[-1] if ":" in broker_sym else broker_sym)
+                self._by_full.setdefault(broker_sym, (position, canonical))
+                self._by_bare.setdefault(broker_sym, (position, canonical))
+                self._by_bare.setdefault(broker_bare, (position, canonical))
+                position += 1
+
+    # ── Lookup ────────────────────────────────────────────────────────────────
+
+    def resolve(self, symbol: str) -> CanonicalSymbol:
+        """CanonicalSymbol for *symbol* (cached)."""
+        hit = self._cache.get(symbol)
+        if hit is not None:
+            self.hits += 1
+            return hit
+        self.misses += 1
+        result = self._resolve_uncached(symbol)
+        with self._lock:
+            if len(self._cache) >= self.max_size:
+                for key in list(islice(self._cache, len(self._cache) // 2)):
+                    del self._cache[key]
+            self._cache[symbol] = result
+        return result
+
+    def canonical(self, symbol: str) -> str:
+        """Same result as the uncached OptionUtils.canonical_symbol() resolution."""
+        if not symbol:
+            return ""
+        hit = self._cache.get(symbol)
+        if hit is not None:
+            self.hits += 1
+            return hit.canonical
+        return self.resolve(symbol).canonical
+
+    def strip_prefix(self, symbol: str) -> str:
+        """*symbol* without its exchange / segment prefix."""
+        node, best = self._trie, None
+        for ch in symbol:
+            node = node.get(ch)
+            if node is None:
+                break
+            end = node.get(_END)
+            if end is not None and (best is None or end[0] < best[0]):
+                best = end
+        return symbol[best[1]:] if best is not None else symbol
+
+    def _resolve_uncached(self, symbol: str) -> CanonicalSymbol:
+        try:
+            bare = self.strip_prefix(symbol)
+            full = self._by_full.get(symbol)
+            by_bare = self._by_bare.get(bare)
+            if full is not None or by_bare is not None:
+                if full is None or (by_bare is not None and by_bare[0] < full[0]):
+                    full = by_bare
+                return CanonicalSymbol(full[1], full[1], None, None, None, True)
+            underlying, expiry, strike, option_type = _parse_contract(bare)
+            return CanonicalSymbol(bare, underlying, expiry, strike, option_type, False)
+        except Exception as e:
+            logger.error(f"[SymbolCanonicalizer] Failed for {symbol!r}: {e}", exc_info=True)
+            return CanonicalSymbol(symbol, None, None, None, None, False)
+
+    # ── Housekeeping ──────────────────────────────────────────────────────────
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._cache),
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache = {}
+        self.hits = self.misses = 0
+
+
+def _build() -> SymbolCanonicalizer:
+    from Utils.OptionUtils import OptionUtils
+    return SymbolCanonicalizer(OptionUtils.EXCHANGE_PREFIXES, OptionUtils.SYMBOL_MAP,
+                               OptionUtils._INDEX_SYMBOL_MAP)
+
+
+symbol_canonicalizer = _build()
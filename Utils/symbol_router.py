@@ -0,0 +1,176 @@
+"""
+Utils/symbol_router.py
+======================
+Interned symbol ids and the subscription routing tables for the tick path.
+
+Every spelling a broker can use for one instrument ("NSE:NIFTY50-INDEX",
+"NSE_INDEX|Nifty 50", "NFO|NIFTY2531825000CE", ...) resolves to the same
+small integer: the id of its OptionUtils.canonical_symbol().  Two strings
+get the same id exactly when OptionUtils.symbols_match() says they match,
+so the per-tick comparisons become integer compares.
+
+SymbolIds (one per process, ``symbol_ids``) owns the ids, so the tick
+mailbox, the event tracer and every router agree on them:
+
+- intern(raw)       one dict lookup once *raw* has been seen; the first
+                    sighting pays one canonical_symbol() call and is cached.
+
+SymbolRouter holds the routing table of one subscription list; each
+WebSocketManager owns one, so two managers never replace each other's
+routes:
+
+- rebuild(symbols)  called when the subscription list changes (the
+                    WebSocketManager.symbols setter).  Each subscribed symbol
+                    becomes the route for its id, tagged INDEX / CE / PE, and
+                    the usual broker spellings of it are interned up front,
+                    so even the first tick in another format is a plain hit.
+- route(raw)        the Route (id, subscribed spelling, kind) for a tick
+                    symbol, or None when nothing subscribed matches it.
+
+Reads never take a lock.  Writes happen only on a cache miss or a rebuild
+and either set one dict entry or swap a whole table, so a reader on the
+feed thread sees the old or the new entry, never a partial one.
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from Utils.OptionUtils import OptionUtils
+
+logger = logging.getLogger(__name__)
+
+MAX_ALIASES = 20000               # raw spellings cached before the cache is reset
+
+# Exchange prefixes option / futures ticks arrive with across the brokers
+_OPTION_PREFIXES = ("", "NSE:", "NFO:", "BSE:", "NSE_FO|", "BSE_FO|", "NFO|", "BSE|")
+
+KIND_INDEX = "INDEX"
+KIND_CE = "CE"
+KIND_PE = "PE"
+KIND_OTHER = "OTHER"
+
+
+class Route(NamedTuple):
+    id: int
+    symbol: str                   # subscribed spelling (option_chain key, ws symbol)
+    kind: str                     # KIND_INDEX / KIND_CE / KIND_PE / KIND_OTHER
+
+
+def _index_aliases() -> Dict[str, List[str]]:
+    """Canonical index name → every spelling OptionUtils knows for it."""
+    aliases: Dict[str, List[str]] = {}
+    for alias, canonical in OptionUtils.SYMBOL_MAP.items():
+        aliases.setdefault(canonical, []).append(alias)
+    for idx_map in OptionUtils._INDEX_SYMBOL_MAP.values():
+        for canonical, broker_sym in idx_map.items():
+            aliases.setdefault(canonical, []).append(broker_sym)
+    return aliases
+
+
+class SymbolIds:
+    """Raw symbol → interned id, shared by every router (see module docstring)."""
+
+    def __init__(self, max_aliases: int = MAX_ALIASES):
+        self.max_aliases = max_aliases
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}            # raw spelling → id
+        self._canonical: Dict[str, int] = {}      # canonical symbol → id
+        self._pinned: Dict[str, int] = {}         # seeded spellings, kept on a reset
+
+    def intern(self, raw: Optional[str]) -> int:
+        """Id of *raw*'s instrument; 0 for an empty symbol (matches nothing)."""
+        if not raw:
+            return 0
+        sid = self._ids.get(raw)
+        return sid if sid is not None else self._intern_slow(raw)
+
+    def _intern_slow(self, raw: str) -> int:
+        canonical = OptionUtils.canonical_symbol(raw)
+        with self._lock:
+            sid = self._canonical.get(canonical)
+            if sid is None:
+                sid = self._canonical[canonical] = len(self._canonical) + 1
+            if len(self._ids) >= self.max_aliases:
+                # Ids stay stable; only the spelling cache starts over.
+                self._ids = dict(self._pinned)
+            self._ids[raw] = sid
+        return sid
+
+    def pin(self, spellings: Dict[str, int]) -> None:
+        """Keep *spellings* (a router's seeded variants) across cache resets."""
+        with self._lock:
+            self._pinned.update(spellings)
+
+    def same(self, sym_a: Optional[str], sym_b: Optional[str]) -> bool:
+        """symbols_match() through the id cache."""
+        a = self.intern(sym_a)
+        return a != 0 and a == self.intern(sym_b)
+
+    def names(self) -> Dict[int, str]:
+        """Id → canonical symbol for every id handed out so far."""
+        return {sid: canonical for canonical, sid in list(self._canonical.items())}
+
+
+symbol_ids = SymbolIds()
+
+
+class SymbolRouter:
+    """Id → subscribed Route for one subscription list (see module docstring)."""
+
+    def __init__(self, ids: Optional[SymbolIds] = None):
+        self.ids = ids if ids is not None else symbol_ids
+        self.intern = self.ids.intern             # bound once: the tick path calls it directly
+        self._lock = threading.Lock()
+        self._routes: Dict[int, Route] = {}
+        self._index_aliases = _index_aliases()
+
+    def same(self, sym_a: Optional[str], sym_b: Optional[str]) -> bool:
+        return self.ids.same(sym_a, sym_b)
+
+    def _kind(self, canonical: str) -> str:
+        if canonical in self._index_aliases:
+            return KIND_INDEX
+        if canonical.endswith("CE"):
+            return KIND_CE
+        if canonical.endswith("PE"):
+            return KIND_PE
+        return KIND_OTHER
+
+    def _variants(self, canonical: str, kind: str) -> Iterable[str]:
+        if kind == KIND_INDEX:
+            return self._index_aliases[canonical]
+        return [pfx + canonical for pfx in _OPTION_PREFIXES]
+
+    def rebuild(self, symbols: Optional[Iterable[str]]) -> None:
+        """Replace the routing table with one for *symbols* (first spelling wins)."""
+        routes: Dict[int, Route] = {}
+        seeded: Dict[str, int] = {}
+        for sym in symbols or ():
+            if not sym:
+                continue
+            sid = self.intern(sym)
+            seeded[sym] = sid
+            if sid in routes:
+                continue
+            canonical = OptionUtils.canonical_symbol(sym)
+            kind = self._kind(canonical)
+            routes[sid] = Route(sid, sym, kind)
+            for variant in self._variants(canonical, kind):
+                seeded[variant] = self.intern(variant)
+        self.ids.pin(seeded)
+        with self._lock:
+            self._routes = routes
+        logger.debug(f"[SymbolRouter] {len(routes)} routes, {len(seeded)} spellings seeded")
+
+    def route(self, raw: Optional[str]) -> Optional[Route]:
+        """Route of the subscribed instrument *raw* refers to, or None."""
+        return self._routes.get(self.intern(raw)) if raw else None
+
+    def subscribed(self, raw: Optional[str]) -> Optional[str]:
+        """Subscribed spelling of *raw*, or None when it is not subscribed."""
+        route = self.route(raw)
+        return route.symbol if route is not None else None
+
+    def __len__(self) -> int:
+        return len(self._routes)
@@ -0,0 +1,119 @@
+"""
+Utils/trace_viewer.py
+=====================
+``python -m Utils.trace_viewer TRACE.npz`` — offline viewer for EventTracer dumps.
+
+Prints the events as a per-thread timeline: one column per thread, one row
+per event in time order, with the wall-clock time and the gap to the
+previous row, so the sequence leading up to an entry, exit or error can be
+read across the WS thread, stage 2, the fetch executor and the GUI.
+
+    --last 5            only the final 5 seconds of the dump
+    --threads Stage2,MainThread
+    --events SIGNAL,GATE_PASSED,ORDER_SENT,FILL
+    --width 34          column width per thread
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from Utils.event_tracer import (EV_BAR_FLUSHED, EV_ERROR, EV_EXIT_SENT, EV_GATE_BLOCKED,
+                                EV_GATE_PASSED, EV_ORDER_SENT, EV_SIGNAL, EV_TICK_ROUTED)
+from Utils.time_utils import IST
+
+_SYMBOL_ARG = {EV_TICK_ROUTED, EV_BAR_FLUSHED, EV_ORDER_SENT}
+_TAG_ARG = {EV_SIGNAL, EV_GATE_PASSED, EV_GATE_BLOCKED, EV_EXIT_SENT, EV_ERROR}
+
+
+class Trace:
+    """A loaded dump: structured event array plus its name tables."""
+
+    def __init__(self, path: str):
+        import numpy as np
+
+        with np.load(path, allow_pickle=False) as f:
+            self.events = f["events"]
+            self.threads: List[str] = [str(t) for t in f["threads"]]
+            self.event_names: Dict[int, str] = dict(zip(f["event_codes"].tolist(), f["event_names"].tolist()))
+            self.tags: Dict[int, str] = dict(zip(f["tag_ids"].tolist(), f["tag_names"].tolist()))
+            self.symbols: Dict[int, str] = dict(zip(f["symbol_ids"].tolist(), f["symbol_names"].tolist()))
+            perf_ns, wall_ns = f["clock"].tolist()
+            self.reason = str(f["reason"])
+        self._wall_offset_ns = wall_ns - perf_ns
+
+    def wall_time(self, t_ns: int) -> datetime:
+        return datetime.fromtimestamp((t_ns + self._wall_offset_ns) / 1e9, IST)
+
+    def describe(self, code: int, a: int, b: float) -> str:
+        text = self.event_names.get(code, f"EV{code}")
+        if code in _SYMBOL_ARG:
+            text += f" {self.symbols.get(a, a)}"
+        elif code in _TAG_ARG:
+            text += f" {self.tags.get(a, a)}"
+        elif a:
+            text += f" {a}"
+        if b:
+            text += f" @{b:g}"
+        return text
+
+
+def render(trace: Trace, last: Optional[float] = None, threads: Optional[List[str]] = None,
+           events: Optional[List[str]] = None, width: int = 34) -> str:
+    """Per-thread timeline of *trace* as text."""
+    data = trace.events
+    if last and len(data):
+        data = data[data["t_ns"] >= data["t_ns"].max() - int(last * 1e9)]
+    columns = [i for i, name in enumerate(trace.threads)
+               if not threads or any(t.lower() in name.lower() for t in threads)]
+    if events:
+        wanted = {code for code, name in trace.event_names.items() if name in {e.upper() for e in events}}
+        data = data[[int(c) in wanted for c in data["code"]]]
+    data = data[[int(t) in columns for t in data["thread"]]] if len(data) else data
+
+    col_of = {thread: pos for pos, thread in enumerate(columns)}
+    lines = [f"trace: {len(data)} events, reason={trace.reason}",
+             f"{'time':<12} {'+ms':>9}  " + "".join(f"{trace.threads[t][:width - 1]:<{width}}" for t in columns),
+             "-" * (24 + width * len(columns))]
+    prev = None
+    for t_ns, thread, code, a, b in data.tolist():
+        gap = (t_ns - prev) / 1e6 if prev is not None else 0.0
+        prev = t_ns
+        cells = [""] * len(columns)
+        cells[col_of[thread]] = trace.describe(code, a, b)[:width - 1]
+        lines.append(f"{trace.wall_time(t_ns).strftime('%H:%M:%S.%f')[:12]:<12} {gap:>9.3f}  "
+                     + "".join(f"{cell:<{width}}" for cell in cells).rstrip())
+    return "\n".join(lines)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="python -m Utils.trace_viewer",
+                                description="Per-thread timeline of an EventTracer dump (.npz).")
+    p.add_argument("trace", help="trace file written by EventTracer.dump()")
+    p.add_argument("--last", type=float, default=None, metavar="SECONDS",
+                   help="only the final SECONDS of the dump")
+    p.add_argument("--threads", default=None,
+                   help="comma-separated thread-name substrings to show")
+    p.add_argument("--events", default=None,
+                   help="comma-separated event names to show (e.g. SIGNAL,ORDER_SENT)")
+    p.add_argument("--width", type=int, default=34, help="column width per thread")
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        trace = Trace(args.trace)
+    except (OSError, KeyError, ValueError) as exc:
+        print(f"cannot read {args.trace}: {exc}", file=sys.stderr)
+        return 1
+    print(render(trace, last=args.last,
+                 threads=args.threads.split(",") if args.threads else None,
+                 events=args.events.split(",") if args.events else None,
+                 width=args.width))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""
+backtest/__main__.py
+====================
+``python -m backtest`` — headless backtest runner, see backtest_cli.
+"""
+
+import sys
+
+from backtest.backtest_cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
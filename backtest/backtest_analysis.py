@@ -0,0 +1,255 @@
+"""
+backtest/backtest_analysis.py
+=============================
+Multi-timeframe signal analysis (BacktestResult.analysis_data), built in
+worker processes.
+
+The analysis evaluates the signal engine on every bar of every analysis
+timeframe, each time on the trailing HISTORY_BUFFER_MAX bars.  Because a
+bar's evaluation only sees that window, the work splits exactly into
+independent (timeframe, bar range) chunks:
+
+- every timeframe's OHLC goes into one SharedMemory block, written once by
+  the parent; workers attach to it read-only instead of receiving a pickled
+  copy per task,
+- the signal engine is shipped once per worker (initializer) — a
+  DynamicSignalEngine as its config dict, anything else pickled,
+- each chunk returns plain tuples (bar index, signal, confidence, rules,
+  indicator values); the parent turns them back into BarAnalysis objects in
+  bar order.
+
+A fourth timeframe adds chunks to the pool, not wall-clock time, as long as
+there are idle cores.  With one worker, an unpicklable engine or a pool
+failure the same chunks run serially in-process, giving identical output.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from Utils.time_utils import IST
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ANALYSIS_WORKERS = 0      # 0 → one per CPU core
+ANALYSIS_CHUNK_BARS = 1500        # bars evaluated per task
+_COLUMNS = ("open", "high", "low", "close")
+
+# (bar index, signal, confidence, rule_results, indicator_values)
+AnalysisRecord = Tuple[int, str, Dict, Dict, Dict]
+
+
+# ── Shared OHLC frames ────────────────────────────────────────────────────────
+
+class SharedFrames:
+    """
+    Timeframe OHLC arrays in one SharedMemory block.
+
+    Layout per timeframe: int64 epoch-ns times followed by a (4, n) float64
+    OHLC array; ``layout`` maps timeframe → (offset, n) and is what workers
+    receive alongside the block name.
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame]):
+        self.layout: Dict[str, Tuple[int, int]] = {}
+        size = 0
+        for tf, df in frames.items():
+            self.layout[tf] = (size, len(df))
+            size += len(df) * 8 * (1 + len(_COLUMNS))
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for tf, df in frames.items():
+            times, ohlc = self._views(self.shm.buf, *self.layout[tf])
+            times[:] = _epoch_ns(df["time"])
+            for row, col in enumerate(_COLUMNS):
+                ohlc[row] = df[col].to_numpy(dtype=float)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @staticmethod
+    def _views(buf, offset: int, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        times = np.ndarray((n,), dtype=np.int64, buffer=buf, offset=offset)
+        ohlc = np.ndarray((len(_COLUMNS), n), dtype=np.float64, buffer=buf, offset=offset + n * 8)
+        return times, ohlc
+
+    @classmethod
+    def frame(cls, buf, offset: int, n: int) -> pd.DataFrame:
+        """The history DataFrame the signal engine sees (IST times, volume 0)."""
+        times, ohlc = cls._views(buf, offset, n)
+        df = pd.DataFrame({"time": pd.to_datetime(times, utc=True).tz_convert(IST)})
+        for row, col in enumerate(_COLUMNS):
+            df[col] = ohlc[row].copy()
+        df["volume"] = 0
+        return df
+
+    def close(self) -> None:
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except Exception as exc:
+            logger.debug("[SharedFrames.close] %s", exc)
+
+
+def _epoch_ns(times: pd.Series) -> np.ndarray:
+    t = pd.to_datetime(times)
+    if t.dt.tz is None:
+        t = t.dt.tz_localize(IST)
+    return t.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalise *df* to the columns and IST-aware times the analysis uses."""
+    frame = pd.DataFrame({"time": pd.to_datetime(df["time"])})
+    if frame["time"].dt.tz is None:
+        frame["time"] = frame["time"].dt.tz_localize(IST)
+    else:
+        frame["time"] = frame["time"].dt.tz_convert(IST)
+    for col in _COLUMNS:
+        frame[col] = df[col].to_numpy(dtype=float)
+    frame["volume"] = 0
+    return frame
+
+
+# ── Signal engine transport ───────────────────────────────────────────────────
+
+def engine_spec(signal_engine) -> Optional[Tuple[str, Any]]:
+    """How to rebuild *signal_engine* in a worker, or None if it cannot be."""
+    try:
+        from strategy.dynamic_signal_engine import DynamicSignalEngine
+        if isinstance(signal_engine, DynamicSignalEngine):
+            return "dynamic", signal_engine.to_dict()
+    except Exception as exc:
+        logger.debug("[backtest_analysis] DynamicSignalEngine unavailable: %s", exc)
+    try:
+        return "pickle", pickle.dumps(signal_engine)
+    except Exception as exc:
+        logger.info("[backtest_analysis] signal engine not picklable (%s) — analysing in-process", exc)
+        return None
+
+
+def _build_engine(spec: Tuple[str, Any]):
+    kind, payload = spec
+    if kind == "dynamic":
+        from strategy.dynamic_signal_engine import DynamicSignalEngine
+        engine = DynamicSignalEngine()
+        engine.from_dict(payload)
+        return engine
+    return pickle.loads(payload)
+
+
+# ── Evaluation ────────────────────────────────────────────────────────────────
+
+def evaluate_range(frame: pd.DataFrame, signal_engine, lo: int, hi: int,
+                   history_max: int, warmup: int) -> List[AnalysisRecord]:
+    """Evaluate bars [lo, hi) of *frame*, each on its trailing history window."""
+    records: List[AnalysisRecord] = []
+    for i in range(lo, hi):
+        start = max(0, i + 1 - history_max)
+        if i + 1 - start < warmup:
+            continue
+        try:
+            window = frame.iloc[start:i + 1].reset_index(drop=True)
+            sr = signal_engine.evaluate(window, current_position=None)
+        except Exception:
+            continue
+        if not sr or not sr.get("available", False):
+            continue
+        records.append((i, sr.get("signal_value", "WAIT"),
+                        dict(sr.get("confidence", {})),
+                        dict(sr.get("rule_results", {})),
+                        dict(sr.get("indicator_values", {}))))
+    return records
+
+
+# Worker-process globals, set once by _init_worker
+_worker_engine = None
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+_worker_frames: Dict[str, pd.DataFrame] = {}
+
+
+def _init_worker(spec, shm_name: str) -> None:
+    global _worker_engine, _worker_shm
+    _worker_engine = _build_engine(spec)
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+
+
+def _run_chunk(tf: str, offset: int, n: int, lo: int, hi: int,
+               history_max: int, warmup: int) -> Tuple[str, List[AnalysisRecord]]:
+    frame = _worker_frames.get(tf)
+    if frame is None:
+        frame = _worker_frames[tf] = SharedFrames.frame(_worker_shm.buf, offset, n)
+    return tf, evaluate_range(frame, _worker_engine, lo, hi, history_max, warmup)
+
+
+# ── Driver ────────────────────────────────────────────────────────────────────
+
+def _chunks(frames: Dict[str, pd.DataFrame], chunk_bars: int) -> List[Tuple[str, int, int]]:
+    return [(tf, lo, min(lo + chunk_bars, len(df)))
+            for tf, df in frames.items() for lo in range(0, len(df), chunk_bars)]
+
+
+def analyse_timeframes(frames: Dict[str, pd.DataFrame], signal_engine, *,
+                       history_max: int, warmup: int,
+                       workers: int = DEFAULT_ANALYSIS_WORKERS,
+                       chunk_bars: int = ANALYSIS_CHUNK_BARS,
+                       progress: Optional[Callable[[int, int], None]] = None,
+                       ) -> Dict[str, List[AnalysisRecord]]:
+    """
+    Evaluate *signal_engine* over every bar of each timeframe frame.
+
+    *frames* maps timeframe → DataFrame (time/open/high/low/close).  Returns
+    timeframe → records sorted by bar index.
+    """
+    tasks = _chunks(frames, chunk_bars)
+    out: Dict[str, List[AnalysisRecord]] = {tf: [] for tf in frames}
+    if not tasks:
+        return out
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    spec = engine_spec(signal_engine) if workers > 1 else None
+
+    done = 0
+    if spec is not None:
+        shared = None
+        try:
+            shared = SharedFrames(frames)
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                     initializer=_init_worker,
+                                     initargs=(spec, shared.name)) as pool:
+                futures = [pool.submit(_run_chunk, tf, *shared.layout[tf], lo, hi, history_max, warmup)
+                           for tf, lo, hi in tasks]
+                for fut in as_completed(futures):
+                    tf, records = fut.result()
+                    out[tf].extend(records)
+                    done += 1
+                    if progress:
+                        progress(done, len(tasks))
+            for records in out.values():
+                records.sort(key=lambda r: r[0])
+            return out
+        except Exception as exc:
+            logger.warning("[backtest_analysis] worker pool failed (%s) — analysing in-process", exc,
+                           exc_info=True)
+            out = {tf: [] for tf in frames}
+            done = 0
+        finally:
+            if shared is not None:
+                shared.close()
+
+    for tf, lo, hi in tasks:
+        out[tf].extend(evaluate_range(frames[tf], signal_engine, lo, hi, history_max, warmup))
+        done += 1
+        if progress:
+            progress(done, len(tasks))
+    return out
+
@@ -10,10 +10,17 @@ Usage
         self._debug_tab = CandleDebugTab(parent=self)
         self._tabs.addTab(self._debug_tab, "🔍 Candle Debug")
 
-2.  After a backtest run finishes, feed the debugger's entries into the tab:
+2.  After a backtest run finishes, open the streamed log (instant — only the
+    index is read) or feed an in-memory entry list:
 
+        self._debug_tab.load_log(CandleDebugLog.open(result.debug_log_path))
         self._debug_tab.load(debugger.get_entries())
 
+    The table shows one page (PAGE_SIZE rows) at a time; entries are parsed
+    only for the visible page and the detail popup.  Clicking a header
+    sorts the whole filtered set (on the log index) and returns to page 1;
+    Conf% and Spot Close are not in the index and do not sort.
+
 3.  The tab populates automatically. Clicking "🔍 Detail" on any row opens
     a full popup with every field from the candle record.
 
@@ -35,7 +42,10 @@ from __future__ import annotations
 import logging
 from typing import Any, Dict, List, Optional
 
-from PyQt5.QtCore import Qt
+import numpy as np
+from PyQt5.QtCore import Qt, QTimer
+
+from backtest.backtest_candle_debugger import CandleDebugLog
 from gui.dialog_base import ThemedDialog, ThemedMixin, ModernCard, make_separator, make_scrollbar_ss, create_section_header, create_modern_button, apply_tab_style, build_title_bar
 from PyQt5.QtGui import QColor, QFont, QStandardItem, QStandardItemModel
 from PyQt5.QtWidgets import (
@@ -51,6 +61,8 @@ from gui.theme_manager import theme_manager
 logger = logging.getLogger(__name__)
 
 SIGNAL_GROUPS = ["BUY_CALL", "BUY_PUT", "EXIT_CALL", "EXIT_PUT", "HOLD"]
+PAGE_SIZE = 500
+SEARCH_DEBOUNCE_MS = 300
 
 
 class ThemedMixin:
@@ -98,6 +110,9 @@ _COL_POS = 5
 _COL_SPOT = 6
 _COL_SKIP = 7
 _COL_BTN = 8  # button placeholder (real buttons added via QPersistentModelIndex)
+# Columns sortable across pages, mapped to CandleDebugLog.sort keys
+_SORT_KEYS = {_COL_IDX: "position", _COL_TIME: "ts", _COL_SIG: "signal",
+              _COL_ACT: "action", _COL_POS: "pos", _COL_SKIP: "skip"}
 
 
 # ── Stylesheet function ───────────────────────────────────────────────────────
@@ -785,7 +800,8 @@ class CandleDebugTab(QWidget, ThemedMixin):
         self._tabs.addTab(tab, "🔍 Candle Debug")
 
     Feed data after a backtest run:
-        tab.load(debugger.get_entries())
+        tab.load_log(CandleDebugLog.open(path))   # streamed .jsonl, paged
+        tab.load(debugger.get_entries())          # in-memory list
     """
 
     def __init__(self, parent=None):
@@ -795,8 +811,10 @@ class CandleDebugTab(QWidget, ThemedMixin):
 
             # Rule 13.2: Connect to theme and density signals
 
-            self._entries: List[Dict] = []
-            self._filtered: List[Dict] = []
+            self._log: Optional[CandleDebugLog] = None
+            self._filtered: np.ndarray = np.empty(0, dtype=np.int64)
+            self._page = 0
+            self._sort = (_COL_IDX, Qt.AscendingOrder)
             self._popup: Optional[CandleDetailPopup] = None
             self._build_ui()
             self.apply_theme()
@@ -805,11 +823,14 @@ class CandleDebugTab(QWidget, ThemedMixin):
             super().__init__(parent)
 
     def _safe_defaults_init(self):
-        self._entries = []
-        self._filtered = []
+        self._log = None
+        self._filtered = np.empty(0, dtype=np.int64)
+        self._page = 0
+        self._sort = (_COL_IDX, Qt.AscendingOrder)
         self._popup = None
         self._count_lbl = None
         self._search = None
+        self._search_timer = None
         self._sig_filter = None
         self._act_filter = None
         self._skip_filter = None
@@ -818,6 +839,9 @@ class CandleDebugTab(QWidget, ThemedMixin):
         self._status_lbl = None
         self._table_model = None
         self._table = None
+        self._prev_btn = None
+        self._next_btn = None
+        self._page_lbl = None
 
     def apply_theme(self, _: str = None) -> None:
         """Apply theme colors to the tab."""
@@ -849,7 +873,7 @@ class CandleDebugTab(QWidget, ThemedMixin):
                 self._status_lbl.setStyleSheet(f"color:{c.TEXT_DIM}; font-size:{ty.SIZE_XS}pt;")
 
             # Refresh table colors
-            self._populate_table(self._filtered)
+            self._show_page(self._page)
 
             logger.debug("[CandleDebugTab.apply_theme] Applied theme")
         except Exception as e:
@@ -859,23 +883,34 @@ class CandleDebugTab(QWidget, ThemedMixin):
 
     def load(self, entries: List[Dict[str, Any]]) -> None:
         """Load a list of candle debug records (from CandleDebugger.get_entries())."""
-        self._entries = entries or []
+        self.load_log(CandleDebugLog.from_entries(entries or []))
+
+    def load_log(self, log: Optional[CandleDebugLog]) -> None:
+        """Attach a CandleDebugLog; entries are read page by page on demand."""
+        if self._log is not None and self._log is not log:
+            self._log.close()
+        self._log = log
+        total = len(log) if log is not None else 0
         self._refresh_filter()
-        self._count_lbl.setText(f"  {len(self._entries):,} candles  ")
+        self._count_lbl.setText(f"  {total:,} candles  ")
 
-        if len(self._entries) == 0:
+        if total == 0:
             self._status_lbl.setText("No debug data available. Make sure debug_candles=True in config.")
         else:
-            self._status_lbl.setText(f"Loaded {len(self._entries)} candle records")
+            self._status_lbl.setText(f"Loaded {total} candle records")
 
-        logger.debug(f"[CandleDebugTab] Loaded {len(self._entries)} candle records")
+        logger.debug(f"[CandleDebugTab] Loaded {total} candle records")
 
     def clear(self) -> None:
         """Remove all records from the view."""
-        self._entries = []
-        self._filtered = []
+        if self._log is not None:
+            self._log.close()
+        self._log = None
+        self._filtered = np.empty(0, dtype=np.int64)
+        self._page = 0
         self._table_model.setRowCount(0)
         self._count_lbl.setText("  0 candles  ")
+        self._update_pager()
 
     # ── UI construction ───────────────────────────────────────────────────────
 
@@ -908,7 +943,13 @@ class CandleDebugTab(QWidget, ThemedMixin):
         self._search = QLineEdit()
         self._search.setPlaceholderText("time, indicator, signal…")
         self._search.setFixedWidth(200)
-        self._search.textChanged.connect(self._refresh_filter)
+        # Debounced: a search scans the whole log, so wait for typing to pause
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._refresh_filter)
+        self._search.textChanged.connect(self._search_timer.start)
+        self._search.returnPressed.connect(self._refresh_filter)
         tb1.addWidget(self._search)
 
         clr_btn = QPushButton("✕")
@@ -952,6 +993,21 @@ class CandleDebugTab(QWidget, ThemedMixin):
 
         root.addLayout(tb2)
 
+        # ── Pager ─────────────────────────────────────────────────────────────
+        tb3 = QHBoxLayout()
+        tb3.setSpacing(sp.GAP_SM)
+        tb3.addStretch()
+        self._prev_btn = QPushButton("◀ Prev")
+        self._prev_btn.clicked.connect(lambda: self._show_page(self._page - 1))
+        tb3.addWidget(self._prev_btn)
+        self._page_lbl = QLabel("Page 0 / 0")
+        self._page_lbl.setStyleSheet(f"color:{c.TEXT_DIM}; font-size:{ty.SIZE_XS}pt;")
+        tb3.addWidget(self._page_lbl)
+        self._next_btn = QPushButton("Next ▶")
+        self._next_btn.clicked.connect(lambda: self._show_page(self._page + 1))
+        tb3.addWidget(self._next_btn)
+        root.addLayout(tb3)
+
         # ── Table ─────────────────────────────────────────────────────────────
         self._table_model = QStandardItemModel(0, len(_COLS))
         self._table_model.setHorizontalHeaderLabels(_COLS)
@@ -965,8 +1021,10 @@ class CandleDebugTab(QWidget, ThemedMixin):
         self._table.verticalHeader().setVisible(False)
         self._table.horizontalHeader().setStretchLastSection(False)
         self._table.setShowGrid(True)
-        self._table.setSortingEnabled(True)
+        # Sorting is done on the log index (all pages), not by the model
+        self._table.setSortingEnabled(False)
         self._table.doubleClicked.connect(self._on_double_click)
+        self._table.clicked.connect(self._on_cell_clicked)
 
         # Column widths (design requirement, can stay as integers)
         hdr = self._table.horizontalHeader()
@@ -979,6 +1037,10 @@ class CandleDebugTab(QWidget, ThemedMixin):
         hdr.resizeSection(_COL_SPOT, 90)
         hdr.resizeSection(_COL_SKIP, 100)
         hdr.resizeSection(_COL_BTN, 80)
+        hdr.setSectionsClickable(True)
+        hdr.setSortIndicatorShown(True)
+        hdr.setSortIndicator(*self._sort)
+        hdr.sortIndicatorChanged.connect(self._on_sort_changed)
 
         root.addWidget(self._table, 1)
 
@@ -998,52 +1060,74 @@ class CandleDebugTab(QWidget, ThemedMixin):
     # ── Filter / populate ─────────────────────────────────────────────────────
 
     def _refresh_filter(self):
-        """Re-apply all filters and repopulate the table."""
-        sig_f = self._sig_filter.currentText()
-        act_f = self._act_filter.currentText()
-        skip_f = self._skip_filter.currentText()
-        pos_f = self._pos_filter.currentText()
-        search = self._search.text().strip().lower()
-
-        result = []
-        for e in self._entries:
-            if sig_f != "ALL" and e.get("resolved_signal", "WAIT") != sig_f:
-                continue
-            if act_f != "ALL" and e.get("action", "WAIT") != act_f:
-                continue
-
-            skip = e.get("skip_reason") or ""
-            if skip_f == "NONE" and skip:
-                continue
-            elif skip_f not in ("ALL", "NONE") and skip != skip_f:
-                continue
-
-            cur_pos = (e.get("position") or {}).get("current") or "FLAT"
-            if pos_f != "ALL" and cur_pos != pos_f:
-                continue
-
+        """Re-apply all filters (on the log index) and show the first page."""
+        if self._search_timer is not None:
+            self._search_timer.stop()
+        log = self._log
+        total = len(log) if log is not None else 0
+        if log is None:
+            result = np.empty(0, dtype=np.int64)
+        else:
+            result = log.filter(
+                signal=self._sig_filter.currentText(),
+                action=self._act_filter.currentText(),
+                skip=self._skip_filter.currentText(),
+                position=self._pos_filter.currentText(),
+            )
+            search = self._search.text().strip()
             if search:
-                haystack = (
-                        str(e.get("time", "")) + " " +
-                        str(e.get("resolved_signal", "")) + " " +
-                        str(e.get("action", "")) + " " +
-                        str(e.get("skip_reason", "")) + " " +
-                        str(e.get("explanation", ""))
-                ).lower()
-                if search not in haystack:
-                    continue
-
-            result.append(e)
+                result = log.search(search, result)
+            result = self._sorted(result)
 
         self._filtered = result
-        self._populate_table(result)
-        self._result_lbl.setText(f"Showing {len(result):,} of {len(self._entries):,}")
+        self._show_page(0)
+        self._result_lbl.setText(f"Showing {len(result):,} of {total:,}")
         self._status_lbl.setText(
-            f"{len(result):,} candles shown" if result
+            f"{len(result):,} candles shown" if len(result)
             else "No candles match the current filters."
         )
 
-    def _populate_table(self, entries: List[Dict]):
+    def _sorted(self, positions: np.ndarray) -> np.ndarray:
+        col, order = self._sort
+        if self._log is None:
+            return positions
+        return self._log.sort(positions, _SORT_KEYS[col], descending=order == Qt.DescendingOrder)
+
+    def _on_sort_changed(self, col: int, order) -> None:
+        """Re-sort the whole filtered set by *col* and go back to page 1."""
+        hdr = self._table.horizontalHeader()
+        if col not in _SORT_KEYS:
+            hdr.blockSignals(True)
+            hdr.setSortIndicator(*self._sort)
+            hdr.blockSignals(False)
+            return
+        self._sort = (col, order)
+        self._filtered = self._sorted(self._filtered)
+        self._show_page(0)
+
+    def _page_count(self) -> int:
+        return max(1, -(-len(self._filtered) // PAGE_SIZE))
+
+    def _show_page(self, page: int) -> None:
+        """Parse and display only the entries on *page* of the filtered set."""
+        if self._table_model is None:
+            return
+        self._page = max(0, min(page, self._page_count() - 1))
+        positions = self._filtered[self._page * PAGE_SIZE:(self._page + 1) * PAGE_SIZE]
+        entries = self._log.entries(positions) if self._log is not None and len(positions) else []
+        self._populate_table(entries, positions)
+        self._update_pager()
+
+    def _update_pager(self) -> None:
+        if self._page_lbl is None:
+            return
+        pages = self._page_count()
+        self._page_lbl.setText(f"Page {self._page + 1 if len(self._filtered) else 0} / "
+                               f"{pages if len(self._filtered) else 0}")
+        self._prev_btn.setEnabled(self._page > 0)
+        self._next_btn.setEnabled(self._page < pages - 1)
+
+    def _populate_table(self, entries: List[Dict], positions=None):
         c = self._c
         signal_colors = get_signal_colors()
         action_colors = get_action_colors()
@@ -1051,9 +1135,6 @@ class CandleDebugTab(QWidget, ThemedMixin):
         model = self._table_model
         model.setRowCount(0)
 
-        # Disable sorting while populating for performance
-        self._table.setSortingEnabled(False)
-
         def _item(text, color=None, align=Qt.AlignLeft | Qt.AlignVCenter) -> QStandardItem:
             it = QStandardItem(str(text))
             it.setTextAlignment(align)
@@ -1062,7 +1143,7 @@ class CandleDebugTab(QWidget, ThemedMixin):
                 it.setForeground(color)
             return it
 
-        for e in entries:
+        for n, e in enumerate(entries):
             sig = e.get("resolved_signal", "WAIT")
             act = e.get("action", "WAIT")
             skip = e.get("skip_reason") or ""
@@ -1096,16 +1177,11 @@ class CandleDebugTab(QWidget, ThemedMixin):
                 _item("🔍 Detail"),  # placeholder text; real click handled below
             ]
 
-            # Store the entry index so we can retrieve it on click
-            row[0].setData(e, Qt.UserRole)
+            # Store the log position so the entry is re-read on click
+            row[0].setData(int(positions[n]) if positions is not None else e, Qt.UserRole)
 
             model.appendRow(row)
 
-        self._table.setSortingEnabled(True)
-
-        # Set up click handler on the "Detail" column
-        self._table.clicked.connect(self._on_cell_clicked)
-
     # ── Click handlers ────────────────────────────────────────────────────────
 
     def _on_cell_clicked(self, index):
@@ -1123,6 +1199,8 @@ class CandleDebugTab(QWidget, ThemedMixin):
             if idx_item is None:
                 return
             entry = idx_item.data(Qt.UserRole)
+            if isinstance(entry, int) and self._log is not None:
+                entry = self._log.entry(entry)
             if not isinstance(entry, dict):
                 return
             self._show_detail(entry)
@@ -1147,8 +1225,10 @@ class CandleDebugTab(QWidget, ThemedMixin):
             if self._popup and self._popup.isVisible():
                 self._popup.close()
             self._popup = None
-            self._entries = []
-            self._filtered = []
+            if self._log is not None:
+                self._log.close()
+            self._log = None
+            self._filtered = np.empty(0, dtype=np.int64)
             self._table_model.clear()
         except Exception as e:
             logger.error(f"[CandleDebugTab.cleanup] Failed: {e}", exc_info=True)
@@ -19,6 +19,15 @@ Changes from original:
   with zero overhead (no exception machinery overhead).
 - Removed dead `import BaseEnums` inside _build_entry — moved to module level
   with a lazy fallback so the circular-import risk is handled cleanly.
+- Streaming mode (stream_path=...): each record() appends one JSON line to a
+  .jsonl file plus a fixed-width row to a binary .idx file (bar time, byte
+  offset, length and small codes for signal / action / skip / position).
+  Nothing is kept in memory, so long runs stay flat.  CandleDebugLog opens
+  such a file instantly (index only) and reads entries on demand.
+- Index bar times are IST epoch seconds: naive bar times are localised to
+  IST (as _parse_ts already did) instead of the host's local zone.
+- CandleDebugLog.sort orders the whole filtered index by time / signal /
+  action / skip / position, so the debug tab sorts across pages.
 """
 
 from __future__ import annotations
@@ -26,18 +35,66 @@ from __future__ import annotations
 import json
 import logging
 import os
+import re
+import struct
+from bisect import bisect_left
 from collections import deque
 from datetime import datetime
 from Utils.time_utils import IST, ist_now, fmt_display, fmt_stamp
 from enum import Enum
-from typing import Any, Deque, Dict, List, Optional
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence
 
+import numpy as np
 import pandas as pd
 
 from Utils.safe_getattr import safe_getattr, safe_hasattr
 
 logger = logging.getLogger(__name__)
 
+# ── Streaming index format ────────────────────────────────────────────────────
+# One fixed-width little-endian row per recorded candle, written next to the
+# .jsonl file as <path>.idx.  Codes index into the tuples below; unknown
+# values map to the last slot ("OTHER").
+INDEX_SUFFIX = ".idx"
+INDEX_DTYPE = np.dtype([
+    ("ts",     "<i8"),     # bar time, epoch seconds (naive times taken as IST)
+    ("offset", "<i8"),     # byte offset of the JSON line
+    ("length", "<u4"),     # byte length of the JSON line (incl. newline)
+    ("signal", "u1"),
+    ("action", "u1"),
+    ("skip",   "u1"),
+    ("pos",    "u1"),
+])
+SIGNAL_CODES = ("WAIT", "BUY_CALL", "BUY_PUT", "EXIT_CALL", "EXIT_PUT", "HOLD", "SKIP", "OTHER")
+SKIP_CODES = ("NONE", "SIDEWAY", "MARKET_CLOSED", "WARMUP", "OTHER")
+POSITION_CODES = ("FLAT", "CALL", "PUT", "OTHER")
+_INDEX_ROW = struct.Struct("<qqIBBBB")     # packed layout of INDEX_DTYPE
+_SIGNAL_IDX = {v: i for i, v in enumerate(SIGNAL_CODES)}
+_SKIP_IDX = {v: i for i, v in enumerate(SKIP_CODES)}
+_POS_IDX = {v: i for i, v in enumerate(POSITION_CODES)}
+# Alphabetical rank of each code, so sort() orders coded columns by label
+_LABEL_RANK = {
+    key: np.argsort(np.argsort(np.array(codes)))
+    for key, codes in (("signal", SIGNAL_CODES), ("action", SIGNAL_CODES),
+                       ("skip", SKIP_CODES), ("pos", POSITION_CODES))
+}
+_STREAM_BUFFER = 1 << 20
+
+
+def _code(table: Dict[str, int], value: Optional[str], default: str) -> int:
+    return table.get(value or default, len(table) - 1)
+
+
+def _skip_code(skip_reason: Optional[str]) -> int:
+    # "WARMUP(3/15)" → WARMUP
+    base = (skip_reason or "NONE").split("(", 1)[0]
+    return _code(_SKIP_IDX, base, "NONE")
+
+
+def index_path_for(path: str) -> str:
+    return path + INDEX_SUFFIX
+
+
 # Lazy import so circular-import between backtest ↔ BaseEnums can't occur at
 # module load time; resolved once on first candle record.
 _BaseEnums = None
@@ -61,18 +118,26 @@ class CandleDebugger:
     immediately before any allocation.
     """
 
-    def __init__(self, debug_mode: bool = True, max_candles: int = 50_000):
+    def __init__(self, debug_mode: bool = True, max_candles: int = 50_000,
+                 stream_path: Optional[str] = None):
         """
         Parameters
         ----------
         debug_mode  : If False, all calls are no-ops.
         max_candles : OOM safety cap.  Oldest entries are evicted when full.
+                      Ignored in streaming mode (nothing is held in memory).
+        stream_path : Optional .jsonl path.  When set, entries are appended to
+                      disk as they are recorded instead of kept in memory.
         """
         self.debug_mode = debug_mode
         self.max_candles = max_candles
         # deque(maxlen) enforces the cap with O(1) appends, no slicing needed
         self._entries: Deque[Dict[str, Any]] = deque(maxlen=max_candles)
         self._bar_index = 0
+        self.stream_path = stream_path
+        self._stream = None
+        self._index = None
+        self._offset = 0
 
     # ── Public API ─────────────────────────────────────────────────────────────
 
@@ -105,15 +170,46 @@ class CandleDebugger:
                 bars_in_trade=bars_in_trade, trailing_sl_high=trailing_sl_high,
                 skip_reason=skip_reason, option_bar=option_bar, tp_sl_info=tp_sl_info,
             )
-            self._entries.append(entry)
+            if self.stream_path:
+                self._write_stream(entry, bar_time)
+            else:
+                self._entries.append(entry)
             self._bar_index += 1
         except Exception as exc:
             logger.debug("[CandleDebugger.record] skipped: %s", exc)
 
+    @property
+    def is_streaming(self) -> bool:
+        return bool(self.stream_path)
+
+    def close(self) -> Optional[str]:
+        """
+        Flush and close the stream files.  Returns the .jsonl path in streaming
+        mode when at least one candle was written, else None.
+        """
+        if self._stream is None:
+            return None
+        try:
+            self._stream.close()
+            self._index.close()
+        except Exception as exc:
+            logger.error("[CandleDebugger.close] %s", exc, exc_info=True)
+        finally:
+            self._stream = self._index = None
+        logger.info("[CandleDebugger] Streamed %d records → %s", self._bar_index, self.stream_path)
+        return self.stream_path
+
     def save(self, path: str) -> bool:
-        """Persist all recorded entries as a JSON file. Returns True on success."""
+        """
+        Persist all recorded entries as a JSON file. Returns True on success.
+
+        In streaming mode the .jsonl is copied line by line into the wrapped
+        JSON format, so memory stays flat here too.
+        """
         if not self.debug_mode:
             return False
+        if self.stream_path:
+            return self._export_stream_json(path)
         try:
             os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
             entries = list(self._entries)
@@ -137,7 +233,7 @@ class CandleDebugger:
             return False
 
     def get_entries(self) -> List[Dict]:
-        """Return a list copy of all recorded entries."""
+        """Return a list copy of all recorded entries (empty in streaming mode)."""
         return list(self._entries)
 
     @classmethod
@@ -162,12 +258,62 @@ class CandleDebugger:
         return obj
 
     def clear(self) -> None:
-        """Reset all recorded data."""
+        """Reset all recorded data (streaming files are truncated)."""
         self._entries.clear()
         self._bar_index = 0
+        if self.stream_path:
+            self.close()
+            for p in (self.stream_path, index_path_for(self.stream_path)):
+                if os.path.exists(p):
+                    os.remove(p)
+            self._offset = 0
 
     def __len__(self) -> int:
-        return len(self._entries)
+        return self._bar_index if self.stream_path else len(self._entries)
+
+    # ── Streaming ──────────────────────────────────────────────────────────────
+
+    def _open_stream(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.stream_path)), exist_ok=True)
+        self._stream = open(self.stream_path, "wb", buffering=_STREAM_BUFFER)
+        self._index = open(index_path_for(self.stream_path), "wb", buffering=_STREAM_BUFFER)
+        self._offset = 0
+
+    def _write_stream(self, entry: Dict[str, Any], bar_time: datetime) -> None:
+        if self._stream is None:
+            self._open_stream()
+        line = (json.dumps(entry, default=_json_default, separators=(",", ":")) + "\n").encode("utf-8")
+        row = _INDEX_ROW.pack(
+            _epoch(bar_time),
+            self._offset,
+            len(line),
+            _code(_SIGNAL_IDX, entry.get("resolved_signal"), "WAIT"),
+            _code(_SIGNAL_IDX, entry.get("action"), "WAIT"),
+            _skip_code(entry.get("skip_reason")),
+            _code(_POS_IDX, (entry.get("position") or {}).get("current"), "FLAT"),
+        )
+        self._stream.write(line)
+        self._index.write(row)
+        self._offset += len(line)
+
+    def _export_stream_json(self, path: str) -> bool:
+        src = self.close() or self.stream_path
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            meta = {"total_candles": self._bar_index,
+                    "generated_at": ist_now().isoformat(timespec="seconds")}
+            with open(path, "w", encoding="utf-8") as out:
+                out.write('{"meta": ' + json.dumps(meta) + ', "candles": [')
+                if src and os.path.exists(src):
+                    with open(src, "r", encoding="utf-8") as f:
+                        for n, line in enumerate(f):
+                            out.write(("," if n else "") + line.rstrip("\n"))
+                out.write("]}")
+            logger.info("[CandleDebugger] Exported %d records → %s", self._bar_index, path)
+            return True
+        except Exception as exc:
+            logger.error("[CandleDebugger.save] Failed to write %s: %s", path, exc, exc_info=True)
+            return False
 
     # ── Private helpers ────────────────────────────────────────────────────────
 
@@ -203,6 +349,185 @@ class CandleDebugger:
         }
 
 
+# ── Lazy reader ────────────────────────────────────────────────────────────────
+
+class CandleDebugLog:
+    """
+    Read-only, paged view over recorded candle debug entries.
+
+    Opening a streamed .jsonl log only loads its fixed-width index (a few
+    dozen bytes per bar), so it is instant regardless of run length.  Entries
+    are parsed on demand with one seek + read each.  Signal / action / skip /
+    position filters run on the index arrays without touching the JSON.
+
+    Use open() for files (.jsonl streams, or the legacy wrapped .json format,
+    which is loaded into memory) and from_entries() for an in-memory list.
+    """
+
+    def __init__(self, index: np.ndarray, path: Optional[str] = None,
+                 entries: Optional[Sequence[Dict[str, Any]]] = None):
+        self.path = path
+        self._idx = index
+        self._entries = entries
+        self._fh = None
+        self._cache: Dict[int, Dict[str, Any]] = {}
+
+    # ── Construction ──────────────────────────────────────────────────────────
+
+    @classmethod
+    def open(cls, path: str) -> "CandleDebugLog":
+        if not path.endswith(".jsonl"):
+            return cls.from_entries(CandleDebugger.load_from_json(path).get_entries())
+        idx_path = index_path_for(path)
+        if os.path.exists(idx_path):
+            index = np.fromfile(idx_path, dtype=INDEX_DTYPE)
+        else:
+            index = cls._rebuild_index(path)
+        logger.info("[CandleDebugLog] Opened %s (%d candles)", path, len(index))
+        return cls(index, path=path)
+
+    @classmethod
+    def from_entries(cls, entries: Sequence[Dict[str, Any]]) -> "CandleDebugLog":
+        entries = list(entries or [])
+        index = np.zeros(len(entries), dtype=INDEX_DTYPE)
+        for i, e in enumerate(entries):
+            index[i] = (_parse_ts(e.get("time")), 0, 0,
+                        _code(_SIGNAL_IDX, e.get("resolved_signal"), "WAIT"),
+                        _code(_SIGNAL_IDX, e.get("action"), "WAIT"),
+                        _skip_code(e.get("skip_reason")),
+                        _code(_POS_IDX, (e.get("position") or {}).get("current"), "FLAT"))
+        return cls(index, entries=entries)
+
+    @staticmethod
+    def _rebuild_index(path: str) -> np.ndarray:
+        """Recreate a missing index (e.g. after a crash) with one pass over the lines."""
+        rows = []
+        offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    break   # truncated last line
+                rows.append((_parse_ts(e.get("time")), offset, len(line),
+                             _code(_SIGNAL_IDX, e.get("resolved_signal"), "WAIT"),
+                             _code(_SIGNAL_IDX, e.get("action"), "WAIT"),
+                             _skip_code(e.get("skip_reason")),
+                             _code(_POS_IDX, (e.get("position") or {}).get("current"), "FLAT")))
+                offset += len(line)
+        return np.array(rows, dtype=INDEX_DTYPE)
+
+    # ── Access ────────────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self._idx)
+
+    def entry(self, i: int) -> Dict[str, Any]:
+        """Return entry *i* (0-based position in the log)."""
+        if self._entries is not None:
+            return self._entries[i]
+        cached = self._cache.get(i)
+        if cached is not None:
+            return cached
+        if self._fh is None:
+            self._fh = open(self.path, "rb")
+        row = self._idx[i]
+        self._fh.seek(int(row["offset"]))
+        entry = json.loads(self._fh.read(int(row["length"])))
+        if len(self._cache) > 2_000:
+            self._cache.clear()
+        self._cache[i] = entry
+        return entry
+
+    def entries(self, positions: Sequence[int]) -> List[Dict[str, Any]]:
+        """Return entries for *positions*, reading them in file order."""
+        order = sorted(range(len(positions)), key=lambda k: positions[k])
+        out: List[Optional[Dict[str, Any]]] = [None] * len(positions)
+        for k in order:
+            out[k] = self.entry(int(positions[k]))
+        return out
+
+    def iter_entries(self) -> Iterator[Dict[str, Any]]:
+        """Stream every entry in order without caching."""
+        if self._entries is not None:
+            yield from self._entries
+            return
+        with open(self.path, "rb") as f:
+            for _, line in zip(range(len(self._idx)), f):
+                yield json.loads(line)
+
+    def find_time(self, ts: datetime) -> int:
+        """Position of the first candle at or after *ts* (index bisect)."""
+        return bisect_left(self._idx["ts"], _epoch(ts))
+
+    def filter(self, signal: str = "ALL", action: str = "ALL",
+               skip: str = "ALL", position: str = "ALL") -> np.ndarray:
+        """Positions matching the given filters, computed on the index."""
+        mask = np.ones(len(self._idx), dtype=bool)
+        if signal != "ALL":
+            mask &= self._idx["signal"] == _code(_SIGNAL_IDX, signal, "WAIT")
+        if action != "ALL":
+            mask &= self._idx["action"] == _code(_SIGNAL_IDX, action, "WAIT")
+        if skip == "NONE":
+            mask &= self._idx["skip"] == _SKIP_IDX["NONE"]
+        elif skip != "ALL":
+            mask &= self._idx["skip"] == _skip_code(skip)
+        if position != "ALL":
+            mask &= self._idx["pos"] == _code(_POS_IDX, position, "FLAT")
+        return np.flatnonzero(mask)
+
+    def sort(self, positions: np.ndarray, key: str, descending: bool = False) -> np.ndarray:
+        """
+        *positions* reordered by index column *key* ("ts", "signal",
+        "action", "skip", "pos", or "position" for log order).  Coded
+        columns sort by label; ties keep log order.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        if key == "position":
+            values = positions
+        else:
+            values = self._idx[key][positions].astype(np.int64)
+            rank = _LABEL_RANK.get(key)
+            if rank is not None:
+                values = rank[values]
+        order = np.argsort(-values if descending else values, kind="stable")
+        return positions[order]
+
+    def search(self, text: str, positions: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Narrow *positions* to entries with a value containing *text*
+        (case-insensitive).  Key names never match.  The raw bytes are
+        scanned first; only lines that contain the needle are parsed.
+        Lines are written with JSON's ASCII escaping, so the needle is
+        escaped the same way; non-ASCII needles skip the byte scan, since
+        escaped text cannot be lower-cased as bytes.
+        """
+        if positions is None:
+            positions = np.arange(len(self._idx))
+        needle = text.lower()
+        if self._entries is not None:
+            return np.array([p for p in positions
+                             if _values_contain(self._entries[p], needle)],
+                            dtype=np.int64)
+        wanted = np.zeros(len(self._idx), dtype=bool)
+        wanted[positions] = True
+        keep = []
+        needle_b = json.dumps(needle)[1:-1].encode("ascii") if needle.isascii() else None
+        # One sequential pass is far cheaper than a seek per candidate
+        with open(self.path, "rb") as f:
+            for p, line in zip(range(len(self._idx)), f):
+                if (wanted[p] and (needle_b is None or needle_b in line.lower())
+                        and _values_contain(json.loads(line), needle)):
+                    keep.append(p)
+        return np.array(keep, dtype=np.int64)
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        self._cache.clear()
+
+
 # ── Module-level helpers ───────────────────────────────────────────────────────
 
 def _extract_signal_meta(sig_result: Optional[Dict]):
@@ -340,6 +665,48 @@ def _dt_str(dt) -> Optional[str]:
         return str(dt)
 
 
+def _epoch(dt) -> int:
+    """Epoch seconds for a bar time; naive values are IST, as in _parse_ts."""
+    if not safe_hasattr(dt, "timestamp"):
+        return 0
+    # TZ-FIX: naive datetime.timestamp() uses the host zone, not IST.
+    if dt.tzinfo is None:
+        dt = IST.localize(dt)
+    return int(dt.timestamp())
+
+
+_TZ_COLON = re.compile(r"([+-]\d{2}):(\d{2})$")
+
+
+def _parse_ts(value) -> int:
+    """Epoch seconds from a _dt_str() string (with or without offset); 0 if unparseable."""
+    if not value:
+        return 0
+    text = _TZ_COLON.sub(r"\1\2", str(value).replace("T", " "))
+    for fmt in ("%Y-%m-%d %H:%M:%S%z", "%Y-%m-%d %H:%M:%S"):
+        try:
+            dt = datetime.strptime(text, fmt)
+            if dt.tzinfo is None:
+                dt = IST.localize(dt)
+            return int(dt.timestamp())
+        except ValueError:
+            continue
+    return 0
+
+
+def _values_contain(obj: Any, needle: str) -> bool:
+    """True if any scalar value nested in *obj* contains *needle* (lower-case)."""
+    if isinstance(obj, dict):
+        return any(_values_contain(v, needle) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_values_contain(v, needle) for v in obj)
+    if obj is None:
+        return False
+    if not isinstance(obj, (str, int, float, bool)):
+        return _values_contain(_json_default(obj), needle)
+    return needle in str(obj).lower()
+
+
 def _json_default(obj: Any) -> Any:
     """JSON serialiser fallback for non-standard types."""
     if isinstance(obj, datetime):
@@ -0,0 +1,156 @@
+"""
+backtest/backtest_checkpoint.py
+===============================
+On-disk checkpoints for BacktestEngine._replay, so a long run that is
+cancelled or crashes resumes from its last checkpoint instead of bar zero.
+
+A checkpoint lives in its own folder, named after the run's cache key
+(see backtest_results_store.run_cache_key — same config, strategy and
+data), and holds two files:
+
+    state.pkl     Fixed-size replay state: next bar, equity, trade counter,
+                  open position (_PositionTracker), TradeState fields, the
+                  signal history window, day-tracking values, counters and
+                  the option pricer's state (HV window, VIX series).
+                  Rewritten atomically (temp file + os.replace).
+    journal.pkl   Append-only: one pickled (trades, equity points) chunk per
+                  checkpoint, holding only what was added since the last one.
+
+Trades and the equity curve grow with the run; appending just the new
+chunk keeps each checkpoint O(bars since last checkpoint) rather than
+O(bars so far).  state.pkl records the journal length it belongs to, so a
+crash between the two writes leaves a consistent checkpoint — the
+unreferenced journal tail is dropped on load.
+
+The candle debug log is not checkpointed: after a resume it covers the
+resumed part of the run only.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+DEFAULT_CHECKPOINT_EVERY = 2000   # bars between periodic checkpoints
+CHECKPOINT_DIR = os.path.join(tempfile.gettempdir(), "backtest_checkpoints")
+
+_STATE_FILE = "state.pkl"
+_JOURNAL_FILE = "journal.pkl"
+
+
+class ReplayCheckpoint:
+    """
+    Checkpoint folder for one run.
+
+    ``save`` is called from the replay loop; ``load`` returns
+    ``(state, trades, equity_curve)`` or None when there is nothing usable.
+    """
+
+    def __init__(self, key: str, directory: Optional[str] = None) -> None:
+        self.key = key
+        self.path = os.path.join(directory or CHECKPOINT_DIR, key)
+        self._journal_bytes = 0
+        self._trades_written = 0
+        self._equity_written = 0
+
+    @property
+    def _state_path(self) -> str:
+        return os.path.join(self.path, _STATE_FILE)
+
+    @property
+    def _journal_path(self) -> str:
+        return os.path.join(self.path, _JOURNAL_FILE)
+
+    def exists(self) -> bool:
+        return os.path.exists(self._state_path)
+
+    # ── Writing ───────────────────────────────────────────────────────────────
+
+    def save(self, state: Dict[str, Any], trades: List, equity_curve: List[Dict]) -> float:
+        """
+        Write a checkpoint; *trades* / *equity_curve* are the full lists so
+        far — only the part added since the previous save is written.
+
+        Returns the time taken in seconds.
+        """
+        t0 = time.perf_counter()
+        os.makedirs(self.path, exist_ok=True)
+
+        new_trades = trades[self._trades_written:]
+        new_equity = equity_curve[self._equity_written:]
+        if new_trades or new_equity:
+            with open(self._journal_path, "ab") as fh:
+                fh.truncate(self._journal_bytes)      # drop an orphaned tail
+                fh.seek(self._journal_bytes)
+                pickle.dump((new_trades, new_equity), fh, protocol=pickle.HIGHEST_PROTOCOL)
+                fh.flush()
+                os.fsync(fh.fileno())
+                self._journal_bytes = fh.tell()
+            self._trades_written = len(trades)
+            self._equity_written = len(equity_curve)
+
+        payload = {
+            "version": FORMAT_VERSION,
+            "key": self.key,
+            "journal_bytes": self._journal_bytes,
+            "n_trades": self._trades_written,
+            "n_equity": self._equity_written,
+            "state": state,
+        }
+        tmp = self._state_path + ".tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(payload, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self._state_path)
+
+        elapsed = time.perf_counter() - t0
+        logger.debug("[Checkpoint] bar %s saved in %.1f ms (%d trades, %d equity points)",
+                     state.get("bar_pos"), elapsed * 1000, self._trades_written, self._equity_written)
+        return elapsed
+
+    # ── Reading ───────────────────────────────────────────────────────────────
+
+    def load(self) -> Optional[Tuple[Dict[str, Any], List, List[Dict]]]:
+        if not self.exists():
+            return None
+        try:
+            with open(self._state_path, "rb") as fh:
+                payload = pickle.load(fh)
+            if payload.get("version") != FORMAT_VERSION or payload.get("key") != self.key:
+                logger.info("[Checkpoint] %s is from another version/run — ignoring", self.path)
+                return None
+
+            trades: List = []
+            equity: List[Dict] = []
+            limit = payload["journal_bytes"]
+            if limit:
+                with open(self._journal_path, "rb") as fh:
+                    while fh.tell() < limit:
+                        chunk_trades, chunk_equity = pickle.load(fh)
+                        trades.extend(chunk_trades)
+                        equity.extend(chunk_equity)
+            if len(trades) != payload["n_trades"] or len(equity) != payload["n_equity"]:
+                logger.warning("[Checkpoint] journal does not match state in %s — ignoring", self.path)
+                return None
+
+            self._journal_bytes = limit
+            self._trades_written = len(trades)
+            self._equity_written = len(equity)
+            return payload["state"], trades, equity
+        except Exception as exc:
+            logger.warning("[Checkpoint] could not load %s: %s", self.path, exc, exc_info=True)
+            return None
+
+    def clear(self) -> None:
+        """Remove the checkpoint (after a completed run)."""
+        self._journal_bytes = self._trades_written = self._equity_written = 0
+        shutil.rmtree(self.path, ignore_errors=True)
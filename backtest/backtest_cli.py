@@ -0,0 +1,530 @@
+"""
+backtest/backtest_cli.py
+========================
+Headless backtest runner: ``python -m backtest`` (or ``trading-backtest``).
+
+Runs BacktestEngine without importing Qt, on local candle data, and writes
+the results to an output folder:
+
+    metrics.json          config + every scalar BacktestResult metric
+    trades.csv / .json    one row per trade
+    equity.csv / .json    equity curve
+    analysis_<tf>.csv     per-bar signal analysis (only with analysis_timeframes)
+    profile.pstats/.txt   cProfile dump and top functions (only with --profile)
+
+With ``--leg`` (repeatable) it runs a portfolio backtest instead
+(backtest_portfolio): every leg's underlying on one clock with shared
+daily-loss / trade-count limits.  metrics.json then holds the combined
+metrics plus one block per leg, trades carry a "leg" column, equity is the
+combined curve and equity_<leg>.csv each leg's own.
+
+With ``--divergence`` it compares live sessions from the trade_sessions /
+orders tables with a replay of the same strategy on the same days
+(backtest_divergence) and writes divergence.json (summary, per session),
+pairs.csv, live_only.csv, backtest_only.csv and signals.csv.  Sessions are
+those started between --start and --end (or the --session ids); candles come
+from --data (for --derivative, default NIFTY) or one --leg per underlying.
+
+Examples::
+
+    python -m backtest --data nifty_1m.csv --start 2025-01-01 --end 2025-03-31 \\
+        --strategy my_strategy --set tp_pct=0.3 --set sl_pct=0.2 --out runs/q1
+
+    python -m backtest --data nifty_1m.parquet --start 2025-01-01 --end 2025-01-31 \\
+        --strategy strategy.json --no-vix --profile
+
+    python -m backtest --leg NIFTY=nifty_1m.csv --leg BANKNIFTY=bank_1m.csv@bank_strategy \\
+        --start 2025-01-01 --end 2025-03-31 --max-daily-loss -8000 --max-trades-per-day 12
+
+    python -m backtest --divergence --data nifty_1m.csv --start 2025-03-01 --end 2025-03-31 \\
+        --set execution_interval_minutes=5 --out runs/divergence_march
+
+``--data`` is a CSV or Parquet file with columns time, open, high, low,
+close (volume optional); candles finer than the execution interval are
+resampled.  ``--strategy`` is a saved strategy slug or a JSON file holding
+either a full strategy (with an "engine" key) or a bare engine config.
+A leg is ``DERIVATIVE=FILE`` with an optional ``@STRATEGY`` (default: the
+--strategy one); its lot size comes from the derivative unless --set
+lot_size is given.
+Exit status is 1 when the backtest reports an error.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import dataclasses
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import time as _time
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from Utils.time_utils import fmt_stamp, ist_now
+from backtest.backtest_divergence import DivergenceAnalyser, DivergenceConfig, DivergenceReport
+from backtest.backtest_engine import BacktestConfig, BacktestEngine, BacktestResult, BacktestTrade
+from backtest.backtest_option_pricer import PriceSource
+from backtest.backtest_portfolio import PortfolioBacktestEngine, PortfolioConfig, PortfolioResult
+from backtest.backtest_results_store import _RESULT_SKIP_FIELDS
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOP = 40                  # functions listed in profile.txt
+
+
+# ── Argument parsing ──────────────────────────────────────────────────────────
+
+def _parse_override(item: str) -> tuple:
+    """``key=value`` → (key, value) converted to the BacktestConfig field type."""
+    if "=" not in item:
+        raise argparse.ArgumentTypeError(f"expected key=value, got {item!r}")
+    key, raw = (s.strip() for s in item.split("=", 1))
+    fields = {f.name: f for f in dataclasses.fields(BacktestConfig)}
+    if key not in fields or key in ("start_date", "end_date"):
+        raise argparse.ArgumentTypeError(f"unknown BacktestConfig field {key!r}")
+    ftype = str(fields[key].type)
+
+    if raw.lower() in ("none", "null") and "Optional" in ftype:
+        return key, None
+    try:
+        if ftype == "bool":
+            if raw.lower() not in ("1", "0", "true", "false", "yes", "no", "on", "off"):
+                raise ValueError(raw)
+            return key, raw.lower() in ("1", "true", "yes", "on")
+        if "int" in ftype:
+            return key, int(raw)
+        if "float" in ftype:
+            return key, float(raw)
+        if ftype == "time":
+            return key, time.fromisoformat(raw)
+        if ftype.startswith("List"):
+            return key, [v.strip() for v in raw.split(",") if v.strip()]
+        if "Dict" in ftype:
+            return key, json.loads(raw)
+    except (ValueError, json.JSONDecodeError) as exc:
+        raise argparse.ArgumentTypeError(f"bad value for {key} ({ftype}): {raw!r}") from exc
+    return key, raw
+
+
+def _parse_leg(item: str) -> tuple:
+    """``DERIVATIVE=FILE[@STRATEGY]`` → (derivative, file, strategy or None)."""
+    if "=" not in item:
+        raise argparse.ArgumentTypeError(f"expected DERIVATIVE=FILE[@STRATEGY], got {item!r}")
+    derivative, rest = (s.strip() for s in item.split("=", 1))
+    path, _, strategy = rest.partition("@")
+    if not derivative or not path:
+        raise argparse.ArgumentTypeError(f"expected DERIVATIVE=FILE[@STRATEGY], got {item!r}")
+    return derivative.upper(), path.strip(), strategy.strip() or None
+
+
+def _parse_date(value: str) -> datetime:
+    try:
+        return datetime.combine(date.fromisoformat(value), datetime.min.time())
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got {value!r}") from exc
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="python -m backtest",
+                                description="Run a backtest headless on local candle data.")
+    p.add_argument("--data", default=None, help="spot candles: .csv or .parquet")
+    p.add_argument("--leg", dest="legs", action="append", default=[], type=_parse_leg,
+                   metavar="DERIV=FILE[@STRATEGY]", help="portfolio leg, repeatable (replaces --data)")
+    p.add_argument("--start", required=True, type=_parse_date, help="first date, YYYY-MM-DD")
+    p.add_argument("--end", required=True, type=_parse_date, help="last date, YYYY-MM-DD")
+    p.add_argument("--strategy", default=None,
+                   help="strategy slug or JSON file (default: the active strategy)")
+    p.add_argument("--vix", default=None,
+                   help="daily VIX .csv (date, close); without it VIX is fetched as in the app")
+    p.add_argument("--no-vix", action="store_true", help="price with rolling HV instead of VIX")
+    p.add_argument("--real-options", action="store_true",
+                   help="price from historical option bars where available (see --option-data)")
+    p.add_argument("--option-data", default=None, metavar="DIR",
+                   help="folder of per-contract option bars, e.g. NIFTY_2025-01-09_22000_CE.csv")
+    p.add_argument("--capital", type=float, default=None,
+                   help="portfolio capital (default: PortfolioConfig.capital)")
+    p.add_argument("--max-daily-loss", type=float, default=None,
+                   help="portfolio daily loss limit in ₹, negative (default: -5000)")
+    p.add_argument("--max-trades-per-day", type=int, default=None,
+                   help="portfolio entries per day across legs (default: 10)")
+    p.add_argument("--max-open-positions", type=int, default=None,
+                   help="portfolio cap on simultaneous positions (default: none)")
+    p.add_argument("--divergence", action="store_true",
+                   help="compare live sessions in --start..--end with their backtest replay")
+    p.add_argument("--session", dest="sessions", action="append", default=[], type=int,
+                   metavar="ID", help="with --divergence: only this session id, repeatable")
+    p.add_argument("--derivative", default=None,
+                   help="with --divergence: only sessions of this underlying (and the one --data holds)")
+    p.add_argument("--set", dest="overrides", action="append", default=[], type=_parse_override,
+                   metavar="KEY=VALUE", help="BacktestConfig override, repeatable")
+    p.add_argument("--out", default=None, help="output folder (default: backtest_runs/<stamp>)")
+    p.add_argument("--format", choices=("csv", "json", "both"), default="both",
+                   help="trades / equity file format (default: both)")
+    p.add_argument("--no-store", action="store_true",
+                   help="neither read nor write the results store (always replays)")
+    p.add_argument("--no-checkpoint", action="store_true", help="disable replay checkpoints")
+    p.add_argument("--profile", action="store_true", help="profile the run with cProfile")
+    p.add_argument("--profile-sort", default="cumulative",
+                   choices=("cumulative", "tottime", "ncalls"), help="profile.txt sort key")
+    p.add_argument("-v", "--verbose", action="store_true")
+    return p
+
+
+# ── Inputs ────────────────────────────────────────────────────────────────────
+
+def load_candles(path: str) -> pd.DataFrame:
+    """Read local spot candles; column names are matched case-insensitively."""
+    if path.lower().endswith((".parquet", ".pq")):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    if "time" not in df.columns:
+        for alt in ("timestamp", "datetime", "date"):
+            if alt in df.columns:
+                df = df.rename(columns={alt: "time"})
+                break
+    missing = [c for c in ("time", "open", "high", "low", "close") if c not in df.columns]
+    if missing:
+        raise ValueError(f"{path}: missing column(s) {', '.join(missing)}")
+    df["time"] = pd.to_datetime(df["time"])
+    return df
+
+
+def load_vix(path: str) -> pd.Series:
+    """Daily VIX close (percent) indexed by date."""
+    df = pd.read_csv(path)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    date_col = next((c for c in ("date", "time", "timestamp") if c in df.columns), df.columns[0])
+    val_col = next((c for c in ("close", "vix", "value") if c in df.columns), df.columns[-1])
+    idx = pd.to_datetime(df[date_col]).dt.date
+    return pd.Series(df[val_col].astype(float).to_numpy(), index=idx).sort_index()
+
+
+def load_strategy(spec: Optional[str]) -> Dict[str, Any]:
+    """BacktestConfig kwargs selecting the strategy: a JSON file or a slug."""
+    if not spec:
+        return {}
+    if os.path.isfile(spec):
+        with open(spec, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        engine_cfg = data.get("engine", data) if isinstance(data, dict) else None
+        if not isinstance(engine_cfg, dict):
+            raise ValueError(f"{spec}: expected a strategy or engine config object")
+        slug = data.get("slug") or os.path.splitext(os.path.basename(spec))[0]
+        return {"signal_engine_cfg": engine_cfg, "strategy_slug": slug}
+    return {"strategy_slug": spec}
+
+
+# ── Outputs ───────────────────────────────────────────────────────────────────
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, PriceSource):
+        return value.value
+    if isinstance(value, float) and value in (float("inf"), float("-inf")):
+        return str(value)
+    return value
+
+
+def trades_records(result: BacktestResult) -> List[Dict[str, Any]]:
+    return [{k: _plain(v) for k, v in dataclasses.asdict(t).items()} for t in result.trades]
+
+
+def equity_records(result: BacktestResult) -> List[Dict[str, Any]]:
+    return [{"timestamp": _plain(e["timestamp"]), "equity": e["equity"]} for e in result.equity_curve]
+
+
+def metrics_dict(result: BacktestResult) -> Dict[str, Any]:
+    return {f.name: _plain(getattr(result, f.name)) for f in dataclasses.fields(result)
+            if f.name not in _RESULT_SKIP_FIELDS}
+
+
+def write_outputs(result: BacktestResult, out_dir: str, fmt: str = "both",
+                  extra: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Write result files into *out_dir*; returns the paths written."""
+    os.makedirs(out_dir, exist_ok=True)
+    written: List[str] = []
+
+    def _json(name: str, payload) -> None:
+        path = os.path.join(out_dir, name)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, indent=2, default=_plain)
+        written.append(path)
+
+    def _csv(name: str, records: List[Dict], columns: Optional[List[str]]) -> None:
+        path = os.path.join(out_dir, name)
+        pd.DataFrame(records, columns=columns).to_csv(path, index=False)
+        written.append(path)
+
+    cfg = {k: _plain(v) for k, v in dataclasses.asdict(result.config).items()}
+    _json("metrics.json", {"config": cfg, "metrics": metrics_dict(result), **(extra or {})})
+
+    trades = trades_records(result)
+    equity = equity_records(result)
+    trade_cols = [f.name for f in dataclasses.fields(BacktestTrade)]
+    if fmt in ("json", "both"):
+        _json("trades.json", trades)
+        _json("equity.json", equity)
+    if fmt in ("csv", "both"):
+        _csv("trades.csv", trades, trade_cols)
+        _csv("equity.csv", equity, ["timestamp", "equity"])
+
+    for tf, bars in (result.analysis_data or {}).items():
+        _csv(f"analysis_{tf}.csv", [b.to_dict() for b in bars], None)
+    return written
+
+
+def write_portfolio_outputs(result: PortfolioResult, out_dir: str, fmt: str = "both",
+                            extra: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Portfolio counterpart of write_outputs; returns the paths written."""
+    os.makedirs(out_dir, exist_ok=True)
+    written: List[str] = []
+
+    def _json(name: str, payload) -> None:
+        path = os.path.join(out_dir, name)
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, indent=2, default=_plain)
+        written.append(path)
+
+    def _csv(name: str, records: List[Dict], columns: Optional[List[str]]) -> None:
+        path = os.path.join(out_dir, name)
+        pd.DataFrame(records, columns=columns).to_csv(path, index=False)
+        written.append(path)
+
+    cfg = result.config
+    combined = {f.name: _plain(getattr(result, f.name)) for f in dataclasses.fields(result)
+                if f.name not in ("config", "legs", "trades", "trade_legs", "equity_curve")}
+    _json("metrics.json", {
+        "config": {k: _plain(v) for k, v in dataclasses.asdict(cfg).items() if k != "legs"},
+        "metrics": combined,
+        "legs": {name: {"config": {k: _plain(v) for k, v in dataclasses.asdict(leg.config).items()},
+                        "metrics": metrics_dict(leg)}
+                 for name, leg in result.legs.items()},
+        **(extra or {}),
+    })
+
+    trades = [{"leg": name, **{k: _plain(v) for k, v in dataclasses.asdict(t).items()}}
+              for name, t in zip(result.trade_legs, result.trades)]
+    equity = [{"timestamp": _plain(e["timestamp"]), "equity": e["equity"]} for e in result.equity_curve]
+    trade_cols = ["leg"] + [f.name for f in dataclasses.fields(BacktestTrade)]
+    if fmt in ("json", "both"):
+        _json("trades.json", trades)
+        _json("equity.json", equity)
+    if fmt in ("csv", "both"):
+        _csv("trades.csv", trades, trade_cols)
+        _csv("equity.csv", equity, ["timestamp", "equity"])
+    for name, leg in result.legs.items():
+        safe = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in name)
+        _csv(f"equity_{safe}.csv", equity_records(leg), ["timestamp", "equity"])
+    return written
+
+
+def write_divergence_outputs(report: DivergenceReport, out_dir: str,
+                             extra: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Divergence report files into *out_dir*; returns the paths written."""
+    os.makedirs(out_dir, exist_ok=True)
+    written: List[str] = []
+    path = os.path.join(out_dir, "divergence.json")
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"config": dataclasses.asdict(report.config), "summary": report.summary,
+                   "by_session": report.by_session.to_dict(orient="records"),
+                   "error": report.error_msg, **(extra or {})}, fh, indent=2, default=_plain)
+    written.append(path)
+    for name in ("pairs", "live_only", "backtest_only", "signals"):
+        path = os.path.join(out_dir, f"{name}.csv")
+        getattr(report, name).to_csv(path, index=False)
+        written.append(path)
+    return written
+
+
+def _run_divergence(args, parser, overrides: Dict[str, Any], strategy_kwargs: Dict[str, Any],
+                    vix) -> int:
+    spot_data: Dict[str, pd.DataFrame] = {}
+    try:
+        if args.data:
+            spot_data[(args.derivative or "NIFTY").upper()] = load_candles(args.data)
+        for derivative, path, _ in args.legs:
+            spot_data[derivative] = load_candles(path)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+    cfg = DivergenceConfig(
+        session_ids=args.sessions, start_date=args.start.date(), end_date=args.end.date(),
+        derivative=args.derivative.upper() if args.derivative else None,
+        strategy_slug=strategy_kwargs.get("strategy_slug"),
+        signal_engine_cfg=strategy_kwargs.get("signal_engine_cfg"), overrides=overrides,
+    )
+    analyser = DivergenceAnalyser(broker=None, config=cfg)
+    if args.verbose:
+        analyser.progress_callback = lambda pct, msg: print(f"  {pct:5.1f}%  {msg}", file=sys.stderr)
+    t0 = _time.perf_counter()
+    report = analyser.run(spot_data=spot_data, vix_series=vix)
+    elapsed = _time.perf_counter() - t0
+
+    out_dir = args.out or os.path.join("backtest_runs", f"divergence_{fmt_stamp()}")
+    written = write_divergence_outputs(report, out_dir, extra={"elapsed_s": round(elapsed, 3),
+                                                               "created": ist_now().isoformat()})
+    if report.error_msg:
+        print(f"Divergence analysis failed: {report.error_msg}", file=sys.stderr)
+    else:
+        s = report.summary
+        print(f"{s['sessions']} sessions | {s['live_trades']} live / {s['backtest_trades']} backtest trades | "
+              f"{s['matched']} matched, {s['extra_live']} extra, {s['missed_live']} missed | "
+              f"entry lag {s['mean_entry_lag_s']:+.0f}s, entry {s['mean_entry_diff_pct']:+.2f}%, "
+              f"exit {s['mean_exit_diff_pct']:+.2f}% | {elapsed:.2f}s")
+    for path in written:
+        print(f"  wrote {path}")
+    return 1 if report.error_msg else 0
+
+
+def _write_profile(profiler: cProfile.Profile, out_dir: str, sort: str) -> List[str]:
+    os.makedirs(out_dir, exist_ok=True)
+    stats_path = os.path.join(out_dir, "profile.pstats")
+    profiler.dump_stats(stats_path)
+    buf = io.StringIO()
+    pstats.Stats(profiler, stream=buf).strip_dirs().sort_stats(sort).print_stats(PROFILE_TOP)
+    txt_path = os.path.join(out_dir, "profile.txt")
+    with open(txt_path, "w", encoding="utf-8") as fh:
+        fh.write(buf.getvalue())
+    return [stats_path, txt_path]
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+def _portfolio_config(args, kwargs: Dict[str, Any]) -> tuple:
+    """(PortfolioConfig, {derivative: candles}, data files) from the --leg arguments."""
+    from Utils.OptionUtils import OptionUtils
+
+    legs: List[BacktestConfig] = []
+    spot_data: Dict[str, pd.DataFrame] = {}
+    files: List[str] = []
+    for derivative, path, strategy in args.legs:
+        leg_kwargs = dict(kwargs, derivative=derivative)
+        if strategy:
+            leg_kwargs.pop("signal_engine_cfg", None)
+            leg_kwargs.update(load_strategy(strategy))
+        if "lot_size" not in dict(args.overrides):
+            leg_kwargs["lot_size"] = OptionUtils.get_lot_size(derivative, fallback=BacktestConfig.lot_size)
+        legs.append(BacktestConfig(**leg_kwargs))
+        spot_data[derivative] = load_candles(path)
+        files.append(os.path.abspath(path))
+
+    pf_kwargs: Dict[str, Any] = {"legs": legs}
+    for arg, key in (("capital", "capital"), ("max_daily_loss", "max_daily_loss"),
+                     ("max_trades_per_day", "max_trades_per_day"),
+                     ("max_open_positions", "max_open_positions")):
+        if getattr(args, arg) is not None:
+            pf_kwargs[key] = getattr(args, arg)
+    return PortfolioConfig(**pf_kwargs), spot_data, files
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(levelname)s %(name)s: %(message)s")
+
+    if args.end < args.start:
+        parser.error("--end is before --start")
+    if args.divergence:
+        try:
+            vix = load_vix(args.vix) if args.vix and not args.no_vix else None
+            strategy_kwargs = load_strategy(args.strategy)
+        except (OSError, ValueError) as exc:
+            parser.error(str(exc))
+        overrides = dict(args.overrides)
+        if args.no_vix:
+            overrides["use_vix"] = False
+        if args.real_options or args.option_data:
+            overrides["use_real_option_data"] = True
+            overrides["option_data_dir"] = args.option_data or ""
+        return _run_divergence(args, parser, overrides, strategy_kwargs, vix)
+    if bool(args.data) == bool(args.legs):
+        parser.error("give either --data or one or more --leg")
+    if len({d for d, _, _ in args.legs}) != len(args.legs):
+        parser.error("each --leg needs a different derivative")
+    try:
+        spot_df = load_candles(args.data) if args.data else None
+        vix = load_vix(args.vix) if args.vix and not args.no_vix else None
+        strategy_kwargs = load_strategy(args.strategy)
+    except (OSError, ValueError) as exc:
+        parser.error(str(exc))
+
+    kwargs: Dict[str, Any] = dict(start_date=args.start, end_date=args.end, **strategy_kwargs)
+    kwargs.update(dict(args.overrides))
+    if args.no_vix:
+        kwargs["use_vix"] = False
+    if args.real_options or args.option_data:
+        kwargs["use_real_option_data"] = True
+        kwargs["option_data_dir"] = args.option_data or ""
+    if args.no_store:
+        kwargs["use_results_cache"] = kwargs["save_results"] = False
+    if args.no_checkpoint:
+        kwargs["checkpoint_every_bars"] = 0
+
+    if args.legs:
+        try:
+            pf_cfg, spot_data, data_files = _portfolio_config(args, kwargs)
+        except (OSError, ValueError) as exc:
+            parser.error(str(exc))
+        engine = PortfolioBacktestEngine(broker=None, config=pf_cfg)
+
+        def run():
+            return engine.run(spot_data=spot_data, vix_series=vix)
+    else:
+        engine = BacktestEngine(broker=None, config=BacktestConfig(**kwargs))
+        data_files = [os.path.abspath(args.data)]
+
+        def run():
+            return engine.run(spot_df=spot_df, vix_series=vix)
+    if args.verbose:
+        engine.progress_callback = lambda pct, msg: print(f"  {pct:5.1f}%  {msg}", file=sys.stderr)
+
+    profiler = cProfile.Profile() if args.profile else None
+    t0 = _time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        result = run()
+    finally:
+        if profiler:
+            profiler.disable()
+    elapsed = _time.perf_counter() - t0
+
+    out_dir = args.out or os.path.join("backtest_runs", fmt_stamp())
+    extra = {
+        "elapsed_s": round(elapsed, 3),
+        "data_file": data_files[0] if args.data else data_files,
+        "created": ist_now().isoformat(),
+    }
+    if args.legs:
+        written = write_portfolio_outputs(result, out_dir, args.format, extra=extra)
+    else:
+        written = write_outputs(result, out_dir, args.format, extra=extra)
+    if profiler:
+        written += _write_profile(profiler, out_dir, args.profile_sort)
+
+    if result.error_msg:
+        print(f"Backtest failed: {result.error_msg}", file=sys.stderr)
+    elif args.legs:
+        for name, leg in result.legs.items():
+            print(f"  {name:<12} {leg.total_trades:4d} trades | net P&L ₹{leg.total_net_pnl:+,.2f}")
+        blocked = sum(result.risk_blocks.values())
+        print(f"{result.total_trades} trades | net P&L ₹{result.total_net_pnl:+,.2f} | "
+              f"win rate {result.win_rate:.1f}% | max DD ₹{result.max_drawdown:,.2f} | "
+              f"{blocked} entries blocked by risk limits | {elapsed:.2f}s")
+    else:
+        source = f"  (saved run #{result.run_id})" if result.from_cache else ""
+        print(f"{result.total_trades} trades | net P&L ₹{result.total_net_pnl:+,.2f} | "
+              f"win rate {result.win_rate:.1f}% | max DD ₹{result.max_drawdown:,.2f} | "
+              f"{elapsed:.2f}s{source}")
+    for path in written:
+        print(f"  wrote {path}")
+    return 1 if result.error_msg else 0
@@ -0,0 +1,417 @@
+"""
+backtest/backtest_divergence.py
+===============================
+Backtest-vs-live divergence report: where did a live session and the
+backtest of the same strategy on the same day part ways?
+
+For a set of live trade_sessions the analyser
+
+1. loads the sessions and every order placed in them (two queries, see
+   SessionCRUD.list_between / OrderCRUD.list_for_sessions) and folds split
+   orders back into one live trade per entry,
+2. replays the session days through BacktestEngine — one ReplaySession per
+   (strategy, derivative, lot size) group covering all of that group's days
+   in a single pass, not one engine per day — and keeps the signal the
+   backtest saw on every bar,
+3. aligns live and backtest trades fill by fill: same replay group and
+   direction, nearest entry within match_tolerance_bars execution bars, one-to-one
+   (pandas merge_asof, no per-trade loops), and looks up the backtest's
+   signal and position at every live entry.
+
+DivergenceReport holds
+
+    pairs           matched trades: entry / exit lag and the live − backtest
+                    entry / exit premium (₹ and %), exit reasons, P&L per unit
+    live_only       live trades the backtest did not take ("extra"), with the
+                    backtest signal and position on that bar
+    backtest_only   backtest trades live did not take ("missed")
+    signals         the backtest's signal per bar for the session days
+    by_session      counts and P&L per session
+    summary         overall counts, match rate, mean lags and slippage
+
+Premiums are compared per unit, so different quantities live and in the
+backtest do not matter.  Candles for the session days come from local data
+(spot_data) or the broker, as for BacktestEngine.run.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from Utils.time_utils import IST
+from backtest.backtest_engine import BacktestConfig, BacktestEngine, BacktestResult, ReplaySession, SessionState
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MATCH_TOLERANCE_BARS = 3
+_LIVE_COLUMNS = ["session_id", "direction", "symbol", "quantity", "entry_time", "exit_time",
+                 "entry_price", "exit_price", "pnl", "exit_reason"]
+_BT_COLUMNS = ["replay", "session_id", "direction", "strike", "entry_time", "exit_time",
+               "entry_price", "exit_price", "net_pnl", "exit_reason", "signal_name"]
+
+
+# ── Config / report ───────────────────────────────────────────────────────────
+
+@dataclass
+class DivergenceConfig:
+    session_ids: List[int] = field(default_factory=list)   # empty → every session in the date range
+    start_date: Optional[date] = None
+    end_date:   Optional[date] = None
+    derivative: Optional[str] = None                        # only sessions trading this underlying
+    strategy_slug: Optional[str] = None                     # replay this strategy instead of the session's
+    signal_engine_cfg: Optional[Dict] = None
+    overrides: Dict[str, Any] = field(default_factory=dict)  # BacktestConfig fields (interval, TP / SL, …)
+    match_tolerance_bars: int = DEFAULT_MATCH_TOLERANCE_BARS
+
+
+@dataclass
+class DivergenceReport:
+    config: DivergenceConfig
+    sessions: List[Dict] = field(default_factory=list)
+    pairs: pd.DataFrame = field(default_factory=pd.DataFrame)
+    live_only: pd.DataFrame = field(default_factory=pd.DataFrame)
+    backtest_only: pd.DataFrame = field(default_factory=pd.DataFrame)
+    signals: pd.DataFrame = field(default_factory=pd.DataFrame)
+    by_session: pd.DataFrame = field(default_factory=pd.DataFrame)
+    summary: Dict[str, Any] = field(default_factory=dict)
+    backtests: Dict[str, BacktestResult] = field(default_factory=dict)   # per replay group
+    error_msg: Optional[str] = None
+
+
+# ── Live side ─────────────────────────────────────────────────────────────────
+
+def _direction(position_type: Any, symbol: Any) -> Optional[str]:
+    """CE / PE from an order's position_type (CALL / PUT) or its symbol suffix."""
+    text = f"{position_type or ''}".upper()
+    if "CALL" in text or text == "CE":
+        return "CE"
+    if "PUT" in text or text == "PE":
+        return "PE"
+    sym = f"{symbol or ''}".upper()
+    return "CE" if sym.endswith("CE") else "PE" if sym.endswith("PE") else None
+
+
+def _ist(values, index=None) -> pd.Series:
+    """IST-aware datetimes; naive values (the DB's IST wall-clock text) are localised."""
+    t = pd.to_datetime(pd.Series(list(values), index=index, dtype=object), errors="coerce")
+    t = t.dt.tz_localize(IST) if t.dt.tz is None else t.dt.tz_convert(IST)
+    return t.astype("datetime64[ns, Asia/Kolkata]")
+
+
+def live_trades_frame(orders: List[Dict]) -> pd.DataFrame:
+    """
+    One row per live trade from CLOSED orders.
+
+    Orders of one session, direction and symbol entered in the same minute
+    (freeze-quantity splits) are folded into one trade with quantity-weighted
+    prices.
+    """
+    closed = [o for o in orders if o.get("status") == "CLOSED" and o.get("entry_price")]
+    if not closed:
+        return pd.DataFrame(columns=_LIVE_COLUMNS)
+    df = pd.DataFrame(closed)
+    df["direction"] = [_direction(p, s) for p, s in zip(df["position_type"], df["symbol"])]
+    df = df[df["direction"].notna()].copy()
+    df["entry_time"] = _ist(df["entered_at"].fillna(df["created_at"]), df.index)
+    df["exit_time"] = _ist(df["exited_at"], df.index)
+    df["quantity"] = df["quantity"].fillna(0).clip(lower=1)
+    df["exit_price"] = df["exit_price"].astype(float)
+    df["w_entry"] = df["entry_price"].astype(float) * df["quantity"]
+    df["w_exit"] = df["exit_price"].fillna(0.0) * df["quantity"]
+    df["minute"] = df["entry_time"].dt.floor("min")
+
+    g = df.groupby(["session_id", "direction", "symbol", "minute"], sort=False)
+    out = g.agg(quantity=("quantity", "sum"), entry_time=("entry_time", "min"),
+                exit_time=("exit_time", "max"), w_entry=("w_entry", "sum"),
+                w_exit=("w_exit", "sum"), pnl=("pnl", "sum"),
+                exit_reason=("reason_to_exit", "first")).reset_index()
+    out["entry_price"] = (out["w_entry"] / out["quantity"]).round(2)
+    out["exit_price"] = (out["w_exit"] / out["quantity"]).round(2)
+    return out[_LIVE_COLUMNS].sort_values("entry_time").reset_index(drop=True)
+
+
+# ── Backtest side ─────────────────────────────────────────────────────────────
+
+def backtest_trades_frame(result: BacktestResult, session_by_day: Dict[date, int],
+                          replay: str = "") -> pd.DataFrame:
+    """Backtest trades of one replay group (*replay* is its report.backtests key)."""
+    if not result.trades:
+        return pd.DataFrame(columns=_BT_COLUMNS)
+    df = pd.DataFrame({
+        "direction": [t.direction for t in result.trades],
+        "strike": [t.strike for t in result.trades],
+        "entry_time": _ist(t.entry_time for t in result.trades),
+        "exit_time": _ist(t.exit_time for t in result.trades),
+        "entry_price": [t.option_entry for t in result.trades],
+        "exit_price": [t.option_exit for t in result.trades],
+        "net_pnl": [t.net_pnl for t in result.trades],
+        "exit_reason": [t.exit_reason for t in result.trades],
+        "signal_name": [t.signal_name for t in result.trades],
+    })
+    df["session_id"] = df["entry_time"].dt.date.map(session_by_day)
+    df["replay"] = replay
+    return df[_BT_COLUMNS]
+
+
+def replay_with_signals(engine: BacktestEngine, spot_df: pd.DataFrame, vix_series=None,
+                        stop: Optional[Callable[[], bool]] = None,
+                        ) -> Tuple[BacktestResult, pd.DataFrame]:
+    """Replay *spot_df* like BacktestEngine._replay, recording the signal of every evaluated bar."""
+    pricer = engine._make_pricer(vix_series)
+    signal_engine, detector = engine._load_signal_engine()
+    if engine.config.use_real_option_data:
+        engine._prefetch_option_bars(spot_df, pricer)
+    session = ReplaySession(engine, spot_df, pricer, signal_engine, detector, SessionState())
+    times: List[datetime] = []
+    signals: List[str] = []
+    positions: List[Optional[str]] = []
+    for i, row in session.rows():
+        if stop is not None and stop():
+            session.result.error_msg = "Divergence analysis cancelled."
+            break
+        if not session.begin_bar(i, row):
+            continue
+        session.evaluate()
+        times.append(session.bar_time)
+        signals.append(str(session.raw_signal))
+        positions.append(session.state.current_position)
+        session.finish_bar()
+    frame = pd.DataFrame({"time": _ist(times), "signal": signals,
+                          "position": [str(p) if p else None for p in positions]})
+    return session.finish(), frame
+
+
+# ── Alignment ─────────────────────────────────────────────────────────────────
+
+def align_trades(live: pd.DataFrame, bt: pd.DataFrame, signals: pd.DataFrame,
+                 tolerance: timedelta) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    (pairs, live_only, backtest_only): nearest entries within *tolerance*, one-to-one.
+
+    Trades only match within the same replay group (underlying, strategy,
+    lot size — the ``replay`` column) and direction, so a NIFTY live trade
+    never pairs with a BANKNIFTY backtest trade entered at the same time.
+    """
+    live = live.sort_values("entry_time").reset_index(drop=True)
+    bt = bt.sort_values("entry_time").reset_index(drop=True)
+    live["live_idx"] = np.arange(len(live))
+    keys = bt[["entry_time", "replay", "direction"]].assign(bt_idx=np.arange(len(bt)),
+                                                            bt_entry_time=bt["entry_time"])
+    if len(live) and len(bt):
+        m = pd.merge_asof(live[["entry_time", "replay", "direction", "live_idx"]], keys, on="entry_time",
+                          by=["replay", "direction"], direction="nearest",
+                          tolerance=pd.Timedelta(tolerance))
+        m = m.dropna(subset=["bt_idx"])
+        m["gap"] = (m["entry_time"] - m["bt_entry_time"]).abs()
+        # Two live trades near one backtest trade: the closer one keeps it
+        m = m.sort_values("gap").drop_duplicates("bt_idx").sort_values("live_idx")
+        li, bi = m["live_idx"].to_numpy(int), m["bt_idx"].to_numpy(int)
+    else:
+        li = bi = np.empty(0, dtype=int)
+
+    lp, bp = live.iloc[li].reset_index(drop=True), bt.iloc[bi].reset_index(drop=True)
+    pairs = pd.DataFrame({
+        "session_id": lp["session_id"], "replay": lp["replay"], "direction": lp["direction"],
+        "live_entry_time": lp["entry_time"], "bt_entry_time": bp["entry_time"],
+        "entry_lag_s": (lp["entry_time"] - bp["entry_time"]).dt.total_seconds(),
+        "live_entry_price": lp["entry_price"], "bt_entry_price": bp["entry_price"],
+        "live_exit_time": lp["exit_time"], "bt_exit_time": bp["exit_time"],
+        "exit_lag_s": (lp["exit_time"] - bp["exit_time"]).dt.total_seconds(),
+        "live_exit_price": lp["exit_price"], "bt_exit_price": bp["exit_price"],
+        "live_exit_reason": lp["exit_reason"], "bt_exit_reason": bp["exit_reason"],
+        "bt_strike": bp["strike"], "live_symbol": lp["symbol"],
+    })
+    pairs["entry_diff"] = (pairs["live_entry_price"] - pairs["bt_entry_price"]).round(2)
+    pairs["entry_diff_pct"] = (pairs["entry_diff"] / pairs["bt_entry_price"] * 100).round(2)
+    pairs["exit_diff"] = (pairs["live_exit_price"] - pairs["bt_exit_price"]).round(2)
+    pairs["exit_diff_pct"] = (pairs["exit_diff"] / pairs["bt_exit_price"] * 100).round(2)
+    pairs["live_pnl_per_unit"] = (pairs["live_exit_price"] - pairs["live_entry_price"]).round(2)
+    pairs["bt_pnl_per_unit"] = (pairs["bt_exit_price"] - pairs["bt_entry_price"]).round(2)
+    pairs["pnl_diff_per_unit"] = (pairs["live_pnl_per_unit"] - pairs["bt_pnl_per_unit"]).round(2)
+
+    live_only = live.drop(index=li).drop(columns="live_idx").reset_index(drop=True)
+    if len(live_only) and len(signals):
+        at_entry = pd.merge_asof(live_only[["entry_time", "replay"]], signals.sort_values("time"),
+                                 left_on="entry_time", right_on="time", by="replay",
+                                 direction="backward")
+        live_only["bt_signal"] = at_entry["signal"].to_numpy()
+        live_only["bt_position"] = at_entry["position"].to_numpy()
+    else:
+        live_only["bt_signal"] = live_only["bt_position"] = None
+    backtest_only = bt.drop(index=bi).reset_index(drop=True)
+    return pairs, live_only, backtest_only
+
+
+def _mean(s: pd.Series) -> float:
+    return round(float(s.mean()), 2) if len(s) else 0.0
+
+
+def summarise(report: DivergenceReport, live: pd.DataFrame, bt: pd.DataFrame) -> None:
+    pairs = report.pairs
+    n_live, n_bt, n_pairs = len(live), len(bt), len(pairs)
+    report.summary = {
+        "sessions": len(report.sessions),
+        "live_trades": n_live,
+        "backtest_trades": n_bt,
+        "matched": n_pairs,
+        "extra_live": len(report.live_only),
+        "missed_live": len(report.backtest_only),
+        "match_rate": round(n_pairs / max(n_live, n_bt) * 100, 2) if max(n_live, n_bt) else 100.0,
+        "mean_entry_lag_s": _mean(pairs["entry_lag_s"]),
+        "median_entry_lag_s": round(float(pairs["entry_lag_s"].median()), 2) if n_pairs else 0.0,
+        "mean_exit_lag_s": _mean(pairs["exit_lag_s"].dropna()),
+        "mean_entry_diff_pct": _mean(pairs["entry_diff_pct"]),
+        "mean_exit_diff_pct": _mean(pairs["exit_diff_pct"].dropna()),
+        "mean_pnl_diff_per_unit": _mean(pairs["pnl_diff_per_unit"].dropna()),
+        "exit_reason_mismatches": int((pairs["live_exit_reason"].astype(str)
+                                       != pairs["bt_exit_reason"].astype(str)).sum()),
+        "live_pnl": round(float(live["pnl"].fillna(0).sum()), 2),
+        "backtest_pnl": round(float(bt["net_pnl"].sum()), 2),
+    }
+    ids = [s["id"] for s in report.sessions]
+    report.by_session = pd.DataFrame({
+        "session_id": ids,
+        "live_trades": live.groupby("session_id").size().reindex(ids, fill_value=0).to_numpy(),
+        "backtest_trades": bt.groupby("session_id").size().reindex(ids, fill_value=0).to_numpy(),
+        "matched": pairs.groupby("session_id").size().reindex(ids, fill_value=0).to_numpy(),
+        "live_pnl": live.groupby("session_id")["pnl"].sum().reindex(ids, fill_value=0.0).round(2).to_numpy(),
+        "backtest_pnl": bt.groupby("session_id")["net_pnl"].sum().reindex(ids, fill_value=0.0).round(2).to_numpy(),
+        "mean_entry_lag_s": pairs.groupby("session_id")["entry_lag_s"].mean().reindex(ids).round(2).to_numpy(),
+    })
+
+
+# ── Analyser ──────────────────────────────────────────────────────────────────
+
+class DivergenceAnalyser:
+    """Replays live sessions' days and aligns the backtest with what was traded live."""
+
+    def __init__(self, broker, config: DivergenceConfig, db=None):
+        self.broker = broker
+        self.config = config
+        self.db = db
+        self.progress_callback: Optional[Callable[[float, str], None]] = None
+        self._stop_requested = False
+
+    def stop(self):
+        self._stop_requested = True
+
+    def _emit(self, pct: float, msg: str):
+        if self.progress_callback:
+            try:
+                self.progress_callback(pct, msg)
+            except Exception:
+                pass
+
+    def load_sessions(self) -> List[Dict]:
+        from db.crud import sessions
+        cfg = self.config
+        if cfg.session_ids:
+            rows = [sessions.get(sid, db=self.db) for sid in cfg.session_ids]
+            return [r for r in rows if r]
+        start = (cfg.start_date or date.today()).isoformat()
+        end = (cfg.end_date or cfg.start_date or date.today()).isoformat()
+        return sessions.list_between(start, end, derivative=cfg.derivative, db=self.db)
+
+    def _groups(self, session_rows: List[Dict]) -> Dict[tuple, List[Dict]]:
+        """Sessions replayed together: same strategy, underlying and lot size."""
+        groups: Dict[tuple, List[Dict]] = {}
+        for s in session_rows:
+            key = (self.config.strategy_slug or s.get("strategy_slug"),
+                   s.get("derivative") or "NIFTY", s.get("lot_size"))
+            groups.setdefault(key, []).append(s)
+        return groups
+
+    def _backtest_config(self, key: tuple, days: List[date]) -> BacktestConfig:
+        slug, derivative, lot_size = key
+        kwargs: Dict[str, Any] = dict(
+            start_date=datetime.combine(days[0], datetime.min.time()),
+            end_date=datetime.combine(days[-1], datetime.min.time()),
+            derivative=derivative, strategy_slug=slug,
+            signal_engine_cfg=self.config.signal_engine_cfg,
+            use_results_cache=False, save_results=False, checkpoint_every_bars=0,
+        )
+        if lot_size:
+            kwargs["lot_size"] = int(lot_size)
+        kwargs.update(self.config.overrides)
+        return BacktestConfig(**kwargs)
+
+    def run(self, spot_data: Optional[Dict[str, pd.DataFrame]] = None,
+            vix_series: Optional[pd.Series] = None) -> DivergenceReport:
+        """
+        Build the report.  *spot_data* maps derivative → local candles
+        covering the session days; missing ones are fetched from the broker.
+        """
+        from db.crud import orders
+
+        report = DivergenceReport(config=self.config)
+        try:
+            report.sessions = self.load_sessions()
+            if not report.sessions:
+                report.error_msg = "No live sessions in the selected range."
+                return report
+            live = live_trades_frame(orders.list_for_sessions([s["id"] for s in report.sessions], db=self.db))
+            self._emit(5, f"{len(report.sessions)} sessions, {len(live)} live trades")
+
+            bt_frames, signal_frames = [], []
+            tolerance = timedelta(0)
+            groups = self._groups(report.sessions)
+            replay_of = {s["id"]: "/".join(str(p) for p in key)
+                         for key, group in groups.items() for s in group}
+            live["replay"] = live["session_id"].map(replay_of)
+            for k, (key, group) in enumerate(groups.items()):
+                replay = "/".join(str(p) for p in key)
+                ids = {s["id"] for s in group}
+                session_by_day: Dict[date, int] = {}
+                for s in group:
+                    session_by_day.setdefault(_ist([s["started_at"]]).iloc[0].date(), s["id"])
+                for sid, t in zip(live["session_id"], live["entry_time"]):
+                    if sid in ids:
+                        session_by_day.setdefault(t.date(), sid)
+                days = sorted(session_by_day)
+
+                engine = BacktestEngine(self.broker, self._backtest_config(key, days))
+                tolerance = max(tolerance, timedelta(
+                    minutes=engine.config.execution_interval_minutes * self.config.match_tolerance_bars))
+                local = (spot_data or {}).get(engine.config.derivative)
+                spot_df = engine._prepare_local_spot(local) if local is not None else engine._fetch_spot()
+                if spot_df is None or spot_df.empty:
+                    logger.warning("[Divergence] %s: no candles for %s..%s — group skipped",
+                                   engine.config.derivative, days[0], days[-1])
+                    continue
+                spot_df = spot_df[spot_df["time"].dt.date.isin(days)].reset_index(drop=True)
+                self._emit(10 + 80 * k / len(groups),
+                           f"Replaying {engine.config.derivative} on {len(days)} day(s), {len(spot_df)} bars…")
+                result, sig = replay_with_signals(engine, spot_df, vix_series,
+                                                  stop=lambda: self._stop_requested)
+                if result.error_msg:
+                    report.error_msg = result.error_msg
+                    return report
+                report.backtests[replay] = result
+                bt_frames.append(backtest_trades_frame(result, session_by_day, replay))
+                signal_frames.append(sig.assign(session_id=sig["time"].dt.date.map(session_by_day),
+                                                replay=replay))
+
+            bt = (pd.concat(bt_frames, ignore_index=True) if bt_frames
+                  else pd.DataFrame(columns=_BT_COLUMNS))
+            report.signals = (pd.concat(signal_frames, ignore_index=True).sort_values("time")
+                              .reset_index(drop=True) if signal_frames
+                              else pd.DataFrame(columns=["time", "signal", "position", "session_id", "replay"]))
+            report.pairs, report.live_only, report.backtest_only = align_trades(
+                live, bt, report.signals, tolerance)
+            summarise(report, live, bt)
+            s = report.summary
+            self._emit(100, f"{s['matched']} matched | {s['extra_live']} extra | {s['missed_live']} missed")
+            logger.info("[Divergence] %d sessions: %d live / %d backtest trades, %d matched "
+                        "(mean entry lag %.0fs, entry diff %.2f%%)",
+                        s["sessions"], s["live_trades"], s["backtest_trades"], s["matched"],
+                        s["mean_entry_lag_s"], s["mean_entry_diff_pct"])
+        except Exception as exc:
+            logger.error("[DivergenceAnalyser.run] %s", exc, exc_info=True)
+            report.error_msg = str(exc)
+        return report
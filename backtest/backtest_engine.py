@@ -32,13 +32,42 @@ Changes from original:
   the signal engine gets day-1 warm-up data.
 - Progress emission interval raised from 50 to 100 bars for lower overhead.
 - All f-string logger calls replaced with % formatting.
+- run() consults backtest_results_store first: an identical run (same
+  config, strategy hash and data fingerprint) is served from SQLite instead
+  of being replayed, and completed runs are saved (use_results_cache /
+  save_results).  debug_candles runs skip the lookup (the candle log is
+  not stored).
+- _replay checkpoints its state every checkpoint_every_bars bars and on
+  cancel (backtest_checkpoint); a re-run of the same config resumes from the
+  last checkpoint instead of bar zero.
+- use_real_option_data: before the replay, historical 1-minute bars for
+  every contract the run can touch are prefetched in parallel into an
+  OptionBarStore (backtest_option_data) and attached to the pricer, so
+  option OHLC is real wherever the broker / local files have it.
+- _close_trade: signal-driven exits are priced at the entry strike instead
+  of the ATM strike at exit time.
+- BacktestResult.finalize delegates to backtest_metrics.compute_metrics
+  (numpy, no per-trade loops) and gains Sortino / Calmar / streaks /
+  time in market / MAE-MFE and hour / weekday / exit-reason breakdowns.
+  _PositionTracker records the option high/low since entry so each trade
+  carries its MAE / MFE.
+- _build_analysis_data: the per-timeframe signal analysis is split into
+  bar-range chunks and evaluated in worker processes over shared-memory
+  OHLC (backtest_analysis); analysis_workers sets the pool size.
+- The per-bar loop lives in ReplaySession (begin_bar / evaluate /
+  finish_bar / finish) so portfolio runs (backtest_portfolio) can step
+  several underlyings on one clock; _replay drives a single session.
+- intrabar_model (backtest_intrabar): TP / SL / trailing / index SL can be
+  resolved along a sub-bar path (OHLC ordering, Brownian bridge or recorded
+  1-minute option bars) instead of from the bar's high / low, so the order
+  of hits inside a bar follows the path.
 """
 
 from __future__ import annotations
 
 import logging
-import math
 import os
+import tempfile
 from dataclasses import dataclass, field
 from datetime import datetime, time, timedelta
 from Utils.time_utils import IST, ist_now, fmt_display, fmt_stamp
@@ -51,7 +80,11 @@ from Utils.safe_getattr import safe_getattr, safe_hasattr
 from Utils.Utils import Utils
 from Utils.common import (MARKET_OPEN_HOUR, MARKET_OPEN_MINUTE,
                           MARKET_CLOSE_HOUR, MARKET_CLOSE_MINUTE)
+from backtest.backtest_analysis import DEFAULT_ANALYSIS_WORKERS, analyse_timeframes, prepare_frame
 from backtest.backtest_candle_debugger import CandleDebugger
+from backtest.backtest_checkpoint import DEFAULT_CHECKPOINT_EVERY, ReplayCheckpoint
+from backtest.backtest_intrabar import DEFAULT_INTRABAR_STEPS, IntrabarPathModel
+from backtest.backtest_option_data import DEFAULT_PREFETCH_WORKERS, OptionBarStore, required_contracts
 from backtest.backtest_option_pricer import OptionPricer, PriceSource, atm_strike
 from data.candle_store import resample_df
 from data.candle_store_manager import candle_store_manager
@@ -66,6 +99,8 @@ COOLDOWN_MINUTES = 15
 HISTORY_BUFFER_MAX = 500
 MIN_WARMUP_BARS = 15
 PROGRESS_INTERVAL = 100   # emit progress every N bars
+# TradeState fields the replay mutates — saved in checkpoints
+_CHECKPOINT_STATE_FIELDS = ("current_position", "current_buy_price", "call_option", "put_option")
 
 
 # ── Data classes ──────────────────────────────────────────────────────────────
@@ -93,9 +128,21 @@ class BacktestConfig:
     sideway_start: time = field(default_factory=lambda: time(12, 0))
     sideway_end:   time = field(default_factory=lambda: time(14, 0))
     use_vix: bool = True
+    hv_method: str = "close"          # HV estimator when use_vix=False
     analysis_timeframes: List[str] = field(default_factory=list)
     debug_candles: bool = False
     debug_output_path: str = ""
+    use_results_cache: bool = True    # serve identical runs from the results store
+    save_results: bool = True         # persist completed runs to the results store
+    checkpoint_every_bars: int = DEFAULT_CHECKPOINT_EVERY   # 0 = no checkpoints
+    resume_from_checkpoint: bool = True
+    use_real_option_data: bool = False   # price from historical option bars where available
+    option_data_dir: str = ""            # optional folder of per-contract CSV/Parquet bars
+    option_prefetch_workers: int = DEFAULT_PREFETCH_WORKERS
+    analysis_workers: int = DEFAULT_ANALYSIS_WORKERS   # processes for analysis_timeframes (0 = all cores)
+    intrabar_model: str = "off"          # off / ohlc / bridge / recorded (backtest_intrabar)
+    intrabar_steps: int = DEFAULT_INTRABAR_STEPS
+    intrabar_seed: int = 0
 
 
 @dataclass
@@ -119,6 +166,8 @@ class BacktestTrade:
     exit_source:  PriceSource
     exit_reason:  str
     signal_name:  str
+    mae:          float = 0.0     # worst open P&L (₹) from the option bar path
+    mfe:          float = 0.0     # best open P&L (₹) from the option bar path
 
 
 @dataclass
@@ -137,6 +186,17 @@ class BacktestResult:
     worst_trade:   float = 0.0
     profit_factor: float = 0.0
     sharpe:        float = 0.0
+    sortino:       float = 0.0
+    calmar:        Optional[float] = None   # None below CALMAR_MIN_DAYS
+    max_drawdown_pct: float = 0.0
+    max_win_streak:  int = 0
+    max_loss_streak: int = 0
+    avg_mae:       float = 0.0
+    avg_mfe:       float = 0.0
+    edge_ratio:    float = 0.0
+    time_in_market:   float = 0.0   # % of trading minutes with a position open
+    avg_hold_minutes: float = 0.0
+    breakdowns: Dict = field(default_factory=dict)   # by_hour / by_weekday / by_exit_reason
     synthetic_bars: int  = 0
     real_bars:      int  = 0
     error_msg: Optional[str] = None
@@ -144,36 +204,58 @@ class BacktestResult:
     debug_log_path: Optional[str] = None
     analysis_data: Dict = field(default_factory=dict)
     equity_curve: List[Dict] = field(default_factory=list)
+    run_id: Optional[int] = None      # results-store id once persisted
+    from_cache: bool = False          # True when served from the results store
 
     def finalize(self):
-        self.total_trades = len(self.trades)
-        if not self.trades:
-            self.completed = True
-            return
-        pnls = [t.net_pnl for t in self.trades]
-        self.total_net_pnl = Utils.round_off(sum(pnls))
-        self.winners   = sum(1 for p in pnls if p > 0)
-        self.losers    = sum(1 for p in pnls if p <= 0)
-        self.win_rate  = self.winners / self.total_trades * 100
-        self.avg_net_pnl  = Utils.round_off(self.total_net_pnl / self.total_trades)
-        self.best_trade   = Utils.round_off(max(pnls))
-        self.worst_trade  = Utils.round_off(min(pnls))
-        gross_profit = sum(p for p in pnls if p > 0)
-        gross_loss   = abs(sum(p for p in pnls if p < 0))
-        self.profit_factor = Utils.round_off(gross_profit / gross_loss) if gross_loss else float("inf")
-        if self.equity_curve:
-            eq = [e["equity"] for e in self.equity_curve]
-            peak = eq[0]; dd = 0.0
-            for e_ in eq:
-                peak = max(peak, e_); dd = min(dd, e_ - peak)
-            self.max_drawdown = Utils.round_off(dd)
-        if len(pnls) > 1:
-            mean_r = sum(pnls) / len(pnls)
-            std_r  = math.sqrt(sum((p - mean_r) ** 2 for p in pnls) / (len(pnls) - 1))
-            self.sharpe = Utils.round_off(mean_r / std_r * math.sqrt(252) if std_r else 0.0)
+        from backtest.backtest_metrics import compute_metrics
+        for key, value in compute_metrics(self.trades, self.equity_curve, self.config.capital).items():
+            setattr(self, key, value)
         self.completed = True
 
 
+# ── BarAnalysis ───────────────────────────────────────────────────────────────
+
+class BarAnalysis:
+    """Analysis results for a single bar/candle."""
+
+    def __init__(self, timestamp: datetime, spot_price: float, signal: str,
+                 confidence: Dict[str, float], rule_results: Dict[str, List[Dict]],
+                 indicator_values: Dict[str, Dict[str, float]],
+                 timeframe: str = "5m"):
+        self.timestamp = timestamp
+        self.spot_price = spot_price
+        self.signal = signal
+        self.confidence = confidence
+        self.rule_results = rule_results
+        self.indicator_values = indicator_values
+        self.timeframe = timeframe
+
+    def to_dict(self) -> Dict:
+        result = {
+            "timeframe":   self.timeframe,
+            "timestamp":   fmt_display(self.timestamp),
+            "spot_price":  self.spot_price,
+            "signal":      self.signal,
+        }
+        if self.confidence:
+            result["overall_confidence"] = sum(self.confidence.values()) / len(self.confidence)
+        else:
+            result["overall_confidence"] = 0.0
+        for sig, conf in self.confidence.items():
+            result[f"confidence_{sig}"] = conf
+        for indicator, values in self.indicator_values.items():
+            result[f"indicator_{indicator}_last"] = values.get("last", "")
+            result[f"indicator_{indicator}_prev"] = values.get("prev", "")
+        for sig, rules in self.rule_results.items():
+            passed = sum(1 for r in rules if r.get("result", False))
+            total = len(rules)
+            result[f"rules_{sig}_passed"] = passed
+            result[f"rules_{sig}_total"] = total
+            result[f"rules_{sig}_pass_rate"] = (passed / total) if total else 0
+        return result
+
+
 # ── Per-trade state tracker ───────────────────────────────────────────────────
 
 @dataclass
@@ -188,6 +270,8 @@ class _PositionTracker:
     signal_name:   str                   = ""
     trailing_sl_high: Optional[float]   = None
     bars_in_trade: int                   = 0
+    max_price:     Optional[float]       = None   # option high/low seen since entry
+    min_price:     Optional[float]       = None
 
     def open(self, *, entry_time, spot_entry, strike, opt_type,
              entry_price, entry_source, signal_name):
@@ -200,10 +284,17 @@ class _PositionTracker:
         self.signal_name  = signal_name
         self.trailing_sl_high = entry_price
         self.bars_in_trade    = 1
+        self.max_price = self.min_price = entry_price
+
+    def note_bar(self, opt_high: float, opt_low: float):
+        """Widen the excursion range with one bar of the held option."""
+        if self.max_price is None or opt_high > self.max_price: self.max_price = opt_high
+        if self.min_price is None or opt_low < self.min_price:  self.min_price = opt_low
 
     def reset(self):
         self.entry_time = self.spot_entry = self.strike = self.opt_type = None
         self.entry_price = self.trailing_sl_high = None
+        self.max_price = self.min_price = None
         self.entry_source = PriceSource.SYNTHETIC
         self.signal_name = ""
         self.bars_in_trade = 0
@@ -280,6 +371,537 @@ def _bt_log_candle_assessment(bar_time, o, h, l, c, sig_result, current_position
         logger.debug("[_bt_log_candle_assessment] %s", exc, exc_info=True)
 
 
+# ── Replay session ────────────────────────────────────────────────────────────
+
+class SessionState:
+    """
+    The TradeState fields a ReplaySession reads and writes, for a session
+    that must not touch the singleton (portfolio legs, divergence replays).
+    """
+
+    def __init__(self):
+        self.derivative = ""
+        self.lot_size = 0
+        self.expiry = 0
+        self.current_position = None
+        self.previous_position = None
+        self.current_buy_price = None
+        self.call_option = None
+        self.put_option = None
+        self.option_signal_result = None
+
+    def reset_trade_attributes(self, current_position, log_fn=None) -> None:
+        # Same trade-lifecycle fields TradeState.reset_trade_attributes clears
+        self.previous_position = current_position
+        self.current_position = None
+        self.current_buy_price = None
+
+
+class ReplaySession:
+    """
+    One underlying's bar-by-bar replay, split into steps so several sessions
+    can share a clock (backtest_portfolio):
+
+        begin_bar(i, row)   day tracking, skips, auto-exit, history buffer —
+                            True when the bar needs a signal
+        evaluate()          signal engine on the history buffer (touches only
+                            this session's state, safe to run concurrently)
+        finish_bar(gate)    TP / SL / exit checks and entry; *gate* may veto
+                            the entry (shared risk limits)
+        finish()            final close, statistics, analysis, debug log
+
+    BacktestEngine._replay drives a single session with the TradeState
+    singleton; portfolio legs each bring their own SessionState.
+    """
+
+    def __init__(self, engine: "BacktestEngine", spot_df: pd.DataFrame, pricer: OptionPricer,
+                 signal_engine, detector, state,
+                 checkpoint: Optional[ReplayCheckpoint] = None):
+        cfg = engine.config
+        self.engine = engine
+        self.cfg = cfg
+        self.spot_df = spot_df
+        self.pricer = pricer
+        self.signal_engine = signal_engine
+        self.detector = detector
+        self.state = state
+        self.checkpoint = checkpoint
+        self.result = BacktestResult(config=cfg)
+        state.derivative = cfg.derivative
+        state.lot_size   = cfg.lot_size
+        state.expiry     = 0
+
+        self.equity     = cfg.capital
+        self.trade_no   = 0
+        self.total_bars = len(spot_df)
+
+        self.tracker = _PositionTracker()
+        self.history_rows: list = []
+        # Debug candles stream to a .jsonl + index as they are recorded, so
+        # memory stays flat however long the run is.
+        self.dbg_path = cfg.debug_output_path or os.path.join(
+            tempfile.gettempdir(), f"backtest_debug_{fmt_stamp()}.jsonl"
+        )
+        self.debugger = CandleDebugger(
+            debug_mode=cfg.debug_candles,
+            stream_path=(os.path.splitext(self.dbg_path)[0] + ".jsonl") if cfg.debug_candles else None,
+        )
+
+        # Day-tracking
+        self.current_date = None
+        self.cooldown_end:   Optional[datetime] = None
+        self.auto_exit_time: Optional[datetime] = None    # pre-computed per day
+
+        # Diagnostic counters
+        self.cnt = dict(sideway=0, market=0, warmup=0, cooldown=0, no_signal=0, in_trade=0, risk_blocked=0)
+        self.entry_attempts = 0
+        self.signals_seen: Dict[str, int] = {}
+
+        # Current bar (set by begin_bar)
+        self.bar_pos = 0
+        self.bar_time: Optional[datetime] = None
+        self.ohlc = (0.0, 0.0, 0.0, 0.0)
+        self.is_new_day = False
+        self.sig_result = None
+        self.raw_signal = "WAIT"
+
+        # Sub-bar TP / SL resolution (None = bar-level checks)
+        self.intrabar = (IntrabarPathModel(cfg.intrabar_model, cfg.intrabar_steps, cfg.intrabar_seed)
+                         if cfg.intrabar_model and cfg.intrabar_model != "off" else None)
+
+        # ── Checkpoint / resume ───────────────────────────────────────────────
+        self.ckpt_every = cfg.checkpoint_every_bars if checkpoint is not None else 0
+        self.start_pos  = 0
+        restored = checkpoint.load() if checkpoint is not None and cfg.resume_from_checkpoint else None
+        if restored is not None:
+            snap, self.result.trades, self.result.equity_curve = restored
+            self.start_pos      = snap["bar_pos"]
+            self.equity         = snap["equity"]
+            self.trade_no       = snap["trade_no"]
+            self.tracker        = snap["tracker"]
+            self.history_rows   = snap["history_rows"]
+            self.current_date   = snap["current_date"]
+            self.cooldown_end   = snap["cooldown_end"]
+            self.auto_exit_time = snap["auto_exit_time"]
+            self.cnt            = {"risk_blocked": 0, **snap["cnt"]}
+            self.entry_attempts = snap["entry_attempts"]
+            self.signals_seen   = snap["signals_seen"]
+            self.result.synthetic_bars = snap["synthetic_bars"]
+            self.result.real_bars      = snap["real_bars"]
+            for key, value in snap["trade_state"].items():
+                setattr(state, key, value)
+            pricer.set_state(snap["pricer"])
+            if self.intrabar is not None and snap.get("intrabar"):
+                self.intrabar.set_state(snap["intrabar"])
+            logger.info("[Backtest] resumed from checkpoint at bar %d/%d (%d trades)",
+                        self.start_pos, self.total_bars, self.trade_no)
+            engine._emit(12 + (self.start_pos / max(self.total_bars, 1)) * 85,
+                         f"Resumed from checkpoint at bar {self.start_pos}/{self.total_bars}")
+
+    def rows(self):
+        """(index, row) pairs still to replay."""
+        rows = self.spot_df.iloc[self.start_pos:] if self.start_pos else self.spot_df
+        return rows.iterrows()
+
+    def save_checkpoint(self, pos: int) -> None:
+        try:
+            self.checkpoint.save({
+                "bar_pos": pos, "equity": self.equity, "trade_no": self.trade_no,
+                "tracker": self.tracker, "history_rows": self.history_rows,
+                "current_date": self.current_date, "cooldown_end": self.cooldown_end,
+                "auto_exit_time": self.auto_exit_time, "cnt": self.cnt,
+                "entry_attempts": self.entry_attempts, "signals_seen": self.signals_seen,
+                "synthetic_bars": self.result.synthetic_bars, "real_bars": self.result.real_bars,
+                "trade_state": {k: safe_getattr(self.state, k, None) for k in _CHECKPOINT_STATE_FIELDS},
+                "pricer": self.pricer.get_state(),
+                "intrabar": self.intrabar.get_state() if self.intrabar is not None else None,
+            }, self.result.trades, self.result.equity_curve)
+        except Exception as exc:
+            logger.warning("[Backtest] checkpoint at bar %d failed: %s", pos, exc, exc_info=True)
+
+    def _record_skip(self, reason: str) -> None:
+        o, h, l, c = self.ohlc
+        self.debugger.record(bar_time=self.bar_time, o=o, h=h, l=l, c=c,
+                             sig_result=None, action="SKIP", state=self.state,
+                             bars_in_trade=self.tracker.bars_in_trade,
+                             trailing_sl_high=self.tracker.trailing_sl_high,
+                             skip_reason=reason)
+
+    def _mark_equity(self) -> None:
+        self.result.equity_curve.append({"timestamp": self.bar_time, "equity": round(self.equity, 2)})
+
+    def _close(self, exit_time: datetime, spot_exit: float, reason: str, **kwargs) -> None:
+        cr = self.engine._close_trade(self.result, self.state, self.tracker, exit_time, spot_exit,
+                                      self.pricer, self.equity, self.trade_no, reason, **kwargs)
+        self.result, self.equity, self.trade_no = cr.result, cr.equity, cr.trade_no
+
+    def _intrabar_exit(self, bar: Dict, strike: float, opt_type: str) -> Optional[tuple]:
+        """
+        TP / SL / trailing SL / index SL walked along an intrabar path.
+
+        Returns (reason, price) for the earliest hit, or None.  Paths stay
+        inside the bar's range, so a path is only built when a bar-level
+        check fires; otherwise the trailing high moves as in bar mode.
+        """
+        cfg, tracker, buy = self.cfg, self.tracker, self.state.current_buy_price
+        o, h, l, c = self.ohlc
+        opt_high, opt_low = bar["high"], bar["low"]
+        tp    = buy * (1 + cfg.tp_pct) if cfg.tp_pct and buy else None
+        sl    = buy * (1 - cfg.sl_pct) if cfg.sl_pct and buy else None
+        trail = cfg.trailing_sl_pct if cfg.trailing_sl_pct and buy else None
+        index_level, index_below = None, opt_type == "CE"
+        if cfg.index_sl is not None and tracker.spot_entry is not None:
+            index_level = tracker.spot_entry + (-cfg.index_sl if index_below else cfg.index_sl)
+        bar_trail_high = max(tracker.trailing_sl_high or opt_high, opt_high) if trail else None
+
+        possible = ((tp is not None and opt_high >= tp) or (sl is not None and opt_low <= sl)
+                    or (trail and opt_low <= bar_trail_high * (1 - trail))
+                    or (index_level is not None and (l <= index_level if index_below else h >= index_level)))
+        if not possible:
+            if trail:
+                tracker.trailing_sl_high = bar_trail_high
+            return None
+
+        sub_bars = None
+        if self.intrabar.model == "recorded":
+            sub_bars = self.pricer.recorded_sub_bars(self.bar_time, strike, opt_type, bar["expiry"],
+                                                     cfg.execution_interval_minutes)
+        opt_path, spot_path = self.intrabar.paths(self.ohlc, bar, opt_type,
+                                                  bar["source"] == PriceSource.REAL, sub_bars)
+        reason, price, trail_high = self.intrabar.first_exit(
+            opt_path, spot_path, tp=tp, sl=sl, trail_pct=trail, trail_high=tracker.trailing_sl_high,
+            index_level=index_level, index_below=index_below)
+        if trail:
+            tracker.trailing_sl_high = trail_high
+        return (reason, price) if reason else None
+
+    # ── Steps ─────────────────────────────────────────────────────────────────
+
+    def begin_bar(self, i: int, row) -> bool:
+        """Everything before the signal; False when the bar is finished already."""
+        cfg, state, tracker = self.cfg, self.state, self.tracker
+        if self.ckpt_every and i > self.start_pos and (i - self.start_pos) % self.ckpt_every == 0:
+            self.save_checkpoint(i)
+
+        self.bar_pos = i
+        self.sig_result = None
+        self.raw_signal = "WAIT"
+        ts = row["time"]
+        o, h, l, c = row["open"], row["high"], row["low"], row["close"]
+        self.ohlc = (o, h, l, c)
+        bar_time = ts if isinstance(ts, datetime) else pd.Timestamp(ts).to_pydatetime()
+        # TZ-FIX: normalize to IST-aware instead of stripping timezone.
+        if bar_time.tzinfo is None:
+            bar_time = IST.localize(bar_time)
+        else:
+            bar_time = bar_time.astimezone(IST)
+        self.bar_time = bar_time
+
+        bar_date  = bar_time.date()
+        is_new_day = self.current_date is not None and bar_date != self.current_date
+        self.is_new_day = is_new_day
+        self.current_date = bar_date
+
+        # TZ-FIX: day boundaries are localized to IST so they compare
+        # against the IST-aware bar_time (naive values raised TypeError
+        # on the first bar of day two).
+        if is_new_day:
+            mkt_open_dt    = IST.localize(datetime.combine(bar_date, MARKET_OPEN))
+            self.cooldown_end  = mkt_open_dt + timedelta(minutes=COOLDOWN_MINUTES)
+            self.auto_exit_time = IST.localize(datetime.combine(bar_date, time(
+                MARKET_CLOSE.hour, MARKET_CLOSE.minute - AUTO_EXIT_BEFORE_CLOSE_MINUTES
+            )))
+
+        # Set auto-exit time for current day (first bar of the day)
+        if self.auto_exit_time is None:
+            self.auto_exit_time = IST.localize(datetime.combine(bar_date, time(
+                MARKET_CLOSE.hour, MARKET_CLOSE.minute - AUTO_EXIT_BEFORE_CLOSE_MINUTES
+            )))
+
+        # Progress
+        if i % PROGRESS_INTERVAL == 0:
+            pct = 12 + (i / self.total_bars) * 85
+            self.engine._emit(pct, f"Bar {i}/{self.total_bars}  |  {bar_time:%d-%b %H:%M}  |  "
+                                   f"₹{self.equity:,.0f}  |  Trades: {self.trade_no}")
+
+        # ── Skip sideway zone ─────────────────────────────────────────────────
+        if cfg.sideway_zone_skip and cfg.sideway_start <= bar_time.time() <= cfg.sideway_end:
+            self.cnt["sideway"] += 1
+            self._record_skip("SIDEWAY")
+            return False
+
+        # ── Skip outside market hours ─────────────────────────────────────────
+        if not (MARKET_OPEN <= bar_time.time() <= MARKET_CLOSE):
+            self.cnt["market"] += 1
+            self._record_skip("MARKET_CLOSED")
+            return False
+
+        # ── Auto-exit at market close ─────────────────────────────────────────
+        if state.current_position and bar_time >= self.auto_exit_time:
+            self._close(bar_time, c, "MARKET_CLOSE")
+            state.reset_trade_attributes(current_position=None)
+            tracker.reset()
+            self._mark_equity()
+            return False
+
+        # ── History buffer ────────────────────────────────────────────────────
+        self.history_rows.append({"time": bar_time, "open": o, "high": h, "low": l, "close": c,
+                                  "volume": 0, "is_new_day": is_new_day})
+        if len(self.history_rows) > HISTORY_BUFFER_MAX:
+            del self.history_rows[:-HISTORY_BUFFER_MAX]
+
+        if len(self.history_rows) < MIN_WARMUP_BARS:
+            self.cnt["warmup"] += 1
+            self._record_skip(f"WARMUP({len(self.history_rows)}/{MIN_WARMUP_BARS})")
+            return False
+
+        if self.cooldown_end and bar_time < self.cooldown_end:
+            self.cnt["cooldown"] += 1
+        return True
+
+    def evaluate(self) -> None:
+        """Run the signal engine on the history buffer (after begin_bar returned True)."""
+        if not self.signal_engine:
+            return
+        state, bar_time = self.state, self.bar_time
+        hist_df = pd.DataFrame(self.history_rows)
+        try:
+            sig_result = self.signal_engine.evaluate(hist_df, current_position=state.current_position)
+
+            if sig_result and sig_result.get("available", False):
+                raw_signal  = sig_result.get("signal_value", "WAIT")
+                override_reason = ""
+
+                # Position-aware override: suppress exit signals when flat
+                if state.current_position is None and raw_signal in ("EXIT_CALL", "EXIT_PUT", "HOLD"):
+                    conf = sig_result.get("confidence", {})
+                    thresh = sig_result.get("threshold", 0.6)
+                    bc, bp = conf.get("BUY_CALL", 0.0), conf.get("BUY_PUT", 0.0)
+                    if bc >= thresh and bp >= thresh:
+                        raw_signal = "BUY_CALL" if bc >= bp else ("BUY_PUT" if bp > bc else "WAIT")
+                        override_reason = f"flat+conflict→{raw_signal}(bc={bc:.0%},bp={bp:.0%})"
+                    elif bc >= thresh:
+                        raw_signal = "BUY_CALL"; override_reason = f"flat:exit→BUY_CALL(conf={bc:.0%})"
+                    elif bp >= thresh:
+                        raw_signal = "BUY_PUT";  override_reason = f"flat:exit→BUY_PUT(conf={bp:.0%})"
+                    else:
+                        raw_signal = "WAIT";     override_reason = f"flat:exit_suppressed(bc={bc:.0%},bp={bp:.0%})"
+
+                if override_reason:
+                    sig_result = {**sig_result, "signal_value": raw_signal, "signal": raw_signal,
+                                  "_bt_override": override_reason}
+
+                state.option_signal_result = sig_result
+                self.signals_seen[raw_signal] = self.signals_seen.get(raw_signal, 0) + 1
+                self.sig_result, self.raw_signal = sig_result, raw_signal
+
+                if logger.isEnabledFor(logging.DEBUG):
+                    o, h, l, c = self.ohlc
+                    _bt_log_candle_assessment(bar_time, o, h, l, c, sig_result,
+                                              state.current_position, len(self.history_rows),
+                                              self.is_new_day)
+            else:
+                self.sig_result = sig_result
+                state.option_signal_result = None
+
+        except Exception as exc:
+            logger.warning("[BT %s] SignalEngine error: %s", f"{bar_time:%H:%M}", exc, exc_info=True)
+            state.option_signal_result = None
+            self.raw_signal = "WAIT"
+
+    def finish_bar(self, entry_gate: Optional[Callable[["ReplaySession"], bool]] = None) -> None:
+        """Exit checks for an open position, then entry (unless *entry_gate* refuses)."""
+        import BaseEnums
+
+        cfg, state, tracker, pricer = self.cfg, self.state, self.tracker, self.pricer
+        bar_time, raw_signal, sig_result = self.bar_time, self.raw_signal, self.sig_result
+        o, h, l, c = self.ohlc
+        action = self.engine._signal_to_action(raw_signal, state)
+
+        # ── Debug context for open position ───────────────────────────────────
+        if cfg.debug_candles:
+            _tp_sl_debug = None; _opt_bar_debug = None
+            if state.current_position:
+                _tp_sl_debug, _opt_bar_debug = self.engine._build_debug_tpsl(
+                    state, tracker, bar_time, o, h, l, c, pricer, cfg, self.result
+                )
+            self.debugger.record(bar_time=bar_time, o=o, h=h, l=l, c=c,
+                                 sig_result=sig_result, action=action, state=state,
+                                 bars_in_trade=tracker.bars_in_trade,
+                                 trailing_sl_high=tracker.trailing_sl_high,
+                                 option_bar=_opt_bar_debug, tp_sl_info=_tp_sl_debug)
+
+        # ── Monitor open position (TP / SL / exit checks) ─────────────────────
+        if state.current_position:
+            strike   = tracker.strike or atm_strike(c, cfg.derivative)
+            opt_type = "CE" if state.current_position == BaseEnums.CALL else "PE"
+            bar      = pricer.resolve_bar(bar_time, o, h, l, c, opt_type,
+                                          minutes_per_bar=cfg.execution_interval_minutes,
+                                          strike=strike)
+            opt_high, opt_low, opt_close = bar["high"], bar["low"], bar["close"]
+            src = bar["source"]
+            tracker.note_bar(opt_high, opt_low)
+
+            def _do_exit(reason: str, price: float):
+                self._close(bar_time, c, reason, forced_option_price=price, forced_source=src)
+                state.reset_trade_attributes(current_position=None)
+                tracker.reset()
+                self._mark_equity()
+
+            if self.intrabar is not None:
+                hit = self._intrabar_exit(bar, strike, opt_type)
+                if hit is not None:
+                    _do_exit(*hit); return
+            else:
+                # TP
+                if cfg.tp_pct and state.current_buy_price:
+                    tp_price = state.current_buy_price * (1 + cfg.tp_pct)
+                    if opt_high >= tp_price:
+                        _do_exit("TP", tp_price); return
+
+                # SL
+                if cfg.sl_pct and state.current_buy_price:
+                    sl_price = state.current_buy_price * (1 - cfg.sl_pct)
+                    if opt_low <= sl_price:
+                        _do_exit("SL", sl_price); return
+
+                # Trailing SL
+                if cfg.trailing_sl_pct and state.current_buy_price:
+                    tracker.trailing_sl_high = max(tracker.trailing_sl_high or opt_high, opt_high)
+                    tsl_price = tracker.trailing_sl_high * (1 - cfg.trailing_sl_pct)
+                    if opt_low <= tsl_price:
+                        _do_exit("TRAILING_SL", tsl_price); return
+
+                # Index SL
+                if cfg.index_sl is not None:
+                    es = tracker.spot_entry
+                    if es is not None:
+                        if state.current_position == BaseEnums.CALL and l <= es - cfg.index_sl:
+                            _do_exit("INDEX_SL", opt_low); return
+                        if state.current_position == BaseEnums.PUT and h >= es + cfg.index_sl:
+                            _do_exit("INDEX_SL", opt_low); return
+
+            # Max hold bars
+            tracker.bars_in_trade += 1
+            if cfg.max_hold_bars and tracker.bars_in_trade >= cfg.max_hold_bars:
+                _do_exit("MAX_HOLD", opt_close); return
+
+            # Signal exit
+            should_exit = (
+                (state.current_position == BaseEnums.CALL and action in ("EXIT_CALL", "BUY_PUT")) or
+                (state.current_position == BaseEnums.PUT  and action in ("EXIT_PUT",  "BUY_CALL"))
+            )
+            if should_exit:
+                _do_exit("SIGNAL", opt_close); return
+
+        # ── Entry logic ───────────────────────────────────────────────────────
+        if state.current_position is None:
+            if   action == "BUY_CALL": opt_type = "CE"
+            elif action == "BUY_PUT":  opt_type = "PE"
+            else:
+                self.cnt["no_signal"] += 1
+                self._mark_equity()
+                return
+
+            if entry_gate is not None and not entry_gate(self):
+                self.cnt["risk_blocked"] += 1
+                self._mark_equity()
+                return
+
+            self.entry_attempts += 1
+            strike      = atm_strike(c, cfg.derivative)
+            opt_sym     = f"{cfg.derivative}{int(strike)}{opt_type}"
+            bar         = pricer.resolve_bar(bar_time, o, h, l, c, opt_type,
+                                             minutes_per_bar=cfg.execution_interval_minutes)
+            entry_price = round(bar["close"] * (1 + cfg.slippage_pct), 2)
+
+            state.current_position = BaseEnums.CALL if opt_type == "CE" else BaseEnums.PUT
+            state.current_buy_price = entry_price
+            if opt_type == "CE": state.call_option = opt_sym
+            else:                state.put_option  = opt_sym
+
+            tracker.open(entry_time=bar_time, spot_entry=c, strike=strike,
+                         opt_type=opt_type, entry_price=entry_price,
+                         entry_source=bar["source"], signal_name=str(raw_signal))
+
+            logger.info("[BT %s] ENTRY #%d: %s strike=%d @ ₹%.2f | spot=%.0f | sig=%s",
+                        f"{bar_time:%d-%b %H:%M}", self.trade_no + 1, opt_type, int(strike),
+                        entry_price, c, raw_signal)
+        else:
+            self.cnt["in_trade"] += 1
+
+        self._mark_equity()
+
+    def step(self, i: int, row, entry_gate=None) -> None:
+        if self.begin_bar(i, row):
+            self.evaluate()
+            self.finish_bar(entry_gate)
+
+    def finish(self) -> BacktestResult:
+        """Close any open position and finalise the result."""
+        cfg, state, spot_df, result = self.cfg, self.state, self.spot_df, self.result
+        cnt = self.cnt
+
+        # ── Final close ───────────────────────────────────────────────────────
+        if state.current_position and not spot_df.empty:
+            last     = spot_df.iloc[-1]
+            last_ts  = (last["time"] if isinstance(last["time"], datetime)
+                        else pd.Timestamp(last["time"]).to_pydatetime())
+            # TZ-FIX: normalize to IST-aware instead of stripping timezone.
+            if last_ts.tzinfo is None:
+                last_ts = IST.localize(last_ts)
+            else:
+                last_ts = last_ts.astimezone(IST)
+            self._close(last_ts, last["close"], "MARKET_CLOSE")
+            result = self.result
+
+        logger.info(
+            "[Backtest] DONE — %d bars | sideway=%d market=%d warmup=%d cooldown=%d "
+            "no_signal=%d in_trade=%d risk_blocked=%d | entries=%d trades=%d | signals=%s",
+            self.total_bars, cnt["sideway"], cnt["market"], cnt["warmup"], cnt["cooldown"],
+            cnt["no_signal"], cnt["in_trade"], cnt["risk_blocked"], self.entry_attempts,
+            self.trade_no, self.signals_seen,
+        )
+        if self.intrabar is not None:
+            logger.info("[Backtest] intrabar %s: %d paths (%d from recorded minutes)",
+                        self.intrabar.model, self.intrabar.stats["paths"], self.intrabar.stats["recorded"])
+        if self.entry_attempts == 0:
+            logger.warning(
+                "[Backtest] ZERO entries — check: (1) strategy rules loaded, "
+                "(2) min_confidence not too high, (3) warmup bars >=15, "
+                "(4) sideway_zone not covering all signal bars."
+            )
+
+        if self.checkpoint is not None and not result.error_msg:
+            self.checkpoint.clear()
+
+        self.engine._emit(98, "Finalising statistics…")
+        result.finalize()
+
+        if cfg.analysis_timeframes and not result.error_msg:
+            try:
+                self.engine._emit(98, "Building analysis data…")
+                result.analysis_data = self.engine._build_analysis_data(spot_df, self.signal_engine)
+            except Exception as exc:
+                logger.warning("[BacktestEngine] Analysis build failed: %s", exc, exc_info=True)
+
+        debugger = self.debugger
+        if cfg.debug_candles and len(debugger) > 0:
+            log_path = debugger.close()
+            # A .json debug_output_path also asks for a legacy wrapped-JSON export
+            if not self.dbg_path.endswith(".jsonl"):
+                debugger.save(self.dbg_path)
+            if log_path:
+                result.debug_log_path = log_path
+                self.engine._emit(99, f"Debug log → {log_path}")
+        else:
+            debugger.close()
+
+        result.debugger_entries = debugger.get_entries()
+        self.engine._emit(100, f"Complete — {result.total_trades} trades | ₹{result.total_net_pnl:,.0f}")
+        return result
+
+
 # ── Backtest Engine ────────────────────────────────────────────────────────────
 
 class BacktestEngine:
@@ -302,36 +924,50 @@ class BacktestEngine:
             try: self.progress_callback(pct, msg)
             except Exception: pass
 
-    def run(self) -> BacktestResult:
+    def run(self, spot_df: Optional[pd.DataFrame] = None,
+            vix_series: Optional[pd.Series] = None) -> BacktestResult:
+        """
+        Run the backtest.  *spot_df* / *vix_series* supply local data instead
+        of fetching it from the broker (headless runs, see backtest_cli).
+        """
         result = BacktestResult(config=self.config)
         try:
-            self._emit(0, "Fetching spot history…")
-            spot_df = self._fetch_spot()
+            if spot_df is not None:
+                self._emit(0, "Preparing local spot history…")
+                spot_df = self._prepare_local_spot(spot_df)
+            else:
+                self._emit(0, "Fetching spot history…")
+                spot_df = self._fetch_spot()
             if spot_df is None or spot_df.empty:
                 result.error_msg = "Could not fetch spot history from broker."
                 return result
 
             self._emit(5, f"Loaded {len(spot_df)} spot candles. Fetching VIX…")
-            pricer = OptionPricer(
-                derivative=self.config.derivative,
-                expiry_type=self.config.expiry_type,
-                broker=self.broker,
-                use_vix=self.config.use_vix,
-            )
-            if self.config.use_vix:
-                pricer.load_vix(
-                    self.config.start_date.date(),
-                    self.config.end_date.date(),
-                    broker=self.broker,
-                )
+            pricer = self._make_pricer(vix_series)
 
             self._emit(10, "Loading strategy signals…")
             signal_engine, detector = self._load_signal_engine()
 
+            # Option bars are loaded first: they are part of the cache key.
+            if self.config.use_real_option_data:
+                self._prefetch_option_bars(spot_df, pricer)
+
+            store_key = self._results_store_key(spot_df, pricer, signal_engine)
+            # The per-candle debug log is not stored, so debug runs always replay.
+            if store_key and self.config.use_results_cache and not self.config.debug_candles:
+                cached = self._load_cached_result(store_key[0], spot_df, signal_engine)
+                if cached is not None:
+                    return cached
+
             self._emit(12, "Starting bar-by-bar replay…")
             state_manager.reset_for_backtest()
             candle_store_manager.clear()
-            result = self._replay(spot_df, pricer, signal_engine, detector)
+            checkpoint = (ReplayCheckpoint(store_key[0])
+                          if store_key and self.config.checkpoint_every_bars > 0 else None)
+            result = self._replay(spot_df, pricer, signal_engine, detector, checkpoint=checkpoint)
+
+            if store_key and self.config.save_results and result.completed and not result.error_msg:
+                self._save_result(result, *store_key)
 
         except Exception as exc:
             logger.error("[BacktestEngine.run] %s", exc, exc_info=True)
@@ -342,6 +978,92 @@ class BacktestEngine:
 
         return result
 
+    def _make_pricer(self, vix_series: Optional[pd.Series] = None) -> OptionPricer:
+        """OptionPricer for this config, with VIX supplied or loaded as configured."""
+        pricer = OptionPricer(
+            derivative=self.config.derivative,
+            expiry_type=self.config.expiry_type,
+            broker=self.broker,
+            use_vix=self.config.use_vix,
+            hv_method=self.config.hv_method,
+        )
+        if self.config.use_vix and vix_series is not None:
+            pricer.set_vix_series(vix_series)
+        elif self.config.use_vix:
+            pricer.load_vix(
+                self.config.start_date.date(),
+                self.config.end_date.date(),
+                broker=self.broker,
+            )
+        return pricer
+
+    # ── Historical option bars ────────────────────────────────────────────────
+
+    def _prefetch_option_bars(self, spot_df: pd.DataFrame, pricer: OptionPricer) -> None:
+        """Bulk-load option bars for every contract the replay can touch."""
+        cfg = self.config
+        requests = required_contracts(spot_df, cfg.derivative, pricer._get_expiry)
+        self._emit(10, f"Prefetching option history for {len(requests)} contracts…")
+        store = OptionBarStore(
+            cfg.derivative,
+            local_dir=cfg.option_data_dir,
+            broker=self.broker if safe_hasattr(self.broker, "get_history_for_timeframe") else None,
+            symbol_fn=lambda strike, opt, expiry: self._get_historical_option_symbol(
+                cfg.derivative, strike, opt, expiry, expiry=expiry),
+            workers=cfg.option_prefetch_workers,
+        )
+
+        def _progress(done: int, total: int):
+            if done % 20 == 0 or done == total:
+                self._emit(10 + 2 * done / total, f"Option history {done}/{total} contracts…")
+
+        stats = store.prefetch(requests, progress=_progress)
+        logger.info("[BacktestEngine] option bars: %d/%d contracts with data (%s)",
+                    len(store), len(requests), stats)
+        pricer.set_option_bars(store if len(store) else None)
+
+    # ── Results store ─────────────────────────────────────────────────────────
+
+    def _results_store_key(self, spot_df, pricer, signal_engine):
+        """(cache_key, strategy_hash, data_fingerprint) or None when the store is off."""
+        cfg = self.config
+        if not (cfg.use_results_cache or cfg.save_results or cfg.checkpoint_every_bars > 0):
+            return None
+        try:
+            from backtest.backtest_results_store import data_fingerprint, run_cache_key, strategy_hash
+            s_hash = strategy_hash(signal_engine.to_dict() if signal_engine else None)
+            d_fp = data_fingerprint(spot_df, pricer.vix_series, pricer._option_bars)
+            return run_cache_key(self.config, s_hash, d_fp), s_hash, d_fp
+        except Exception as exc:
+            logger.warning("[BacktestEngine] results store unavailable: %s", exc, exc_info=True)
+            return None
+
+    def _load_cached_result(self, cache_key, spot_df, signal_engine) -> Optional[BacktestResult]:
+        try:
+            from backtest.backtest_results_store import results_store
+            cached = results_store.find_cached(cache_key)
+        except Exception as exc:
+            logger.warning("[BacktestEngine] results store lookup failed: %s", exc, exc_info=True)
+            return None
+        if cached is None:
+            return None
+        # Keep the caller's UI-only settings; analysis data is not stored.
+        cached.config = self.config
+        cached.from_cache = True
+        if self.config.analysis_timeframes:
+            cached.analysis_data = self._build_analysis_data(spot_df, signal_engine)
+        logger.info("[BacktestEngine] identical run found in results store (run #%s)", cached.run_id)
+        self._emit(100, "Loaded identical run from results store")
+        return cached
+
+    def _save_result(self, result: BacktestResult, cache_key, s_hash, d_fp) -> None:
+        try:
+            from backtest.backtest_results_store import results_store
+            run_id = results_store.save(result, cache_key, s_hash, d_fp)
+            result.run_id = run_id if run_id > 0 else None
+        except Exception as exc:
+            logger.warning("[BacktestEngine] could not save result: %s", exc, exc_info=True)
+
     # ── Spot data fetching ────────────────────────────────────────────────────
 
     @staticmethod
@@ -361,6 +1083,28 @@ class BacktestEngine:
         df = df[t_naive_for_filter.dt.time.between(MARKET_OPEN, MARKET_CLOSE)].copy()
         return df.sort_values("time").reset_index(drop=True)
 
+    def _prepare_local_spot(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Resample caller-supplied candles to the execution interval and filter."""
+        df = df.copy()
+        if not pd.api.types.is_datetime64_any_dtype(df["time"]):
+            df["time"] = pd.to_datetime(df["time"])
+        if df["time"].dt.tz is None:
+            df["time"] = df["time"].dt.tz_localize(IST)
+        df = df.sort_values("time").reset_index(drop=True)
+        if "volume" not in df.columns:
+            df["volume"] = 0
+        step = df["time"].diff().dt.total_seconds().dropna()
+        bar_minutes = int(round(step.min() / 60)) if not step.empty else 0
+        interval = self.config.execution_interval_minutes
+        if 0 < bar_minutes < interval:
+            df = resample_df(df, interval)
+            if df is None:
+                return None
+        elif bar_minutes > interval:
+            logger.warning("[BacktestEngine] local data is %dm bars; cannot replay at %dm",
+                           bar_minutes, interval)
+        return self._filter_spot_df(df, self.config.start_date.date(), self.config.end_date.date())
+
     def _fetch_spot(self) -> Optional[pd.DataFrame]:
         try:
             days = (self.config.end_date - self.config.start_date).days + 2
@@ -433,328 +1177,23 @@ class BacktestEngine:
     # ── Replay loop ───────────────────────────────────────────────────────────
 
     def _replay(self, spot_df: pd.DataFrame, pricer: OptionPricer,
-                signal_engine, detector) -> BacktestResult:
-        import BaseEnums
-
-        cfg    = self.config
-        result = BacktestResult(config=cfg)
-        state  = self.state
-        state.derivative = cfg.derivative
-        state.lot_size   = cfg.lot_size
-        state.expiry     = 0
-
-        equity     = cfg.capital
-        trade_no   = 0
-        total_bars = len(spot_df)
-
-        tracker       = _PositionTracker()
-        history_rows: list = []
-        debugger      = CandleDebugger(debug_mode=cfg.debug_candles)
-
-        # Day-tracking
-        _current_date    = None
-        _cooldown_end:   Optional[datetime] = None
-        _auto_exit_time: Optional[datetime] = None    # pre-computed per day
-
-        # Diagnostic counters
-        cnt = dict(sideway=0, market=0, warmup=0, cooldown=0, no_signal=0, in_trade=0)
-        _entry_attempts = 0
-        _signals_seen: Dict[str, int] = {}
-
+                signal_engine, detector,
+                checkpoint: Optional[ReplayCheckpoint] = None) -> BacktestResult:
+        cfg = self.config
+        session = ReplaySession(self, spot_df, pricer, signal_engine, detector, self.state,
+                                 checkpoint=checkpoint)
         logger.info("[Backtest] %d bars | %dm | tp=%s | sl=%s",
-                    total_bars, cfg.execution_interval_minutes, cfg.tp_pct, cfg.sl_pct)
+                    session.total_bars, cfg.execution_interval_minutes, cfg.tp_pct, cfg.sl_pct)
 
-        for i, row in spot_df.iterrows():
+        for i, row in session.rows():
             if self._stop_requested:
-                result.error_msg = "Backtest cancelled by user."
+                session.result.error_msg = "Backtest cancelled by user."
+                if checkpoint is not None:
+                    session.save_checkpoint(i)
                 break
+            session.step(i, row)
 
-            ts = row["time"]
-            o, h, l, c = row["open"], row["high"], row["low"], row["close"]
-            bar_time = ts if isinstance(ts, datetime) else pd.Timestamp(ts).to_pydatetime()
-            # TZ-FIX: normalize to IST-aware instead of stripping timezone.
-            if bar_time.tzinfo is None:
-                bar_time = IST.localize(bar_time)
-            else:
-                bar_time = bar_time.astimezone(IST)
-
-            bar_date  = bar_time.date()
-            is_new_day = _current_date is not None and bar_date != _current_date
-            _current_date = bar_date
-
-            if is_new_day:
-                mkt_open_dt    = datetime.combine(bar_date, MARKET_OPEN)
-                _cooldown_end  = mkt_open_dt + timedelta(minutes=COOLDOWN_MINUTES)
-                _auto_exit_time = datetime.combine(bar_date, time(
-                    MARKET_CLOSE.hour, MARKET_CLOSE.minute - AUTO_EXIT_BEFORE_CLOSE_MINUTES
-                ))
-
-            # Set auto-exit time for current day (first bar of the day)
-            if _auto_exit_time is None:
-                _auto_exit_time = datetime.combine(bar_date, time(
-                    MARKET_CLOSE.hour, MARKET_CLOSE.minute - AUTO_EXIT_BEFORE_CLOSE_MINUTES
-                ))
-
-            # Progress
-            if i % PROGRESS_INTERVAL == 0:
-                pct = 12 + (i / total_bars) * 85
-                self._emit(pct, f"Bar {i}/{total_bars}  |  {bar_time:%d-%b %H:%M}  |  ₹{equity:,.0f}  |  Trades: {trade_no}")
-
-            # ── Skip sideway zone ─────────────────────────────────────────────
-            if cfg.sideway_zone_skip and cfg.sideway_start <= bar_time.time() <= cfg.sideway_end:
-                cnt["sideway"] += 1
-                debugger.record(bar_time=bar_time, o=o, h=h, l=l, c=c,
-                                sig_result=None, action="SKIP", state=state,
-                                bars_in_trade=tracker.bars_in_trade,
-                                trailing_sl_high=tracker.trailing_sl_high,
-                                skip_reason="SIDEWAY")
-                continue
-
-            # ── Skip outside market hours ─────────────────────────────────────
-            if not (MARKET_OPEN <= bar_time.time() <= MARKET_CLOSE):
-                cnt["market"] += 1
-                debugger.record(bar_time=bar_time, o=o, h=h, l=l, c=c,
-                                sig_result=None, action="SKIP", state=state,
-                                bars_in_trade=tracker.bars_in_trade,
-                                trailing_sl_high=tracker.trailing_sl_high,
-                                skip_reason="MARKET_CLOSED")
-                continue
-
-            # ── Auto-exit at market close ─────────────────────────────────────
-            if state.current_position and bar_time >= _auto_exit_time:
-                cr = self._close_trade(result, state, tracker, bar_time, c, pricer, equity, trade_no, "MARKET_CLOSE")
-                result, equity, trade_no = cr.result, cr.equity, cr.trade_no
-                state.reset_trade_attributes(current_position=None)
-                tracker.reset()
-                result.equity_curve.append({"timestamp": bar_time, "equity": round(equity, 2)})
-                continue
-
-            # ── History buffer ────────────────────────────────────────────────
-            history_rows.append({"time": bar_time, "open": o, "high": h, "low": l, "close": c, "volume": 0,
-                                  "is_new_day": is_new_day})
-            if len(history_rows) > HISTORY_BUFFER_MAX:
-                del history_rows[:-HISTORY_BUFFER_MAX]
-
-            if len(history_rows) < MIN_WARMUP_BARS:
-                cnt["warmup"] += 1
-                debugger.record(bar_time=bar_time, o=o, h=h, l=l, c=c,
-                                sig_result=None, action="SKIP", state=state,
-                                bars_in_trade=tracker.bars_in_trade,
-                                trailing_sl_high=tracker.trailing_sl_high,
-                                skip_reason=f"WARMUP({len(history_rows)}/{MIN_WARMUP_BARS})")
-                continue
-
-            if _cooldown_end and bar_time < _cooldown_end:
-                cnt["cooldown"] += 1
-
-            hist_df = pd.DataFrame(history_rows)
-
-            # ── Signal evaluation ─────────────────────────────────────────────
-            sig_result = None
-            raw_signal = "WAIT"
-
-            if signal_engine:
-                try:
-                    sig_result = signal_engine.evaluate(hist_df, current_position=state.current_position)
-
-                    if sig_result and sig_result.get("available", False):
-                        raw_signal  = sig_result.get("signal_value", "WAIT")
-                        override_reason = ""
-
-                        # Position-aware override: suppress exit signals when flat
-                        if state.current_position is None and raw_signal in ("EXIT_CALL", "EXIT_PUT", "HOLD"):
-                            conf = sig_result.get("confidence", {})
-                            thresh = sig_result.get("threshold", 0.6)
-                            bc, bp = conf.get("BUY_CALL", 0.0), conf.get("BUY_PUT", 0.0)
-                            if bc >= thresh and bp >= thresh:
-                                raw_signal = "BUY_CALL" if bc >= bp else ("BUY_PUT" if bp > bc else "WAIT")
-                                override_reason = f"flat+conflict→{raw_signal}(bc={bc:.0%},bp={bp:.0%})"
-                            elif bc >= thresh:
-                                raw_signal = "BUY_CALL"; override_reason = f"flat:exit→BUY_CALL(conf={bc:.0%})"
-                            elif bp >= thresh:
-                                raw_signal = "BUY_PUT";  override_reason = f"flat:exit→BUY_PUT(conf={bp:.0%})"
-                            else:
-                                raw_signal = "WAIT";     override_reason = f"flat:exit_suppressed(bc={bc:.0%},bp={bp:.0%})"
-
-                        if override_reason:
-                            sig_result = {**sig_result, "signal_value": raw_signal, "signal": raw_signal,
-                                          "_bt_override": override_reason}
-
-                        state.option_signal_result = sig_result
-                        _signals_seen[raw_signal] = _signals_seen.get(raw_signal, 0) + 1
-
-                        if logger.isEnabledFor(logging.DEBUG):
-                            _bt_log_candle_assessment(bar_time, o, h, l, c, sig_result,
-                                                       state.current_position, len(history_rows), is_new_day)
-                    else:
-                        raw_signal = "WAIT"
-                        state.option_signal_result = None
-
-                except Exception as exc:
-                    logger.warning("[BT %s] SignalEngine error: %s", f"{bar_time:%H:%M}", exc, exc_info=True)
-                    state.option_signal_result = None
-                    raw_signal = "WAIT"
-
-            action = self._signal_to_action(raw_signal, state)
-
-            # ── Debug context for open position ───────────────────────────────
-            _tp_sl_debug = None; _opt_bar_debug = None
-            if cfg.debug_candles and state.current_position:
-                _tp_sl_debug, _opt_bar_debug = self._build_debug_tpsl(
-                    state, tracker, bar_time, o, h, l, c, pricer, cfg, result
-                )
-
-            if cfg.debug_candles:
-                debugger.record(bar_time=bar_time, o=o, h=h, l=l, c=c,
-                                sig_result=sig_result, action=action, state=state,
-                                bars_in_trade=tracker.bars_in_trade,
-                                trailing_sl_high=tracker.trailing_sl_high,
-                                option_bar=_opt_bar_debug, tp_sl_info=_tp_sl_debug)
-
-            # ── Monitor open position (TP / SL / exit checks) ─────────────────
-            if state.current_position:
-                strike   = tracker.strike or atm_strike(c, cfg.derivative)
-                opt_type = "CE" if state.current_position == BaseEnums.CALL else "PE"
-                bar      = pricer.resolve_bar(bar_time, o, h, l, c, opt_type,
-                                              minutes_per_bar=cfg.execution_interval_minutes,
-                                              strike=strike)
-                opt_high, opt_low, opt_close = bar["high"], bar["low"], bar["close"]
-                src = bar["source"]
-
-                def _do_exit(reason: str, price: float):
-                    nonlocal equity, trade_no, result
-                    cr = self._close_trade(result, state, tracker, bar_time, c, pricer,
-                                           equity, trade_no, reason,
-                                           forced_option_price=price, forced_source=src)
-                    result, equity, trade_no = cr.result, cr.equity, cr.trade_no
-                    state.reset_trade_attributes(current_position=None)
-                    tracker.reset()
-                    result.equity_curve.append({"timestamp": bar_time, "equity": round(equity, 2)})
-
-                # TP
-                if cfg.tp_pct and state.current_buy_price:
-                    tp_price = state.current_buy_price * (1 + cfg.tp_pct)
-                    if opt_high >= tp_price:
-                        _do_exit("TP", tp_price); continue
-
-                # SL
-                if cfg.sl_pct and state.current_buy_price:
-                    sl_price = state.current_buy_price * (1 - cfg.sl_pct)
-                    if opt_low <= sl_price:
-                        _do_exit("SL", sl_price); continue
-
-                # Trailing SL
-                if cfg.trailing_sl_pct and state.current_buy_price:
-                    tracker.trailing_sl_high = max(tracker.trailing_sl_high or opt_high, opt_high)
-                    tsl_price = tracker.trailing_sl_high * (1 - cfg.trailing_sl_pct)
-                    if opt_low <= tsl_price:
-                        _do_exit("TRAILING_SL", tsl_price); continue
-
-                # Index SL
-                if cfg.index_sl is not None:
-                    es = tracker.spot_entry
-                    if es is not None:
-                        if state.current_position == BaseEnums.CALL and l <= es - cfg.index_sl:
-                            _do_exit("INDEX_SL", opt_low); continue
-                        if state.current_position == BaseEnums.PUT and h >= es + cfg.index_sl:
-                            _do_exit("INDEX_SL", opt_low); continue
-
-                # Max hold bars
-                tracker.bars_in_trade += 1
-                if cfg.max_hold_bars and tracker.bars_in_trade >= cfg.max_hold_bars:
-                    _do_exit("MAX_HOLD", opt_close); continue
-
-                # Signal exit
-                should_exit = (
-                    (state.current_position == BaseEnums.CALL and action in ("EXIT_CALL", "BUY_PUT")) or
-                    (state.current_position == BaseEnums.PUT  and action in ("EXIT_PUT",  "BUY_CALL"))
-                )
-                if should_exit:
-                    _do_exit("SIGNAL", opt_close); continue
-
-            # ── Entry logic ───────────────────────────────────────────────────
-            if state.current_position is None:
-                if   action == "BUY_CALL": opt_type = "CE"
-                elif action == "BUY_PUT":  opt_type = "PE"
-                else:
-                    cnt["no_signal"] += 1
-                    result.equity_curve.append({"timestamp": bar_time, "equity": round(equity, 2)})
-                    continue
-
-                _entry_attempts += 1
-                strike      = atm_strike(c, cfg.derivative)
-                opt_sym     = f"{cfg.derivative}{int(strike)}{opt_type}"
-                bar         = pricer.resolve_bar(bar_time, o, h, l, c, opt_type,
-                                                 minutes_per_bar=cfg.execution_interval_minutes)
-                entry_price = round(bar["close"] * (1 + cfg.slippage_pct), 2)
-
-                state.current_position = BaseEnums.CALL if opt_type == "CE" else BaseEnums.PUT
-                state.current_buy_price = entry_price
-                if opt_type == "CE": state.call_option = opt_sym
-                else:                state.put_option  = opt_sym
-
-                tracker.open(entry_time=bar_time, spot_entry=c, strike=strike,
-                             opt_type=opt_type, entry_price=entry_price,
-                             entry_source=bar["source"], signal_name=str(raw_signal))
-
-                logger.info("[BT %s] ENTRY #%d: %s strike=%d @ ₹%.2f | spot=%.0f | sig=%s",
-                            f"{bar_time:%d-%b %H:%M}", trade_no + 1, opt_type, int(strike),
-                            entry_price, c, raw_signal)
-            else:
-                cnt["in_trade"] += 1
-
-            result.equity_curve.append({"timestamp": bar_time, "equity": round(equity, 2)})
-
-        # ── Final close ───────────────────────────────────────────────────────
-        if state.current_position and not spot_df.empty:
-            last     = spot_df.iloc[-1]
-            last_ts  = (last["time"] if isinstance(last["time"], datetime)
-                        else pd.Timestamp(last["time"]).to_pydatetime())
-            # TZ-FIX: normalize to IST-aware instead of stripping timezone.
-            if last_ts.tzinfo is None:
-                last_ts = IST.localize(last_ts)
-            else:
-                last_ts = last_ts.astimezone(IST)
-            cr = self._close_trade(result, state, tracker, last_ts, last["close"],
-                                   pricer, equity, trade_no, "MARKET_CLOSE")
-            result, equity, trade_no = cr.result, cr.equity, cr.trade_no
-
-        logger.info(
-            "[Backtest] DONE — %d bars | sideway=%d market=%d warmup=%d cooldown=%d "
-            "no_signal=%d in_trade=%d | entries=%d trades=%d | signals=%s",
-            total_bars, cnt["sideway"], cnt["market"], cnt["warmup"], cnt["cooldown"],
-            cnt["no_signal"], cnt["in_trade"], _entry_attempts, trade_no, _signals_seen,
-        )
-        if _entry_attempts == 0:
-            logger.warning(
-                "[Backtest] ZERO entries — check: (1) strategy rules loaded, "
-                "(2) min_confidence not too high, (3) warmup bars >=15, "
-                "(4) sideway_zone not covering all signal bars."
-            )
-
-        self._emit(98, "Finalising statistics…")
-        result.finalize()
-
-        if cfg.analysis_timeframes and not result.error_msg:
-            try:
-                self._emit(98, "Building analysis data…")
-                result.analysis_data = self._build_analysis_data(spot_df, signal_engine)
-            except Exception as exc:
-                logger.warning("[BacktestEngine] Analysis build failed: %s", exc, exc_info=True)
-
-        if cfg.debug_candles and len(debugger) > 0:
-            import tempfile
-            dbg_path = cfg.debug_output_path or os.path.join(
-                tempfile.gettempdir(),
-                f"backtest_debug_{fmt_stamp()}.json"
-            )
-            if debugger.save(dbg_path):
-                result.debug_log_path = dbg_path
-                self._emit(99, f"Debug log → {dbg_path}")
-
-        result.debugger_entries = debugger.get_entries()
-        self._emit(100, f"Complete — {result.total_trades} trades | ₹{result.total_net_pnl:,.0f}")
-        return result
+        return session.finish()
 
     # ── Helpers ───────────────────────────────────────────────────────────────
 
@@ -795,7 +1234,8 @@ class BacktestEngine:
                 exit_source = forced_source or PriceSource.SYNTHETIC
             else:
                 bar = pricer.resolve_bar(exit_time, spot_exit, spot_exit, spot_exit, spot_exit,
-                                          opt_type, minutes_per_bar=self.config.execution_interval_minutes)
+                                          opt_type, minutes_per_bar=self.config.execution_interval_minutes,
+                                          strike=strike)
                 exit_price  = bar["close"] * (1 - self.config.slippage_pct)
                 exit_source = bar["source"]
 
@@ -805,6 +1245,11 @@ class BacktestEngine:
             lot_sz  = self.config.lot_size
 
             gross_pnl = (exit_price - entry_price) * lots * lot_sz
+            # Excursions include the exit price, so MAE ≤ realised ≤ MFE.
+            hi = max(tracker.max_price or exit_price, exit_price)
+            lo = min(tracker.min_price or exit_price, exit_price)
+            mfe = Utils.round_off(max(hi - entry_price, 0.0) * lots * lot_sz)
+            mae = Utils.round_off(min(lo - entry_price, 0.0) * lots * lot_sz)
             brokerage = self.config.brokerage_per_lot * lots * 2
             net_pnl   = Utils.round_off(gross_pnl - brokerage)
 
@@ -821,6 +1266,7 @@ class BacktestEngine:
                 brokerage=Utils.round_off(brokerage), net_pnl=net_pnl,
                 entry_source=tracker.entry_source, exit_source=exit_source,
                 exit_reason=exit_reason, signal_name=tracker.signal_name,
+                mae=mae, mfe=mfe,
             ))
 
             if exit_source == PriceSource.SYNTHETIC or tracker.entry_source == PriceSource.SYNTHETIC:
@@ -868,28 +1314,36 @@ class BacktestEngine:
             logger.debug("[_build_debug_tpsl] %s", exc)
         return tpsl, opt_bar
 
-    def _get_historical_option_symbol(self, derivative, strike, option_type, bar_time) -> Optional[str]:
+    def _get_historical_option_symbol(self, derivative, strike, option_type, bar_time,
+                                      expiry: Optional[datetime] = None) -> Optional[str]:
+        """Broker symbol for a contract; *expiry* skips the expiry lookup from *bar_time*."""
         try:
             exchange_symbol = OptionUtils.get_exchange_symbol(derivative)
             if self.config.expiry_type == "monthly":
-                y, m = bar_time.year, bar_time.month + 1
-                if m > 12: y += 1; m = 1
-                exp = OptionUtils.get_monthly_expiry_date(y, m, derivative=exchange_symbol)
-                if bar_time > exp:
-                    m += 1
+                if expiry is not None:
+                    exp = expiry
+                else:
+                    y, m = bar_time.year, bar_time.month + 1
                     if m > 12: y += 1; m = 1
                     exp = OptionUtils.get_monthly_expiry_date(y, m, derivative=exchange_symbol)
+                    if bar_time > exp:
+                        m += 1
+                        if m > 12: y += 1; m = 1
+                        exp = OptionUtils.get_monthly_expiry_date(y, m, derivative=exchange_symbol)
                 y2  = str(exp.year)[2:]
                 mon = OptionUtils.MONTHLY_MONTH_CODES.get(exp.month, "JAN")
                 sym = f"{exchange_symbol}{y2}{mon}{int(strike)}{option_type}"
             else:
-                from Utils.common import is_holiday
-                target_wd  = OptionUtils.EXPIRY_WEEKDAY_MAP.get(exchange_symbol, 1)
-                days_ahead = (target_wd - bar_time.weekday()) % 7 or 7
-                exp        = bar_time + timedelta(days=days_ahead)
-                for _ in range(10):
-                    if not is_holiday(exp): break
-                    exp -= timedelta(days=1)
+                if expiry is not None:
+                    exp = expiry
+                else:
+                    from Utils.common import is_holiday
+                    target_wd  = OptionUtils.EXPIRY_WEEKDAY_MAP.get(exchange_symbol, 1)
+                    days_ahead = (target_wd - bar_time.weekday()) % 7 or 7
+                    exp        = bar_time + timedelta(days=days_ahead)
+                    for _ in range(10):
+                        if not is_holiday(exp): break
+                        exp -= timedelta(days=1)
                 y2  = str(exp.year)[2:]
                 mon = OptionUtils.WEEKLY_MONTH_CODES.get(exp.month, str(exp.month))
                 sym = f"{exchange_symbol}{y2}{mon}{exp.day:02d}{int(strike)}{option_type}"
@@ -903,51 +1357,45 @@ class BacktestEngine:
             return f"{derivative}{int(strike)}{option_type}"
 
     def _build_analysis_data(self, spot_df: pd.DataFrame, signal_engine) -> Dict:
-        from backtest.backtest_window import BarAnalysis
+        """Per-timeframe BarAnalysis lists, evaluated in worker processes (backtest_analysis)."""
         result: Dict = {}
         if spot_df is None or spot_df.empty or not signal_engine:
             return result
 
+        frames: Dict[str, pd.DataFrame] = {}
         for tf_str in dict.fromkeys(self.config.analysis_timeframes):
             try:
                 tf_min = self._parse_tf_minutes(tf_str)
                 if tf_min == self.config.execution_interval_minutes or tf_min == 1:
-                    tf_df = spot_df.copy()
+                    tf_df = spot_df
                 else:
                     if tf_min < self.config.execution_interval_minutes:
                         logger.debug("[Analysis] skip %s: cannot upsample from %dm", tf_str, self.config.execution_interval_minutes)
                         continue
                     tf_df = resample_df(spot_df, tf_min)
                 if tf_df is None or tf_df.empty: continue
-                if not pd.api.types.is_datetime64_any_dtype(tf_df["time"]):
-                    tf_df["time"] = pd.to_datetime(tf_df["time"])
-
-                bars: list = []; history: list = []
-                for _, row in tf_df.iterrows():
-                    ts = row["time"]
-                    bt = ts if isinstance(ts, datetime) else pd.Timestamp(ts).to_pydatetime()
-                    # TZ-FIX: normalize to IST-aware instead of stripping timezone.
-                    bt = IST.localize(bt) if bt.tzinfo is None else bt.astimezone(IST)
-                    history.append({"time": bt, "open": row["open"], "high": row["high"],
-                                    "low": row["low"], "close": row["close"], "volume": 0})
-                    if len(history) > HISTORY_BUFFER_MAX: del history[:-HISTORY_BUFFER_MAX]
-                    if len(history) < MIN_WARMUP_BARS: continue
-                    try:
-                        sr = signal_engine.evaluate(pd.DataFrame(history), current_position=None)
-                    except Exception: continue
-                    if not sr or not sr.get("available", False): continue
-                    bars.append(BarAnalysis(
-                        timestamp=bt, spot_price=row["close"],
-                        signal=sr.get("signal_value", "WAIT"),
-                        confidence=dict(sr.get("confidence", {})),
-                        rule_results=dict(sr.get("rule_results", {})),
-                        indicator_values=dict(sr.get("indicator_values", {})),
-                        timeframe=tf_str,
-                    ))
-                result[tf_str] = bars
-                logger.info("[Analysis] %s: %d bars", tf_str, len(bars))
+                frames[tf_str] = prepare_frame(tf_df)
             except Exception as exc:
                 logger.warning("[BacktestEngine._build_analysis_data] %s: %s", tf_str, exc, exc_info=True)
+        if not frames:
+            return result
+
+        def _progress(done: int, total: int):
+            self._emit(98, f"Building analysis data… {done}/{total} chunks")
+
+        records = analyse_timeframes(frames, signal_engine,
+                                     history_max=HISTORY_BUFFER_MAX, warmup=MIN_WARMUP_BARS,
+                                     workers=self.config.analysis_workers, progress=_progress)
+        for tf_str, frame in frames.items():
+            times = frame["time"].dt.to_pydatetime()
+            closes = frame["close"].to_numpy()
+            result[tf_str] = [
+                BarAnalysis(timestamp=times[i], spot_price=float(closes[i]), signal=signal,
+                            confidence=confidence, rule_results=rules,
+                            indicator_values=indicators, timeframe=tf_str)
+                for i, signal, confidence, rules, indicators in records.get(tf_str, [])
+            ]
+            logger.info("[Analysis] %s: %d bars", tf_str, len(result[tf_str]))
         return result
 
     @staticmethod
@@ -0,0 +1,373 @@
+"""
+backtest/backtest_history_tab.py
+================================
+"Saved Runs" tab for the Backtest Window — browse and compare backtests
+persisted by backtest_results_store.
+
+Only summary rows are queried when the tab is shown; equity curves are
+loaded on demand for the runs selected for comparison (and cached by the
+store), so the tab stays fast with hundreds of saved runs.
+
+Layout
+------
+┌─────────────────────────────────────────────────────────────────┐
+│  Strategy: [ALL ▾]  Derivative: [ALL ▾]  Sort: [Created ▾] [⟳] │
+├────┬──────────────────┬──────────┬──────┬────────┬──────┬───────┤
+│ ID │ Created          │ Strategy │ From │ Trades │ P&L  │ …     │
+├────┴──────────────────┴──────────┴──────┴────────┴──────┴───────┤
+│  Equity overlay of the selected runs (pyqtgraph when available) │
+│  Side-by-side metrics table                                     │
+└─────────────────────────────────────────────────────────────────┘
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, List
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import (
+    QAbstractItemView, QComboBox, QHBoxLayout, QHeaderView, QLabel,
+    QMessageBox, QPushButton, QSplitter, QTableWidget, QTableWidgetItem,
+    QVBoxLayout, QWidget,
+)
+
+# Rule 13.1: Import theme manager
+from gui.theme_manager import theme_manager
+
+logger = logging.getLogger(__name__)
+
+MAX_COMPARE = 6                   # equity curves overlaid at once
+LIST_LIMIT = 500
+
+_RUN_COLS = ["ID", "Created", "Strategy", "Derivative", "From", "To", "TF",
+             "Trades", "Net P&L", "Win %", "Max DD", "PF", "Sharpe"]
+_SORT_OPTIONS = [("Created", "created_at"), ("Net P&L", "total_net_pnl"),
+                 ("Sharpe", "sharpe"), ("Win %", "win_rate"),
+                 ("Max DD", "max_drawdown"), ("Profit factor", "profit_factor")]
+_COMPARE_ROWS = [("Net P&L", "total_net_pnl", "₹{:+,.0f}"), ("Trades", "total_trades", "{:d}"),
+                 ("Win %", "win_rate", "{:.1f}%"), ("Max DD", "max_drawdown", "₹{:,.0f}"),
+                 ("Profit factor", "profit_factor", "{:.2f}"), ("Sharpe", "sharpe", "{:.2f}"),
+                 ("Avg P&L", "avg_net_pnl", "₹{:+,.0f}"), ("Synthetic bars", "synthetic_bars", "{:d}"),
+                 ("Sortino", "sortino", "{:.2f}"), ("Calmar", "calmar", "{:.2f}"),
+                 ("Time in market", "time_in_market", "{:.1f}%"), ("Avg MAE", "avg_mae", "₹{:,.0f}"),
+                 ("Avg MFE", "avg_mfe", "₹{:+,.0f}")]
+
+
+class ThemedMixin:
+    """Mixin class to provide theme token shortcuts."""
+
+    @property
+    def _c(self):
+        return theme_manager.palette
+
+    @property
+    def _ty(self):
+        return theme_manager.typography
+
+    @property
+    def _sp(self):
+        return theme_manager.spacing
+
+
+def _fmt(template: str, value) -> str:
+    try:
+        return template.format(value)
+    except (TypeError, ValueError):
+        return "—" if value is None else str(value)
+
+
+class _NumItem(QTableWidgetItem):
+    """Table item that sorts by its numeric value."""
+
+    def __init__(self, text: str, value: float):
+        super().__init__(text)
+        self._value = value if value is not None else float("-inf")
+
+    def __lt__(self, other):
+        if isinstance(other, _NumItem):
+            return self._value < other._value
+        return super().__lt__(other)
+
+
+class BacktestHistoryTab(QWidget, ThemedMixin):
+    """Lists saved backtest runs and overlays the selected ones."""
+
+    def __init__(self, parent=None):
+        self._safe_defaults_init()
+        try:
+            super().__init__(parent)
+
+            # Rule 13.2: Connect to theme and density signals
+            theme_manager.theme_changed.connect(self.apply_theme)
+            theme_manager.density_changed.connect(self.apply_theme)
+
+            self._build_ui()
+            self.apply_theme()
+        except Exception as e:
+            logger.error(f"[BacktestHistoryTab.__init__] Failed: {e}", exc_info=True)
+            super().__init__(parent)
+
+    def _safe_defaults_init(self):
+        self._runs: List[Dict] = []
+        self._stale = True
+        self._pg_widget = None
+        self._table = None
+        self._compare_table = None
+
+    # ── UI ────────────────────────────────────────────────────────────────────
+
+    def _build_ui(self):
+        sp = self._sp
+        lay = QVBoxLayout(self)
+        lay.setContentsMargins(sp.PAD_MD, sp.PAD_MD, sp.PAD_MD, sp.PAD_MD)
+        lay.setSpacing(sp.GAP_SM)
+
+        bar = QHBoxLayout()
+        self._strategy_combo = QComboBox()
+        self._derivative_combo = QComboBox()
+        self._sort_combo = QComboBox()
+        for label, col in _SORT_OPTIONS:
+            self._sort_combo.addItem(label, col)
+        for caption, combo in (("Strategy:", self._strategy_combo),
+                               ("Derivative:", self._derivative_combo),
+                               ("Sort:", self._sort_combo)):
+            bar.addWidget(QLabel(caption))
+            bar.addWidget(combo)
+            combo.currentIndexChanged.connect(self._on_filter_changed)
+        bar.addStretch()
+        self._count_lbl = QLabel("")
+        bar.addWidget(self._count_lbl)
+        self._delete_btn = QPushButton("🗑  Delete")
+        self._delete_btn.clicked.connect(self._delete_selected)
+        bar.addWidget(self._delete_btn)
+        refresh_btn = QPushButton("⟳  Refresh")
+        refresh_btn.clicked.connect(self.refresh)
+        bar.addWidget(refresh_btn)
+        lay.addLayout(bar)
+
+        splitter = QSplitter(Qt.Vertical)
+        self._table = QTableWidget(0, len(_RUN_COLS))
+        self._table.setHorizontalHeaderLabels(_RUN_COLS)
+        self._table.setAlternatingRowColors(True)
+        self._table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self._table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self._table.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self._table.setSortingEnabled(True)
+        self._table.verticalHeader().setVisible(False)
+        hdr = self._table.horizontalHeader()
+        hdr.setSectionResizeMode(QHeaderView.ResizeToContents)
+        hdr.setStretchLastSection(True)
+        self._table.itemSelectionChanged.connect(self._on_selection_changed)
+        splitter.addWidget(self._table)
+
+        compare = QWidget()
+        c_lay = QHBoxLayout(compare)
+        c_lay.setContentsMargins(0, 0, 0, 0)
+        try:
+            import pyqtgraph as pg
+            self._pg_widget = pg.PlotWidget()
+            self._pg_widget.setLabel("left", "Equity (₹)")
+            self._pg_widget.setLabel("bottom", "Bar #")
+            self._pg_widget.showGrid(x=True, y=True, alpha=0.15)
+            self._pg_widget.addLegend()
+            c_lay.addWidget(self._pg_widget, 3)
+        except ImportError:
+            self._pg_widget = None
+        self._compare_table = QTableWidget(0, 0)
+        self._compare_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self._compare_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        c_lay.addWidget(self._compare_table, 2)
+        splitter.addWidget(compare)
+        splitter.setSizes([300, 260])
+        lay.addWidget(splitter, 1)
+
+        self._hint = QLabel(f"Select up to {MAX_COMPARE} runs to compare. "
+                            "Identical re-runs are served from this store instead of being replayed.")
+        lay.addWidget(self._hint)
+
+    def apply_theme(self, _: str = None) -> None:
+        try:
+            c, sp, ty = self._c, self._sp, self._ty
+            if self._table is None:
+                return
+            table_ss = f"""
+                QTableWidget {{
+                    background: {c.BG_MAIN};
+                    alternate-background-color: {c.BG_PANEL};
+                    gridline-color: {c.BORDER};
+                    border: 1px solid {c.BORDER};
+                    border-radius: {sp.RADIUS_MD}px;
+                    color: {c.TEXT_MAIN};
+                }}
+                QTableWidget::item:selected {{
+                    background: {c.BG_SELECTED};
+                    color: {c.TEXT_MAIN};
+                }}
+                QHeaderView::section {{
+                    background: {c.BG_HOVER};
+                    color: {c.TEXT_MAIN};
+                    border: none;
+                    border-bottom: 1px solid {c.BORDER};
+                    padding: {sp.PAD_SM}px;
+                    font-weight: {ty.WEIGHT_BOLD};
+                }}
+            """
+            self._table.setStyleSheet(table_ss)
+            self._compare_table.setStyleSheet(table_ss)
+            self._hint.setStyleSheet(f"color: {c.TEXT_DIM}; font-size: {ty.SIZE_XS}pt;")
+            self._count_lbl.setStyleSheet(f"color: {c.TEXT_DIM}; font-size: {ty.SIZE_XS}pt;")
+            if self._pg_widget is not None:
+                self._pg_widget.setBackground(c.BG_MAIN)
+        except Exception as e:
+            logger.error(f"[BacktestHistoryTab.apply_theme] Failed: {e}", exc_info=True)
+
+    # ── Loading ───────────────────────────────────────────────────────────────
+
+    def mark_stale(self) -> None:
+        """Re-query on next show (call after a run has been saved)."""
+        self._stale = True
+        if self.isVisible():
+            self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._stale:
+            self.refresh()
+
+    def refresh(self) -> None:
+        try:
+            from backtest.backtest_results_store import results_store
+            self._stale = False
+            self._runs = results_store.list_runs(limit=LIST_LIMIT)
+            self._reload_filter_options()
+            self._fill_table()
+        except Exception as e:
+            logger.error(f"[BacktestHistoryTab.refresh] Failed: {e}", exc_info=True)
+
+    def _reload_filter_options(self):
+        for combo, key in ((self._strategy_combo, "strategy_slug"),
+                           (self._derivative_combo, "derivative")):
+            current = combo.currentData()
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem("ALL", None)
+            for value in sorted({r[key] for r in self._runs if r.get(key)}):
+                combo.addItem(value, value)
+            idx = combo.findData(current)
+            combo.setCurrentIndex(idx if idx >= 0 else 0)
+            combo.blockSignals(False)
+
+    def _on_filter_changed(self, *_):
+        if not self._stale:
+            self._fill_table()
+
+    def _filtered_runs(self) -> List[Dict]:
+        strategy = self._strategy_combo.currentData()
+        derivative = self._derivative_combo.currentData()
+        order = self._sort_combo.currentData() or "created_at"
+        rows = [r for r in self._runs
+                if (strategy is None or r.get("strategy_slug") == strategy)
+                and (derivative is None or r.get("derivative") == derivative)]
+        rows.sort(key=lambda r: (r.get(order) is None, r.get(order) or 0),
+                  reverse=order != "max_drawdown")
+        return rows
+
+    def _fill_table(self):
+        c = self._c
+        rows = self._filtered_runs()
+        t = self._table
+        t.setSortingEnabled(False)
+        t.setRowCount(len(rows))
+        for i, r in enumerate(rows):
+            pnl = r.get("total_net_pnl") or 0.0
+            cells = [
+                _NumItem(str(r["id"]), r["id"]),
+                QTableWidgetItem(str(r.get("created_at") or "")),
+                QTableWidgetItem(r.get("strategy_slug") or "—"),
+                QTableWidgetItem(r.get("derivative") or ""),
+                QTableWidgetItem(r.get("start_date") or ""),
+                QTableWidgetItem(r.get("end_date") or ""),
+                _NumItem(f"{r.get('interval_minutes') or 0}m", r.get("interval_minutes")),
+                _NumItem(str(r.get("total_trades") or 0), r.get("total_trades")),
+                _NumItem(_fmt("₹{:+,.0f}", pnl), pnl),
+                _NumItem(_fmt("{:.1f}", r.get("win_rate")), r.get("win_rate")),
+                _NumItem(_fmt("₹{:,.0f}", r.get("max_drawdown")), r.get("max_drawdown")),
+                _NumItem(_fmt("{:.2f}", r.get("profit_factor")), r.get("profit_factor")),
+                _NumItem(_fmt("{:.2f}", r.get("sharpe")), r.get("sharpe")),
+            ]
+            cells[8].setForeground(QColor(c.GREEN if pnl >= 0 else c.RED))
+            cells[0].setData(Qt.UserRole, r["id"])
+            for col, item in enumerate(cells):
+                t.setItem(i, col, item)
+        t.setSortingEnabled(True)
+        self._count_lbl.setText(f"{len(rows)} of {len(self._runs)} runs")
+        self._on_selection_changed()
+
+    # ── Comparison ────────────────────────────────────────────────────────────
+
+    def _selected_ids(self) -> List[int]:
+        rows = sorted({idx.row() for idx in self._table.selectionModel().selectedRows()})
+        ids = []
+        for row in rows:
+            item = self._table.item(row, 0)
+            if item is not None:
+                ids.append(int(item.data(Qt.UserRole)))
+        return ids
+
+    def _on_selection_changed(self):
+        try:
+            ids = self._selected_ids()[:MAX_COMPARE]
+            by_id = {r["id"]: r for r in self._runs}
+            self._draw_overlay(ids, by_id)
+            self._fill_compare_table([by_id[i] for i in ids if i in by_id])
+        except Exception as e:
+            logger.error(f"[BacktestHistoryTab._on_selection_changed] Failed: {e}", exc_info=True)
+
+    def _draw_overlay(self, ids: List[int], by_id: Dict[int, Dict]):
+        if self._pg_widget is None:
+            return
+        import pyqtgraph as pg
+        from backtest.backtest_results_store import results_store
+
+        c = self._c
+        colors = [c.BLUE, c.GREEN, c.ORANGE, c.YELLOW, c.RED, c.TEXT_DIM]
+        pw = self._pg_widget
+        pw.clear()
+        for n, run_id in enumerate(ids):
+            curve = results_store.load_equity(run_id)
+            if not curve:
+                continue
+            name = f"#{run_id} {by_id.get(run_id, {}).get('strategy_slug') or ''}".strip()
+            pw.plot(list(range(len(curve))), [e["equity"] for e in curve],
+                    pen=pg.mkPen(color=colors[n % len(colors)], width=2), name=name)
+
+    def _fill_compare_table(self, runs: List[Dict]):
+        t = self._compare_table
+        t.clear()
+        t.setColumnCount(len(runs))
+        t.setRowCount(len(_COMPARE_ROWS))
+        t.setHorizontalHeaderLabels([f"#{r['id']}" for r in runs])
+        t.setVerticalHeaderLabels([label for label, _, _ in _COMPARE_ROWS])
+        if not runs:
+            return
+        from backtest.backtest_results_store import results_store
+
+        for col, r in enumerate(runs):
+            metrics = results_store.load_metrics(r["id"])
+            for row, (_, key, template) in enumerate(_COMPARE_ROWS):
+                t.setItem(row, col, QTableWidgetItem(_fmt(template, metrics.get(key, r.get(key)))))
+
+    def _delete_selected(self):
+        ids = self._selected_ids()
+        if not ids:
+            return
+        answer = QMessageBox.question(self, "Delete saved runs",
+                                      f"Delete {len(ids)} saved run(s)? This cannot be undone.")
+        if answer != QMessageBox.Yes:
+            return
+        from backtest.backtest_results_store import results_store
+        for run_id in ids:
+            results_store.delete(run_id)
+        self.refresh()
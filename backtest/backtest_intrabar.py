@@ -0,0 +1,192 @@
+"""
+backtest/backtest_intrabar.py
+=============================
+Intrabar price paths for TP / SL resolution.
+
+From bars alone the replay cannot tell whether TP or SL came first when both
+lie inside one bar's range, and the trailing stop is raised to the bar high
+and then tested against the same bar's low even when the low came first.
+Live trading (PositionMonitor) reacts per tick.  With an IntrabarPathModel
+the replay walks the exit checks along a sub-bar path instead:
+
+    ohlc       open → nearer extreme → other extreme → close, the usual
+               ordering heuristic (a bullish bar dips first).  The path is
+               piecewise linear, so its four vertices are all that matter.
+    bridge     Brownian bridge from open to close with *steps* sub-steps,
+               stretched to touch exactly the bar's high and low.  Shapes
+               are drawn INTRABAR_BLOCK at a time (one numpy call) from a
+               seeded generator, so runs are reproducible.
+    recorded   the recorded 1-minute option bars inside the bar
+               (OptionBarStore), each walked with the ohlc ordering; bars
+               without recorded minutes fall back to bridge.
+
+The path is built on the primary series — the option bar when it is REAL or
+recorded, spot otherwise — and mapped monotonically onto the other, so TP /
+SL / trailing SL see option prices and index SL sees spot.  first_exit()
+tests every level over the whole path with array ops and returns the
+earliest hit; ties keep the bar-level priority TP → SL → TRAILING_SL →
+INDEX_SL.
+
+Every path stays inside its bar's range, so a bar with no bar-level exit has
+none on any path; the replay only asks for a path on bars where the
+bar-level checks fire, which keeps the cost close to the bar-only run.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+INTRABAR_MODELS = ("off", "ohlc", "bridge", "recorded")
+DEFAULT_INTRABAR_STEPS = 30
+INTRABAR_BLOCK = 4096             # bridge shapes generated per numpy call
+
+# Exit priority when two levels are hit at the same path point (bar-level order)
+_PRIORITY = {"TP": 0, "SL": 1, "TRAILING_SL": 2, "INDEX_SL": 3}
+
+
+def _ohlc_vertices(o, h, low, c) -> np.ndarray:
+    """OHLC ordering heuristic for one bar or (k,) arrays of bars → (…, 4) vertices."""
+    bullish = np.asarray(c) >= np.asarray(o)
+    first = np.where(bullish, low, h)
+    second = np.where(bullish, h, low)
+    return np.stack([np.broadcast_to(o, first.shape), first, second,
+                     np.broadcast_to(c, first.shape)], axis=-1)
+
+
+def _remap(x: np.ndarray, a_lo: float, a_hi: float, b_lo: float, b_hi: float,
+           increasing: bool) -> np.ndarray:
+    """Map *x* from [a_lo, a_hi] onto [b_lo, b_hi] (reversed when not *increasing*)."""
+    if a_hi <= a_lo:
+        return np.full(x.shape, (b_lo + b_hi) / 2)
+    frac = (x - a_lo) / (a_hi - a_lo)
+    return b_lo + frac * (b_hi - b_lo) if increasing else b_hi - frac * (b_hi - b_lo)
+
+
+def _first(mask: np.ndarray) -> int:
+    """Index of the first True in *mask*, or len(mask)."""
+    i = int(mask.argmax())
+    return i if mask[i] else mask.size
+
+
+class IntrabarPathModel:
+    """Sub-bar paths and first-exit resolution for one replay (see module docstring)."""
+
+    def __init__(self, model: str = "bridge", steps: int = DEFAULT_INTRABAR_STEPS, seed: int = 0):
+        if model not in INTRABAR_MODELS or model == "off":
+            raise ValueError(f"unknown intrabar model {model!r} (expected one of "
+                             f"{', '.join(INTRABAR_MODELS[1:])})")
+        self.model = model
+        self.steps = max(2, int(steps))
+        self._rng = np.random.default_rng(seed)
+        self._t = np.linspace(0.0, 1.0, self.steps + 1)
+        self._bank = np.empty((0, self.steps + 1))
+        self._bank_seed_state = None      # generator state the current bank was drawn from
+        self._next = 0
+        self.stats = {"paths": 0, "recorded": 0}
+
+    # ── Checkpoint state ──────────────────────────────────────────────────────
+
+    def get_state(self) -> Dict:
+        """Picklable position in the path sequence; the bank itself is redrawn on restore."""
+        return {"bank_seed": self._bank_seed_state, "rng": self._rng.bit_generator.state,
+                "next": self._next, "stats": dict(self.stats)}
+
+    def set_state(self, state: Dict) -> None:
+        if state.get("bank_seed") is not None:
+            self._rng.bit_generator.state = state["bank_seed"]
+            self._refill()
+        self._rng.bit_generator.state = state["rng"]
+        self._next = state["next"]
+        self.stats = dict(state["stats"])
+
+    # ── Paths ─────────────────────────────────────────────────────────────────
+
+    def _refill(self) -> None:
+        self._bank_seed_state = self._rng.bit_generator.state
+        walk = np.cumsum(self._rng.standard_normal((INTRABAR_BLOCK, self.steps)), axis=1)
+        walk = np.concatenate([np.zeros((INTRABAR_BLOCK, 1)), walk], axis=1)
+        self._bank = walk - self._t * walk[:, -1:]
+        self._next = 0
+
+    def _bridge_shape(self) -> np.ndarray:
+        """One standard Brownian bridge (0 at both ends) of steps + 1 points."""
+        if self._next >= len(self._bank):
+            self._refill()
+        shape = self._bank[self._next]
+        self._next += 1
+        return shape
+
+    def _bridge(self, o: float, h: float, low: float, c: float) -> np.ndarray:
+        w = self._bridge_shape()
+        up, dn = int(w.argmax()), int(w.argmin())
+        if w[up] <= 0 or w[dn] >= 0:
+            return _ohlc_vertices(o, h, low, c)
+        line = o + (c - o) * self._t
+        x = line + np.clip(w, 0, None) / w[up] * (h - line[up]) \
+                 + np.clip(w, None, 0) / -w[dn] * (line[dn] - low)
+        x = np.clip(x, low, h)
+        x[up], x[dn] = h, low
+        return x
+
+    def path(self, o: float, h: float, low: float, c: float,
+             sub_bars: Optional[np.ndarray] = None) -> np.ndarray:
+        """Price path through one bar: recorded minutes when given, else the model's."""
+        self.stats["paths"] += 1
+        if sub_bars is not None and len(sub_bars):
+            self.stats["recorded"] += 1
+            return _ohlc_vertices(sub_bars[:, 0], sub_bars[:, 1], sub_bars[:, 2], sub_bars[:, 3]).ravel()
+        if self.model == "ohlc":
+            return _ohlc_vertices(o, h, low, c)
+        return self._bridge(o, h, low, c)
+
+    def paths(self, spot_ohlc: Tuple[float, float, float, float], opt_bar: Dict,
+              opt_type: str, primary_option: bool,
+              sub_bars: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(option path, spot path) for one bar; the secondary is mapped from the primary."""
+        so, sh, sl, sc = spot_ohlc
+        oo, oh, ol, oc = opt_bar["open"], opt_bar["high"], opt_bar["low"], opt_bar["close"]
+        rising = opt_type == "CE"
+        if primary_option or sub_bars is not None:
+            opt_path = self.path(oo, oh, ol, oc, sub_bars)
+            return opt_path, _remap(opt_path, ol, oh, sl, sh, rising)
+        spot_path = self.path(so, sh, sl, sc)
+        return _remap(spot_path, sl, sh, ol, oh, rising), spot_path
+
+    # ── Exit resolution ───────────────────────────────────────────────────────
+
+    @staticmethod
+    def first_exit(opt_path: np.ndarray, spot_path: np.ndarray, *,
+                   tp: Optional[float] = None, sl: Optional[float] = None,
+                   trail_pct: Optional[float] = None, trail_high: Optional[float] = None,
+                   index_level: Optional[float] = None, index_below: bool = True,
+                   ) -> Tuple[Optional[str], Optional[float], Optional[float]]:
+        """
+        Earliest exit along the path: (reason, fill price, trailing high).
+
+        reason / price are None when no level is hit; the trailing high is the
+        running high at the exit point (or the path's end) when trailing is on.
+        """
+        n = opt_path.size
+        hits = []
+        if tp is not None:
+            hits.append((_first(opt_path >= tp), "TP", tp))
+        if sl is not None:
+            hits.append((_first(opt_path <= sl), "SL", sl))
+        running = None
+        if trail_pct:
+            start = opt_path[0] if trail_high is None else max(trail_high, opt_path[0])
+            running = np.maximum.accumulate(np.maximum(opt_path, start))
+            stops = running * (1 - trail_pct)
+            i = _first(opt_path <= stops)
+            hits.append((i, "TRAILING_SL", float(stops[i]) if i < n else None))
+        if index_level is not None:
+            i = _first(spot_path <= index_level if index_below else spot_path >= index_level)
+            hits.append((i, "INDEX_SL", float(opt_path[i]) if i < n else None))
+
+        hits = [h for h in hits if h[0] < n]
+        if not hits:
+            return None, None, float(running[-1]) if running is not None else None
+        i, reason, price = min(hits, key=lambda h: (h[0], _PRIORITY[h[1]]))
+        return reason, price, float(running[i]) if running is not None else None
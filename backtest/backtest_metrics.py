@@ -0,0 +1,164 @@
+"""
+backtest/backtest_metrics.py
+============================
+Vectorised result metrics for BacktestResult.finalize().
+
+compute_metrics() turns the trade list and equity curve into numpy arrays
+once and derives every metric from them — no per-trade Python loops beyond
+the array extraction:
+
+    totals          trades, winners / losers, win rate, net / avg / best /
+                    worst P&L, profit factor
+    risk            max drawdown (₹ and % of peak equity), Sharpe and Sortino
+                    (per trade, √252-scaled as before), Calmar (annualised
+                    return on capital / max drawdown %; None without a
+                    drawdown or for runs shorter than CALMAR_MIN_DAYS trading
+                    days, where annualising a few days' return gives
+                    meaningless magnitudes)
+    streaks         longest winning and losing runs
+    excursions      average MAE / MFE (₹, from the option bar path recorded
+                    per trade) and the edge ratio MFE / |MAE|
+    exposure        time in market and average holding time, in trading
+                    minutes (Utils.expiry_calendar), so nights and weekends
+                    do not count
+    breakdowns      trades / net P&L / win rate by entry hour, entry weekday
+                    and exit reason
+
+Scalar keys match BacktestResult field names; "breakdowns" is a dict of
+dicts keyed by label strings so it survives a JSON round-trip unchanged.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from Utils.Utils import Utils
+from Utils.expiry_calendar import SESSION_MINUTES, TRADING_MINUTES_PER_YEAR, get_expiry_calendar
+
+logger = logging.getLogger(__name__)
+
+CALMAR_MIN_DAYS = 60      # trading days of equity curve before Calmar is reported
+
+_WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def _longest_run(mask: np.ndarray) -> int:
+    """Length of the longest run of True values in a 1-D bool array."""
+    if not mask.any():
+        return 0
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return int((edges[1::2] - edges[::2]).max())
+
+
+def _group(codes: np.ndarray, labels: Sequence[str], pnl: np.ndarray) -> Dict[str, Dict[str, float]]:
+    """Per-bucket trades / net P&L / win rate; empty buckets are left out."""
+    size = len(labels)
+    count = np.bincount(codes, minlength=size)
+    total = np.bincount(codes, weights=pnl, minlength=size)
+    wins = np.bincount(codes, weights=(pnl > 0).astype(float), minlength=size)
+    out: Dict[str, Dict[str, float]] = {}
+    for i in np.flatnonzero(count):
+        out[labels[i]] = {
+            "trades": int(count[i]),
+            "net_pnl": Utils.round_off(float(total[i])),
+            "avg_pnl": Utils.round_off(float(total[i] / count[i])),
+            "win_rate": round(float(wins[i] / count[i] * 100), 2),
+        }
+    return out
+
+
+def _trading_minutes(trades, equity_curve) -> tuple:
+    """(minutes in trades per trade, total minutes covered by the equity curve)."""
+    try:
+        first, last = equity_curve[0]["timestamp"], equity_curve[-1]["timestamp"]
+        cal = get_expiry_calendar(first.date())
+        if not cal.covers(last.date()):
+            cal = get_expiry_calendar(last.date())
+        held = np.fromiter((cal.trading_minutes_between(t.entry_time, t.exit_time)
+                            for t in trades), float, len(trades))
+        return held, cal.trading_minutes_between(first, last)
+    except Exception as exc:
+        logger.debug("[backtest_metrics] trading-minute lookup failed: %s", exc)
+        held = np.fromiter(((t.exit_time - t.entry_time).total_seconds() / 60 for t in trades),
+                           float, len(trades))
+        span = (equity_curve[-1]["timestamp"] - equity_curve[0]["timestamp"]).total_seconds() / 60
+        return held, span
+
+
+def compute_metrics(trades: List, equity_curve: List[Dict], capital: float) -> Dict[str, Any]:
+    """All BacktestResult metrics for *trades* and *equity_curve* (see module docstring)."""
+    n = len(trades)
+    metrics: Dict[str, Any] = {"total_trades": n}
+    if not n:
+        return metrics
+
+    pnl = np.fromiter((t.net_pnl for t in trades), float, n)
+    wins = pnl > 0
+    gross_profit = float(pnl[wins].sum())
+    gross_loss = float(-pnl[pnl < 0].sum())
+    total = float(pnl.sum())
+    metrics.update(
+        total_net_pnl=Utils.round_off(total),
+        winners=int(wins.sum()),
+        losers=int(n - wins.sum()),
+        win_rate=float(wins.mean() * 100),
+        avg_net_pnl=Utils.round_off(Utils.round_off(total) / n),
+        best_trade=Utils.round_off(float(pnl.max())),
+        worst_trade=Utils.round_off(float(pnl.min())),
+        profit_factor=Utils.round_off(gross_profit / gross_loss) if gross_loss else float("inf"),
+        max_win_streak=_longest_run(wins),
+        max_loss_streak=_longest_run(~wins),
+    )
+
+    if n > 1:
+        mean_r = total / n
+        std_r = float(pnl.std(ddof=1))
+        metrics["sharpe"] = Utils.round_off(mean_r / std_r * math.sqrt(252) if std_r else 0.0)
+        downside = float(np.sqrt(np.mean(np.minimum(pnl, 0.0) ** 2)))
+        metrics["sortino"] = Utils.round_off(mean_r / downside * math.sqrt(252) if downside else 0.0)
+
+    # ── Excursions ────────────────────────────────────────────────────────────
+    mae = np.fromiter((getattr(t, "mae", 0.0) or 0.0 for t in trades), float, n)
+    mfe = np.fromiter((getattr(t, "mfe", 0.0) or 0.0 for t in trades), float, n)
+    metrics["avg_mae"] = Utils.round_off(float(mae.mean()))
+    metrics["avg_mfe"] = Utils.round_off(float(mfe.mean()))
+    metrics["edge_ratio"] = Utils.round_off(float(mfe.mean() / -mae.mean())) if mae.mean() < 0 else 0.0
+
+    # ── Breakdowns ────────────────────────────────────────────────────────────
+    hours = np.fromiter((t.entry_time.hour for t in trades), np.int64, n)
+    weekdays = np.fromiter((t.entry_time.weekday() for t in trades), np.int64, n)
+    reasons, reason_codes = np.unique(np.array([str(t.exit_reason) for t in trades]), return_inverse=True)
+    metrics["breakdowns"] = {
+        "by_hour": _group(hours, [f"{h:02d}:00" for h in range(24)], pnl),
+        "by_weekday": _group(weekdays, _WEEKDAYS, pnl),
+        "by_exit_reason": _group(reason_codes, [str(r) for r in reasons], pnl),
+    }
+
+    if not equity_curve:
+        return metrics
+
+    # ── Drawdown / Calmar ─────────────────────────────────────────────────────
+    eq = np.fromiter((e["equity"] for e in equity_curve), float, len(equity_curve))
+    peak = np.maximum.accumulate(eq)
+    dd = eq - peak
+    metrics["max_drawdown"] = Utils.round_off(float(min(dd.min(), 0.0)))
+    pos = peak > 0
+    dd_pct = float((dd[pos] / peak[pos]).min() * 100) if pos.any() else 0.0
+    metrics["max_drawdown_pct"] = round(min(dd_pct, 0.0), 2)
+
+    # ── Exposure ──────────────────────────────────────────────────────────────
+    held, span = _trading_minutes(trades, equity_curve)
+    metrics["avg_hold_minutes"] = round(float(held.mean()), 1)
+    metrics["time_in_market"] = round(float(min(held.sum() / span, 1.0) * 100), 2) if span > 0 else 0.0
+    # A 10-day run at -2 % scales to ~-50 %/yr; below the minimum span Calmar
+    # is None (shown as "—") rather than a number nobody should compare.
+    metrics["calmar"] = None
+    if span >= CALMAR_MIN_DAYS * SESSION_MINUTES and capital and metrics["max_drawdown_pct"] < 0:
+        annual_pct = total / capital * 100 / (span / TRADING_MINUTES_PER_YEAR)
+        metrics["calmar"] = Utils.round_off(annual_pct / abs(metrics["max_drawdown_pct"]))
+    return metrics
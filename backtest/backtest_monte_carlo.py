@@ -0,0 +1,220 @@
+"""
+backtest/backtest_monte_carlo.py
+================================
+Monte Carlo robustness analysis of a finished backtest's trade sequence.
+
+A single backtest shows one ordering of its trades.  Resampling the trade
+P&Ls thousands of times shows how much of the result — especially the
+drawdown — was luck of the order:
+
+- ``bootstrap``   : draw n trades with replacement (also varies the mix).
+- ``permutation`` : shuffle the n trades (same final P&L, different path).
+
+All resamples are built as one (sims × trades) matrix, so the whole
+analysis is a handful of NumPy passes; 10 000 resamples of a few hundred
+trades take well under a second.  Very large matrices are processed in
+row chunks to bound memory.  The per-trade percentile bands (a sort per
+column, the one expensive step) use the first BAND_SIMULATIONS paths; the
+scalar distributions always use every simulation.
+
+Drawdowns follow ``BacktestResult.max_drawdown``: rupees, ≤ 0.  A trade with
+net P&L ≤ 0 counts as a loss, matching ``BacktestResult.losers``.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIMULATIONS = 10_000
+DEFAULT_PERCENTILES: Tuple[float, ...] = (5.0, 25.0, 50.0, 75.0, 95.0)
+DEFAULT_RUIN_FRACTION = 0.5       # ruin = equity falls to 50 % of starting capital
+MAX_CELLS = 8_000_000             # sims × trades per chunk (~64 MB of float64)
+BAND_SIMULATIONS = 2_500          # paths used for the percentile bands
+METHODS = ("bootstrap", "permutation")
+
+
+# ── Result container ──────────────────────────────────────────────────────────
+
+@dataclass
+class MonteCarloResult:
+    method: str
+    n_simulations: int
+    n_trades: int
+    capital: float
+    ruin_level: float
+    percentiles: Tuple[float, ...]
+    # (len(percentiles), n_trades + 1) equity after k trades, column 0 = capital
+    equity_bands: np.ndarray
+    final_pnl: np.ndarray               # (n_simulations,)
+    max_drawdown: np.ndarray            # (n_simulations,) rupees, ≤ 0
+    longest_losing_streak: np.ndarray   # (n_simulations,) int
+    prob_of_ruin: float
+    elapsed_s: float = 0.0
+    actual: Dict[str, float] = field(default_factory=dict)
+
+    def band(self, pct: float) -> np.ndarray:
+        """Equity path for one of the computed percentiles."""
+        try:
+            return self.equity_bands[self.percentiles.index(pct)]
+        except ValueError:
+            raise KeyError(f"percentile {pct} not computed; have {self.percentiles}") from None
+
+    def distribution(self, metric: str) -> Dict[str, float]:
+        """Percentile table (plus mean) for final_pnl / max_drawdown / longest_losing_streak."""
+        arr = getattr(self, metric)
+        qs = np.percentile(arr, self.percentiles)
+        out = {f"p{p:g}": float(v) for p, v in zip(self.percentiles, qs)}
+        out["mean"] = float(arr.mean())
+        return out
+
+    def summary(self) -> Dict:
+        return {
+            "method": self.method,
+            "n_simulations": self.n_simulations,
+            "n_trades": self.n_trades,
+            "capital": self.capital,
+            "ruin_level": self.ruin_level,
+            "prob_of_ruin": self.prob_of_ruin,
+            "final_pnl": self.distribution("final_pnl"),
+            "max_drawdown": self.distribution("max_drawdown"),
+            "longest_losing_streak": self.distribution("longest_losing_streak"),
+            "actual": dict(self.actual),
+            "elapsed_s": round(self.elapsed_s, 4),
+        }
+
+
+# ── Vectorised path metrics ───────────────────────────────────────────────────
+
+def longest_losing_streak(pnl_matrix: np.ndarray) -> np.ndarray:
+    """Longest run of P&L ≤ 0 in each row, without a Python loop over rows."""
+    loss = pnl_matrix <= 0
+    run = np.cumsum(loss, axis=1, dtype=np.int32)
+    # At every win, remember the running count; subtracting the last such
+    # value gives the length of the current losing run.
+    reset = np.maximum.accumulate(np.where(loss, 0, run), axis=1)
+    return (run - reset).max(axis=1, initial=0)
+
+
+def _path_stats(pnl_matrix: np.ndarray, capital: float, ruin_level: float):
+    equity = capital + np.cumsum(pnl_matrix, axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), capital)
+    max_dd = np.minimum((equity - peak).min(axis=1), 0.0)
+    ruined = equity.min(axis=1) <= ruin_level
+    return equity, equity[:, -1] - capital, max_dd, longest_losing_streak(pnl_matrix), ruined
+
+
+def _resample(rng: np.random.Generator, pnls: np.ndarray, rows: int, method: str) -> np.ndarray:
+    n = pnls.size
+    if method == "bootstrap":
+        return pnls[rng.integers(0, n, size=(rows, n))]
+    return rng.permuted(np.broadcast_to(pnls, (rows, n)), axis=1)
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+def run_monte_carlo(
+    pnls: Sequence[float],
+    capital: float,
+    n_simulations: int = DEFAULT_SIMULATIONS,
+    method: str = "bootstrap",
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    ruin_fraction: float = DEFAULT_RUIN_FRACTION,
+    seed: Optional[int] = None,
+) -> Optional[MonteCarloResult]:
+    """
+    Resample *pnls* (net P&L per trade, in order) and measure path risk.
+
+    Returns None when there are fewer than two trades — nothing to reorder.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    arr = np.asarray(pnls, dtype=float)
+    n = arr.size
+    if n < 2 or n_simulations < 1:
+        return None
+
+    t0 = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    pcts = tuple(float(p) for p in percentiles)
+    ruin_level = capital * (1.0 - ruin_fraction)
+
+    chunk = max(1, min(n_simulations, MAX_CELLS // n))
+    final = np.empty(n_simulations)
+    max_dd = np.empty(n_simulations)
+    streak = np.empty(n_simulations, dtype=np.int32)
+    ruined = 0
+    bands = None
+
+    for start in range(0, n_simulations, chunk):
+        rows = min(chunk, n_simulations - start)
+        paths = _resample(rng, arr, rows, method)
+        equity, f, dd, s, r = _path_stats(paths, capital, ruin_level)
+        final[start:start + rows] = f
+        max_dd[start:start + rows] = dd
+        streak[start:start + rows] = s
+        ruined += int(r.sum())
+        if bands is None:
+            bands = np.percentile(equity[:BAND_SIMULATIONS], pcts, axis=0)
+
+    bands = np.hstack([np.full((len(pcts), 1), float(capital)), bands])
+
+    _, a_final, a_dd, a_streak, _ = _path_stats(arr[None, :], capital, ruin_level)
+    res = MonteCarloResult(
+        method=method, n_simulations=n_simulations, n_trades=n,
+        capital=float(capital), ruin_level=float(ruin_level), percentiles=pcts,
+        equity_bands=bands, final_pnl=final, max_drawdown=max_dd,
+        longest_losing_streak=streak, prob_of_ruin=ruined / n_simulations,
+        actual={"final_pnl": float(a_final[0]), "max_drawdown": float(a_dd[0]),
+                "longest_losing_streak": int(a_streak[0])},
+    )
+    res.elapsed_s = time.perf_counter() - t0
+    logger.info("[MonteCarlo] %s × %d sims of %d trades in %.3fs | ruin=%.2f%%",
+                method, n_simulations, n, res.elapsed_s, res.prob_of_ruin * 100)
+    return res
+
+
+def monte_carlo_from_result(result, **kwargs) -> Optional[MonteCarloResult]:
+    """Run :func:`run_monte_carlo` on a finalized ``BacktestResult``."""
+    trades = getattr(result, "trades", None) or []
+    capital = getattr(getattr(result, "config", None), "capital", 100_000.0)
+    return run_monte_carlo([t.net_pnl for t in trades], capital, **kwargs)
+
+
+def trade_exit_positions(equity_curve, trades) -> np.ndarray:
+    """
+    Index into *equity_curve* at which each trade's P&L is first booked.
+
+    Lets trade-indexed Monte Carlo bands be drawn on the bar-indexed equity
+    chart: band column k + 1 is plotted at the bar where trade k closed.
+    """
+    if not equity_curve or not trades:
+        return np.empty(0, dtype=np.int64)
+    ts = np.array([np.datetime64(_naive_utc(e["timestamp"]), "ns") for e in equity_curve])
+    exits = np.array([np.datetime64(_naive_utc(t.exit_time), "ns") for t in trades])
+    pos = np.searchsorted(ts, exits, side="left")
+    return np.minimum(pos, len(equity_curve) - 1)
+
+
+def _naive_utc(dt):
+    if getattr(dt, "tzinfo", None) is not None:
+        from datetime import timezone
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def benchmark(n_trades: int = 250, n_simulations: int = DEFAULT_SIMULATIONS, seed: int = 11) -> Dict:
+    """Time both methods on synthetic trade P&Ls; returns seconds per method."""
+    rng = np.random.default_rng(seed)
+    pnls = rng.normal(150.0, 1800.0, n_trades)
+    out = {"n_trades": n_trades, "n_simulations": n_simulations}
+    for m in METHODS:
+        res = run_monte_carlo(pnls, 100_000.0, n_simulations, method=m, seed=seed)
+        out[f"{m}_s"] = round(res.elapsed_s, 4)
+    return out
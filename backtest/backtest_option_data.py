@@ -0,0 +1,390 @@
+"""
+backtest/backtest_option_data.py
+================================
+Historical option-contract bars for real-premium backtests.
+
+Before the replay, OptionBarStore.prefetch() loads 1-minute bars for every
+contract the replay can touch — for each trading day, the ATM strikes
+spanned by that day's spot range, CE and PE, at the expiry the pricer uses
+that day.  Each contract is read, in order of preference, from:
+
+1. the on-disk cache (``Data/option_bars/<DERIVATIVE>/<contract>.npz``),
+2. a local folder of per-contract files (``<contract>.csv|.parquet`` or
+   ``<broker symbol>.csv|.parquet``),
+3. the broker history API (get_history_for_timeframe, 1-minute).
+
+Loads run in a thread pool; whatever was fetched is written to the cache
+with the day range it covers, including "no data" results from a source
+that was asked, so a repeat run makes no network calls.  A request outside
+the cached range goes back to the sources and merges with the cache.
+Brokers usually cannot serve expired contracts, which is what the local
+folder is for.
+
+Each contract's bars are kept as dense arrays over epoch minutes, so a
+(contract, minute) lookup is one dict access plus an array index.
+OptionPricer.resolve_bar uses the store when it is attached and falls back
+to Black-Scholes when a contract or minute has no data.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from Utils.time_utils import IST, ist_now
+
+logger = logging.getLogger(__name__)
+
+OPTION_CACHE_DIR = os.path.join("Data", "option_bars")
+DEFAULT_PREFETCH_WORKERS = 8
+_NO_DATA = np.empty(0, dtype=np.int64)
+_EPOCH = pd.Timestamp(0, tz="UTC")
+
+ContractKey = Tuple[date, int, str]           # (expiry date, strike, "CE"/"PE")
+
+
+def contract_name(derivative: str, expiry: date, strike: int, option_type: str) -> str:
+    """Canonical file name stem, e.g. ``NIFTY_2025-01-09_22000_CE``."""
+    return f"{derivative.upper()}_{expiry:%Y-%m-%d}_{int(strike)}_{option_type}"
+
+
+def _epoch_minutes(ts) -> int:
+    if ts.tzinfo is None:
+        ts = IST.localize(ts)
+    return int(ts.timestamp()) // 60
+
+
+# ── One contract ──────────────────────────────────────────────────────────────
+
+class ContractBars:
+    """1-minute OHLC for one contract as dense arrays indexed by epoch minute."""
+
+    __slots__ = ("t0", "open", "high", "low", "close")
+
+    def __init__(self, minutes: np.ndarray, o: np.ndarray, h: np.ndarray,
+                 low: np.ndarray, c: np.ndarray) -> None:
+        if minutes.size == 0:
+            self.t0 = 0
+            self.open = self.high = self.low = self.close = np.empty(0)
+            return
+        order = np.argsort(minutes, kind="stable")
+        minutes = minutes[order]
+        self.t0 = int(minutes[0])
+        idx = minutes - self.t0
+        span = int(idx[-1]) + 1
+        arrays = []
+        for src in (o, h, low, c):
+            dense = np.full(span, np.nan)
+            dense[idx] = np.asarray(src, dtype=float)[order]
+            arrays.append(dense)
+        self.open, self.high, self.low, self.close = arrays
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(~np.isnan(self.close)))
+
+    def bar(self, minute: int, width: int = 1) -> Optional[Dict[str, float]]:
+        """OHLC over [minute, minute + width); None when no minute has data."""
+        i = minute - self.t0
+        if i < 0 or i >= self.close.size:
+            return None
+        if width <= 1:
+            c = self.close[i]
+            if c != c:                                     # NaN
+                return None
+            return {"open": self.open[i], "high": self.high[i], "low": self.low[i], "close": c}
+        j = min(i + width, self.close.size)
+        closes = self.close[i:j]
+        valid = np.flatnonzero(~np.isnan(closes))
+        if valid.size == 0:
+            return None
+        return {
+            "open": float(self.open[i + valid[0]]),
+            "high": float(np.nanmax(self.high[i:j])),
+            "low": float(np.nanmin(self.low[i:j])),
+            "close": float(closes[valid[-1]]),
+        }
+
+    def sub_bars(self, minute: int, width: int) -> Optional[np.ndarray]:
+        """(k, 4) OHLC rows for the minutes of [minute, minute + width) that have data."""
+        i = minute - self.t0
+        if i < 0 or i >= self.close.size:
+            return None
+        j = min(i + max(width, 1), self.close.size)
+        rows = np.column_stack((self.open[i:j], self.high[i:j], self.low[i:j], self.close[i:j]))
+        rows = rows[~np.isnan(rows[:, 3])]
+        return rows if rows.size else None
+
+
+# ── Contract requirements ─────────────────────────────────────────────────────
+
+@dataclass
+class ContractRequest:
+    expiry: datetime
+    strike: int
+    option_type: str
+    first_day: date
+    last_day: date
+
+
+def required_contracts(spot_df: pd.DataFrame, derivative: str,
+                       expiry_fn: Callable[[datetime], datetime]) -> Dict[ContractKey, ContractRequest]:
+    """
+    Contracts the replay can touch: per trading day, every ATM strike in the
+    day's low–high range (both option types) at that day's expiry.
+    """
+    from backtest.backtest_option_pricer import DEFAULT_STRIKE_STEP, STRIKE_STEP, atm_strike
+
+    step = STRIKE_STEP.get(derivative.upper(), DEFAULT_STRIKE_STEP)
+    times = pd.to_datetime(spot_df["time"])
+    if times.dt.tz is None:
+        times = times.dt.tz_localize(IST)
+    else:
+        times = times.dt.tz_convert(IST)
+    frame = pd.DataFrame({"day": times.dt.date, "time": times,
+                          "low": spot_df["low"].to_numpy(), "high": spot_df["high"].to_numpy()})
+    daily = frame.groupby("day").agg(first=("time", "min"), low=("low", "min"), high=("high", "max"))
+
+    out: Dict[ContractKey, ContractRequest] = {}
+    for day, row in daily.iterrows():
+        expiry = expiry_fn(row["first"].to_pydatetime())
+        lo, hi = int(atm_strike(row["low"], derivative)), int(atm_strike(row["high"], derivative))
+        for strike in range(lo, hi + step, step):
+            for opt in ("CE", "PE"):
+                key = (expiry.date(), strike, opt)
+                req = out.get(key)
+                if req is None:
+                    out[key] = ContractRequest(expiry, strike, opt, day, day)
+                else:
+                    req.first_day = min(req.first_day, day)
+                    req.last_day = max(req.last_day, day)
+    return out
+
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+
+class OptionBarStore:
+    """
+    Per-contract option bars for one underlying.
+
+    Parameters
+    ----------
+    derivative     : underlying name (cache sub-folder, contract names).
+    cache_dir      : on-disk cache root (default OPTION_CACHE_DIR).
+    local_dir      : optional folder of per-contract CSV/Parquet files.
+    broker         : optional broker for get_history_for_timeframe().
+    symbol_fn      : (strike, option_type, expiry) → broker symbol.
+    workers        : prefetch thread count.
+    """
+
+    def __init__(self, derivative: str, cache_dir: Optional[str] = None,
+                 local_dir: Optional[str] = None, broker=None,
+                 symbol_fn: Optional[Callable[[int, str, datetime], Optional[str]]] = None,
+                 workers: int = DEFAULT_PREFETCH_WORKERS) -> None:
+        self.derivative = derivative.upper()
+        self.cache_dir = os.path.join(cache_dir or OPTION_CACHE_DIR, self.derivative)
+        self.local_dir = local_dir or None
+        self.broker = broker
+        self.symbol_fn = symbol_fn
+        self.workers = max(1, int(workers))
+        self._contracts: Dict[ContractKey, ContractBars] = {}
+        self._lock = threading.Lock()
+        self.stats = {"cache": 0, "local": 0, "broker": 0, "missing": 0, "failed": 0}
+
+    def __len__(self) -> int:
+        return len(self._contracts)
+
+    def fingerprint(self) -> str:
+        """SHA-1 over every loaded contract's bars (part of the results-cache key)."""
+        h = hashlib.sha1()
+        for key in sorted(self._contracts):
+            bars = self._contracts[key]
+            h.update(f"{key[0]:%Y-%m-%d}|{key[1]}|{key[2]}|{bars.t0}".encode("utf-8"))
+            for arr in (bars.open, bars.high, bars.low, bars.close):
+                h.update(np.ascontiguousarray(arr).tobytes())
+        return h.hexdigest()
+
+    # ── Lookup ────────────────────────────────────────────────────────────────
+
+    def bar(self, strike: float, option_type: str, expiry: date,
+            timestamp: datetime, minutes: int = 1) -> Optional[Dict[str, float]]:
+        """Real OHLC for the bar opening at *timestamp*, or None."""
+        bars = self._contracts.get((expiry, int(strike), option_type))
+        if bars is None:
+            return None
+        return bars.bar(_epoch_minutes(timestamp), minutes)
+
+    def sub_bars(self, strike: float, option_type: str, expiry: date,
+                 timestamp: datetime, minutes: int = 1) -> Optional[np.ndarray]:
+        """Recorded 1-minute OHLC rows inside the bar opening at *timestamp*, or None."""
+        bars = self._contracts.get((expiry, int(strike), option_type))
+        if bars is None:
+            return None
+        return bars.sub_bars(_epoch_minutes(timestamp), minutes)
+
+    # ── Prefetch ──────────────────────────────────────────────────────────────
+
+    def prefetch(self, requests: Dict[ContractKey, ContractRequest],
+                 progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, int]:
+        """Load every requested contract (cache → local files → broker) in parallel."""
+        todo = [(k, r) for k, r in requests.items() if k not in self._contracts]
+        if not todo:
+            return dict(self.stats)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        done = 0
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(todo)),
+                                thread_name_prefix="opt-prefetch") as pool:
+            futures = {pool.submit(self._load_contract, k, r): k for k, r in todo}
+            for fut in as_completed(futures):
+                key = futures[fut]
+                try:
+                    bars, source = fut.result()
+                except Exception as exc:
+                    logger.warning("[OptionBarStore] %s failed: %s", key, exc, exc_info=True)
+                    bars, source = None, "failed"
+                with self._lock:
+                    self.stats[source] += 1
+                    if bars is not None and len(bars):
+                        self._contracts[key] = bars
+                done += 1
+                if progress:
+                    progress(done, len(todo))
+        logger.info("[OptionBarStore] %s: %d contracts | %s", self.derivative, len(todo), self.stats)
+        return dict(self.stats)
+
+    def _load_contract(self, key: ContractKey, req: ContractRequest) -> Tuple[Optional[ContractBars], str]:
+        name = contract_name(self.derivative, *key)
+        cache_path = os.path.join(self.cache_dir, name + ".npz")
+        cached, covered = None, None
+        if os.path.exists(cache_path):
+            cached, covered = self._read_cache(cache_path)
+            in_range = covered is not None and covered[0] <= req.first_day and req.last_day <= covered[1]
+            # A cached miss does not hide local files added since.
+            if in_range and (len(cached) or not self.local_dir):
+                return cached, "cache"
+
+        symbol = None
+        if self.symbol_fn is not None:
+            try:
+                symbol = self.symbol_fn(req.strike, req.option_type, req.expiry)
+            except Exception as exc:
+                logger.debug("[OptionBarStore] symbol for %s: %s", name, exc)
+
+        df, source, asked = None, "missing", False
+        if self.local_dir:
+            asked = True
+            df = self._read_local(name, symbol)
+            if df is not None:
+                source = "local"
+        if df is None and self.broker is not None and symbol:
+            asked = True
+            try:
+                df = self._fetch_broker(symbol, req)
+            except Exception as exc:
+                # Not cached: a transient failure should be retried next run.
+                logger.warning("[OptionBarStore] broker history for %s failed: %s", symbol, exc)
+                return cached, "cache" if cached is not None and len(cached) else "failed"
+            source = "broker" if df is not None and not df.empty else "missing"
+
+        bars = self._to_bars(df)
+        if cached is not None and len(cached):
+            bars = self._merge(bars, cached)
+            if source == "missing":
+                source = "cache"
+        if asked:
+            # Only a source that was actually asked can record a miss.
+            days = [req.first_day, req.last_day] + (list(covered) if covered else [])
+            if len(bars):
+                days += [self._day(bars.t0), self._day(bars.t0 + bars.close.size - 1)]
+            self._write_cache(cache_path, bars, (min(days), max(days)))
+        return bars, source
+
+    def _read_local(self, name: str, symbol: Optional[str]) -> Optional[pd.DataFrame]:
+        stems = [name] + ([symbol, symbol.replace(":", "_")] if symbol else [])
+        for stem in stems:
+            for ext in (".parquet", ".csv"):
+                path = os.path.join(self.local_dir, stem + ext)
+                if os.path.exists(path):
+                    df = pd.read_parquet(path) if ext == ".parquet" else pd.read_csv(path)
+                    df.columns = [str(c).strip().lower() for c in df.columns]
+                    return df
+        return None
+
+    def _fetch_broker(self, symbol: str, req: ContractRequest) -> Optional[pd.DataFrame]:
+        days = (ist_now().date() - req.first_day).days + 2
+        return self.broker.get_history_for_timeframe(symbol=symbol, interval="1", days=days)
+
+    @staticmethod
+    def _to_bars(df: Optional[pd.DataFrame]) -> ContractBars:
+        """Every row the source returned (the cache keeps the full fetched range)."""
+        if df is None or df.empty or not {"time", "open", "high", "low", "close"} <= set(df.columns):
+            return ContractBars(_NO_DATA, _NO_DATA, _NO_DATA, _NO_DATA, _NO_DATA)
+        t = pd.to_datetime(df["time"])
+        t = t.dt.tz_localize(IST) if t.dt.tz is None else t.dt.tz_convert(IST)
+        minutes = ((t - _EPOCH) // pd.Timedelta(minutes=1)).to_numpy(dtype=np.int64)
+        cols = [df[c].to_numpy(dtype=float) for c in ("open", "high", "low", "close")]
+        return ContractBars(minutes, *cols)
+
+    @staticmethod
+    def _rows(bars: ContractBars) -> Tuple[np.ndarray, ...]:
+        valid = np.flatnonzero(~np.isnan(bars.close))
+        return (bars.t0 + valid, bars.open[valid], bars.high[valid], bars.low[valid], bars.close[valid])
+
+    @classmethod
+    def _merge(cls, fresh: ContractBars, cached: ContractBars) -> ContractBars:
+        """Union of both; *fresh* wins on minutes present in both."""
+        rows = [np.concatenate(pair) for pair in zip(cls._rows(fresh), cls._rows(cached))]
+        _, first = np.unique(rows[0], return_index=True)
+        return ContractBars(*(r[first] for r in rows))
+
+    @staticmethod
+    def _day(minute: int) -> date:
+        return (_EPOCH + pd.Timedelta(minutes=int(minute))).tz_convert(IST).date()
+
+    # ── Disk cache ────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _read_cache(path: str) -> Tuple[ContractBars, Optional[Tuple[date, date]]]:
+        """Cached bars and the day range the source was asked for (None: unknown)."""
+        with np.load(path) as z:
+            c = z["close"]
+            valid = ~np.isnan(c)
+            minutes = z["t0"] + np.flatnonzero(valid)
+            bars = ContractBars(minutes, z["open"][valid], z["high"][valid], z["low"][valid], c[valid])
+            covered = None
+            if "days" in z.files:
+                first, last = (int(d) for d in z["days"])
+                covered = (date.fromordinal(first), date.fromordinal(last))
+            return bars, covered
+
+    @staticmethod
+    def _write_cache(path: str, bars: ContractBars, covered: Tuple[date, date]) -> None:
+        tmp = path + ".tmp.npz"
+        try:
+            np.savez(tmp, t0=np.int64(bars.t0), open=bars.open, high=bars.high,
+                     low=bars.low, close=bars.close,
+                     days=np.array([covered[0].toordinal(), covered[1].toordinal()], dtype=np.int64))
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning("[OptionBarStore] could not cache %s: %s", path, exc)
+
+    def clear_cache(self, contracts: Optional[Iterable[ContractKey]] = None) -> None:
+        """Delete cached files (all for this underlying, or just *contracts*)."""
+        names = ([contract_name(self.derivative, *k) + ".npz" for k in contracts]
+                 if contracts is not None else
+                 [f for f in os.listdir(self.cache_dir) if f.endswith(".npz")]
+                 if os.path.isdir(self.cache_dir) else [])
+        for f in names:
+            try:
+                os.remove(os.path.join(self.cache_dir, f))
+            except OSError:
+                pass
+        self._contracts.clear()
@@ -1,5 +1,3 @@
-# TZ-FIX imports
-from Utils.time_utils import IST, ist_localize
 """
 backtest/backtest_option_pricer.py
 ===================================
@@ -21,8 +19,15 @@ Changes from original:
 - OptionPricer.resolve_bar: cached expiry datetime per (timestamp.date, type)
   so nearest_weekly/monthly_expiry() is not called on every single bar for
   the same trading day.
-- nearest_weekly_expiry / nearest_monthly_expiry: extracted common holiday
-  adjustment logic into _adjust_for_holiday() helper.
+- nearest_weekly_expiry / nearest_monthly_expiry: looked up in the
+  precomputed Utils.expiry_calendar table (holiday roll-back included)
+  instead of weekday arithmetic and holiday scans; both return 15:30 IST and
+  roll to the next expiry after the close on expiry day.
+- time_to_expiry_years: trading minutes to expiry / (252 × 375) from the
+  expiry calendar.  Wall-clock seconds / (252 × 6.25 h) counted nights and
+  weekends as trading time and overstated T several-fold near expiry.
+  Sigma is kept on the same trading-time basis: HV already is, VIX
+  (calendar-time) is converted in OptionPricer._get_sigma.
 - _broker_type: simplified class-name sniffing with a dict lookup instead of
   six elif branches.
 - black_scholes_price: early-exit intrinsic value returned as rounded float
@@ -32,6 +37,23 @@ Changes from original:
 - create_pricer_from_state: removed try/except that swallowed all errors and
   silently returned a default pricer — errors now propagate so callers know
   something went wrong.
+- black_scholes_raw: unrounded core split out of black_scholes_price so the
+  vectorised pricer (backtest_vector_pricer) can be checked against it.
+- OptionPricer.price_batch / get_price_grid: array pricing and per-day
+  interpolated tables for callers that price many contracts at once.
+- OptionPricer HV (use_vix=False): the per-call rolling_hv() over a trimmed
+  list is replaced by an O(1) estimator from backtest_volatility, selected
+  with hv_method ("close" — identical to rolling_hv — "ewma", "parkinson",
+  "garman_klass").  rolling_hv() itself is unchanged.
+- OptionPricer.set_option_bars: attaches an OptionBarStore
+  (backtest_option_data); resolve_bar then prices from historical contract
+  bars when no real_ohlc is passed, falling back to Black-Scholes per bar.
+- VixCache.load_series / OptionPricer.set_vix_series: install a ready-made
+  daily VIX series without a fetch (offline runs, benchmark suite).
+- OptionPricer.get_state / set_state: HV window and VIX series for replay
+  checkpoints (backtest_checkpoint).
+- OptionPricer.recorded_sub_bars: the 1-minute option bars inside a bar,
+  for the recorded intrabar path (backtest_intrabar).
 """
 
 from __future__ import annotations
@@ -50,6 +72,9 @@ from Utils.safe_getattr import safe_getattr, safe_hasattr
 from data.trade_state_manager import state_manager
 from Utils.OptionUtils import OptionUtils
 from Utils.Utils import Utils
+from Utils.expiry_calendar import get_expiry_calendar
+# TZ-FIX imports
+from Utils.time_utils import IST, ist_localize
 
 logger = logging.getLogger(__name__)
 
@@ -135,7 +160,7 @@ def rolling_hv(
         return DEFAULT_HV / 100.0
 
 
-def black_scholes_price(
+def black_scholes_raw(
     S: float,
     K: float,
     T: float,
@@ -145,28 +170,45 @@ def black_scholes_price(
     q: float = 0.0,
 ) -> float:
     """
-    Black-Scholes-Merton option price.
+    Unrounded Black-Scholes-Merton price.
 
-    Returns intrinsic value (rounded) when inputs are degenerate (T≤0, sigma≤0).
+    Reference implementation for backtest_vector_pricer.bs_price_vec; returns
+    intrinsic value when inputs are degenerate (T≤0, sigma≤0).
     """
     if T <= 0 or sigma <= 0 or S <= 0 or K <= 0:
         intrinsic = (S - K) if option_type == "CE" else (K - S)
-        return Utils.round_off(max(0.0, intrinsic))
+        return max(0.0, intrinsic)
 
     T = max(T, MIN_TIME_TO_EXPIRY)
-    try:
-        sqrt_T = math.sqrt(T)
-        d1 = (math.log(S / K) + (r - q + 0.5 * sigma ** 2) * T) / (sigma * sqrt_T)
-        d2 = d1 - sigma * sqrt_T
+    sqrt_T = math.sqrt(T)
+    d1 = (math.log(S / K) + (r - q + 0.5 * sigma ** 2) * T) / (sigma * sqrt_T)
+    d2 = d1 - sigma * sqrt_T
 
-        if option_type == "CE":
-            price = (S * math.exp(-q * T) * _norm_cdf(d1)
-                     - K * math.exp(-r * T) * _norm_cdf(d2))
-        else:
-            price = (K * math.exp(-r * T) * _norm_cdf(-d2)
-                     - S * math.exp(-q * T) * _norm_cdf(-d1))
+    if option_type == "CE":
+        price = (S * math.exp(-q * T) * _norm_cdf(d1)
+                 - K * math.exp(-r * T) * _norm_cdf(d2))
+    else:
+        price = (K * math.exp(-r * T) * _norm_cdf(-d2)
+                 - S * math.exp(-q * T) * _norm_cdf(-d1))
+    return max(0.0, price)
+
+
+def black_scholes_price(
+    S: float,
+    K: float,
+    T: float,
+    r: float,
+    sigma: float,
+    option_type: str = "CE",
+    q: float = 0.0,
+) -> float:
+    """
+    Black-Scholes-Merton option price.
 
-        return max(0.0, Utils.round_off(price))
+    Returns intrinsic value (rounded) when inputs are degenerate (T≤0, sigma≤0).
+    """
+    try:
+        return Utils.round_off(black_scholes_raw(S, K, T, r, sigma, option_type, q))
 
     except (ValueError, OverflowError, ZeroDivisionError) as exc:
         logger.warning("[BS] math error S=%s K=%s T=%s σ=%s: %s", S, K, T, sigma, exc)
@@ -174,6 +216,16 @@ def black_scholes_price(
         return Utils.round_off(max(0.0, intrinsic))
 
 
+def _make_hv_estimator(method: str):
+    """Build the incremental HV estimator for *method* (close / ewma / parkinson / garman_klass)."""
+    from backtest.backtest_volatility import EwmaVolatility, RangeVolatility, RollingVolatility
+    if method == "close":
+        return RollingVolatility(lookback=HV_LOOKBACK, min_bars=HV_MIN_BARS)
+    if method == "ewma":
+        return EwmaVolatility(min_bars=HV_MIN_BARS)
+    return RangeVolatility(method=method, lookback=HV_LOOKBACK, min_bars=HV_MIN_BARS)
+
+
 def atm_strike(spot: float, derivative: str) -> float:
     """Round spot to nearest ATM strike for the given derivative."""
     step = STRIKE_STEP.get(derivative.upper(), DEFAULT_STRIKE_STEP)
@@ -181,22 +233,25 @@ def atm_strike(spot: float, derivative: str) -> float:
 
 
 def time_to_expiry_years(current_dt: datetime, expiry_dt: datetime) -> float:
-    """Time to expiry in calendar-year fraction (252-day trading year basis)."""
-    # TZ-FIX: normalize both inputs to IST-aware so subtraction never raises
-    # "can't subtract offset-naive and offset-aware datetimes".
+    """
+    Trading time to expiry as a fraction of a 252-session year.
+
+    Counts trading minutes only (Utils.expiry_calendar), so nights,
+    weekends and holidays do not add time value.  Sigma priced with this T
+    must be trading-time vol: rolling HV (annualised over 252 × 375 bars)
+    is; VIX, annualised on calendar time, is converted in
+    OptionPricer._get_sigma via ExpiryCalendar.calendar_to_trading_vol.
+    """
+    # TZ-FIX: naive inputs are IST; aware ones compare correctly as they are
+    # and are converted by the calendar only when not already IST.
     if current_dt.tzinfo is None:
         current_dt = IST.localize(current_dt)
-    else:
-        current_dt = current_dt.astimezone(IST)
     if expiry_dt.tzinfo is None:
         expiry_dt = IST.localize(expiry_dt)
-    else:
-        expiry_dt = expiry_dt.astimezone(IST)
-    delta = (expiry_dt - current_dt).total_seconds()
-    if delta <= 0:
+    if expiry_dt <= current_dt:
         return MIN_TIME_TO_EXPIRY
-    trading_seconds_per_year = 252 * 6.25 * 3600
-    return max(delta / trading_seconds_per_year, MIN_TIME_TO_EXPIRY)
+    T = get_expiry_calendar(current_dt.date()).years_to_expiry(current_dt, expiry_dt)
+    return max(T, MIN_TIME_TO_EXPIRY)
 
 
 # ── Broker type helper ────────────────────────────────────────────────────────
@@ -255,6 +310,17 @@ class VixCache:
             if self._data is not None:
                 self._date_index = set(self._data.index)
 
+    @property
+    def series(self) -> Optional[pd.Series]:
+        return self._data
+
+    def load_series(self, series: pd.Series) -> None:
+        """Install a pre-built daily VIX series (percent, indexed by date)."""
+        with self._lock:
+            self._fetched = True
+            self._data = series
+            self._date_index = set(series.index) if series is not None else None
+
     def get_vix(self, dt: datetime) -> Tuple[float, bool]:
         """Return (vix_as_decimal, is_real). Falls back to DEFAULT_VIX."""
         if self._data is None or self._data.empty:
@@ -365,83 +431,28 @@ class VixCache:
 
 # ── Expiry calendar helpers ───────────────────────────────────────────────────
 
-def _adjust_for_holiday(d: date, max_back: int = 10) -> date:
-    """Walk backwards from d until we find a non-holiday trading day."""
-    try:
-        from Utils.common import is_holiday
-        for _ in range(max_back):
-            if not is_holiday(d):
-                return d
-            d -= timedelta(days=1)
-    except Exception:
-        pass
-    return d
+def _expiry_close(d: date) -> datetime:
+    return IST.localize(datetime(d.year, d.month, d.day, 15, 30))
 
 
 def nearest_weekly_expiry(dt: datetime, derivative: str = "NIFTY") -> datetime:
-    """Return next weekly expiry datetime on or after dt."""
-    try:
-        exchange_symbol = OptionUtils.get_exchange_symbol(derivative)
-        target_weekday = OptionUtils.EXPIRY_WEEKDAY_MAP.get(exchange_symbol, 1)
-    except Exception:
-        target_weekday = 1
-
-    current = dt.date()
-    days_ahead = (target_weekday - current.weekday()) % 7
-    if days_ahead == 0 and dt.hour >= 15 and dt.minute >= 30:
-        days_ahead = 7
-    exp_date = _adjust_for_holiday(current + timedelta(days=days_ahead))
-    # TZ-FIX: localize naive expiry datetime to IST.
-    return IST.localize(datetime(exp_date.year, exp_date.month, exp_date.day, 15, 30))
+    """Return next weekly expiry datetime (15:30 IST) on or after dt."""
+    dt = IST.localize(dt) if dt.tzinfo is None else dt.astimezone(IST)
+    cal = get_expiry_calendar(dt.date())
+    exp = cal.expiry(derivative, dt.date(), "weekly")
+    if exp == dt.date() and (dt.hour, dt.minute) >= (15, 30):
+        exp = cal.expiry(derivative, dt.date(), "weekly", offset=1)
+    return _expiry_close(exp)
 
 
 def nearest_monthly_expiry(dt: datetime, derivative: str = "NIFTY") -> datetime:
-    """Return next monthly expiry datetime on or after dt."""
-    try:
-        exchange_symbol = OptionUtils.get_exchange_symbol(derivative)
-        expiry_dt = OptionUtils.get_monthly_expiry_date(dt.year, dt.month, derivative=exchange_symbol)
-        # TZ-FIX: normalize expiry to IST-aware; never strip tzinfo.
-        def _to_ist(d):
-            if hasattr(d, "to_pydatetime"):
-                d = d.to_pydatetime()
-            elif not isinstance(d, datetime):
-                d = datetime.fromisoformat(str(d))
-            return IST.localize(d) if d.tzinfo is None else d.astimezone(IST)
-
-        expiry = _to_ist(expiry_dt)
-        # Also normalize dt for comparison
-        dt_aware = IST.localize(dt) if dt.tzinfo is None else dt.astimezone(IST)
-
-        if expiry <= dt_aware:
-            nm = dt_aware.month % 12 + 1
-            ny = dt_aware.year + (1 if dt_aware.month == 12 else 0)
-            expiry_dt2 = OptionUtils.get_monthly_expiry_date(ny, nm, derivative=exchange_symbol)
-            expiry = _to_ist(expiry_dt2)
-        return expiry
-    except Exception as exc:
-        logger.warning("[nearest_monthly_expiry] OptionUtils failed: %s — using fallback", exc)
-
-    # Fallback: last Tuesday of the month
-    d = dt.date()
-    target_wd = 1
-    if d.month == 12:
-        last_day = date(d.year + 1, 1, 1) - timedelta(days=1)
-    else:
-        last_day = date(d.year, d.month + 1, 1) - timedelta(days=1)
-    offset = (last_day.weekday() - target_wd) % 7
-    exp_date = _adjust_for_holiday(last_day - timedelta(days=offset))
-    # TZ-FIX: localize naive expiry datetimes to IST.
-    exp_dt = IST.localize(datetime(exp_date.year, exp_date.month, exp_date.day, 15, 30))
-    dt_aware = IST.localize(dt) if dt.tzinfo is None else dt.astimezone(IST)
-    if exp_dt <= dt_aware:
-        if d.month >= 11:
-            last_day2 = date(d.year + 1, (d.month % 12) + 2, 1) - timedelta(days=1)
-        else:
-            last_day2 = date(d.year, d.month + 2, 1) - timedelta(days=1)
-        offset2 = (last_day2.weekday() - target_wd) % 7
-        exp_date2 = _adjust_for_holiday(last_day2 - timedelta(days=offset2))
-        exp_dt = IST.localize(datetime(exp_date2.year, exp_date2.month, exp_date2.day, 15, 30))
-    return exp_dt
+    """Return next monthly expiry datetime (15:30 IST) on or after dt."""
+    dt = IST.localize(dt) if dt.tzinfo is None else dt.astimezone(IST)
+    cal = get_expiry_calendar(dt.date())
+    exp = cal.expiry(derivative, dt.date(), "monthly")
+    if exp == dt.date() and (dt.hour, dt.minute) >= (15, 30):
+        exp = cal.expiry(derivative, dt.date(), "monthly", offset=1)
+    return _expiry_close(exp)
 
 
 # ── Main resolver ─────────────────────────────────────────────────────────────
@@ -462,6 +473,7 @@ class OptionPricer:
         div_yield: float = DIVIDEND_YIELD,
         broker=None,
         use_vix: bool = True,
+        hv_method: str = "close",
     ) -> None:
         self.derivative = derivative.upper()
         self.expiry_type = expiry_type
@@ -469,10 +481,16 @@ class OptionPricer:
         self.div_yield = div_yield
         self.use_vix = use_vix
         self._vix = VixCache()
-        self._spot_history: list = []
+        # O(1) realised-vol estimator used when use_vix=False
+        self.hv_method = hv_method
+        self._hv = _make_hv_estimator(hv_method)
         self._broker_type = "default"
         # Per-day expiry cache: date → datetime
         self._expiry_cache: Dict[date, datetime] = {}
+        # Interpolated BS tables (VIX mode only): (date, type) → BSPriceGrid
+        self._grid_cache: Dict[Tuple[date, str], object] = {}
+        # Historical option bars (backtest_option_data.OptionBarStore)
+        self._option_bars = None
 
         if broker is not None:
             self._vix.set_broker(broker)
@@ -498,12 +516,55 @@ class OptionPricer:
             self._broker_type = _broker_type(broker)
         self._vix.ensure_loaded(start, end)
 
-    def push_spot(self, spot_close: float) -> None:
-        """Feed latest spot close into the rolling HV buffer (use_vix=False only)."""
-        if not self.use_vix:
-            self._spot_history.append(float(spot_close))
-            if len(self._spot_history) > HV_LOOKBACK + 5:
-                self._spot_history = self._spot_history[-(HV_LOOKBACK + 5):]
+    @property
+    def vix_series(self) -> Optional[pd.Series]:
+        """Daily VIX series in use; None with use_vix=False or before loading."""
+        return self._vix.series if self.use_vix else None
+
+    def set_vix_series(self, series: pd.Series) -> None:
+        """Use *series* (daily VIX %, date index) instead of fetching one."""
+        self._vix.load_series(series)
+
+    def set_option_bars(self, store) -> None:
+        """Price from *store* (an OptionBarStore) where it has data; None detaches."""
+        self._option_bars = store
+
+    def recorded_sub_bars(self, timestamp: datetime, strike: float, option_type: str,
+                          expiry: datetime, minutes_per_bar: int):
+        """Recorded 1-minute option OHLC rows inside one bar (backtest_intrabar), or None."""
+        if self._option_bars is None:
+            return None
+        return self._option_bars.sub_bars(strike, option_type, expiry.date(), timestamp, minutes_per_bar)
+
+    def get_state(self) -> Dict:
+        """Picklable replay state (HV window, VIX series) for checkpoints."""
+        return {"hv_method": self.hv_method, "hv": self._hv,
+                "vix": self._vix.series if self.use_vix else None}
+
+    def set_state(self, state: Dict) -> None:
+        """Restore what get_state() returned; mismatched HV methods are ignored."""
+        if state.get("hv_method") == self.hv_method and state.get("hv") is not None:
+            self._hv = state["hv"]
+        if self.use_vix and state.get("vix") is not None:
+            self._vix.load_series(state["vix"])
+
+    def push_spot(self, spot_close: float, spot_open: Optional[float] = None,
+                  spot_high: Optional[float] = None, spot_low: Optional[float] = None) -> None:
+        """
+        Feed the latest spot bar into the HV estimator (use_vix=False only).
+
+        Range estimators (parkinson / garman_klass) use the OHLC; when it is
+        not supplied the close is used for every field.
+        """
+        if self.use_vix:
+            return
+        if self.hv_method in ("parkinson", "garman_klass"):
+            c = float(spot_close)
+            self._hv.push(c if spot_open is None else float(spot_open),
+                          c if spot_high is None else float(spot_high),
+                          c if spot_low is None else float(spot_low), c)
+        else:
+            self._hv.push(spot_close)
 
     def _get_expiry(self, timestamp: datetime) -> datetime:
         """Return expiry datetime for timestamp, cached per trading day."""
@@ -516,12 +577,14 @@ class OptionPricer:
         return self._expiry_cache[key]
 
     def _get_sigma(self, timestamp: datetime, interval_minutes: int = 5) -> Tuple[float, bool]:
-        """Return (sigma_decimal, is_real_vix)."""
+        """Return (sigma_decimal, is_real_vix), on the trading-time basis of time_to_expiry_years."""
         if self.use_vix:
             s, real = self._vix.get_vix(timestamp)
+            d = timestamp.date()
+            s = get_expiry_calendar(d).calendar_to_trading_vol(s, d)
             return max(s, 0.05), real
         bars_per_year = int((252 * 375) / max(interval_minutes, 1))
-        return max(rolling_hv(self._spot_history, bars_per_year=bars_per_year), 0.05), False
+        return max(self._hv.value(bars_per_year=bars_per_year), 0.05), False
 
     def resolve_bar(
         self,
@@ -552,9 +615,13 @@ class OptionPricer:
             strike = atm_strike(spot_close, self.derivative)
 
         sigma, vix_real = self._get_sigma(timestamp, minutes_per_bar)
-        self.push_spot(spot_close)
+        self.push_spot(spot_close, spot_open, spot_high, spot_low)
         expiry_dt = self._get_expiry(timestamp)
 
+        if real_ohlc is None and self._option_bars is not None:
+            real_ohlc = self._option_bars.bar(strike, option_type, expiry_dt.date(),
+                                              timestamp, minutes_per_bar)
+
         # Real data path
         if real_ohlc is not None:
             ro, rh, rl, rc = (
@@ -599,6 +666,63 @@ class OptionPricer:
             "source": PriceSource.SYNTHETIC,
         }
 
+    def get_price_grid(self, timestamp: datetime, option_type: str):
+        """
+        Return the interpolated BS table for (trading day, option_type), or None.
+
+        For callers that price many points per day (sub-bar paths, chains);
+        a plain resolve_bar prices ~4 points per bar, fewer than a table build.
+        Only available in VIX mode, where sigma is constant for the day —
+        rolling-HV sigma changes every bar so a table would never be reused.
+        """
+        if not self.use_vix:
+            return None
+        if timestamp.tzinfo is None:
+            timestamp = IST.localize(timestamp)
+        else:
+            timestamp = timestamp.astimezone(IST)
+        sigma, _ = self._get_sigma(timestamp)
+        key = (timestamp.date(), option_type)
+        grid = self._grid_cache.get(key)
+        if grid is None or grid.sigma != sigma:
+            from backtest.backtest_vector_pricer import BSPriceGrid
+            # T only shrinks through the day: cover [now - 1 session, now + margin]
+            T_now = time_to_expiry_years(timestamp, self._get_expiry(timestamp))
+            grid = BSPriceGrid(sigma, option_type, r=self.risk_free, q=self.div_yield,
+                               moneyness_range=(0.94, 1.06), moneyness_points=481,
+                               min_T=max(T_now - 1.1 / 252, 0.0), max_T=T_now + 0.1 / 252,
+                               t_points=65)
+            if len(self._grid_cache) > 8:
+                self._grid_cache.clear()
+            self._grid_cache[key] = grid
+        return grid
+
+    def price_batch(
+        self,
+        timestamp: datetime,
+        spots,
+        strikes,
+        option_types="CE",
+        sigma: Optional[float] = None,
+    ):
+        """
+        Price many contracts at *timestamp* in one vectorised call.
+
+        spots / strikes / option_types broadcast together (option_types may be
+        a single "CE"/"PE" or an array of them).  sigma defaults to the same
+        VIX / HV estimate resolve_bar would use.  Returns an unrounded ndarray.
+        """
+        from backtest.backtest_vector_pricer import bs_price_vec
+
+        if timestamp.tzinfo is None:
+            timestamp = IST.localize(timestamp)
+        else:
+            timestamp = timestamp.astimezone(IST)
+        if sigma is None:
+            sigma, _ = self._get_sigma(timestamp)
+        T = time_to_expiry_years(timestamp, self._get_expiry(timestamp))
+        return bs_price_vec(spots, strikes, T, self.risk_free, sigma, option_types, self.div_yield)
+
     def get_option_symbol(
         self, strike: float, option_type: str, expiry_offset: int = 0
     ) -> Optional[str]:
@@ -0,0 +1,301 @@
+"""
+backtest/backtest_portfolio.py
+==============================
+Portfolio backtest: several underlyings (e.g. NIFTY, BANKNIFTY, FINNIFTY)
+replayed side by side on one shared clock, with a shared capital and risk
+budget.
+
+Each leg is an ordinary BacktestConfig — its own derivative, strategy, lot
+size, TP / SL — replayed by a ReplaySession from backtest_engine, so legs
+behave exactly like single-underlying runs except where the shared limits
+step in.  On every clock minute:
+
+1. every leg with a bar at that minute runs its pre-signal step (day
+   tracking, skips, auto-exit at close),
+2. the legs that need a signal evaluate their strategies concurrently
+   (thread pool, one leg per worker) — threads, so they only overlap
+   where NumPy / pandas release the GIL; the Python-level rule evaluation
+   is serialised by it and the speed-up over one leg after another is
+   small,
+3. exits and entries are applied leg by leg in config order; each entry
+   goes through the shared risk book first.
+
+The risk book mirrors trade/risk_manager.RiskManager: a new trade is
+refused once the day's entries reach max_trades_per_day or the day's
+realised P&L across all legs is at or below max_daily_loss, and — beyond
+RiskManager — once max_open_positions legs hold positions.  Open positions
+are never force-closed by the book, as in live trading.
+
+Leg state lives in a per-leg SessionState (backtest_engine), a stand-in for
+the TradeState fields the replay uses, so the singleton is untouched.  The combined equity curve is
+PortfolioConfig.capital plus every leg's realised P&L; each leg keeps its
+own BacktestResult (trades, equity from its own capital, metrics).
+"""
+
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from Utils.time_utils import IST
+from backtest.backtest_engine import (BacktestConfig, BacktestEngine, BacktestResult, BacktestTrade,
+                                      ReplaySession, SessionState)
+from backtest.backtest_metrics import compute_metrics
+
+logger = logging.getLogger(__name__)
+
+
+# ── Config / result ───────────────────────────────────────────────────────────
+
+@dataclass
+class PortfolioConfig:
+    legs: List[BacktestConfig] = field(default_factory=list)
+    capital: float = 300_000.0
+    max_daily_loss: float = -5000.0   # ₹ realised across legs; same sign convention as TradeState
+    max_trades_per_day: int = 10      # entries across legs
+    max_open_positions: int = 0       # 0 = no cap beyond one position per leg
+    signal_workers: int = 0           # threads for per-leg signals (0 = one per leg)
+
+
+@dataclass
+class PortfolioResult:
+    config: PortfolioConfig
+    legs: Dict[str, BacktestResult] = field(default_factory=dict)
+    trades: List[BacktestTrade] = field(default_factory=list)      # all legs, by exit time
+    trade_legs: List[str] = field(default_factory=list)            # leg name per trade
+    equity_curve: List[Dict] = field(default_factory=list)         # combined
+    total_trades:  int   = 0
+    total_net_pnl: float = 0.0
+    win_rate:      float = 0.0
+    max_drawdown:  float = 0.0
+    max_drawdown_pct: float = 0.0
+    profit_factor: float = 0.0
+    sharpe:        float = 0.0
+    sortino:       float = 0.0
+    calmar:        Optional[float] = None   # None below CALMAR_MIN_DAYS
+    breakdowns: Dict = field(default_factory=dict)                 # compute_metrics + by_leg
+    risk_blocks: Dict[str, int] = field(default_factory=dict)      # refused entries by limit
+    error_msg: Optional[str] = None
+    completed: bool = False
+
+    def finalize(self):
+        order = sorted(range(len(self.trades)), key=lambda k: self.trades[k].exit_time)
+        self.trades = [self.trades[k] for k in order]
+        self.trade_legs = [self.trade_legs[k] for k in order]
+        known = {f for f in self.__dataclass_fields__}
+        for key, value in compute_metrics(self.trades, self.equity_curve, self.config.capital).items():
+            if key in known:
+                setattr(self, key, value)
+        self.breakdowns = dict(self.breakdowns or {})
+        self.breakdowns["by_leg"] = {
+            name: {"trades": leg.total_trades, "net_pnl": leg.total_net_pnl,
+                   "avg_pnl": leg.avg_net_pnl, "win_rate": round(leg.win_rate, 2)}
+            for name, leg in self.legs.items()
+        }
+        self.completed = True
+
+
+def leg_names(legs: List[BacktestConfig]) -> List[str]:
+    """Display name per leg: the derivative, plus the strategy when an underlying repeats."""
+    counts: Dict[str, int] = {}
+    for cfg in legs:
+        counts[cfg.derivative] = counts.get(cfg.derivative, 0) + 1
+    names: List[str] = []
+    for cfg in legs:
+        name = cfg.derivative
+        if counts[cfg.derivative] > 1:
+            name = f"{cfg.derivative}:{cfg.strategy_slug or len(names) + 1}"
+        while name in names:
+            name = f"{name}#{len(names) + 1}"
+        names.append(name)
+    return names
+
+
+# ── Shared risk book ──────────────────────────────────────────────────────────
+
+class _RiskBook:
+    """Daily loss / trade-count / open-position limits shared by all legs."""
+
+    def __init__(self, cfg: PortfolioConfig, sessions: Dict[str, ReplaySession]):
+        self.cfg = cfg
+        self.sessions = sessions
+        self.day: Optional[date] = None
+        self.trades_today = 0
+        self.pnl_today = 0.0
+        self.blocks: Dict[str, int] = {"max_trades": 0, "daily_loss": 0, "max_positions": 0}
+        self._seen = {name: 0 for name in sessions}
+
+    def _roll(self, day: date) -> None:
+        if day != self.day:
+            self.day, self.trades_today, self.pnl_today = day, 0, 0.0
+
+    def note_closed(self, name: str) -> None:
+        """Book P&L of trades *name* closed since the last call."""
+        trades = self.sessions[name].result.trades
+        for t in trades[self._seen[name]:]:
+            self._roll(t.exit_time.date())
+            self.pnl_today += t.net_pnl
+        self._seen[name] = len(trades)
+
+    def allow(self, session: ReplaySession) -> bool:
+        cfg = self.cfg
+        self._roll(session.bar_time.date())
+        reason = key = ""
+        if self.trades_today >= cfg.max_trades_per_day:
+            key, reason = "max_trades", f"Max trades/day reached ({self.trades_today}/{cfg.max_trades_per_day})"
+        elif self.pnl_today <= cfg.max_daily_loss:
+            key, reason = "daily_loss", f"Daily loss limit hit (₹{self.pnl_today:.2f} ≤ ₹{cfg.max_daily_loss:.2f})"
+        elif cfg.max_open_positions:
+            open_now = sum(1 for s in self.sessions.values() if s.state.current_position)
+            if open_now >= cfg.max_open_positions:
+                key, reason = "max_positions", f"Max open positions ({open_now}/{cfg.max_open_positions})"
+        if key:
+            self.blocks[key] += 1
+            logger.debug("[Portfolio %s] %s entry refused: %s",
+                         f"{session.bar_time:%d-%b %H:%M}", session.cfg.derivative, reason)
+            return False
+        self.trades_today += 1
+        return True
+
+
+# ── Engine ────────────────────────────────────────────────────────────────────
+
+def _clock_ns(ts) -> int:
+    t = pd.Timestamp(ts)
+    return (t.tz_localize(IST) if t.tzinfo is None else t).value
+
+
+class PortfolioBacktestEngine:
+    """Replays every leg of a PortfolioConfig on one clock with shared limits."""
+
+    def __init__(self, broker, config: PortfolioConfig):
+        self.broker = broker
+        self.config = config
+        self.progress_callback: Optional[Callable[[float, str], None]] = None
+        self._stop_requested = False
+        self._engines: List[BacktestEngine] = []
+
+    def stop(self):
+        self._stop_requested = True
+        for engine in self._engines:
+            engine.stop()
+
+    def _emit(self, pct: float, msg: str):
+        if self.progress_callback:
+            try:
+                self.progress_callback(pct, msg)
+            except Exception:
+                pass
+
+    def run(self, spot_data: Optional[Dict[str, pd.DataFrame]] = None,
+            vix_series: Optional[pd.Series] = None) -> PortfolioResult:
+        """
+        Run the portfolio.  *spot_data* maps derivative → local candles (as
+        for BacktestEngine.run); legs without an entry fetch from the broker.
+        """
+        cfg = self.config
+        result = PortfolioResult(config=cfg)
+        if not cfg.legs:
+            result.error_msg = "Portfolio has no legs."
+            return result
+        try:
+            sessions = self._prepare_legs(spot_data or {}, vix_series)
+            if not sessions:
+                result.error_msg = "Could not load spot history for any leg."
+                return result
+            self._run_clock(sessions, result)
+            for name, session in sessions.items():
+                leg = session.finish()
+                result.legs[name] = leg
+                result.trades.extend(leg.trades)
+                result.trade_legs.extend([name] * len(leg.trades))
+            # Positions still open when the clock ran out are closed by finish()
+            final = round(cfg.capital + sum(leg.total_net_pnl for leg in result.legs.values()), 2)
+            if result.equity_curve and result.equity_curve[-1]["equity"] != final:
+                result.equity_curve.append({"timestamp": result.equity_curve[-1]["timestamp"],
+                                            "equity": final})
+            result.finalize()
+            self._emit(100, f"Complete — {result.total_trades} trades | ₹{result.total_net_pnl:,.0f}")
+        except Exception as exc:
+            logger.error("[PortfolioBacktestEngine.run] %s", exc, exc_info=True)
+            result.error_msg = str(exc)
+        return result
+
+    def _prepare_legs(self, spot_data: Dict[str, pd.DataFrame], vix_series) -> Dict[str, ReplaySession]:
+        sessions: Dict[str, ReplaySession] = {}
+        names = leg_names(self.config.legs)
+        for k, (name, leg_cfg) in enumerate(zip(names, self.config.legs)):
+            self._emit(10 * k / len(names), f"Loading {name}…")
+            engine = BacktestEngine(self.broker, leg_cfg)
+            local = spot_data.get(name, spot_data.get(leg_cfg.derivative))
+            spot_df = engine._prepare_local_spot(local) if local is not None else engine._fetch_spot()
+            if spot_df is None or spot_df.empty:
+                logger.warning("[Portfolio] %s: no spot history — leg skipped", name)
+                continue
+            pricer = engine._make_pricer(vix_series)
+            signal_engine, detector = engine._load_signal_engine()
+            if leg_cfg.use_real_option_data:
+                engine._prefetch_option_bars(spot_df, pricer)
+            self._engines.append(engine)
+            sessions[name] = ReplaySession(engine, spot_df, pricer, signal_engine, detector, SessionState())
+            logger.info("[Portfolio] %s: %d bars", name, len(spot_df))
+        return sessions
+
+    def _run_clock(self, sessions: Dict[str, ReplaySession], result: PortfolioResult) -> None:
+        cfg = self.config
+        book = _RiskBook(cfg, sessions)
+        rows = {name: s.rows() for name, s in sessions.items()}
+        pending: Dict[str, Any] = {}
+        clock: Dict[str, int] = {}
+
+        def _advance(name: str) -> None:
+            item = next(rows[name], None)
+            if item is None:
+                pending.pop(name, None)
+                clock.pop(name, None)
+            else:
+                pending[name], clock[name] = item, _clock_ns(item[1]["time"])
+
+        for name in sessions:
+            _advance(name)
+        total = sum(s.total_bars for s in sessions.values())
+        done = 0
+        base = sum(s.cfg.capital for s in sessions.values())
+        workers = cfg.signal_workers or len(sessions)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bt-leg") as pool:
+            while pending:
+                if self._stop_requested:
+                    result.error_msg = "Backtest cancelled by user."
+                    break
+                now = min(clock.values())
+                due = [name for name in sessions if clock.get(name) == now]
+
+                ready = [name for name in due if sessions[name].begin_bar(*pending[name])]
+                for name in due:                    # auto-exits at the close
+                    book.note_closed(name)
+                if len(ready) > 1:
+                    list(pool.map(lambda n: sessions[n].evaluate(), ready))
+                elif ready:
+                    sessions[ready[0]].evaluate()
+                for name in ready:
+                    sessions[name].finish_bar(book.allow)
+                    book.note_closed(name)
+
+                equity = cfg.capital + sum(s.equity for s in sessions.values()) - base
+                result.equity_curve.append({"timestamp": sessions[due[0]].bar_time,
+                                            "equity": round(equity, 2)})
+                done += len(due)
+                if done % (100 * len(sessions)) < len(due):
+                    self._emit(10 + 85 * done / total,
+                               f"{sessions[due[0]].bar_time:%d-%b %H:%M}  |  ₹{equity:,.0f}")
+                for name in due:
+                    _advance(name)
+
+        result.risk_blocks = dict(book.blocks)
+        logger.info("[Portfolio] DONE — %d legs | risk blocks %s", len(sessions), book.blocks)
@@ -0,0 +1,287 @@
+"""
+backtest/backtest_results_store.py
+==================================
+Persistent store for backtest results, backed by the app's SQLite database
+(tables backtest_runs / backtest_trades / backtest_equity, see
+db/db_installer.py and db.crud.BacktestRunCRUD).
+
+Each run is keyed by a cache key built from three parts:
+
+- the result-relevant BacktestConfig fields (debug / UI-only fields are
+  excluded — see CACHE_EXCLUDED_FIELDS),
+- strategy_hash(): SHA-1 of the signal-engine config,
+- data_fingerprint(): SHA-1 of the spot candles (and the VIX series when
+  the run prices with VIX, and the loaded option bars in real-OHLC mode).
+
+BacktestEngine.run() looks the key up before replaying; an identical run
+is returned from the store instead of being replayed.  Runs with
+debug_candles are always replayed (the per-candle log is not stored) but
+are still saved.  ENGINE_VERSION is
+part of the key — bump it whenever a change to the replay would alter
+results for the same inputs, so stale runs are not served.
+
+Summary rows are cheap to list; trades and the equity curve are only read
+when a run is loaded (load / load_equity), which is what the comparison
+view relies on.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from Utils.time_utils import IST
+from backtest.backtest_engine import BacktestConfig, BacktestResult, BacktestTrade
+from backtest.backtest_option_pricer import PriceSource
+
+logger = logging.getLogger(__name__)
+
+ENGINE_VERSION = 3   # 2: trading-time T (expiry calendar), exit priced at entry strike
+                     # 3: trade MAE / MFE, sortino / calmar and the breakdown metrics
+CACHE_EXCLUDED_FIELDS = frozenset({
+    "debug_candles", "debug_output_path", "analysis_timeframes",
+    "use_results_cache", "save_results", "checkpoint_every_bars", "resume_from_checkpoint",
+    "option_prefetch_workers", "analysis_workers",
+})
+# Non-scalar BacktestResult fields, left out of metrics JSON (here and backtest_cli)
+_RESULT_SKIP_FIELDS = frozenset({
+    "config", "trades", "debugger_entries", "analysis_data", "equity_curve",
+})
+# ...plus the run identity, which the store keeps in its own columns
+_STORE_SKIP_FIELDS = _RESULT_SKIP_FIELDS | {"run_id", "from_cache"}
+EQUITY_CACHE_SIZE = 16            # equity curves kept in memory by load_equity()
+
+
+# ── Serialisation helpers ─────────────────────────────────────────────────────
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, PriceSource):
+        return value.value
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"not JSON serialisable: {type(value).__name__}")
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, default=_json_default, sort_keys=True, separators=(",", ":"))
+
+
+def _parse_dt(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value)
+    return IST.localize(dt) if dt.tzinfo is None else dt.astimezone(IST)
+
+
+def config_to_dict(cfg: BacktestConfig) -> Dict[str, Any]:
+    return json.loads(_dumps(dataclasses.asdict(cfg)))
+
+
+def config_from_dict(d: Dict[str, Any]) -> BacktestConfig:
+    """Rebuild a BacktestConfig; unknown keys (from newer versions) are ignored."""
+    known = {f.name: f for f in dataclasses.fields(BacktestConfig)}
+    kwargs = {}
+    for key, value in d.items():
+        if key not in known:
+            continue
+        if key in ("start_date", "end_date") and isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        elif key in ("sideway_start", "sideway_end") and isinstance(value, str):
+            value = time.fromisoformat(value)
+        kwargs[key] = value
+    return BacktestConfig(**kwargs)
+
+
+# ── Keys and fingerprints ─────────────────────────────────────────────────────
+
+def strategy_hash(engine_cfg: Optional[Dict[str, Any]]) -> str:
+    """Stable hash of a signal-engine config dict (key order does not matter)."""
+    return hashlib.sha1(_dumps(engine_cfg or {}).encode("utf-8")).hexdigest()
+
+
+def data_fingerprint(spot_df: pd.DataFrame, vix: Optional[pd.Series] = None,
+                     option_bars=None) -> str:
+    """
+    SHA-1 over the raw bytes of the candle times and OHLC columns, plus the
+    VIX series and an OptionBarStore's fingerprint when given.
+
+    Hashes the arrays directly rather than a text rendering, so it costs a
+    few milliseconds even for a year of 1-minute bars.
+    """
+    h = hashlib.sha1()
+    if spot_df is not None and not spot_df.empty:
+        t = pd.to_datetime(spot_df["time"])
+        if t.dt.tz is not None:
+            t = t.dt.tz_convert("UTC").dt.tz_localize(None)
+        h.update(np.ascontiguousarray(t.to_numpy(dtype="datetime64[ns]")).view(np.int64).tobytes())
+        for col in ("open", "high", "low", "close"):
+            h.update(np.ascontiguousarray(spot_df[col].to_numpy(dtype=float)).tobytes())
+    if vix is not None and not vix.empty:
+        h.update(_dumps({str(k): float(v) for k, v in vix.items()}).encode("utf-8"))
+    if option_bars is not None and len(option_bars):
+        h.update(option_bars.fingerprint().encode("utf-8"))
+    return h.hexdigest()
+
+
+def run_cache_key(cfg: BacktestConfig, strat_hash: str, data_fp: str) -> str:
+    relevant = {k: v for k, v in config_to_dict(cfg).items() if k not in CACHE_EXCLUDED_FIELDS}
+    payload = _dumps({"v": ENGINE_VERSION, "cfg": relevant, "strategy": strat_hash, "data": data_fp})
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+# ── Row conversion ────────────────────────────────────────────────────────────
+
+def _trade_row(t: BacktestTrade) -> tuple:
+    return (
+        t.trade_no, t.direction,
+        t.entry_time.isoformat() if t.entry_time else None,
+        t.exit_time.isoformat() if t.exit_time else None,
+        t.spot_entry, t.spot_exit, int(t.strike), t.option_entry, t.option_exit,
+        t.lots, t.lot_size, t.gross_pnl, t.slippage_cost, t.brokerage, t.net_pnl,
+        _json_default(t.entry_source) if isinstance(t.entry_source, PriceSource) else str(t.entry_source),
+        _json_default(t.exit_source) if isinstance(t.exit_source, PriceSource) else str(t.exit_source),
+        t.exit_reason, t.signal_name, t.mae, t.mfe,
+    )
+
+
+def _trade_from_row(r: Dict[str, Any]) -> BacktestTrade:
+    def _src(v):
+        try:
+            return PriceSource(v)
+        except ValueError:
+            return PriceSource.SYNTHETIC
+    return BacktestTrade(
+        trade_no=r["trade_no"], direction=r["direction"],
+        entry_time=_parse_dt(r["entry_time"]), exit_time=_parse_dt(r["exit_time"]),
+        spot_entry=r["spot_entry"], spot_exit=r["spot_exit"], strike=r["strike"],
+        option_entry=r["option_entry"], option_exit=r["option_exit"],
+        lots=r["lots"], lot_size=r["lot_size"], gross_pnl=r["gross_pnl"],
+        slippage_cost=r["slippage_cost"], brokerage=r["brokerage"], net_pnl=r["net_pnl"],
+        entry_source=_src(r["entry_source"]), exit_source=_src(r["exit_source"]),
+        exit_reason=r["exit_reason"], signal_name=r["signal_name"],
+        mae=r.get("mae") or 0.0, mfe=r.get("mfe") or 0.0,
+    )
+
+
+# ── Store ─────────────────────────────────────────────────────────────────────
+
+class BacktestResultsStore:
+    """Save, look up and lazily load backtest runs."""
+
+    def __init__(self, db=None) -> None:
+        self._db = db
+        self._equity_cache: "OrderedDict[int, List[Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def _crud(self):
+        from db.crud import backtest_runs
+        return backtest_runs
+
+    # ── Writing ───────────────────────────────────────────────────────────────
+
+    def save(self, result: BacktestResult, cache_key: str, strat_hash: str, data_fp: str) -> int:
+        """Persist *result*; returns the run id (-1 on failure)."""
+        cfg = result.config
+        metrics = {f.name: getattr(result, f.name) for f in dataclasses.fields(result)
+                   if f.name not in _STORE_SKIP_FIELDS}
+        run = {
+            "cache_key": cache_key,
+            "strategy_slug": cfg.strategy_slug,
+            "strategy_hash": strat_hash,
+            "data_fingerprint": data_fp,
+            "derivative": cfg.derivative,
+            "start_date": cfg.start_date.date().isoformat(),
+            "end_date": cfg.end_date.date().isoformat(),
+            "interval_minutes": cfg.execution_interval_minutes,
+            "total_trades": result.total_trades,
+            "total_net_pnl": result.total_net_pnl,
+            "win_rate": result.win_rate,
+            "max_drawdown": result.max_drawdown,
+            "profit_factor": result.profit_factor,
+            "sharpe": result.sharpe,
+            "config": _dumps(config_to_dict(cfg)),
+            "metrics": _dumps(metrics),
+        }
+        trades = [_trade_row(t) for t in result.trades]
+        equity = [(e["timestamp"].isoformat(), float(e["equity"])) for e in result.equity_curve]
+        run_id = self._crud.save(run, trades, equity, db=self._db)
+        if run_id > 0:
+            logger.info("[ResultsStore] saved run #%d (%d trades, %d equity points)",
+                        run_id, len(trades), len(equity))
+        return run_id
+
+    # ── Reading ───────────────────────────────────────────────────────────────
+
+    def find_cached(self, cache_key: str) -> Optional[BacktestResult]:
+        """Full result for an identical earlier run, or None."""
+        row = self._crud.get_by_cache_key(cache_key, db=self._db)
+        return self._build(row) if row else None
+
+    def list_runs(self, **filters) -> List[Dict[str, Any]]:
+        """Summary rows; see BacktestRunCRUD.list_runs for the filters."""
+        return self._crud.list_runs(db=self._db, **filters)
+
+    def load(self, run_id: int) -> Optional[BacktestResult]:
+        row = self._crud.get(run_id, db=self._db)
+        return self._build(row) if row else None
+
+    def load_config(self, run_id: int) -> Optional[BacktestConfig]:
+        row = self._crud.get(run_id, db=self._db)
+        return config_from_dict(json.loads(row["config"])) if row else None
+
+    def load_metrics(self, run_id: int) -> Dict[str, Any]:
+        """Scalar result metrics only — no trades or equity are read."""
+        row = self._crud.get(run_id, db=self._db)
+        return json.loads(row["metrics"]) if row else {}
+
+    def load_trades(self, run_id: int) -> List[BacktestTrade]:
+        return [_trade_from_row(r) for r in self._crud.get_trades(run_id, db=self._db)]
+
+    def load_equity(self, run_id: int) -> List[Dict]:
+        """Equity curve for one run; the last few are kept in memory."""
+        with self._lock:
+            if run_id in self._equity_cache:
+                self._equity_cache.move_to_end(run_id)
+                return self._equity_cache[run_id]
+        curve = [{"timestamp": _parse_dt(ts), "equity": eq}
+                 for ts, eq in self._crud.get_equity(run_id, db=self._db)]
+        with self._lock:
+            self._equity_cache[run_id] = curve
+            while len(self._equity_cache) > EQUITY_CACHE_SIZE:
+                self._equity_cache.popitem(last=False)
+        return curve
+
+    def delete(self, run_id: int) -> bool:
+        with self._lock:
+            self._equity_cache.pop(run_id, None)
+        return self._crud.delete(run_id, db=self._db)
+
+    def _build(self, row: Dict[str, Any]) -> BacktestResult:
+        result = BacktestResult(config=config_from_dict(json.loads(row["config"])),
+                                run_id=row["id"])
+        known = {f.name for f in dataclasses.fields(BacktestResult)}
+        for key, value in json.loads(row["metrics"]).items():
+            if key in known and key not in _STORE_SKIP_FIELDS:
+                setattr(result, key, value)
+        result.trades = self.load_trades(row["id"])
+        result.equity_curve = self.load_equity(row["id"])
+        # The candle debug log lives in a temp file; keep it only if it survived.
+        if result.debug_log_path and not os.path.exists(result.debug_log_path):
+            result.debug_log_path = None
+        return result
+
+
+results_store = BacktestResultsStore()
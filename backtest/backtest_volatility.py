@@ -0,0 +1,347 @@
+"""
+backtest/backtest_volatility.py
+================================
+Realised-volatility estimators for the backtest option pricer.
+
+rolling_hv() in backtest_option_pricer rebuilds a list of closes and
+recomputes the log-return standard deviation on every call.  The classes
+here keep running window statistics instead, so each new bar costs O(1):
+
+- RollingVolatility: close-to-close HV over a fixed window; sliding Welford
+  updates (add / replace / remove) with periodic exact re-sync to bound drift.
+  Returns exactly what rolling_hv() returns for the same price history.
+- EwmaVolatility: RiskMetrics-style exponentially weighted variance.
+- RangeVolatility: Parkinson or Garman-Klass estimator from bar OHLC over a
+  fixed window.
+
+Vector functions compute the whole series in one NumPy pass for full-history
+work: hv_series(), ewma_hv_series(), range_hv_series().  Element i equals the
+value the incremental estimator reports after bar i.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Deque, Optional
+
+import numpy as np
+
+from backtest.backtest_option_pricer import DEFAULT_HV, HV_LOOKBACK, HV_MIN_BARS
+
+HV_FLOOR = 0.05
+HV_CAP = 1.50
+DEFAULT_BARS_PER_YEAR = 375 * 252
+RESYNC_EVERY = 10_000       # exact recompute interval for the sliding sums
+EWMA_LAMBDA = 0.94
+_LN2 = math.log(2.0)
+_GK_K = 2.0 * _LN2 - 1.0
+
+
+def _clamp(v: float) -> float:
+    return max(HV_FLOOR, min(HV_CAP, v))
+
+
+# ── Sliding-window statistics ─────────────────────────────────────────────────
+
+class _WindowStats:
+    """
+    Mean and sample variance over the last *window* slots.
+
+    Slots may be None (an invalid observation still occupies a slot, which is
+    how rolling_hv() skips returns next to non-positive prices).  Updates are
+    Welford-style and O(1); every RESYNC_EVERY updates the moments are
+    recomputed exactly from the slots so rounding error cannot accumulate.
+    """
+
+    __slots__ = ("window", "_slots", "n", "mean", "m2", "_updates")
+
+    def __init__(self, window: int) -> None:
+        self.window = max(1, int(window))
+        self._slots: Deque[Optional[float]] = deque()
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._updates = 0
+
+    def push(self, x: Optional[float]) -> None:
+        evicted = self._slots.popleft() if len(self._slots) == self.window else None
+        self._slots.append(x)
+
+        if x is not None and evicted is not None:
+            # Same count: combined replace step
+            delta = x - evicted
+            new_mean = self.mean + delta / self.n
+            self.m2 += delta * (x - new_mean + evicted - self.mean)
+            self.mean = new_mean
+        elif evicted is not None:
+            self._remove(evicted)
+        elif x is not None:
+            self.n += 1
+            d = x - self.mean
+            self.mean += d / self.n
+            self.m2 += d * (x - self.mean)
+
+        if self.m2 < 0.0:
+            self.m2 = 0.0
+        self._updates += 1
+        if self._updates >= RESYNC_EVERY:
+            self._resync()
+
+    def _remove(self, y: float) -> None:
+        self.n -= 1
+        if self.n <= 0:
+            self.n, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        d = y - self.mean
+        self.mean -= d / self.n
+        self.m2 -= d * (y - self.mean)
+
+    def _resync(self) -> None:
+        vals = [v for v in self._slots if v is not None]
+        self.n = len(vals)
+        self.mean = math.fsum(vals) / self.n if vals else 0.0
+        self.m2 = math.fsum((v - self.mean) ** 2 for v in vals)
+        self._updates = 0
+
+    def variance(self) -> float:
+        return self.m2 / max(self.n - 1, 1)
+
+    def clear(self) -> None:
+        self._slots.clear()
+        self.n, self.mean, self.m2, self._updates = 0, 0.0, 0.0, 0
+
+
+# ── Incremental estimators ────────────────────────────────────────────────────
+
+class RollingVolatility:
+    """
+    Close-to-close realised volatility over the last *lookback* returns.
+
+    push(close) is O(1); value() reproduces rolling_hv() on the same history,
+    including the DEFAULT_HV fallback below HV_MIN_BARS and the [5%, 150%]
+    clamp.
+    """
+
+    def __init__(self, lookback: int = HV_LOOKBACK, min_bars: int = HV_MIN_BARS) -> None:
+        self.lookback = lookback
+        self.min_bars = min_bars
+        self._stats = _WindowStats(lookback)
+        self._prev: Optional[float] = None
+        self._count = 0
+
+    def push(self, close: float) -> None:
+        close = float(close)
+        if self._prev is not None:
+            ok = self._prev > 0 and close > 0
+            self._stats.push(math.log(close / self._prev) if ok else None)
+        self._prev = close
+        self._count += 1
+
+    def value(self, bars_per_year: int = DEFAULT_BARS_PER_YEAR) -> float:
+        """Annualised volatility as a decimal, or DEFAULT_HV/100 when too few bars."""
+        if self._count < self.min_bars + 1 or self._stats.n < self.min_bars:
+            return DEFAULT_HV / 100.0
+        return _clamp(math.sqrt(self._stats.variance()) * math.sqrt(bars_per_year))
+
+    def clear(self) -> None:
+        self._stats.clear()
+        self._prev = None
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class EwmaVolatility:
+    """
+    Exponentially weighted volatility: var ← λ·var + (1-λ)·r².
+
+    Seeded with the mean squared return of the first *min_bars* returns so early
+    values are not dominated by the zero initial state.
+    """
+
+    def __init__(self, lam: float = EWMA_LAMBDA, min_bars: int = HV_MIN_BARS) -> None:
+        self.lam = lam
+        self.min_bars = min_bars
+        self._var: Optional[float] = None
+        self._seed: list = []
+        self._prev: Optional[float] = None
+
+    def push(self, close: float) -> None:
+        close = float(close)
+        prev, self._prev = self._prev, close
+        if prev is None or not _priced(prev, close):
+            return
+        r = math.log(close / prev)
+        if self._var is None:
+            self._seed.append(r)
+            if len(self._seed) >= self.min_bars:
+                self._var = math.fsum(x * x for x in self._seed) / len(self._seed)
+                self._seed = []
+            return
+        self._var = self.lam * self._var + (1.0 - self.lam) * r * r
+
+    def value(self, bars_per_year: int = DEFAULT_BARS_PER_YEAR) -> float:
+        if self._var is None:
+            return DEFAULT_HV / 100.0
+        return _clamp(math.sqrt(self._var * bars_per_year))
+
+    def clear(self) -> None:
+        self._var, self._seed, self._prev = None, [], None
+
+
+class RangeVolatility:
+    """
+    Range-based volatility from bar OHLC over a fixed window.
+
+    method="parkinson":    σ² = mean(ln(H/L)²) / (4·ln2)
+    method="garman_klass": σ² = mean(½·ln(H/L)² − (2·ln2 − 1)·ln(C/O)²)
+
+    Both use the whole bar range, so they need far fewer bars than
+    close-to-close HV for the same precision.
+    """
+
+    METHODS = ("parkinson", "garman_klass")
+
+    def __init__(self, method: str = "parkinson", lookback: int = HV_LOOKBACK,
+                 min_bars: int = HV_MIN_BARS) -> None:
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown range volatility method: {method!r}")
+        self.method = method
+        self.min_bars = min_bars
+        self._stats = _WindowStats(lookback)
+
+    def push(self, o: float, h: float, low: float, c: float) -> None:
+        self._stats.push(_range_term(self.method, o, h, low, c))
+
+    def value(self, bars_per_year: int = DEFAULT_BARS_PER_YEAR) -> float:
+        if self._stats.n < self.min_bars:
+            return DEFAULT_HV / 100.0
+        return _clamp(math.sqrt(max(self._stats.mean, 0.0) * bars_per_year))
+
+    def clear(self) -> None:
+        self._stats.clear()
+
+
+def _priced(prev, close):
+    """Return guard shared by EwmaVolatility and ewma_hv_series (scalars or arrays)."""
+    return (prev > 0) & (close > 0)
+
+
+def _range_term(method: str, o: float, h: float, low: float, c: float) -> Optional[float]:
+    if min(o, h, low, c) <= 0 or h < low:
+        return None
+    hl = math.log(h / low)
+    if method == "parkinson":
+        return hl * hl / (4.0 * _LN2)
+    co = math.log(c / o)
+    return 0.5 * hl * hl - _GK_K * co * co
+
+
+# ── Vector (full-history) series ──────────────────────────────────────────────
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """Trailing sum over up to *window* elements (shorter at the start)."""
+    cs = np.concatenate(([0.0], np.cumsum(x)))
+    idx = np.arange(1, len(x) + 1)
+    return cs[idx] - cs[np.maximum(idx - window, 0)]
+
+
+def hv_series(
+    closes,
+    lookback: int = HV_LOOKBACK,
+    bars_per_year: int = DEFAULT_BARS_PER_YEAR,
+    min_bars: int = HV_MIN_BARS,
+) -> np.ndarray:
+    """
+    Close-to-close HV after every bar, in one pass.
+
+    hv_series(c)[i] == rolling_hv(c[:i+1]) for every i (to float rounding).
+    Returns are demeaned globally before the cumulative sums, which keeps
+    the sum-of-squares form well conditioned for tiny minute returns.
+    """
+    c = np.asarray(closes, dtype=np.float64)
+    n = len(c)
+    out = np.full(n, DEFAULT_HV / 100.0)
+    if n < 2:
+        return out
+
+    ok = (c[1:] > 0) & (c[:-1] > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(ok, np.log(np.where(ok, c[1:], 1.0) / np.where(ok, c[:-1], 1.0)), 0.0)
+    shift = r[ok].mean() if ok.any() else 0.0
+    rc = np.where(ok, r - shift, 0.0)
+
+    cnt = _rolling_sum(ok.astype(np.float64), lookback)
+    s1 = _rolling_sum(rc, lookback)
+    s2 = _rolling_sum(rc * rc, lookback)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = (s2 - s1 * s1 / cnt) / np.maximum(cnt - 1, 1)
+    vol = np.sqrt(np.maximum(var, 0.0) * bars_per_year)
+
+    prices_seen = np.arange(2, n + 1)
+    valid = (prices_seen >= min_bars + 1) & (cnt >= min_bars)
+    out[1:] = np.where(valid, np.clip(vol, HV_FLOOR, HV_CAP), DEFAULT_HV / 100.0)
+    return out
+
+
+def ewma_hv_series(
+    closes,
+    lam: float = EWMA_LAMBDA,
+    bars_per_year: int = DEFAULT_BARS_PER_YEAR,
+    min_bars: int = HV_MIN_BARS,
+) -> np.ndarray:
+    """
+    EwmaVolatility after every bar (recursive filter; pandas ewm does the pass).
+
+    Returns touching a zero or negative price are skipped, as in push(): the
+    variance holds through them and the seed counts only usable returns.
+    """
+    import pandas as pd
+
+    c = np.asarray(closes, dtype=np.float64)
+    n = len(c)
+    out = np.full(n, DEFAULT_HV / 100.0)
+    if n <= min_bars:
+        return out
+    ok = _priced(c[:-1], c[1:])
+    r2 = np.log(c[1:][ok] / c[:-1][ok]) ** 2
+    if len(r2) < min_bars:
+        return out
+    seed = r2[:min_bars].mean()
+    # var_k = λ·var_{k-1} + (1-λ)·r²_k, seeded at the min_bars-th usable return
+    filt = pd.Series(np.concatenate(([seed], r2[min_bars:]))).ewm(
+        alpha=1.0 - lam, adjust=False).mean().to_numpy()
+    used = np.cumsum(ok)                    # usable returns seen by bar i + 1
+    ready = used >= min_bars
+    out[1:][ready] = np.clip(np.sqrt(filt[used[ready] - min_bars] * bars_per_year),
+                             HV_FLOOR, HV_CAP)
+    return out
+
+
+def range_hv_series(
+    o, h, low, c,
+    method: str = "parkinson",
+    lookback: int = HV_LOOKBACK,
+    bars_per_year: int = DEFAULT_BARS_PER_YEAR,
+    min_bars: int = HV_MIN_BARS,
+) -> np.ndarray:
+    """RangeVolatility after every bar, in one pass."""
+    if method not in RangeVolatility.METHODS:
+        raise ValueError(f"Unknown range volatility method: {method!r}")
+    o, h, low, c = (np.asarray(a, dtype=np.float64) for a in (o, h, low, c))
+    ok = (np.minimum(np.minimum(o, h), np.minimum(low, c)) > 0) & (h >= low)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hl = np.where(ok, np.log(np.where(ok, h, 1.0) / np.where(ok, low, 1.0)), 0.0)
+        co = np.where(ok, np.log(np.where(ok, c, 1.0) / np.where(ok, o, 1.0)), 0.0)
+    if method == "parkinson":
+        term = hl * hl / (4.0 * _LN2)
+    else:
+        term = 0.5 * hl * hl - _GK_K * co * co
+
+    cnt = _rolling_sum(ok.astype(np.float64), lookback)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = _rolling_sum(np.where(ok, term, 0.0), lookback) / cnt
+    vol = np.sqrt(np.maximum(np.nan_to_num(mean), 0.0) * bars_per_year)
+    return np.where(cnt >= min_bars, np.clip(vol, HV_FLOOR, HV_CAP), DEFAULT_HV / 100.0)
@@ -10,7 +10,8 @@ Layout (mirrors main TradingGUI):
   │  ├─ 📈 Overview                   │  Sidebar        │
   │  ├─ 📋 Trade Log                  │  (right side,   │
   │  ├─ 🔬 Strategy Analysis           │   tabbed like   │
-  │  └─ 📉 Equity Curve                │   StatusPanel)  │
+  │  ├─ 📉 Equity Curve                │   StatusPanel)  │
+  │  └─ 🗂 Saved Runs                   │                 │
   └──────────────────────────────────┴─────────────────┘
   │  Progress bar + Run / Stop buttons                  │
   └─────────────────────────────────────────────────────┘
@@ -42,8 +43,11 @@ from PyQt5.QtWidgets import (
 
 from Utils.safe_getattr import safe_hasattr, safe_getattr
 from backtest.backtest_candle_debug_tab import CandleDebugTab
-from backtest.backtest_engine import BacktestConfig, BacktestResult
+from backtest.backtest_candle_debugger import CandleDebugLog
+from backtest.backtest_engine import BacktestConfig, BacktestResult, BarAnalysis
 from backtest.backtest_help_tab import BacktestHelpTab
+from backtest.backtest_history_tab import BacktestHistoryTab
+from backtest.backtest_monte_carlo import monte_carlo_from_result, trade_exit_positions
 from backtest.backtest_thread import BacktestThread
 from data.trade_state_manager import state_manager
 from strategy.strategy_manager import StrategyManager
@@ -248,48 +252,6 @@ def _qdate_to_datetime(qd: QDate, end_of_day: bool = False) -> datetime:
     return IST.localize(datetime(qd.year(), qd.month(), qd.day(), 0, 0, 0))
 
 
-# ── BarAnalysis ────────────────────────────────────────────────────────────────
-
-class BarAnalysis:
-    """Analysis results for a single bar/candle."""
-
-    def __init__(self, timestamp: datetime, spot_price: float, signal: str,
-                 confidence: Dict[str, float], rule_results: Dict[str, List[Dict]],
-                 indicator_values: Dict[str, Dict[str, float]],
-                 timeframe: str = "5m"):
-        self.timestamp = timestamp
-        self.spot_price = spot_price
-        self.signal = signal
-        self.confidence = confidence
-        self.rule_results = rule_results
-        self.indicator_values = indicator_values
-        self.timeframe = timeframe
-
-    def to_dict(self) -> Dict:
-        result = {
-            "timeframe":   self.timeframe,
-            "timestamp":   fmt_display(self.timestamp),
-            "spot_price":  self.spot_price,
-            "signal":      self.signal,
-        }
-        if self.confidence:
-            result["overall_confidence"] = sum(self.confidence.values()) / len(self.confidence)
-        else:
-            result["overall_confidence"] = 0.0
-        for sig, conf in self.confidence.items():
-            result[f"confidence_{sig}"] = conf
-        for indicator, values in self.indicator_values.items():
-            result[f"indicator_{indicator}_last"] = values.get("last", "")
-            result[f"indicator_{indicator}_prev"] = values.get("prev", "")
-        for sig, rules in self.rule_results.items():
-            passed = sum(1 for r in rules if r.get("result", False))
-            total = len(rules)
-            result[f"rules_{sig}_passed"] = passed
-            result[f"rules_{sig}_total"] = total
-            result[f"rules_{sig}_pass_rate"] = (passed / total) if total else 0
-        return result
-
-
 # ── Multi-Timeframe Analysis Tab (Themed) ─────────────────────────────────────
 
 class MultiTimeframeAnalysisTab(QWidget, ThemedMixin):
@@ -673,6 +635,10 @@ class SettingsSidebar(QTabWidget, ThemedMixin):
         self.execution_interval = None
         self.auto_export = None
         self.use_vix = None
+        self.use_real_options = None
+        self.option_data_dir = ""
+        self.intrabar_model = None
+        self.intrabar_steps = None
 
     def apply_theme(self, _: str = None) -> None:
         """Apply theme colors to the sidebar."""
@@ -916,6 +882,13 @@ class SettingsSidebar(QTabWidget, ThemedMixin):
         lay.addWidget(g_tf, 1)
         return tab
 
+    def _pick_option_data_dir(self):
+        directory = QFileDialog.getExistingDirectory(self, "Select Option Bars Folder",
+                                                     self.option_data_dir or "")
+        self.option_data_dir = directory or ""
+        self._option_dir_btn.setText(
+            f"📁  {os.path.basename(directory)}" if directory else "📁  Local bars folder…")
+
     def _build_instrument_tab(self) -> QWidget:
         c = self._c
         sp = self._sp
@@ -1105,6 +1078,26 @@ class SettingsSidebar(QTabWidget, ThemedMixin):
         )
         gl.addWidget(self.execution_interval)
 
+        gl.addWidget(_label("Intrabar TP / SL model:", size_token="SIZE_XS"))
+        self.intrabar_model = QComboBox()
+        self.intrabar_model.addItems(["off", "ohlc", "bridge", "recorded"])
+        self.intrabar_model.setCurrentText("off")
+        self.intrabar_model.setStyleSheet(self._get_combobox_style())
+        self.intrabar_model.setToolTip(
+            "How TP / SL / trailing SL are resolved inside a bar:\n"
+            "off — from the bar high / low (TP wins a same-bar conflict)\n"
+            "ohlc — open → nearer extreme → other extreme → close\n"
+            "bridge — seeded Brownian-bridge path through the bar's range\n"
+            "recorded — recorded 1-min option bars (needs real option history)"
+        )
+        gl.addWidget(self.intrabar_model)
+        self.intrabar_steps = QSpinBox()
+        self.intrabar_steps.setRange(4, 300)
+        self.intrabar_steps.setValue(30)
+        self.intrabar_steps.setPrefix("Bridge steps: ")
+        self.intrabar_steps.setStyleSheet(self._get_spinbox_style())
+        gl.addWidget(self.intrabar_steps)
+
         self.auto_export = QCheckBox("Auto-export analysis after run")
         self.auto_export.setChecked(False)
         self.auto_export.setStyleSheet(self._get_checkbox_style())
@@ -1133,6 +1126,42 @@ class SettingsSidebar(QTabWidget, ThemedMixin):
         g3l.addWidget(hv_note)
         lay.addWidget(g3)
 
+        g4 = _card("Option Prices", "BLUE")
+        g4l = QVBoxLayout(g4)
+        g4l.setSpacing(sp.GAP_SM)
+        self.use_real_options = QCheckBox("Use real option history where available")
+        self.use_real_options.setChecked(False)
+        self.use_real_options.setStyleSheet(self._get_checkbox_style())
+        self.use_real_options.setToolTip(
+            "Prefetches 1-min bars for every contract the run can touch\n"
+            "(broker history or a local folder, cached under Data/option_bars).\n"
+            "Bars without data fall back to Black-Scholes."
+        )
+        g4l.addWidget(self.use_real_options)
+        self._option_dir_btn = QPushButton("📁  Local bars folder…")
+        self._option_dir_btn.setCursor(Qt.PointingHandCursor)
+        self._option_dir_btn.setStyleSheet(f"""
+            QPushButton {{
+                background: {c.BG_HOVER};
+                color: {c.TEXT_MAIN};
+                border: 1px solid {c.BORDER};
+                border-radius: {sp.RADIUS_MD}px;
+                padding: {sp.PAD_SM}px {sp.PAD_MD}px;
+                font-size: {ty.SIZE_BODY}pt;
+            }}
+            QPushButton:hover {{
+                background: {c.BORDER};
+            }}
+        """)
+        self._option_dir_btn.setToolTip(
+            "Optional folder of per-contract files named like\n"
+            "NIFTY_2025-01-09_22000_CE.csv (time, open, high, low, close)\n"
+            "or by broker symbol — for expired contracts the broker cannot serve."
+        )
+        self._option_dir_btn.clicked.connect(self._pick_option_data_dir)
+        g4l.addWidget(self._option_dir_btn)
+        lay.addWidget(g4)
+
         g2 = _card("Notes", "TEXT_DIM")
         g2l = QVBoxLayout(g2)
         g2l.setSpacing(sp.GAP_SM)
@@ -1140,8 +1169,8 @@ class SettingsSidebar(QTabWidget, ThemedMixin):
             "• Spot data is always fetched at 1-min resolution\n"
             "  and resampled to the execution interval above\n"
             "• Analysis timeframes are independent of execution\n"
-            "• Synthetic (BS) pricing used for all option bars\n"
-            "  (marked ⚗ in Trade Log)\n"
+            "• Synthetic (BS) pricing used for option bars\n"
+            "  without real history (marked ⚗ in Trade Log)\n"
             "• HV mode: no network calls, fully offline capable"
         )
         info.setWordWrap(True)
@@ -1308,15 +1337,33 @@ class EquityChart(QWidget, ThemedMixin):
             except Exception:
                 return False
 
-    def set_data(self, equity_curve, trades):
+    def set_data(self, equity_curve, trades, monte_carlo=None):
+        """
+        Draw the equity curve.  *monte_carlo* (a MonteCarloResult) adds
+        5–95 % and 25–75 % bands plus the median, each placed at the bar
+        where the corresponding trade closed.
+        """
         self._equity_data = equity_curve
         synth_indices = [i for i, t in enumerate(trades) if self._is_synthetic(t)]
+        bands = self._mc_band_points(equity_curve, trades, monte_carlo)
         if self._use_pg:
-            self._draw_pg(equity_curve, trades, synth_indices)
+            self._draw_pg(equity_curve, trades, synth_indices, bands)
         else:
-            self._fallback.set_data(equity_curve, trades)
+            self._fallback.set_data(equity_curve, trades, bands)
 
-    def _draw_pg(self, equity_curve, trades, synth_indices):
+    @staticmethod
+    def _mc_band_points(equity_curve, trades, monte_carlo):
+        """Return (xs, {pct: ys}) for the chart, or None."""
+        if monte_carlo is None or not equity_curve or not trades:
+            return None
+        try:
+            xs = [0] + trade_exit_positions(equity_curve, trades).tolist()
+            return xs, {p: monte_carlo.band(p).tolist() for p in (5.0, 25.0, 50.0, 75.0, 95.0)}
+        except Exception as e:
+            logger.error(f"[EquityChart._mc_band_points] Failed: {e}", exc_info=True)
+            return None
+
+    def _draw_pg(self, equity_curve, trades, synth_indices, bands=None):
         import pyqtgraph as pg
         c = self._c
 
@@ -1334,6 +1381,17 @@ class EquityChart(QWidget, ThemedMixin):
         fc.setAlpha(30)
         pw.addItem(pg.FillBetweenItem(curve, base, brush=fc))
 
+        if bands:
+            bx, ys = bands
+            no_pen = pg.mkPen(None)
+            for lo, hi, alpha in ((5.0, 95.0, 25), (25.0, 75.0, 45)):
+                band_clr = QColor(c.BLUE)
+                band_clr.setAlpha(alpha)
+                pw.addItem(pg.FillBetweenItem(pw.plot(bx, ys[lo], pen=no_pen),
+                                              pw.plot(bx, ys[hi], pen=no_pen), brush=band_clr))
+            pw.plot(bx, ys[50.0], pen=pg.mkPen(color=c.BLUE, width=1, style=Qt.DashLine),
+                    name="Monte Carlo median")
+
         if synth_indices:
             regions = []
             start_idx = synth_indices[0]
@@ -1395,14 +1453,16 @@ class _EquityPainter(QWidget, ThemedMixin):
 
     def _safe_defaults_init(self):
         self._equity = []
+        self._bands = None
 
     def apply_theme(self, _: str = None) -> None:
         """Apply theme colors to the painter."""
         # Colors will be used in paintEvent
         self.update()
 
-    def set_data(self, equity_curve, _trades):
+    def set_data(self, equity_curve, _trades, bands=None):
         self._equity = [e["equity"] for e in equity_curve]
+        self._bands = bands
         self.update()
 
     def paintEvent(self, event):
@@ -1419,6 +1479,9 @@ class _EquityPainter(QWidget, ThemedMixin):
             p.drawText(0, 0, w, h, Qt.AlignCenter, "No equity data")
             return
         mn, mx = min(self._equity), max(self._equity)
+        if self._bands:
+            mn = min(mn, min(self._bands[1][5.0]))
+            mx = max(mx, max(self._bands[1][95.0]))
         rng = mx - mn or 1
         tx = lambda i: pad + int((i / (len(self._equity) - 1)) * (w - 2 * pad))
         ty = lambda v: h - pad - int(((v - mn) / rng) * (h - 2 * pad))
@@ -1428,6 +1491,12 @@ class _EquityPainter(QWidget, ThemedMixin):
         p.setPen(QPen(clr, 2))
         for i in range(1, len(self._equity)):
             p.drawLine(tx(i - 1), ty(self._equity[i - 1]), tx(i), ty(self._equity[i]))
+        if self._bands:
+            bx, ys = self._bands
+            p.setPen(QPen(QColor(c.BLUE), 1, Qt.DashLine))
+            for pct in (5.0, 50.0, 95.0):
+                for j in range(1, len(bx)):
+                    p.drawLine(tx(bx[j - 1]), ty(ys[pct][j - 1]), tx(bx[j]), ty(ys[pct][j]))
         p.setPen(QColor(c.TEXT_DIM))
         p.drawText(2, ty(mx) + 4, f"₹{mx:,.0f}")
         p.drawText(2, ty(mn) + 4, f"₹{mn:,.0f}")
@@ -1497,6 +1566,7 @@ class BacktestWindow(QMainWindow, ThemedMixin):
         self._tabs = None
         self.settings_sidebar = None
         self._cards = {}
+        self._breakdown_tables = {}
         self._timeframe_info = None
         self._cfg_summary = None
         self._trade_table = None
@@ -1729,6 +1799,8 @@ class BacktestWindow(QMainWindow, ThemedMixin):
         self._tabs.addTab(self._build_chart_tab(),          "📉  Equity Curve")
         self._debug_tab = CandleDebugTab(parent=self)
         self._tabs.addTab(self._debug_tab, "🔍 Candle Debug")
+        self._history_tab = BacktestHistoryTab(parent=self)
+        self._tabs.addTab(self._history_tab, "🗂  Saved Runs")
         self._help_tab = BacktestHelpTab(parent=self)
         self._tabs.addTab(self._help_tab, "❓ Help")
 
@@ -1761,6 +1833,14 @@ class BacktestWindow(QMainWindow, ThemedMixin):
             ("winners",      "Winners",            "—", "GREEN"),
             ("losers",       "Losers",             "—", "RED"),
             ("data_quality", "Data Source",        "—", "TEXT_MAIN"),
+            ("mc_pnl",       "MC P&L (5th pct)",   "—", "TEXT_MAIN"),
+            ("mc_dd",        "MC Max DD (95%)",    "—", "YELLOW"),
+            ("mc_streak",    "MC Loss Streak (95%)", "—", "RED"),
+            ("mc_ruin",      "Risk of Ruin",       "—", "TEXT_MAIN"),
+            ("sortino",      "Sortino Ratio",      "—", "BLUE"),
+            ("calmar",       "Calmar Ratio",       "—", "BLUE"),
+            ("time_in_mkt",  "Time in Market",     "—", "TEXT_MAIN"),
+            ("mae_mfe",      "Avg MAE / MFE",      "—", "TEXT_MAIN"),
         ]
         for n, (key, lbl, val, clr) in enumerate(card_defs):
             card = _StatCard(lbl, val, clr)
@@ -1769,6 +1849,17 @@ class BacktestWindow(QMainWindow, ThemedMixin):
 
         lay.addWidget(cards_w)
 
+        # P&L breakdowns (entry hour / entry weekday / exit reason)
+        bd_row = QHBoxLayout()
+        bd_row.setSpacing(sp.GAP_MD)
+        self._breakdown_tables = {}
+        for key, title in (("by_hour", "Entry Hour"), ("by_weekday", "Weekday"),
+                           ("by_exit_reason", "Exit Reason")):
+            table = self._make_breakdown_table(title)
+            self._breakdown_tables[key] = table
+            bd_row.addWidget(table)
+        lay.addLayout(bd_row, 1)
+
         self._timeframe_info = _label("", color_token="BLUE", size_token="SIZE_BODY")
         lay.addWidget(self._timeframe_info)
 
@@ -1783,6 +1874,51 @@ class BacktestWindow(QMainWindow, ThemedMixin):
         lay.addStretch()
         return w
 
+    def _make_breakdown_table(self, title: str) -> QTableWidget:
+        c, sp = self._c, self._sp
+        table = QTableWidget(0, 4)
+        table.setHorizontalHeaderLabels([title, "Trades", "Net P&L", "Win %"])
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setSelectionMode(QTableWidget.NoSelection)
+        table.setStyleSheet(f"""
+            QTableWidget {{
+                background: {c.BG_MAIN};
+                gridline-color: {c.BORDER};
+                border: 1px solid {c.BORDER};
+                border-radius: {sp.RADIUS_MD}px;
+                color: {c.TEXT_MAIN};
+                font-size: {self._ty.SIZE_XS}pt;
+            }}
+            QHeaderView::section {{
+                background: {c.BG_HOVER};
+                color: {c.TEXT_MAIN};
+                border: none;
+                border-bottom: 1px solid {c.BORDER};
+                padding: {sp.PAD_XS}px;
+                font-weight: {self._ty.WEIGHT_BOLD};
+            }}
+        """)
+        hdr = table.horizontalHeader()
+        hdr.setSectionResizeMode(QHeaderView.Stretch)
+        return table
+
+    def _fill_breakdown_table(self, table: QTableWidget, rows: Dict[str, Dict]):
+        c = self._c
+        table.setRowCount(len(rows))
+        for r, (label, stats) in enumerate(rows.items()):
+            pnl = stats.get("net_pnl", 0.0)
+            for col, (text, clr) in enumerate((
+                (label,                          c.TEXT_MAIN),
+                (str(stats.get("trades", 0)),    c.TEXT_MAIN),
+                (f"₹{pnl:+,.0f}",                c.GREEN if pnl >= 0 else c.RED),
+                (f"{stats.get('win_rate', 0.0):.0f}%", c.TEXT_DIM),
+            )):
+                item = QTableWidgetItem(text)
+                item.setForeground(QBrush(QColor(clr)))
+                item.setTextAlignment(Qt.AlignCenter)
+                table.setItem(r, col, item)
+
     def _build_trade_log_tab(self) -> QWidget:
         sp = self._sp
         c = self._c
@@ -1806,7 +1942,7 @@ class BacktestWindow(QMainWindow, ThemedMixin):
             "#", "Dir", "Entry Time", "Exit Time",
             "Spot In", "Spot Out", "Strike",
             "Opt Entry", "Opt Exit", "Lots",
-            "Gross P&L", "Net P&L", "Exit", "Signal", "Src"
+            "Gross P&L", "Net P&L", "MAE", "MFE", "Exit", "Signal", "Src"
         ]
         self._trade_table = QTableWidget(0, len(cols))
         self._trade_table.setHorizontalHeaderLabels(cols)
@@ -2076,6 +2212,10 @@ class BacktestWindow(QMainWindow, ThemedMixin):
             execution_interval_minutes = int(sb.execution_interval.currentText()),
             sideway_zone_skip   = sb.skip_sideway.isChecked(),
             use_vix             = sb.use_vix.isChecked(),
+            use_real_option_data = sb.use_real_options.isChecked(),
+            option_data_dir     = sb.option_data_dir,
+            intrabar_model      = sb.intrabar_model.currentText(),
+            intrabar_steps      = sb.intrabar_steps.value(),
             strategy_slug       = strategy_slug,
             signal_engine_cfg   = strategy.get("engine", {}),
             debug_candles       = True,   # collect per-candle data for Strategy Analysis tab
@@ -2153,8 +2293,10 @@ class BacktestWindow(QMainWindow, ThemedMixin):
             f"✓  Done — {result.total_trades} trades  |  "
             f"Net P&L ₹{result.total_net_pnl:+,.0f}  |  "
             f"Win Rate {result.win_rate:.1f}%"
+            + (f"  |  from saved run #{result.run_id}" if safe_getattr(result, "from_cache", False) else "")
         )
         self._populate_results(result)
+        self._history_tab.mark_stale()
 
         # Auto-export analysis
         if (self.settings_sidebar.auto_export.isChecked()
@@ -2162,33 +2304,21 @@ class BacktestWindow(QMainWindow, ThemedMixin):
                 and result.analysis_data):
             self._export_analysis()
 
-        # FIX: Load debug entries from the saved JSON file
+        # Open the streamed debug log — only its index is read here; the tab
+        # pages entries in on demand.
         if safe_hasattr(result, 'debug_log_path') and result.debug_log_path:
             try:
-                import json
-                import os
-
                 if os.path.exists(result.debug_log_path):
-                    with open(result.debug_log_path, 'r', encoding='utf-8') as f:
-                        debug_data = json.load(f)
-
-                    # Extract candles from the debug data
-                    candles = debug_data.get('candles', [])
-
-                    if candles:
-                        self._debug_tab.load(candles)
-                        logger.info(f"✅ Loaded {len(candles)} debug entries from {result.debug_log_path}")
-
-                        # Also update the status label
+                    log = CandleDebugLog.open(result.debug_log_path)
+                    self._debug_tab.load_log(log)
+                    logger.info(f"✅ Opened {len(log)} debug entries from {result.debug_log_path}")
+                    if len(log):
                         self._status_lbl.setText(
                             f"✓  Done — {result.total_trades} trades  |  "
                             f"Net P&L ₹{result.total_net_pnl:+,.0f}  |  "
                             f"Win Rate {result.win_rate:.1f}%  |  "
-                            f"Debug: {len(candles)} candles"
+                            f"Debug: {len(log)} candles"
                         )
-                    else:
-                        logger.warning("Debug file contains no candles")
-                        self._debug_tab.load([])
                 else:
                     logger.warning(f"Debug file not found: {result.debug_log_path}")
                     self._debug_tab.load([])
@@ -2220,6 +2350,8 @@ class BacktestWindow(QMainWindow, ThemedMixin):
         self._trade_table.setRowCount(0)
         for card in self._cards.values():
             card.update_value("—")
+        for table in self._breakdown_tables.values():
+            table.setRowCount(0)
         self._analysis_data = {}
         self._analysis_tab.set_analysis_data({})
 
@@ -2268,6 +2400,34 @@ class BacktestWindow(QMainWindow, ThemedMixin):
         else:
             dq_lbl, dq_clr = "N/A", "TEXT_DIM"
         self._cards["data_quality"].update_value(dq_lbl, dq_clr)
+        so_clr = "GREEN" if result.sortino >= 1 else ("YELLOW" if result.sortino >= 0 else "RED")
+        self._cards["sortino"].update_value(f"{result.sortino:.2f}", so_clr)
+        if result.calmar is None:
+            self._cards["calmar"].update_value("—", "TEXT_DIM")
+        else:
+            ca_clr = "GREEN" if result.calmar >= 1 else ("YELLOW" if result.calmar >= 0 else "RED")
+            self._cards["calmar"].update_value(f"{result.calmar:.2f}", ca_clr)
+        self._cards["time_in_mkt"].update_value(
+            f"{result.time_in_market:.1f}%  ·  {result.avg_hold_minutes:.0f}m avg")
+        self._cards["mae_mfe"].update_value(f"₹{result.avg_mae:,.0f} / ₹{result.avg_mfe:+,.0f}")
+        for key, table in self._breakdown_tables.items():
+            self._fill_breakdown_table(table, (result.breakdowns or {}).get(key, {}))
+
+        # Monte Carlo: reorder the trades to see how lucky the sequence was
+        mc = None
+        try:
+            mc = monte_carlo_from_result(result, seed=0)
+        except Exception as e:
+            logger.error(f"[BacktestWindow] Monte Carlo failed: {e}", exc_info=True)
+        if mc is not None:
+            pnl5 = mc.distribution("final_pnl")["p5"]
+            self._cards["mc_pnl"].update_value(f"₹{pnl5:+,.0f}", "GREEN" if pnl5 >= 0 else "RED")
+            # Drawdowns are ≤ 0, so the 95th-worst is the 5th percentile
+            self._cards["mc_dd"].update_value(f"₹{mc.distribution('max_drawdown')['p5']:,.0f}", "YELLOW")
+            self._cards["mc_streak"].update_value(
+                f"{mc.distribution('longest_losing_streak')['p95']:.0f} trades", "RED")
+            ruin_clr = "GREEN" if mc.prob_of_ruin < 0.01 else ("YELLOW" if mc.prob_of_ruin < 0.05 else "RED")
+            self._cards["mc_ruin"].update_value(f"{mc.prob_of_ruin:.1%}", ruin_clr)
 
         cfg = result.config
         self._cfg_summary.setText(
@@ -2302,6 +2462,8 @@ class BacktestWindow(QMainWindow, ThemedMixin):
                 (str(t.lots),                                             c.TEXT_MAIN),
                 (f"₹{t.gross_pnl:+,.0f}",                               pnl_clr),
                 (f"₹{t.net_pnl:+,.0f}",                                 pnl_clr),
+                (f"₹{t.mae:+,.0f}",                                     c.RED if t.mae < 0 else c.TEXT_DIM),
+                (f"₹{t.mfe:+,.0f}",                                     c.GREEN if t.mfe > 0 else c.TEXT_DIM),
                 (t.exit_reason,          c.YELLOW if t.exit_reason == "SL" else c.TEXT_MAIN),
                 ((t.signal_name or "—")[:20],                            c.TEXT_DIM),
                 (src_badge,              c.YELLOW if is_synth else c.GREEN),
@@ -2315,7 +2477,7 @@ class BacktestWindow(QMainWindow, ThemedMixin):
         self._trade_table.setSortingEnabled(True)
 
         # Equity chart
-        self._equity_chart.set_data(result.equity_curve, result.trades)
+        self._equity_chart.set_data(result.equity_curve, result.trades, monte_carlo=mc)
 
         # Analysis tab — build from candle debug log
         analysis_data = self._build_analysis_data(result)
@@ -2354,27 +2516,27 @@ class BacktestWindow(QMainWindow, ThemedMixin):
     def _build_analysis_from_debug_log(
         self, path: str, result: BacktestResult
     ) -> Dict[str, List[BarAnalysis]]:
-        """Parse the per-candle JSON debug log into BarAnalysis objects."""
-        import json
-
-        with open(path, "r", encoding="utf-8") as f:
-            payload = json.load(f)
-
-        candles = payload.get("candles", [])
-        if not candles:
+        """Stream the per-candle debug log (.jsonl or legacy .json) into BarAnalysis objects."""
+        log = CandleDebugLog.open(path)
+        if not len(log):
             return {}
 
         tf = f"{result.config.execution_interval_minutes}m"
         bars: List[BarAnalysis] = []
 
-        for c in candles:
+        for c in log.iter_entries():
             # Skip skipped bars (sideway/warmup/market-closed)
             if c.get("skip_reason"):
                 continue
 
             try:
-                # TZ-FIX: strptime returns naive; localize to IST immediately.
-                ts = IST.localize(datetime.strptime(c["time"], "%Y-%m-%d %H:%M:%S"))
+                # Debug times carry a +0530 offset when the bar was tz-aware.
+                raw = c["time"]
+                if len(raw) > 19:
+                    ts = datetime.strptime(raw, "%Y-%m-%d %H:%M:%S%z").astimezone(IST)
+                else:
+                    # TZ-FIX: strptime returns naive; localize to IST immediately.
+                    ts = IST.localize(datetime.strptime(raw, "%Y-%m-%d %H:%M:%S"))
             except Exception:
                 continue
 
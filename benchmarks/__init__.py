@@ -0,0 +1,23 @@
+"""
+benchmarks
+==========
+Reproducible performance benchmarks for the backtester.
+
+    python -m benchmarks                                  # small + medium
+    python -m benchmarks --sizes large --only replay
+    python -m benchmarks --baseline old.json --threshold 0.1
+
+All data comes from SyntheticMarket, a seeded generator of NIFTY-like
+1-minute candles, VIX and option-chain snapshots, so two runs with the
+same seed time exactly the same work.
+"""
+
+from benchmarks.runner import compare, has_regression, load_results, run_suite, save_results
+from benchmarks.scenarios import SCENARIOS, SIZES, Scenario, get_scenarios
+from benchmarks.synthetic_market import SyntheticMarket
+
+__all__ = [
+    "SyntheticMarket",
+    "Scenario", "SCENARIOS", "SIZES", "get_scenarios",
+    "run_suite", "save_results", "load_results", "compare", "has_regression",
+]
@@ -0,0 +1,81 @@
+"""
+benchmarks/__main__.py
+======================
+Command-line entry point: ``python -m benchmarks``.
+
+Exit status is 1 when ``--baseline`` is given and any scenario regressed by
+more than ``--threshold``, so the command can gate a CI job.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+
+from Utils.time_utils import fmt_stamp
+from benchmarks.runner import (DEFAULT_METRIC, DEFAULT_REPEAT, DEFAULT_THRESHOLD, compare,
+                               format_comparison, format_results, has_regression,
+                               load_results, run_suite, save_results)
+from benchmarks.scenarios import SIZES, SCENARIOS
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _csv(value: str):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Time backtester hot paths on synthetic data.")
+    parser.add_argument("--sizes", type=_csv, default=["small", "medium"],
+                        help=f"comma list of {', '.join(SIZES)} (default: small,medium)")
+    parser.add_argument("--only", type=_csv, default=None,
+                        help=f"comma list of scenarios: {', '.join(s.name for s in SCENARIOS)}")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=None,
+                        help="result JSON path (default: benchmarks/results/bench_<stamp>.json)")
+    parser.add_argument("--baseline", default=None, help="earlier result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown fraction before failing (default: 0.15)")
+    parser.add_argument("--metric", default=DEFAULT_METRIC, choices=["min_s", "median_s", "mean_s"])
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for s in SCENARIOS:
+            print(f"{s.name:<16} {s.description}")
+        return 0
+
+    # App modules log freely at INFO; keep the console readable by default.
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR,
+                        format="%(levelname)s %(name)s: %(message)s")
+
+    try:
+        data = run_suite(sizes=args.sizes, scenarios=args.only, repeat=args.repeat,
+                         seed=args.seed, progress=lambda k: print(f"  running {k} …", file=sys.stderr))
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    out = args.out or os.path.join(RESULTS_DIR, f"bench_{fmt_stamp()}.json")
+    save_results(data, out)
+    print(format_results(data))
+    print(f"\nResults written to {out}")
+
+    if args.baseline:
+        rows = compare(load_results(args.baseline), data, args.threshold, args.metric)
+        print()
+        print(format_comparison(rows, args.metric))
+        if has_regression(rows):
+            print(f"\nRegression: at least one scenario is more than "
+                  f"{args.threshold:.0%} slower than the baseline.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+benchmarks/runner.py
+====================
+Times the scenarios, writes JSON results and compares two result files.
+
+Result file layout::
+
+    {
+      "meta":    {"created": ..., "git": ..., "python": ..., "seed": ..., ...},
+      "results": {
+        "replay/small": {"scenario": "replay", "size": "small", "days": 5,
+                         "status": "ok", "items": 375, "repeat": 3,
+                         "min_s": ..., "median_s": ..., "mean_s": ...,
+                         "per_item_us": ..., "items_per_s": ...},
+        ...
+      }
+    }
+
+Comparison uses ``min_s`` by default — the least noisy statistic for
+short CPU-bound runs — and flags a regression when the current value
+exceeds the baseline by more than the threshold fraction (and by more
+than a small absolute floor, so microsecond-scale scenarios don't flap).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from Utils.time_utils import ist_now
+from benchmarks.scenarios import SIZES, Scenario, get_scenarios
+from benchmarks.synthetic_market import SyntheticMarket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.15          # 15 % slower than baseline → regression
+DEFAULT_METRIC = "min_s"
+DEFAULT_MIN_DELTA_S = 0.002       # ignore changes smaller than timer noise
+
+
+# ── Running ───────────────────────────────────────────────────────────────────
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _time_scenario(scenario: Scenario, market: SyntheticMarket, repeat: int) -> Dict:
+    timings: List[float] = []
+    items = 0
+    for _ in range(repeat):
+        ctx = scenario.setup(market)
+        try:
+            t0 = time.perf_counter()
+            items = scenario.run(ctx)
+            timings.append(time.perf_counter() - t0)
+        finally:
+            if scenario.teardown is not None:
+                scenario.teardown(ctx)
+
+    med = statistics.median(timings)
+    return {
+        "status": "ok",
+        "items": int(items),
+        "repeat": repeat,
+        "min_s": round(min(timings), 6),
+        "median_s": round(med, 6),
+        "mean_s": round(statistics.fmean(timings), 6),
+        "per_item_us": round(med / items * 1e6, 3) if items else None,
+        "items_per_s": round(items / med, 1) if med > 0 else None,
+    }
+
+
+def run_suite(
+    sizes: Sequence[str] = ("small", "medium"),
+    scenarios: Optional[List[str]] = None,
+    repeat: int = DEFAULT_REPEAT,
+    seed: int = 42,
+    progress: Optional[Callable[[str], None]] = None,
+) -> Dict:
+    """
+    Run every selected scenario at every size and return the result dict.
+
+    A scenario whose imports fail is recorded as ``skipped``; one that
+    raises while running is recorded as ``error``.  Neither stops the suite.
+    """
+    selected = get_scenarios(scenarios)
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        raise ValueError(f"Unknown size(s): {', '.join(unknown)}")
+
+    results: Dict[str, Dict] = {}
+    for size in sizes:
+        market = SyntheticMarket(seed=seed, days=SIZES[size])
+        market.spot_1min()                  # generate once, outside every timer
+        for sc in selected:
+            key = f"{sc.name}/{size}"
+            if progress:
+                progress(key)
+            entry = {"scenario": sc.name, "size": size, "days": SIZES[size]}
+            try:
+                entry.update(_time_scenario(sc, market, repeat))
+            except ImportError as exc:
+                entry.update(status="skipped", error=str(exc))
+            except Exception as exc:
+                logger.error("[benchmarks] %s failed: %s", key, exc, exc_info=True)
+                entry.update(status="error", error=f"{type(exc).__name__}: {exc}")
+            results[key] = entry
+
+    return {
+        "meta": {
+            "created": ist_now().isoformat(),
+            "git": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "seed": seed,
+            "repeat": repeat,
+            "sizes": {s: SIZES[s] for s in sizes},
+        },
+        "results": results,
+    }
+
+
+# ── Persistence ───────────────────────────────────────────────────────────────
+
+def save_results(data: Dict, path: str) -> str:
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+    return path
+
+
+def load_results(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+# ── Comparison ────────────────────────────────────────────────────────────────
+
+def compare(
+    baseline: Dict,
+    current: Dict,
+    threshold: float = DEFAULT_THRESHOLD,
+    metric: str = DEFAULT_METRIC,
+    min_delta_s: float = DEFAULT_MIN_DELTA_S,
+) -> List[Dict]:
+    """
+    Compare two result dicts key by key.
+
+    Each row: key, baseline, current, ratio (current / baseline) and a
+    status of ``regression``, ``improved``, ``ok``, ``new``, ``missing`` or
+    ``not_run`` (either side skipped / errored).  Differences below
+    *min_delta_s* seconds are always ``ok`` so sub-millisecond scenarios
+    don't flap.
+    """
+    base_res = baseline.get("results", {})
+    cur_res = current.get("results", {})
+    rows: List[Dict] = []
+    for key in sorted(set(base_res) | set(cur_res)):
+        b, c = base_res.get(key), cur_res.get(key)
+        row = {"key": key, "baseline": None, "current": None, "ratio": None}
+        if b is None:
+            row["status"] = "new"
+        elif c is None:
+            row["status"] = "missing"
+        elif b.get("status") != "ok" or c.get("status") != "ok":
+            row["status"] = "not_run"
+        else:
+            bv, cv = b[metric], c[metric]
+            ratio = cv / bv if bv else float("inf")
+            row.update(baseline=bv, current=cv, ratio=round(ratio, 3))
+            if abs(cv - bv) < min_delta_s:
+                row["status"] = "ok"
+            elif ratio > 1.0 + threshold:
+                row["status"] = "regression"
+            elif ratio < 1.0 - threshold:
+                row["status"] = "improved"
+            else:
+                row["status"] = "ok"
+        rows.append(row)
+    return rows
+
+
+def has_regression(rows: List[Dict]) -> bool:
+    return any(r["status"] == "regression" for r in rows)
+
+
+# ── Reporting ─────────────────────────────────────────────────────────────────
+
+def format_results(data: Dict) -> str:
+    lines = [f"{'scenario':<24}{'items':>9}{'min s':>11}{'median s':>11}{'µs/item':>11}  status"]
+    for key, r in data.get("results", {}).items():
+        if r.get("status") == "ok":
+            lines.append(f"{key:<24}{r['items']:>9}{r['min_s']:>11.4f}{r['median_s']:>11.4f}"
+                         f"{(r['per_item_us'] or 0):>11.2f}  ok")
+        else:
+            lines.append(f"{key:<24}{'':>9}{'':>11}{'':>11}{'':>11}  {r.get('status')}: {r.get('error', '')}")
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict], metric: str = DEFAULT_METRIC) -> str:
+    lines = [f"{'scenario':<24}{'base ' + metric:>14}{'cur ' + metric:>14}{'ratio':>8}  status"]
+    for r in rows:
+        if r["ratio"] is None:
+            lines.append(f"{r['key']:<24}{'':>14}{'':>14}{'':>8}  {r['status']}")
+        else:
+            flag = "  <-- " if r["status"] == "regression" else "  "
+            lines.append(f"{r['key']:<24}{r['baseline']:>14.4f}{r['current']:>14.4f}"
+                         f"{r['ratio']:>8.2f}{flag}{r['status']}")
+    return "\n".join(lines)
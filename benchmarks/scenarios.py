@@ -0,0 +1,580 @@
+"""
+benchmarks/scenarios.py
+=======================
+Fixed benchmark scenarios over the hot paths of the backtester.
+
+Each scenario has a ``setup`` (untimed, builds fresh objects from the
+synthetic market), a ``run`` (timed, returns the number of items it
+processed so results can be reported per bar / per call) and an optional
+``teardown``.  Setup runs before every repeat so stateful objects — the
+pricer's HV window, the TradeState singleton — start clean each time.
+
+Heavy app modules are imported inside ``setup`` so the generator and the
+runner stay importable when an optional dependency is missing; the runner
+reports such scenarios as skipped.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.synthetic_market import SyntheticMarket
+
+logger = logging.getLogger(__name__)
+
+# Trading days per named data size
+SIZES: Dict[str, int] = {"small": 5, "medium": 20, "large": 60}
+
+EXECUTION_MINUTES = 5            # bar width used by replay-style scenarios
+HISTORY_WINDOW = 500             # matches backtest_engine.HISTORY_BUFFER_MAX
+WARMUP_BARS = 15                 # matches backtest_engine.MIN_WARMUP_BARS
+
+
+@dataclass
+class Scenario:
+    name: str
+    setup: Callable[[SyntheticMarket], Any]
+    run: Callable[[Any], int]
+    teardown: Optional[Callable[[Any], None]] = None
+    description: str = ""
+
+
+# ── Shared builders ───────────────────────────────────────────────────────────
+
+def _signal_engine():
+    from strategy.dynamic_signal_engine import DynamicSignalEngine, build_example_config
+    engine = DynamicSignalEngine()
+    engine.from_dict(build_example_config())
+    return engine
+
+
+def _pricer(market: SyntheticMarket, use_vix: bool = True):
+    from backtest.backtest_option_pricer import OptionPricer
+    pricer = OptionPricer(derivative=market.derivative, expiry_type="weekly",
+                          broker=None, use_vix=use_vix)
+    if use_vix:
+        pricer.set_vix_series(market.vix_daily())
+    return pricer
+
+
+def _history_frame(market: SyntheticMarket):
+    """Execution-interval bars shaped like the replay's history rows."""
+    df = market.spot_bars(EXECUTION_MINUTES)
+    df = df[["time", "open", "high", "low", "close"]].copy()
+    df["volume"] = 0
+    dates = df["time"].dt.date
+    df["is_new_day"] = dates.ne(dates.shift()) & dates.shift().notna()
+    return df.reset_index(drop=True)
+
+
+# ── resample_df ───────────────────────────────────────────────────────────────
+
+def _resample_setup(market: SyntheticMarket):
+    from data.candle_store import resample_df
+    return resample_df, market.spot_1min()
+
+
+def _resample_run(ctx) -> int:
+    resample_df, df = ctx
+    for minutes in (5, 15, 60):
+        resample_df(df, minutes)
+    return len(df)
+
+
+# ── DynamicSignalEngine.evaluate / evaluate_tick ─────────────────────────────
+
+def _evaluate_setup(market: SyntheticMarket):
+    return _signal_engine(), _history_frame(market)
+
+
+def _evaluate_run(ctx) -> int:
+    engine, df = ctx
+    calls = 0
+    for i in range(WARMUP_BARS, len(df)):
+        engine.evaluate(df.iloc[max(0, i + 1 - HISTORY_WINDOW):i + 1])
+        calls += 1
+    return calls
+
+
+def _evaluate_tick_setup(market: SyntheticMarket):
+    engine = _signal_engine()
+    hist = _history_frame(market)
+    engine.evaluate(hist.iloc[-HISTORY_WINDOW:])
+    ticks = market.spot_1min()["close"].to_numpy(dtype=float)
+    return engine, ticks
+
+
+def _evaluate_tick_run(ctx) -> int:
+    engine, ticks = ctx
+    for px in ticks:
+        engine.evaluate_tick(float(px))
+    return len(ticks)
+
+
+# ── OptionPricer.resolve_bar ──────────────────────────────────────────────────
+
+def _bars_as_lists(market: SyntheticMarket):
+    df = market.spot_bars(EXECUTION_MINUTES)
+    times = [t.to_pydatetime() for t in df["time"]]
+    return (times, df["open"].tolist(), df["high"].tolist(),
+            df["low"].tolist(), df["close"].tolist())
+
+
+def _resolve_setup(market: SyntheticMarket, use_vix: bool = True):
+    from backtest.backtest_option_pricer import atm_strike
+    return _pricer(market, use_vix), _bars_as_lists(market), atm_strike, market.derivative
+
+
+def _resolve_run(ctx) -> int:
+    pricer, (times, o, h, l, c), atm_strike, derivative = ctx
+    for i in range(len(times)):
+        opt_type = "CE" if i & 1 else "PE"
+        pricer.resolve_bar(times[i], o[i], h[i], l[i], c[i], opt_type,
+                           minutes_per_bar=EXECUTION_MINUTES,
+                           strike=atm_strike(c[i], derivative))
+    return len(times)
+
+
+# ── BacktestResult.finalize ───────────────────────────────────────────────────
+
+def _finalize_setup(market: SyntheticMarket):
+    from backtest.backtest_engine import BacktestConfig, BacktestResult, BacktestTrade
+    from backtest.backtest_option_pricer import PriceSource
+
+    sessions = market.sessions()
+    cfg = BacktestConfig(start_date=datetime.combine(sessions[0], datetime.min.time()),
+                         end_date=datetime.combine(sessions[-1], datetime.min.time()))
+    bars = market.spot_bars(EXECUTION_MINUTES)
+    times = [t.to_pydatetime() for t in bars["time"]]
+    rng = np.random.default_rng(market.seed + 3)
+
+    n_trades = max(len(times) // 10, 2)
+    pnls = np.round(rng.normal(150.0, 1800.0, n_trades), 2)
+    trades = []
+    for k in range(n_trades):
+        t0 = times[(k * 10) % len(times)]
+        trades.append(BacktestTrade(
+            trade_no=k + 1, direction="CE" if k & 1 else "PE",
+            entry_time=t0, exit_time=t0 + timedelta(minutes=25),
+            spot_entry=22000.0, spot_exit=22010.0, strike=22000,
+            option_entry=120.0, option_exit=120.0 + pnls[k] / 50,
+            lots=1, lot_size=50, gross_pnl=float(pnls[k]) + 80.0,
+            slippage_cost=0.0, brokerage=80.0, net_pnl=float(pnls[k]),
+            entry_source=PriceSource.SYNTHETIC, exit_source=PriceSource.SYNTHETIC,
+            exit_reason="TP" if pnls[k] > 0 else "SL", signal_name="BUY_CALL",
+        ))
+    equity = cfg.capital + np.cumsum(rng.normal(2.0, 120.0, len(times)))
+    curve = [{"timestamp": t, "equity": round(float(e), 2)} for t, e in zip(times, equity)]
+    return BacktestResult, cfg, trades, curve
+
+
+def _finalize_run(ctx) -> int:
+    BacktestResult, cfg, trades, curve = ctx
+    result = BacktestResult(config=cfg, trades=list(trades), equity_curve=list(curve))
+    result.finalize()
+    return len(curve)
+
+
+# ── BacktestEngine._replay ────────────────────────────────────────────────────
+
+def _replay_setup(market: SyntheticMarket):
+    from backtest.backtest_engine import BacktestConfig, BacktestEngine
+    from data.candle_store_manager import candle_store_manager
+    from data.trade_state_manager import state_manager
+    from strategy.dynamic_signal_engine import build_example_config
+
+    sessions = market.sessions()
+    cfg = BacktestConfig(
+        start_date=datetime.combine(sessions[0], datetime.min.time()),
+        end_date=datetime.combine(sessions[-1], datetime.min.time()),
+        derivative=market.derivative,
+        signal_engine_cfg=build_example_config(),
+        tp_pct=0.30, sl_pct=0.20, trailing_sl_pct=0.10,
+        execution_interval_minutes=EXECUTION_MINUTES,
+        use_vix=True,
+    )
+    engine = BacktestEngine(broker=None, config=cfg)
+    spot_df = engine._filter_spot_df(market.spot_bars(EXECUTION_MINUTES),
+                                     sessions[0], sessions[-1])
+    state_manager.reset_for_backtest()
+    candle_store_manager.clear()
+    return engine, spot_df, _pricer(market), _signal_engine()
+
+
+def _replay_run(ctx) -> int:
+    engine, spot_df, pricer, signal_engine = ctx
+    result = engine._replay(spot_df, pricer, signal_engine, None)
+    if result.error_msg:
+        raise RuntimeError(result.error_msg)
+    return len(spot_df)
+
+
+def _replay_teardown(ctx) -> None:
+    from data.candle_store_manager import candle_store_manager
+    from data.trade_state_manager import state_manager
+    engine = ctx[0]
+    state_manager.restore_state(engine._saved_state)
+    candle_store_manager.clear()
+
+
+# ── Tick symbol routing ───────────────────────────────────────────────────────
+
+ROUTED_STRIKES_EACH_SIDE = 30     # 1 index + 61 strikes × CE/PE = 123 subscriptions
+
+
+def _tick_route_setup(market: SyntheticMarket):
+    """Fyers-style subscriptions and one tick per 1-min bar, cycling the symbols.
+
+    Every third option tick carries a Zerodha-style "NFO:" prefix so the
+    remap to the subscribed spelling is exercised as well as exact hits.
+    """
+    from Utils.OptionUtils import OptionUtils
+    from Utils.symbol_router import SymbolIds, SymbolRouter
+
+    index = "NSE:NIFTY50-INDEX"
+    atm = 22000
+    strikes = atm + 50 * np.arange(-ROUTED_STRIKES_EACH_SIDE, ROUTED_STRIKES_EACH_SIDE + 1)
+    options = [f"NSE:NIFTY25JAN{k}{t}" for k in strikes for t in ("CE", "PE")]
+    symbols = [index] + options
+    chain = {sym: {"ltp": 0.0} for sym in options}
+
+    n_ticks = len(market.spot_1min())
+    ticks = []
+    for i in range(n_ticks):
+        if i % 4 == 0:
+            ticks.append(index)
+            continue
+        sym = options[i % len(options)]
+        ticks.append("NFO:" + sym[4:] if i % 3 == 0 else sym)
+    router = SymbolRouter(SymbolIds())
+    router.rebuild(symbols)
+    legs = (index, f"NSE:NIFTY25JAN{atm}CE", f"NSE:NIFTY25JAN{atm}PE")
+    return OptionUtils, router, symbols, chain, ticks, legs
+
+
+def _symbols_match_scan(OptionUtils, sym_a: str, sym_b: str) -> bool:
+    """OptionUtils.symbols_match as it was before canonical_symbol() was memoised."""
+    if not sym_a or not sym_b:
+        return False
+    if sym_a == sym_b:
+        return True
+    return OptionUtils._canonical_symbol_scan(sym_a) == OptionUtils._canonical_symbol_scan(sym_b)
+
+
+def _tick_route_scan_run(ctx) -> int:
+    """
+    The pre-router path: symbols_match loops in the ws callback and
+    TradingApp, on the uncached canonical scan that symbols_match used then
+    (the memoised canonical_symbol() makes the same loops ~25× faster).
+    """
+    OptionUtils, _, symbols, chain, ticks, (index, call, put) = ctx
+    for tick_sym in ticks:
+        for subscribed_sym in symbols:
+            if subscribed_sym != tick_sym and _symbols_match_scan(OptionUtils, tick_sym, subscribed_sym):
+                tick_sym = subscribed_sym
+                break
+        if _symbols_match_scan(OptionUtils, tick_sym, index):
+            continue
+        chain_key = tick_sym if tick_sym in chain else None
+        if chain_key is None:
+            for k in chain:
+                if _symbols_match_scan(OptionUtils, tick_sym, k):
+                    chain_key = k
+                    break
+        if _symbols_match_scan(OptionUtils, tick_sym, put):
+            pass
+        elif _symbols_match_scan(OptionUtils, tick_sym, call):
+            pass
+    return len(ticks)
+
+
+def _tick_route_run(ctx) -> int:
+    """The same per-tick decisions through SymbolRouter ids."""
+    _, router, _, chain, ticks, (index, call, put) = ctx
+    for tick_sym in ticks:
+        subscribed_sym = router.subscribed(tick_sym)
+        if subscribed_sym is not None:
+            tick_sym = subscribed_sym
+        tick_id = router.intern(tick_sym)
+        if tick_id == router.intern(index):
+            continue
+        chain_key = tick_sym if tick_sym in chain else None
+        if chain_key is None:
+            subscribed_sym = router.subscribed(tick_sym)
+            chain_key = subscribed_sym if subscribed_sym in chain else None
+        if tick_id == router.intern(put):
+            pass
+        elif tick_id == router.intern(call):
+            pass
+    return len(ticks)
+
+
+# ── Symbol canonicalisation ───────────────────────────────────────────────────
+
+def _symbol_corpus() -> List[str]:
+    """Every broker's index spellings and option / future cores under every prefix."""
+    from Utils.OptionUtils import OptionUtils
+
+    bases = set(OptionUtils.SYMBOL_MAP) | set(OptionUtils.SYMBOL_MAP.values())
+    for idx_map in OptionUtils._INDEX_SYMBOL_MAP.values():
+        for broker_sym in idx_map.values():
+            bases.add(broker_sym)
+            bases.add(broker_sym.split("|")[-1].split(":")[-1])
+    for underlying in ("NIFTY", "BANKNIFTY", "FINNIFTY", "MIDCPNIFTY", "SENSEX"):
+        bases.update({f"{underlying}2531825000CE", f"{underlying}25N0625050PE",
+                      f"{underlying}25MAR48000CE", f"{underlying}25MARFUT"})
+    bases.update({"12345", "RELIANCE", "M&M25MAR3000CE", "Nifty 50", "NSE:NSE:NIFTY"})
+    corpus = set(bases)
+    for pfx in OptionUtils.EXCHANGE_PREFIXES:
+        corpus.update(pfx + b for b in bases)
+    return sorted(corpus)
+
+
+def _canonical_setup(market: SyntheticMarket):
+    """Corpus repeated per trading day; checks the memoised form against the scan first."""
+    from Utils.OptionUtils import OptionUtils
+    from Utils.symbol_canonicalizer import symbol_canonicalizer
+
+    corpus = _symbol_corpus()
+    mismatched = [s for s in corpus
+                  if OptionUtils.canonical_symbol(s) != OptionUtils._canonical_symbol_scan(s)]
+    if mismatched:
+        raise RuntimeError(f"canonical_symbol differs from the scan for {mismatched[:5]}")
+    symbol_canonicalizer.clear()
+    return OptionUtils, corpus * market.days
+
+
+def _canonical_scan_run(ctx) -> int:
+    OptionUtils, symbols = ctx
+    for sym in symbols:
+        OptionUtils._canonical_symbol_scan(sym)
+    return len(symbols)
+
+
+def _canonical_run(ctx) -> int:
+    OptionUtils, symbols = ctx
+    for sym in symbols:
+        OptionUtils.canonical_symbol(sym)
+    return len(symbols)
+
+
+# ── Stage 1 → stage 2 hand-off ────────────────────────────────────────────────
+
+TICKS_PER_CYCLE = 25             # 5k ticks/s against a 5 ms stage-2 cycle
+
+
+def _handoff_setup(market: SyntheticMarket):
+    """The tick_route stream as interned ids, ten ticks per 1-min bar."""
+    _, router, _, _, ticks, _ = _tick_route_setup(market)
+    ids = [router.intern(sym) for sym in ticks] * 10
+    return ids, [(100.0 + (i % 97), 99.9, 100.1, 75) for i in range(len(ids))]
+
+
+def _tick_queue_run(ctx) -> int:
+    """The previous hand-off: Queue(maxsize=500) of 'tick' tokens, drained per cycle."""
+    import queue
+
+    ids, updates = ctx
+    q = queue.Queue(maxsize=500)
+    for i in range(len(ids)):
+        try:
+            q.put_nowait("tick")
+        except queue.Full:
+            pass
+        if i % TICKS_PER_CYCLE == TICKS_PER_CYCLE - 1:
+            while not q.empty():
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    break
+    return len(ids)
+
+
+def _tick_mailbox_run(ctx) -> int:
+    """data.tick_mailbox.TickMailbox: latest update per symbol id, taken per cycle."""
+    from data.tick_mailbox import TickMailbox
+
+    ids, updates = ctx
+    mailbox = TickMailbox()
+    for i, (sid, update) in enumerate(zip(ids, updates)):
+        mailbox.post(sid, update)
+        if i % TICKS_PER_CYCLE == TICKS_PER_CYCLE - 1:
+            mailbox.take(timeout=0)
+    logger.debug("tick_mailbox: %s", mailbox.stats())
+    return len(ids)
+
+
+# ── WebSocket transports ──────────────────────────────────────────────────────
+
+WS_RECONNECTS = 5                # injected outages per run
+WS_BURST = 10_000                # ticks per burst
+WS_BASE_DELAY = 0.05             # reconnect backoff base for both transports
+
+
+def _ws_wait(cond, timeout: float = 10.0) -> None:
+    end = time.perf_counter() + timeout
+    while not cond():
+        if time.perf_counter() > end:
+            raise RuntimeError("stand-in feed timed out")
+        time.sleep(0.001)
+
+
+def _ws_setup(market: SyntheticMarket, transport: str):
+    """
+    A connected manager of *transport* against a local benchmarks.ws_standin
+    server (NDJSON over TCP, not WebSocket framing).
+    """
+    from benchmarks.ws_standin import STANDIN_SYMBOL, StandinBroker, StandinServer
+    if transport == "asyncio":
+        from data.async_websocket_manager import AsyncWebSocketManager as manager_cls
+    else:
+        from data.websocket_manager import WebSocketManager as manager_cls
+
+    server = StandinServer().start()
+    received = [0]
+
+    def on_message(_tick):
+        received[0] += 1
+
+    ws = manager_cls(StandinBroker(server.port), on_message, [STANDIN_SYMBOL])
+    ws._base_delay = WS_BASE_DELAY
+    ws.connect()
+    _ws_wait(lambda: ws.is_connected() and server.clients == 1)
+    return server, ws, received
+
+
+def _ws_reconnect_run(ctx) -> int:
+    """Drop the feed and wait for the manager to be subscribed again, WS_RECONNECTS times."""
+    server, ws, _ = ctx
+    for _ in range(WS_RECONNECTS):
+        accepted = server.connections
+        server.inject_disconnect()
+        _ws_wait(lambda: server.connections > accepted and ws.is_connected())
+    logger.debug("ws reconnect: %s", ws.get_statistics())
+    return WS_RECONNECTS
+
+
+def _ws_burst_run(ctx) -> int:
+    """WS_BURST ticks through broker read loop → normalisation → on_message."""
+    server, _, received = ctx
+    target = received[0] + WS_BURST
+    server.burst(WS_BURST)
+    _ws_wait(lambda: received[0] >= target, timeout=60.0)
+    return WS_BURST
+
+
+def _ws_teardown(ctx) -> None:
+    server, ws, _ = ctx
+    ws.cleanup()
+    server.stop()
+
+
+# ── Option-chain analytics ────────────────────────────────────────────────────
+
+CHAIN_STRIKES_EACH_SIDE = 50     # 101 strikes × CE/PE
+
+
+def _chain_analytics_setup(market: SyntheticMarket):
+    """One synthetic chain snapshot per 5-min bar, as the live {symbol: quote} mapping."""
+    from backtest.backtest_option_pricer import nearest_weekly_expiry
+
+    df = market.spot_1min()
+    updates = []
+    for i in range(0, len(df), EXECUTION_MINUTES):
+        ts = df["time"].iloc[i].to_pydatetime()
+        spot = float(df["close"].iloc[i])
+        snap = market.option_chain(ts, spot, CHAIN_STRIKES_EACH_SIDE)
+        chain = {}
+        for row in snap.itertuples(index=False):
+            for side in ("ce", "pe"):
+                ltp = float(getattr(row, f"{side}_ltp"))
+                chain[f"NSE:NIFTY25JAN{row.strike}{side.upper()}"] = {
+                    "ltp": ltp, "bid": round(ltp - 0.05, 2), "ask": round(ltp + 0.05, 2),
+                    "oi": float(getattr(row, f"{side}_oi")),
+                    "volume": float(getattr(row, f"{side}_volume")),
+                }
+        quotes = [(sym, q["ltp"], q["bid"], q["ask"], q["oi"], q["volume"]) for sym, q in chain.items()]
+        updates.append((ts, spot, chain, quotes, nearest_weekly_expiry(ts, market.derivative)))
+    return market.derivative, updates
+
+
+def _chain_analytics_run(ctx) -> int:
+    """
+    data.chain_analytics.ChainAnalytics.update over every snapshot (warm smile
+    after the first), with each snapshot's quotes fed through record() first
+    as the live chain writer does tick by tick.
+    """
+    from data.chain_analytics import ChainAnalytics
+
+    derivative, updates = ctx
+    analytics = ChainAnalytics(min_interval=0.0)
+    compute_ms = []
+    for ts, spot, chain, quotes, expiry in updates:
+        for quote in quotes:
+            analytics.record(*quote)
+        metrics = analytics.update(chain, spot, derivative, now=ts, expiry=expiry)
+        if metrics is not None:
+            compute_ms.append(metrics.compute_ms)
+    if compute_ms:
+        logger.debug("chain_analytics: %d updates, p50 %.3f ms, max %.3f ms", len(compute_ms),
+                     float(np.median(compute_ms)), max(compute_ms))
+    return len(updates)
+
+
+# ── Registry ──────────────────────────────────────────────────────────────────
+
+SCENARIOS: List[Scenario] = [
+    Scenario("resample_df", _resample_setup, _resample_run,
+             description="1-min frame → 5/15/60-min via data.candle_store.resample_df; items = 1-min bars"),
+    Scenario("evaluate", _evaluate_setup, _evaluate_run,
+             description="DynamicSignalEngine.evaluate on a rolling 500-bar window per 5-min bar"),
+    Scenario("evaluate_tick", _evaluate_tick_setup, _evaluate_tick_run,
+             description="DynamicSignalEngine.evaluate_tick once per 1-min close"),
+    Scenario("resolve_bar", _resolve_setup, _resolve_run,
+             description="OptionPricer.resolve_bar (VIX sigma) per 5-min bar"),
+    Scenario("resolve_bar_hv", lambda m: _resolve_setup(m, use_vix=False), _resolve_run,
+             description="OptionPricer.resolve_bar (rolling HV sigma) per 5-min bar"),
+    Scenario("finalize", _finalize_setup, _finalize_run,
+             description="BacktestResult.finalize; items = equity-curve points"),
+    Scenario("replay", _replay_setup, _replay_run, _replay_teardown,
+             description="BacktestEngine._replay end to end on 5-min bars; items = bars"),
+    Scenario("tick_route_scan", _tick_route_setup, _tick_route_scan_run,
+             description="tick symbol routing via uncached symbols_match scans, 123 subscriptions; items = ticks"),
+    Scenario("tick_route", _tick_route_setup, _tick_route_run,
+             description="tick symbol routing via SymbolRouter ids, 123 subscriptions; items = ticks"),
+    Scenario("canonical_scan", _canonical_setup, _canonical_scan_run,
+             description="uncached OptionUtils._canonical_symbol_scan over all brokers' formats"),
+    Scenario("canonical_symbol", _canonical_setup, _canonical_run,
+             description="memoised OptionUtils.canonical_symbol over the same corpus (checked equal)"),
+    Scenario("tick_queue", _handoff_setup, _tick_queue_run,
+             description="stage 1 → 2 via the old bounded Queue of tokens, drained every 25 ticks"),
+    Scenario("tick_mailbox", _handoff_setup, _tick_mailbox_run,
+             description="stage 1 → 2 via the conflating TickMailbox, taken every 25 ticks; items = ticks"),
+    Scenario("ws_reconnect_threads", lambda m: _ws_setup(m, "threads"), _ws_reconnect_run, _ws_teardown,
+             description="threaded WebSocketManager, NDJSON-over-TCP stand-in outages; items = reconnects"),
+    Scenario("ws_reconnect_asyncio", lambda m: _ws_setup(m, "asyncio"), _ws_reconnect_run, _ws_teardown,
+             description="AsyncWebSocketManager, NDJSON-over-TCP stand-in outages; items = reconnects"),
+    Scenario("ws_burst_threads", lambda m: _ws_setup(m, "threads"), _ws_burst_run, _ws_teardown,
+             description="threaded WebSocketManager, 10k-tick burst from the NDJSON-over-TCP stand-in; items = ticks"),
+    Scenario("ws_burst_asyncio", lambda m: _ws_setup(m, "asyncio"), _ws_burst_run, _ws_teardown,
+             description="AsyncWebSocketManager, 10k-tick burst from the NDJSON-over-TCP stand-in; items = ticks"),
+    Scenario("chain_analytics", _chain_analytics_setup, _chain_analytics_run,
+             description="PCR / IV / Greeks / max pain over a 101-strike chain per 5-min bar; 202 quotes recorded, then one update, per item"),
+]
+
+
+def get_scenarios(names: Optional[List[str]] = None) -> List[Scenario]:
+    """Return the registry, optionally filtered to *names* (order preserved)."""
+    if not names:
+        return list(SCENARIOS)
+    known = {s.name: s for s in SCENARIOS}
+    unknown = [n for n in names if n not in known]
+    if unknown:
+        raise ValueError(f"Unknown scenario(s): {', '.join(unknown)}")
+    return [known[n] for n in names]
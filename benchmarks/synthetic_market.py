@@ -0,0 +1,285 @@
+"""
+benchmarks/synthetic_market.py
+==============================
+Seeded synthetic market data for the benchmark suite.
+
+Produces 1-minute NIFTY-like spot candles that look like the real feed the
+backtest engine consumes:
+
+- IST-aware bar times stamped at the bar open, 09:15 … 15:29 (375 bars).
+- Weekends and exchange holidays skipped (app holiday list, or seeded random
+  holidays when that list is unavailable).
+- Overnight gaps with occasional large gap-up/gap-down days.
+- A handful of missing minutes per day (feed dropouts), so resampling and
+  day-boundary logic see ragged sessions.
+- U-shaped intraday volatility and volume profiles.
+
+Also produces a daily India-VIX-like series (percent, indexed by date) and
+option-chain snapshots priced with the vectorised Black-Scholes pricer.
+
+The same seed always produces byte-identical frames, so timings from two
+runs are measured on the same data.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from Utils.common import MARKET_OPEN_HOUR, MARKET_OPEN_MINUTE
+from Utils.time_utils import IST
+
+logger = logging.getLogger(__name__)
+
+BARS_PER_SESSION = 375            # 09:15 … 15:29 inclusive
+DEFAULT_SPOT = 22_000.0
+DEFAULT_ANNUAL_VOL = 0.14         # realised, before the intraday profile
+DEFAULT_VIX_MEAN = 14.0
+RANDOM_HOLIDAY_RATE = 1 / 25      # used only when no holiday list is available
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+def _intraday_profile() -> np.ndarray:
+    """U-shaped multiplier over the 375 session minutes (mean 1.0)."""
+    x = np.linspace(-1.0, 1.0, BARS_PER_SESSION)
+    prof = 0.65 + 0.9 * x ** 2
+    prof[:15] *= 1.6              # opening auction spill-over
+    return prof / prof.mean()
+
+
+def _load_holidays() -> List[str]:
+    try:
+        from Utils.common import get_holidays
+        return list(get_holidays() or [])
+    except Exception as exc:
+        logger.debug("[SyntheticMarket] holiday list unavailable: %s", exc)
+        return []
+
+
+# ── Generator ─────────────────────────────────────────────────────────────────
+
+class SyntheticMarket:
+    """
+    Deterministic market data generator.
+
+    Parameters
+    ----------
+    seed        : RNG seed; everything derives from it.
+    start       : first calendar date considered (non-trading days skipped).
+    days        : number of *trading* days to produce.
+    derivative  : underlying name (controls strike step in option chains).
+    spot        : starting index level.
+    annual_vol  : annualised realised volatility of the minute returns.
+    holidays    : iterable of "YYYY-MM-DD" strings; None → app holiday list.
+    dropout_rate: probability that any given minute bar is missing.
+    """
+
+    def __init__(
+        self,
+        seed: int = 42,
+        start: date = date(2025, 1, 1),
+        days: int = 20,
+        derivative: str = "NIFTY",
+        spot: float = DEFAULT_SPOT,
+        annual_vol: float = DEFAULT_ANNUAL_VOL,
+        holidays: Optional[Iterable[str]] = None,
+        dropout_rate: float = 0.002,
+    ) -> None:
+        self.seed = int(seed)
+        self.start = start
+        self.days = int(days)
+        self.derivative = derivative
+        self.spot = float(spot)
+        self.annual_vol = float(annual_vol)
+        self.dropout_rate = float(dropout_rate)
+        self._holidays = set(holidays) if holidays is not None else set(_load_holidays())
+        self._random_holidays = holidays is None and not self._holidays
+
+        self._sessions: Optional[List[date]] = None
+        self._spot_df: Optional[pd.DataFrame] = None
+        self._vix: Optional[pd.Series] = None
+
+    # ── Calendar ──────────────────────────────────────────────────────────────
+
+    def sessions(self) -> List[date]:
+        """Trading dates covered by the data set."""
+        if self._sessions is not None:
+            return self._sessions
+        rng = np.random.default_rng(self.seed + 1)
+        out: List[date] = []
+        d = self.start
+        while len(out) < self.days:
+            skip = d.weekday() >= 5 or d.isoformat() in self._holidays
+            if not skip and self._random_holidays:
+                skip = rng.random() < RANDOM_HOLIDAY_RATE
+            if not skip:
+                out.append(d)
+            d += timedelta(days=1)
+        self._sessions = out
+        return out
+
+    # ── Spot candles ──────────────────────────────────────────────────────────
+
+    def spot_1min(self) -> pd.DataFrame:
+        """
+        1-minute OHLCV frame: [time, open, high, low, close, volume].
+
+        ``time`` is tz-aware IST.  The frame is cached; callers that mutate
+        it should take a copy.
+        """
+        if self._spot_df is not None:
+            return self._spot_df
+
+        rng = np.random.default_rng(self.seed)
+        sessions = self.sessions()
+        n_days = len(sessions)
+        n = n_days * BARS_PER_SESSION
+
+        prof = _intraday_profile()
+        sigma_min = self.annual_vol / math.sqrt(252 * BARS_PER_SESSION)
+        vol_prof = prof / math.sqrt(np.mean(prof ** 2))             # keeps daily variance
+        rets = rng.standard_normal((n_days, BARS_PER_SESSION)) * sigma_min * vol_prof
+        # Slow intraday drift regimes so trend rules occasionally fire
+        drift = rng.normal(0.0, sigma_min * 0.02, size=(n_days, 1))
+        rets += drift
+
+        # Overnight gaps: mostly small, occasionally a 1–2% jump
+        gaps = rng.normal(0.0, 0.004, size=n_days)
+        big = rng.random(n_days) < 0.08
+        gaps[big] += rng.choice([-1.0, 1.0], size=big.sum()) * rng.uniform(0.01, 0.02, size=big.sum())
+        gaps[0] = 0.0
+
+        log_close = np.log(self.spot) + np.cumsum(rets, axis=1)
+        log_close += np.cumsum(gaps)[:, None]
+        # Carry each day's close into the next day's open level
+        day_move = log_close[:, -1] - np.log(self.spot) - np.cumsum(gaps)
+        log_close[1:] += np.cumsum(day_move)[:-1, None]
+        close = np.exp(log_close).ravel()
+
+        open_ = np.empty(n)
+        open_[1:] = close[:-1]
+        open_[0] = self.spot
+        first = np.arange(n_days) * BARS_PER_SESSION
+        open_[first] = close[first] * np.exp(-rets[:, 0])          # gap lands on the open
+
+        wick = np.abs(rng.standard_normal((2, n))) * sigma_min * np.tile(vol_prof, n_days) * 0.6
+        high = np.maximum(open_, close) * np.exp(wick[0])
+        low = np.minimum(open_, close) * np.exp(-wick[1])
+
+        volume = np.round(rng.lognormal(mean=11.0, sigma=0.35, size=n)
+                          * np.tile(prof ** 1.5, n_days)).astype(np.int64)
+
+        minute = np.tile(np.arange(BARS_PER_SESSION), n_days)
+        day_ns = np.repeat(
+            np.array([datetime(d.year, d.month, d.day, MARKET_OPEN_HOUR, MARKET_OPEN_MINUTE)
+                      for d in sessions], dtype="datetime64[ns]").astype(np.int64), BARS_PER_SESSION)
+        times = pd.to_datetime(day_ns + minute * 60_000_000_000, unit="ns").tz_localize(IST)
+
+        keep = rng.random(n) >= self.dropout_rate
+        keep[first] = True                                          # never drop the open
+
+        df = pd.DataFrame({
+            "time": times[keep],
+            "open": np.round(open_[keep], 2),
+            "high": np.round(high[keep], 2),
+            "low": np.round(low[keep], 2),
+            "close": np.round(close[keep], 2),
+            "volume": volume[keep],
+        })
+        self._spot_df = df
+        return df
+
+    def spot_bars(self, minutes: int) -> pd.DataFrame:
+        """Spot candles at *minutes* width, via the app's own resampler."""
+        if minutes <= 1:
+            return self.spot_1min().copy()
+        from data.candle_store import resample_df
+        return resample_df(self.spot_1min(), minutes)
+
+    # ── VIX ───────────────────────────────────────────────────────────────────
+
+    def vix_daily(self) -> pd.Series:
+        """Daily VIX close (percent) indexed by ``datetime.date``, OU around the mean."""
+        if self._vix is not None:
+            return self._vix
+        rng = np.random.default_rng(self.seed + 2)
+        sessions = self.sessions()
+        v = np.empty(len(sessions))
+        level = DEFAULT_VIX_MEAN
+        for i in range(len(sessions)):
+            level += 0.15 * (DEFAULT_VIX_MEAN - level) + rng.normal(0.0, 0.8)
+            v[i] = level
+        self._vix = pd.Series(np.round(np.clip(v, 9.0, 40.0), 2), index=sessions)
+        return self._vix
+
+    # ── Option chains ─────────────────────────────────────────────────────────
+
+    def option_chain(self, timestamp: datetime, spot: float,
+                     strikes_each_side: int = 10, expiry_type: str = "weekly") -> pd.DataFrame:
+        """
+        One option-chain snapshot around *spot*.
+
+        Columns: strike, ce_ltp, pe_ltp, ce_iv, pe_iv, ce_oi, pe_oi,
+        ce_volume, pe_volume.  IVs carry a put skew on top of the day's VIX.
+        """
+        from backtest.backtest_option_pricer import (
+            DEFAULT_STRIKE_STEP, RISK_FREE_RATE, STRIKE_STEP, atm_strike,
+            nearest_monthly_expiry, nearest_weekly_expiry, time_to_expiry_years,
+        )
+        from backtest.backtest_vector_pricer import bs_price_vec
+
+        if timestamp.tzinfo is None:
+            timestamp = IST.localize(timestamp)
+        step = STRIKE_STEP.get(self.derivative.upper(), DEFAULT_STRIKE_STEP)
+        atm = atm_strike(spot, self.derivative)
+        strikes = atm + step * np.arange(-strikes_each_side, strikes_each_side + 1, dtype=float)
+
+        expiry = (nearest_monthly_expiry(timestamp, self.derivative) if expiry_type == "monthly"
+                  else nearest_weekly_expiry(timestamp, self.derivative))
+        T = time_to_expiry_years(timestamp, expiry)
+
+        vix = self.vix_daily()
+        base = float(vix.get(timestamp.date(), DEFAULT_VIX_MEAN)) / 100.0
+        k = np.log(strikes / spot)
+        iv = base * (1.0 - 1.8 * k + 12.0 * k ** 2)                  # skew + smile
+
+        ce = bs_price_vec(spot, strikes, T, RISK_FREE_RATE, iv, "CE")
+        pe = bs_price_vec(spot, strikes, T, RISK_FREE_RATE, iv, "PE")
+
+        rng = np.random.default_rng((self.seed, int(timestamp.timestamp())))
+        oi_shape = np.exp(-0.5 * (np.arange(-strikes_each_side, strikes_each_side + 1) / 5.0) ** 2)
+        ce_oi = np.round(oi_shape * rng.uniform(0.6, 1.4, strikes.size) * 5e6, -2)
+        pe_oi = np.round(oi_shape * rng.uniform(0.6, 1.4, strikes.size) * 5e6, -2)
+
+        return pd.DataFrame({
+            "strike": strikes.astype(np.int64),
+            "ce_ltp": np.maximum(np.round(ce, 2), 0.05),
+            "pe_ltp": np.maximum(np.round(pe, 2), 0.05),
+            "ce_iv": np.round(iv * 100, 2),
+            "pe_iv": np.round(iv * 100, 2),
+            "ce_oi": ce_oi.astype(np.int64),
+            "pe_oi": pe_oi.astype(np.int64),
+            "ce_volume": np.round(ce_oi * rng.uniform(0.5, 3.0, strikes.size)).astype(np.int64),
+            "pe_volume": np.round(pe_oi * rng.uniform(0.5, 3.0, strikes.size)).astype(np.int64),
+        })
+
+    def option_chain_snapshots(self, every_minutes: int = 15, strikes_each_side: int = 10):
+        """Yield ``(timestamp, chain_df)`` every *every_minutes* of spot data."""
+        df = self.spot_1min()
+        minute_of_day = (df["time"].dt.hour * 60 + df["time"].dt.minute).to_numpy()
+        sel = np.flatnonzero(minute_of_day % every_minutes == 0)
+        times = df["time"]
+        closes = df["close"].to_numpy()
+        for i in sel:
+            ts = times.iloc[i].to_pydatetime()
+            yield ts, self.option_chain(ts, float(closes[i]), strikes_each_side)
+
+    def __repr__(self) -> str:
+        return (f"SyntheticMarket(seed={self.seed}, days={self.days}, "
+                f"derivative={self.derivative!r}, spot={self.spot})")
@@ -0,0 +1,195 @@
+"""
+benchmarks/ws_standin.py
+========================
+Local stand-in for a broker feed, for exercising the WebSocketManager
+transports without a broker account or network.
+
+StandinServer is a plain TCP server on 127.0.0.1 (asyncio, in its own
+thread) that streams newline-delimited JSON (NDJSON) ticks to every
+connected client.  It is not a WebSocket server: there is no HTTP upgrade
+handshake and no frame encoding or masking.  The ws_* benchmarks therefore
+measure the manager side (read loop, normalisation, routing, reconnect
+backoff and resubscribe), not a WebSocket library's framing cost.
+
+- burst(n)             send n ticks to every client as fast as possible
+- inject_disconnect()  drop every client connection (feed outage)
+
+StandinBroker implements the broker-side WebSocket hooks the managers call
+(create_websocket / ws_connect / ws_subscribe / ws_unsubscribe /
+ws_disconnect / normalize_tick).  ws_connect blocks in a read loop like the
+broker SDKs do: on_connect once the socket is open, on_tick per line,
+on_close when the server drops the connection.
+
+    server = StandinServer().start()
+    ws = AsyncWebSocketManager(StandinBroker(server.port), on_message, ["NSE:NIFTY50-INDEX"])
+    ws.connect()
+    server.burst(10_000)
+    server.inject_disconnect()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import socket
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STANDIN_SYMBOL = "NSE:NIFTY50-INDEX"
+
+
+class StandinServer:
+    """Tick server with outage / burst injection (see module docstring)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.connections = 0              # accepted connections so far
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: List[asyncio.StreamWriter] = []
+        self._seq = 0
+
+    def start(self) -> "StandinServer":
+        started = threading.Event()
+
+        def _run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._loop = loop
+            self._server = loop.run_until_complete(asyncio.start_server(self._serve, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=_run, daemon=True, name="WS-Standin")
+        self._thread.start()
+        started.wait(timeout=5.0)
+        return self
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        self._call(self._shutdown())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=2.0)
+        self._loop = None
+
+    # ── Injection ─────────────────────────────────────────────────────────────
+
+    def burst(self, n: int, symbol: str = STANDIN_SYMBOL) -> None:
+        """Send *n* ticks to every connected client; returns once they are written."""
+        self._call(self._burst(n, symbol))
+
+    def inject_disconnect(self) -> None:
+        """Drop every client connection."""
+        self._call(self._drop())
+
+    @property
+    def clients(self) -> int:
+        return len(self._writers)
+
+    # ── Server side (event loop) ──────────────────────────────────────────────
+
+    def _call(self, coro, timeout: float = 30.0):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._writers.append(writer)
+        try:
+            while await reader.readline():
+                pass                      # subscribe / unsubscribe frames are not needed
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            if writer in self._writers:
+                self._writers.remove(writer)
+            writer.close()
+
+    async def _burst(self, n: int, symbol: str) -> None:
+        for writer in list(self._writers):
+            lines = []
+            for _ in range(n):
+                self._seq += 1
+                lines.append(json.dumps({"s": symbol, "lp": 22000.0 + self._seq % 100,
+                                         "v": self._seq}))
+            writer.write(("\n".join(lines) + "\n").encode())
+            await writer.drain()
+
+    async def _drop(self) -> None:
+        writers, self._writers = self._writers, []
+        for writer in writers:
+            writer.close()
+
+    async def _shutdown(self) -> None:
+        await self._drop()
+        self._server.close()
+
+
+class StandinBroker:
+    """The broker WebSocket hooks the managers call, backed by StandinServer."""
+
+    def __init__(self, port: int, host: str = "127.0.0.1"):
+        self.host = host
+        self.port = port
+
+    def __repr__(self) -> str:
+        return f"StandinBroker({self.host}:{self.port})"
+
+    def create_websocket(self, on_tick: Callable, on_connect: Callable,
+                         on_close: Callable, on_error: Callable) -> Dict[str, Any]:
+        return {"on_tick": on_tick, "on_connect": on_connect, "on_close": on_close,
+                "on_error": on_error, "sock": None, "closed": False}
+
+    def ws_connect(self, ws_obj: Dict[str, Any]) -> None:
+        """Blocking read loop, like the broker SDKs."""
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=5)
+        except OSError as e:
+            ws_obj["on_error"](str(e))
+            return
+        sock.settimeout(None)
+        ws_obj["sock"] = sock
+        ws_obj["on_connect"]()
+        on_tick = ws_obj["on_tick"]
+        try:
+            with sock.makefile("rb") as stream:
+                for line in stream:
+                    on_tick(json.loads(line))
+        except (OSError, ValueError):
+            pass
+        if not ws_obj["closed"]:
+            ws_obj["on_close"]("connection dropped by server")
+
+    def ws_subscribe(self, ws_obj: Dict[str, Any], symbols: List[str]) -> None:
+        self._send(ws_obj, {"op": "subscribe", "symbols": symbols})
+
+    def ws_unsubscribe(self, ws_obj: Dict[str, Any], symbols: List[str]) -> None:
+        self._send(ws_obj, {"op": "unsubscribe", "symbols": symbols})
+
+    def ws_disconnect(self, ws_obj: Dict[str, Any]) -> None:
+        ws_obj["closed"] = True
+        sock = ws_obj.get("sock")
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def normalize_tick(self, raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return {"symbol": raw.get("s"), "ltp": raw.get("lp"), "volume": raw.get("v")}
+
+    @staticmethod
+    def _send(ws_obj: Dict[str, Any], frame: Dict[str, Any]) -> None:
+        sock = ws_obj.get("sock")
+        if sock is not None:
+            try:
+                sock.sendall((json.dumps(frame) + "\n").encode())
+            except OSError:
+                pass
@@ -44,8 +44,6 @@ from datetime import datetime, timedelta
 from Utils.time_utils import IST, ist_now, fmt_display, fmt_stamp
 from typing import Optional, Any, Dict, List, Callable, Union
 
-from broker.TokenExpiryHandler import token_expiry_handler
-
 logger = logging.getLogger(__name__)
 
 
@@ -142,7 +140,9 @@ class BaseBroker(ABC):
     # ── Token expiry tracking ──────────────────────────────────────────────────
     _token_expiry_check_interval: int = 60  # seconds
     _last_token_check: float = 0.0
-    _token_handler = token_expiry_handler
+    # Resolved on first use: TokenExpiryHandler imports PyQt5, and headless
+    # users of this module (backtest CLI) must not pull in Qt.
+    _token_handler = None
 
     # =========================================================================
     # broker_type / token properties
@@ -244,7 +244,10 @@ class BaseBroker(ABC):
         logger.critical(f"[{self.broker_type}] {message}")
 
         # Register with central handler
-        self._token_handler.handle_token_expired(
+        handler = self._token_handler
+        if handler is None:
+            from broker.TokenExpiryHandler import token_expiry_handler as handler
+        handler.handle_token_expired(
             source=self.broker_type,
             error_msg=message,
             recovery_callback=recovery_callback
@@ -0,0 +1,365 @@
+"""
+data/async_websocket_manager.py
+===============================
+WebSocketManager transport driven by a single asyncio event loop.
+
+WebSocketManager runs a connect thread plus heartbeat, network-monitor and
+reconnect threads that poll in 0.5–1 s sleeps.  AsyncWebSocketManager keeps
+its public API, ConnectionState, statistics and callback wrapper, and
+replaces those threads with coroutines on one event loop in a dedicated
+thread ("WS-Loop"):
+
+- One supervisor coroutine connects, watches the connection and reconnects
+  with the same exponential backoff + jitter.  It sleeps until the next
+  deadline that matters (stale-feed limit, network check, connect timeout)
+  and is woken immediately when the broker reports a close / error or
+  disconnect() is called, so reconnects start without polling delay.
+- Blocking broker calls (create_websocket, ws_disconnect, the HTTP network
+  fallback) run on one "WS-IO" worker; broker.ws_connect keeps its own
+  daemon thread because most SDKs run their read loop inside it.
+- Ticks are not routed through the loop: the SDK thread calls the wrapped
+  on_message callback directly, exactly as with the threaded manager, so
+  the hop adds no per-tick latency.
+
+Select it with the "ws_transport": "asyncio" config key (see TradingApp).
+get_statistics() adds "transport" and the last / average reconnect latency
+(connection loss → broker on_connect).
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from data.websocket_manager import ConnectionState, WebSocketManager
+
+logger = logging.getLogger(__name__)
+
+NETWORK_PROBE = ("8.8.8.8", 53)
+
+
+class AsyncWebSocketManager(WebSocketManager):
+    """WebSocketManager with connect / heartbeat / reconnect as coroutines (see module docstring)."""
+
+    def _safe_defaults_init(self):
+        super()._safe_defaults_init()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._io: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._supervisor: Optional[concurrent.futures.Future] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._lost_at: Optional[float] = None
+        self._opened_at = 0.0
+        self._last_reconnect_s = 0.0
+        self._reconnect_total_s = 0.0
+        self._reconnects_timed = 0
+
+    # ── Event loop ─────────────────────────────────────────────────────────────
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None and self._loop_thread is not None and self._loop_thread.is_alive():
+            return self._loop
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def _run():
+            asyncio.set_event_loop(loop)
+            self._wake = asyncio.Event()
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self._io = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="WS-IO")
+        self._loop = loop
+        self._loop_thread = threading.Thread(target=_run, daemon=True, name="WS-Loop")
+        self._loop_thread.start()
+        ready.wait(timeout=2.0)
+        return loop
+
+    def _wake_loop(self) -> None:
+        """Wake the supervisor from any thread."""
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    async def _io_call(self, fn, *args, timeout: Optional[float] = None):
+        """Run a blocking broker call on the WS-IO worker."""
+        fut = asyncio.get_running_loop().run_in_executor(self._io, fn, *args)
+        return await asyncio.wait_for(fut, timeout) if timeout else await fut
+
+    async def _sleep(self, seconds: float) -> bool:
+        """Sleep up to *seconds*; True if woken early (stop / connection lost)."""
+        if seconds <= 0:
+            return self._wake.is_set()
+        try:
+            await asyncio.wait_for(self._wake.wait(), seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    # ── Public API ─────────────────────────────────────────────────────────────
+
+    def connect(self):
+        """Start the supervisor coroutine (returns immediately; ticks flow once connected)."""
+        with self._connection_lock:
+            try:
+                if self.broker is None:
+                    logger.error("AsyncWebSocketManager.connect: no broker set")
+                    return
+                if self._supervisor is not None and not self._supervisor.done():
+                    logger.info(f"Already {self._state.value}. Skipping.")
+                    return
+                self._manual_stop = False
+                self._reconnect_attempts = 0
+                self._state = ConnectionState.CONNECTING
+                loop = self._ensure_loop()
+                self._supervisor = asyncio.run_coroutine_threadsafe(self._supervise(), loop)
+            except Exception as e:
+                logger.error(f"[AsyncWebSocketManager.connect] Unexpected: {e}", exc_info=True)
+                self._state = ConnectionState.DISCONNECTED
+
+    def subscribe(self, symbols: Optional[List[str]] = None):
+        """Subscribe now if connected; otherwise the symbols are sent on connect."""
+        with self._connection_lock:
+            try:
+                if symbols:
+                    if not isinstance(symbols, list):
+                        logger.error("symbols must be a list")
+                        return
+                    self.symbols = symbols
+                if not self.symbols:
+                    logger.warning("No symbols to subscribe to")
+                    return
+                if self._state == ConnectionState.CONNECTED and self._ws_obj is not None:
+                    self.broker.ws_subscribe(self._ws_obj, self.symbols)
+                    logger.info(f"Subscribed to {len(self.symbols)} symbols")
+                elif self._supervisor is None or self._supervisor.done():
+                    logger.warning("Not connected; connecting — symbols will be subscribed on connect")
+                    self.connect()
+            except Exception as e:
+                logger.error(f"[AsyncWebSocketManager.subscribe] {e!r}", exc_info=True)
+
+    def disconnect(self):
+        """Stop the supervisor, unsubscribe and close the broker socket (bounded wait)."""
+        with self._connection_lock:
+            self._manual_stop = True
+            old_supervisor = self._supervisor
+            self._state = ConnectionState.CLOSING
+        try:
+            logger.info("Initiating WebSocket disconnect...")
+            self._wake_loop()
+            if old_supervisor is not None:
+                try:
+                    old_supervisor.result(timeout=2.0)
+                except Exception:
+                    old_supervisor.cancel()
+            if self._loop is not None and not self._loop.is_closed() and self._ws_obj is not None:
+                closing = asyncio.run_coroutine_threadsafe(self._close_socket(unsubscribe=True), self._loop)
+                try:
+                    closing.result(timeout=4.0)
+                except Exception:
+                    logger.warning("ws_disconnect timed out")
+            self._ws_obj = None
+            self._state = ConnectionState.DISCONNECTED
+            logger.info(f"WebSocket disconnected — messages={self._message_count}, "
+                        f"errors={self._error_count}, reconnects={self._reconnect_count}")
+        except Exception as e:
+            logger.error(f"[AsyncWebSocketManager.disconnect] {e!r}", exc_info=True)
+            self._state = ConnectionState.DISCONNECTED
+
+    def cleanup(self, timeout: float = 3.0):
+        """Base cleanup (which calls disconnect()), then stop the event loop and the IO worker."""
+        if self._cleanup_done:
+            return
+        super().cleanup(timeout=timeout)
+        try:
+            loop = self._loop
+            if loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(loop.stop)
+                if self._loop_thread is not None:
+                    self._loop_thread.join(timeout=timeout)
+                if not (self._loop_thread and self._loop_thread.is_alive()):
+                    loop.close()
+            if self._io is not None:
+                self._io.shutdown(wait=False)
+            self._loop = self._loop_thread = self._io = self._supervisor = None
+        except Exception as e:
+            logger.error(f"[AsyncWebSocketManager.cleanup] {e}", exc_info=True)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        stats = super().get_statistics()
+        stats.update({
+            "transport": "asyncio",
+            "last_reconnect_s": round(self._last_reconnect_s, 3),
+            "avg_reconnect_s": round(self._reconnect_total_s / self._reconnects_timed, 3)
+            if self._reconnects_timed else 0.0,
+        })
+        return stats
+
+    # ── Broker callbacks (SDK threads) ─────────────────────────────────────────
+
+    def _on_connect(self):
+        super()._on_connect()
+        lost_at, self._lost_at = self._lost_at, None
+        if lost_at is not None:
+            self._last_reconnect_s = time.perf_counter() - lost_at
+            self._reconnect_total_s += self._last_reconnect_s
+            self._reconnects_timed += 1
+            logger.info(f"[AsyncWebSocketManager] Reconnected in {self._last_reconnect_s * 1000:.0f} ms")
+
+    def _schedule_reconnect(self):
+        """Base close / error / stale handlers call this: hand over to the supervisor."""
+        if self._lost_at is None:
+            self._lost_at = time.perf_counter()
+        self._wake_loop()
+
+    def _start_monitoring_threads(self):
+        """Monitoring runs in the supervisor coroutine."""
+
+    # ── Supervisor ─────────────────────────────────────────────────────────────
+
+    def _backoff(self) -> float:
+        delay = min(self._base_delay * (2 ** (self._reconnect_attempts - 1)), self._max_delay)
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _supervise(self) -> None:
+        first = True
+        while not self._manual_stop:
+            if not first:
+                if self._reconnect_attempts >= self._max_reconnect_attempts:
+                    logger.critical(f"Max reconnect attempts ({self._max_reconnect_attempts}) reached. Giving up.")
+                    self._state = ConnectionState.DISCONNECTED
+                    return
+                self._state = ConnectionState.RECONNECTING
+                self._reconnect_attempts += 1
+                delay = self._backoff()
+                logger.info(f"Reconnecting in {delay:.1f}s (attempt {self._reconnect_attempts})...")
+                # Close callbacks from the old socket also wake us; only stop cuts the backoff short
+                resume_at = time.time() + delay
+                while not self._manual_stop and time.time() < resume_at:
+                    self._wake.clear()
+                    await self._sleep(resume_at - time.time())
+                if self._manual_stop:
+                    return
+                self._reconnect_count += 1
+            first = False
+
+            self._wake.clear()
+            if await self._open_socket():
+                await self._watch()
+            if self._manual_stop:
+                return
+            if self._lost_at is None:
+                self._lost_at = time.perf_counter()
+            await self._close_socket()
+
+    async def _open_socket(self) -> bool:
+        try:
+            logger.info("Connecting to broker WebSocket")
+            if self._state != ConnectionState.RECONNECTING:
+                self._state = ConnectionState.CONNECTING
+            self._ws_obj = await self._io_call(
+                lambda: self.broker.create_websocket(
+                    on_tick=self.on_message_callback,
+                    on_connect=self._on_connect,
+                    on_close=self._on_close,
+                    on_error=self._on_error,
+                ),
+                timeout=self.connection_timeout,
+            )
+            if self._ws_obj is None:
+                logger.error("broker.create_websocket() returned None")
+                self._retries += 1
+                return False
+            self._opened_at = time.time()
+            self._connect_thread = threading.Thread(
+                target=self._run_broker_connect,
+                daemon=True,
+                name=f"WS-Connect-{self.broker.__class__.__name__}",
+            )
+            self._connect_thread.start()
+            self._retries = 0
+            return True
+        except Exception as e:
+            logger.error(f"Connection attempt failed: {e!r}", exc_info=True)
+            self._retries += 1
+            self._error_count += 1
+            return False
+
+    async def _watch(self) -> None:
+        """Return when the connection is lost, stale, timed out or stop is requested."""
+        network_failures = 0
+        next_network_check = time.time() + self._network_check_interval
+        warned_stale = False
+        while not self._manual_stop:
+            now = time.time()
+            state = self._state
+            if state == ConnectionState.CONNECTED:
+                age = now - self._last_message_time
+                if age > self.heartbeat_interval * 2:
+                    logger.error("Connection appears dead; triggering reconnect")
+                    self._handle_stale_connection()
+                    return
+                if age > self.heartbeat_interval and not warned_stale:
+                    logger.warning(f"No messages for {age:.1f}s — connection may be stale")
+                    warned_stale = True
+                elif age <= self.heartbeat_interval:
+                    warned_stale = False
+                if now >= next_network_check:
+                    if await self._network_ok():
+                        network_failures = 0
+                    else:
+                        network_failures += 1
+                        logger.warning(f"Network check failed ({network_failures}/3)")
+                        if network_failures >= 3:
+                            logger.error("Network down; triggering reconnect")
+                            self._handle_network_disconnection()
+                            return
+                    next_network_check = time.time() + self._network_check_interval
+                deadlines = [self._last_message_time + (self.heartbeat_interval if not warned_stale
+                                                        else self.heartbeat_interval * 2),
+                             next_network_check]
+            elif state in (ConnectionState.CONNECTING, ConnectionState.RECONNECTING):
+                connect_deadline = self._opened_at + self.connection_timeout
+                if now >= connect_deadline:
+                    logger.error(f"No on_connect within {self.connection_timeout}s; retrying")
+                    return
+                deadlines = [connect_deadline]
+            else:
+                return  # DISCONNECTED by a broker close / error callback
+            if await self._sleep(max(min(deadlines) - time.time(), 0.01)):
+                self._wake.clear()
+                if self._state != ConnectionState.CONNECTED or self._manual_stop:
+                    return
+
+    async def _network_ok(self) -> bool:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(*NETWORK_PROBE), 5)
+            writer.close()
+            return True
+        except Exception:
+            try:
+                return await self._io_call(self._check_network, timeout=12)
+            except Exception:
+                return False
+
+    async def _close_socket(self, unsubscribe: bool = False) -> None:
+        ws_obj = self._ws_obj
+        if ws_obj is None or self.broker is None:
+            return
+        try:
+            if unsubscribe and self.symbols:
+                try:
+                    await self._io_call(self.broker.ws_unsubscribe, ws_obj, self.symbols, timeout=1.0)
+                except Exception as e:
+                    logger.warning(f"Unsubscribe error (continuing): {e}")
+            await self._io_call(self.broker.ws_disconnect, ws_obj, timeout=2.0)
+        except asyncio.TimeoutError:
+            logger.warning("ws_disconnect timed out after 2 seconds")
+        except Exception as e:
+            logger.error(f"ws_disconnect error: {e}")
+        finally:
+            if self._ws_obj is ws_obj:
+                self._ws_obj = None
@@ -0,0 +1,465 @@
+"""
+data/chain_analytics.py
+=======================
+Option-chain analytics on NumPy arrays: PCR, IV smile, Greeks, max pain, OI change.
+
+The chain writer hands every quote to ChainAnalytics.record(), which stores
+it in preallocated per-symbol NumPy columns (ltp, bid, ask, OI, volume).
+Once per update cycle ChainAnalytics.update() takes the live option_chain
+mapping only for its symbols, gathers those columns into one row per
+strike — strike, CE / PE price, OI, volume — and computes everything from
+those arrays.  A caller that never records quotes gets them read from the
+mapping's {symbol: {"ltp", "bid", "ask", "oi", "volume"}} entries instead.
+
+- PCR on OI and on volume (put total / call total).
+- IV per strike from the out-of-the-money side (calls at / above spot,
+  puts below), which is the side the market quotes the smile from.  The
+  solver takes Newton steps on a price / vega kernel seeded with the last
+  cycle's smile interpolated onto today's strikes, so a warm cycle needs one
+  or two steps; a cold start or a row that does not converge goes through
+  backtest_vector_pricer.implied_vol_vec.
+- Greeks per strike (CE / PE delta, theta; gamma, vega) at that IV, from
+  the solver's final step and put-call parity — no second pricing pass.
+- Max pain: the strike minimising the total payout to option holders, as
+  one (strike × strike) intrinsic matrix product against the OI vectors.
+- OI change per contract against the first OI seen this session.
+
+ChainMetrics.fields() are the scalars that go to TradeState.chain_metrics
+and the stats popup.  attach() adds CHAIN_COLUMNS to an OHLCV frame as a
+per-bar series (the last value at or before each bar's close), so strategy
+rules can use them as column sides.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Deque, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CHAIN_COLUMNS = ("pcr_oi", "pcr_volume", "atm_iv", "iv_skew", "max_pain")
+
+UPDATE_INTERVAL_S = 1.0            # at most one update per second from stage 2
+NEWTON_STEPS = 4                   # warm-start steps before the bracketed fallback
+PRICE_TOL = 0.005                  # ₹, model vs market price at the solved IV
+SKEW_STRIKES = 2                   # iv_skew = IV(ATM − 2 strikes) − IV(ATM + 2 strikes)
+HISTORY_POINTS = 2000              # one point per minute kept for attach()
+INITIAL_SLOTS = 512                # per-symbol quote columns; doubled when full
+
+_NO_QUOTE: Dict[str, Any] = {}
+_NAN = float("nan")
+
+
+@dataclass
+class ChainMetrics:
+    """One update's per-strike arrays and scalar summary."""
+
+    time: datetime
+    spot: float
+    years_to_expiry: float
+    strikes: np.ndarray
+    ce_price: np.ndarray           # mid of bid / ask, else ltp
+    pe_price: np.ndarray
+    ce_oi: np.ndarray
+    pe_oi: np.ndarray
+    ce_volume: np.ndarray
+    pe_volume: np.ndarray
+    ce_oi_change: np.ndarray
+    pe_oi_change: np.ndarray
+    iv: np.ndarray
+    ce_delta: np.ndarray
+    pe_delta: np.ndarray
+    gamma: np.ndarray
+    vega: np.ndarray               # per 1 vol point
+    ce_theta: np.ndarray           # per calendar day
+    pe_theta: np.ndarray
+    pcr_oi: Optional[float] = None
+    pcr_volume: Optional[float] = None
+    atm_strike: Optional[float] = None
+    atm_iv: Optional[float] = None
+    iv_skew: Optional[float] = None
+    max_pain: Optional[float] = None
+    ce_oi_change_total: Optional[float] = None
+    pe_oi_change_total: Optional[float] = None
+    compute_ms: float = 0.0
+
+    def fields(self) -> Dict[str, Any]:
+        """Scalar summary for state / GUI (None where the chain had no data)."""
+        return {
+            "time": self.time,
+            "spot": self.spot,
+            "strikes": int(len(self.strikes)),
+            "pcr_oi": self.pcr_oi,
+            "pcr_volume": self.pcr_volume,
+            "atm_strike": self.atm_strike,
+            "atm_iv": self.atm_iv,
+            "iv_skew": self.iv_skew,
+            "max_pain": self.max_pain,
+            "ce_oi_change": self.ce_oi_change_total,
+            "pe_oi_change": self.pe_oi_change_total,
+            "compute_ms": round(self.compute_ms, 3),
+        }
+
+
+def _finite(value) -> Optional[float]:
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def _ratio(num: float, den: float, present: bool) -> Optional[float]:
+    return _finite(num / den) if present and den > 0 else None
+
+
+def _new_block(slots: int) -> np.ndarray:
+    return np.full((6, slots), np.nan)
+
+
+class ChainAnalytics:
+    """Array analytics over the live option chain (see module docstring)."""
+
+    def __init__(self, min_interval: float = UPDATE_INTERVAL_S):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._meta: Dict[str, Optional[Tuple[float, bool]]] = {}   # symbol → (strike, is_call)
+        self._layout = None
+        # Quote columns written by record(): ltp, bid, ask, oi, volume, first OI
+        # seen.  _cols are row views of _block, so update() gathers with one index.
+        self._quote_lock = threading.Lock()
+        self._slots: Dict[str, int] = {}
+        self._block = _new_block(INITIAL_SLOTS)
+        self._cols = tuple(self._block)
+        self._recorded = False
+        self._smile: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._expiry_key: Optional[Tuple[str, int, Any]] = None
+        self._expiry: Optional[datetime] = None
+        self._underlying: Optional[str] = None
+        self._history: Deque[Tuple[datetime, Tuple[Optional[float], ...]]] = deque(maxlen=HISTORY_POINTS)
+        self._last_update = 0.0
+        self.latest: Optional[ChainMetrics] = None
+
+    def due(self) -> bool:
+        return time.monotonic() - self._last_update >= self.min_interval
+
+    def reset(self) -> None:
+        """Forget the OI baseline, smile and history (update() does this on a new underlying)."""
+        with self._lock:
+            self._reset()
+
+    def _reset(self) -> None:
+        self._meta.clear()
+        self._layout = None
+        with self._quote_lock:
+            self._slots = {}
+            self._block = _new_block(INITIAL_SLOTS)
+            self._cols = tuple(self._block)
+            self._recorded = False
+        self._smile = None
+        self._history.clear()
+        self._expiry_key = None
+        self._underlying = None
+        self.latest = None
+
+    # ── Inputs ────────────────────────────────────────────────────────────────
+
+    def record(self, symbol: str, ltp: Optional[float], bid: Optional[float], ask: Optional[float],
+               oi: Optional[float] = None, volume: Optional[float] = None) -> None:
+        """
+        Store one chain quote (called by the chain writer on every tick).
+
+        Five scalar stores into the symbol's slot; OI / volume missing from a
+        partial feed frame keep their previous values, as the chain does.
+        """
+        with self._quote_lock:
+            slot = self._slots.get(symbol)
+            if slot is None:
+                slot = self._add_slot(symbol)
+            c_ltp, c_bid, c_ask, c_oi, c_vol, _ = self._cols
+            c_ltp[slot] = _NAN if ltp is None else ltp
+            c_bid[slot] = _NAN if bid is None else bid
+            c_ask[slot] = _NAN if ask is None else ask
+            if oi is not None:
+                c_oi[slot] = oi
+            if volume is not None:
+                c_vol[slot] = volume
+            self._recorded = True
+
+    def _add_slot(self, symbol: str) -> int:
+        """Next free slot for *symbol*, growing the columns when full (quote lock held)."""
+        slot = len(self._slots)
+        if slot == self._block.shape[1]:
+            self._block = np.concatenate([self._block, _new_block(slot)], axis=1)
+            self._cols = tuple(self._block)
+        self._slots[symbol] = slot
+        return slot
+
+    def _store(self, symbol: str, quote: Mapping[str, Any]) -> None:
+        """record() from a chain entry's quote dict."""
+        self.record(symbol, quote.get("ltp"), quote.get("bid"), quote.get("ask"),
+                    quote.get("oi"), quote.get("volume"))
+
+    def _contract(self, symbol: str) -> Optional[Tuple[float, bool]]:
+        meta = self._meta.get(symbol, False)
+        if meta is False:
+            from Utils.OptionUtils import OptionUtils
+            parsed = OptionUtils.parse_symbol(symbol)
+            meta = None
+            if parsed is not None and parsed.strike and parsed.option_type in ("CE", "PE"):
+                meta = (float(parsed.strike), parsed.option_type == "CE")
+            self._meta[symbol] = meta
+        return meta
+
+    def _years_to_expiry(self, underlying: str, weeks_offset: int, now: datetime,
+                         expiry: Optional[datetime] = None) -> float:
+        from backtest.backtest_option_pricer import time_to_expiry_years
+        from Utils.OptionSymbolBuilder import OptionSymbolBuilder
+
+        if expiry is not None:
+            return time_to_expiry_years(now, expiry)
+        key = (underlying, weeks_offset, now.date())
+        if key != self._expiry_key:
+            expiry = OptionSymbolBuilder.expiry_date(underlying, weeks_offset or 0)
+            self._expiry = expiry.replace(hour=15, minute=30, second=0, microsecond=0)
+            self._expiry_key = key
+        return time_to_expiry_years(now, self._expiry)
+
+    def _layout_for(self, chain: Mapping[str, Mapping[str, Any]]):
+        """
+        (keys, slots, strikes, scatter index, call payout matrix), rebuilt
+        only when the chain's symbols change.
+        """
+        keys = tuple(chain)
+        if self._layout is not None and self._layout[0] == keys:
+            return self._layout
+        slots, strike_of, put = [], [], []
+        for sym in keys:
+            meta = self._contract(sym)
+            if meta is None:
+                continue
+            slot = self._slots.get(sym)
+            if slot is None:                            # not recorded yet: start from the chain
+                self._store(sym, chain.get(sym) or _NO_QUOTE)
+                slot = self._slots[sym]
+            slots.append(slot)
+            strike_of.append(meta[0])
+            put.append(not meta[1])
+        if not slots:
+            self._layout = None
+            return None
+        slots = np.array(slots, dtype=np.intp)
+        strikes, index = np.unique(strike_of, return_inverse=True)
+        scatter = np.array(put) * len(strikes) + index            # CE row, then PE row
+        call_pay = np.maximum(strikes[:, None] - strikes[None, :], 0.0)   # expiry at row strike
+        self._layout = (keys, slots, strikes, scatter, call_pay)
+        return self._layout
+
+    def _arrays(self, chain: Mapping[str, Mapping[str, Any]]):
+        """
+        (strikes, call payout matrix, 8 × strikes block) — rows CE / PE price,
+        OI, volume, OI change, NaN where missing.
+        """
+        if not self._recorded:
+            for sym, quote in chain.items():
+                self._store(sym, quote or _NO_QUOTE)
+            self._recorded = False                      # still reading the mapping
+        layout = self._layout_for(chain)
+        if layout is None:
+            return None
+        _, slots, strikes, scatter, call_pay = layout
+        with self._quote_lock:
+            q = self._block[:, slots]
+            first = np.isnan(q[5]) & ~np.isnan(q[3])
+            if first.any():                             # first OI seen sets the baseline
+                q[5, first] = q[3, first]
+                self._block[5, slots[first]] = q[3, first]
+        ltp, bid, ask, oi, _, base = q
+        values = np.empty((4, len(slots)))
+        values[0] = np.where((bid > 0) & (ask >= bid), 0.5 * (bid + ask), ltp)
+        values[1:3] = q[3:5]
+        np.subtract(oi, base, out=values[3])
+        out = np.full((4, 2 * len(strikes)), np.nan)
+        out[:, scatter] = values
+        return strikes, call_pay, out.reshape(8, len(strikes))
+
+    # ── IV and Greeks ─────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _kernel(S: float, K: np.ndarray, T: float, r: float, sigma: np.ndarray, call: np.ndarray):
+        """Price, vega and the d1 / d2 terms for *sigma* (no dividend)."""
+        from backtest.backtest_vector_pricer import norm_cdf, norm_pdf
+
+        sqrt_t = math.sqrt(T)
+        vol_t = sigma * sqrt_t
+        d = np.empty((2, len(K)))                       # d1, d2: one norm_cdf call for both
+        np.divide(np.log(S / K) + (r + 0.5 * sigma * sigma) * T, vol_t, out=d[0])
+        np.subtract(d[0], vol_t, out=d[1])
+        disc_k = K * math.exp(-r * T)
+        (n_d1, n_d2), pdf_d1 = norm_cdf(d), norm_pdf(d[0])
+        call_price = S * n_d1 - disc_k * n_d2
+        price = np.where(call, call_price, call_price - S + disc_k)
+        return price, S * pdf_d1 * sqrt_t, n_d1, n_d2, pdf_d1, disc_k
+
+    def _solve(self, S: float, K: np.ndarray, T: float, r: float, price: np.ndarray, call: np.ndarray):
+        """IV per strike plus the kernel terms at it; NaN where no IV fits the price."""
+        from backtest.backtest_vector_pricer import IV_MAX, IV_MIN, implied_vol_vec
+
+        disc_k = K * math.exp(-r * T)
+        intrinsic = np.maximum(0.0, np.where(call, S - disc_k, disc_k - S))
+        solvable = np.isfinite(price) & (price > intrinsic) & (price < np.where(call, S, disc_k))
+        if not solvable.any():
+            nan = np.full(len(K), np.nan)
+            return nan, None
+
+        if self._smile is not None:
+            sigma = np.interp(K, *self._smile)
+        else:
+            sigma = implied_vol_vec(price, S, K, T, r, call)
+        sigma = np.clip(np.where(np.isfinite(sigma), sigma, 0.2), IV_MIN, IV_MAX)
+
+        for step in range(NEWTON_STEPS + 1):
+            terms = self._kernel(S, K, T, r, sigma, call)
+            diff = terms[0] - price
+            bad = solvable & ~(np.abs(diff) < PRICE_TOL)
+            if not bad.any() or step == NEWTON_STEPS:
+                break
+            sigma = np.where(bad, np.clip(sigma - diff / np.maximum(terms[1], 1e-8), IV_MIN, IV_MAX), sigma)
+
+        if bad.any():
+            sigma = sigma.copy()
+            sigma[bad] = implied_vol_vec(price[bad], S, K[bad], T, r, call[bad])
+            terms = self._kernel(S, K, T, r, np.where(np.isfinite(sigma), sigma, IV_MIN), call)
+        iv = np.where(solvable & np.isfinite(sigma), sigma, np.nan)
+        return iv, terms
+
+    # ── Update ────────────────────────────────────────────────────────────────
+
+    def update(self, chain: Mapping[str, Mapping[str, Any]], spot: Optional[float],
+               underlying: str, weeks_offset: int = 0, now: Optional[datetime] = None,
+               r: Optional[float] = None, expiry: Optional[datetime] = None) -> Optional[ChainMetrics]:
+        """
+        Recompute everything from *chain*; None when there is nothing to compute.
+
+        The contracts' expiry comes from *underlying* / *weeks_offset* as of
+        today unless *expiry* is given (replays of past sessions).
+        """
+        t0 = time.perf_counter()
+        self._last_update = time.monotonic()
+        if not chain or not spot or not underlying:
+            return None
+        from backtest.backtest_vector_pricer import RISK_FREE_RATE
+        from Utils.time_utils import ist_now
+
+        r = RISK_FREE_RATE if r is None else r
+        now = now or ist_now()
+        with self._lock:
+            if underlying != self._underlying:
+                self._reset()
+                self._underlying = underlying
+            built = self._arrays(chain)
+            if built is None:
+                return None
+            K, call_pay, block = built
+            ce_px, pe_px, ce_oi, pe_oi, ce_vol, pe_vol, ce_chg, pe_chg = block
+            T = self._years_to_expiry(underlying, weeks_offset, now, expiry)
+
+            # IV from the OTM side of each strike
+            call = K >= spot
+            price = np.where(call, ce_px, pe_px)
+            iv, terms = self._solve(spot, K, T, r, price, call)
+            if terms is not None:
+                # NaN IV rows carry through gamma / theta; delta / vega are masked
+                _, vega, n_d1, n_d2, pdf_d1, disc_k = terms
+                ok = np.isfinite(iv)
+                sqrt_t = math.sqrt(T)
+                ce_delta = np.where(ok, n_d1, np.nan)
+                gamma = pdf_d1 / (spot * iv * sqrt_t)
+                rate_k = r * disc_k
+                ce_theta = (-spot * pdf_d1 * iv / (2.0 * sqrt_t) - rate_k * n_d2) / 365.0
+                pe_theta = ce_theta + rate_k / 365.0
+                vega = np.where(ok, vega / 100.0, np.nan)
+                if np.count_nonzero(ok) >= 2:
+                    self._smile = (K[ok], iv[ok])
+            else:
+                ce_delta = gamma = vega = ce_theta = pe_theta = np.full(len(K), np.nan)
+
+            # Totals of the OI / volume / OI-change rows, NaN as 0
+            present = np.isfinite(block[2:])
+            filled = np.where(present, block[2:], 0.0)
+            sums = filled.sum(axis=1).tolist()
+            present = present.any(axis=1).tolist()
+
+            # Max pain over the listed strikes
+            max_pain = None
+            if filled[:2].any():
+                payout = call_pay @ filled[0] + call_pay.T @ filled[1]
+                max_pain = float(K[int(np.argmin(payout))])
+
+            atm = int(np.argmin(np.abs(K - spot)))
+            lo, hi = atm - SKEW_STRIKES, atm + SKEW_STRIKES
+            iv_skew = _finite(iv[lo] - iv[hi]) if lo >= 0 and hi < len(K) else None
+
+            metrics = ChainMetrics(
+                time=now, spot=float(spot), years_to_expiry=T, strikes=K,
+                ce_price=ce_px, pe_price=pe_px, ce_oi=ce_oi, pe_oi=pe_oi,
+                ce_volume=ce_vol, pe_volume=pe_vol, ce_oi_change=ce_chg, pe_oi_change=pe_chg,
+                iv=iv, ce_delta=ce_delta, pe_delta=ce_delta - 1.0, gamma=gamma, vega=vega,
+                ce_theta=ce_theta, pe_theta=pe_theta,
+                pcr_oi=_ratio(sums[1], sums[0], present[0] and present[1]),
+                pcr_volume=_ratio(sums[3], sums[2], present[2] and present[3]),
+                atm_strike=float(K[atm]),
+                atm_iv=_finite(iv[atm]),
+                iv_skew=iv_skew,
+                max_pain=max_pain,
+                ce_oi_change_total=_finite(sums[4]) if present[4] else None,
+                pe_oi_change_total=_finite(sums[5]) if present[5] else None,
+            )
+            metrics.compute_ms = (time.perf_counter() - t0) * 1e3
+            self.latest = metrics
+            self._record(metrics)
+        return metrics
+
+    # ── Signal-engine columns ─────────────────────────────────────────────────
+
+    def _record(self, m: ChainMetrics) -> None:
+        point = (m.time, (m.pcr_oi, m.pcr_volume, m.atm_iv, m.iv_skew, m.max_pain))
+        minute = m.time.replace(second=0, microsecond=0)
+        if self._history and self._history[-1][0].replace(second=0, microsecond=0) == minute:
+            self._history[-1] = point                   # last value per minute
+        else:
+            self._history.append(point)
+
+    def columns(self) -> Dict[str, float]:
+        """Latest CHAIN_COLUMNS values (NaN before the first update), for a tick-level row."""
+        with self._lock:
+            point = self._history[-1][1] if self._history else (None,) * len(CHAIN_COLUMNS)
+        return {col: np.nan if v is None else v for col, v in zip(CHAIN_COLUMNS, point)}
+
+    def attach(self, df, bar_minutes: int = 1):
+        """*df* with CHAIN_COLUMNS added per bar (NaN before the first update)."""
+        if df is None or df.empty or "time" not in df.columns:
+            return df
+        import pandas as pd
+
+        with self._lock:
+            history = list(self._history)
+        try:
+            if not history:
+                return df.assign(**{col: np.nan for col in CHAIN_COLUMNS})
+            hist = pd.DataFrame([values for _, values in history], columns=list(CHAIN_COLUMNS), dtype=float)
+            stamps, tz = pd.DatetimeIndex([t for t, _ in history]), df["time"].dt.tz
+            hist["_at"] = stamps.tz_convert(tz) if tz is not None else stamps.tz_localize(None)
+            bar_close = (df["time"] + pd.Timedelta(minutes=max(1, int(bar_minutes)))).reset_index(drop=True)
+            hist["_at"] = hist["_at"].astype(bar_close.dtype)
+            joined = pd.merge_asof(bar_close.to_frame("_at"), hist, on="_at", direction="backward")
+            out = df.copy()
+            for col in CHAIN_COLUMNS:
+                out[col] = joined[col].to_numpy()
+            return out
+        except Exception as e:
+            logger.debug(f"[ChainAnalytics.attach] {e}", exc_info=True)
+            return df
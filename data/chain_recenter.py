@@ -0,0 +1,127 @@
+"""
+data/chain_recenter.py
+======================
+When to move the subscribed option-chain window, and what to send when it moves.
+
+TradingApp subscribes ``itm`` + ATM + ``otm`` strikes on each side around the
+strike nearest spot.  As spot trends, that window has to follow it, but a
+full rebuild unsubscribes and resubscribes every symbol (a tick gap for the
+whole chain) and spot oscillating around a strike boundary would move the
+window back and forth.
+
+ChainRecenter:
+
+- check(spot)       hot path (every derivative tick): two float compares
+                    while spot stays inside the band, otherwise the new
+                    centre strike.  The band is ±(0.5 + hysteresis) strike
+                    steps around the current centre, so after a move spot has
+                    to travel ``hysteresis`` steps past the next boundary
+                    before the window moves again.
+- delta(old, new)   the symbols to subscribe (new − old) and unsubscribe
+                    (old − new), in chain order; callers subscribe the added
+                    ones before unsubscribing the dropped ones and leave the
+                    retained chain entries untouched.
+- stats()           re-centres, symbols added / dropped, and how many full
+                    rebuilds that avoided resubscribing.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from Utils.OptionSymbolBuilder import OptionSymbolBuilder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HYSTERESIS = 0.25           # strike steps past the half-way boundary
+
+
+class ChainRecenter:
+    """Hysteresis band around the chain centre plus delta bookkeeping (see module docstring)."""
+
+    def __init__(self, hysteresis: float = DEFAULT_HYSTERESIS):
+        self.hysteresis = max(0.0, hysteresis)
+        self._lock = threading.Lock()
+        self.underlying: Optional[str] = None
+        self.step = 0.0
+        self.centre: Optional[float] = None
+        self._low = float("inf")            # no window yet: check() never fires
+        self._high = float("-inf")
+        self._in_flight = False
+        self._recenters = 0
+        self._added = 0
+        self._dropped = 0
+        self._retained = 0
+
+    # ── Window ────────────────────────────────────────────────────────────────
+
+    def reset(self, underlying: str, spot: float) -> Optional[float]:
+        """Centre the window on the strike nearest *spot* (full subscribe)."""
+        step = float(OptionSymbolBuilder.multiplier(underlying) or 0)
+        if step <= 0 or spot is None:
+            return None
+        self.underlying = underlying
+        self.step = step
+        self._set_centre(self.nearest(spot))
+        return self.centre
+
+    def nearest(self, spot: float) -> float:
+        return float(OptionSymbolBuilder.nearest_strike(spot, self.underlying))
+
+    def _set_centre(self, centre: float) -> None:
+        half_band = (0.5 + self.hysteresis) * self.step
+        self.centre = centre
+        self._low = centre - half_band
+        self._high = centre + half_band
+
+    def check(self, spot: Optional[float]) -> Optional[float]:
+        """New centre strike when *spot* has left the band, else None."""
+        if spot is None or self._low < spot < self._high or self._in_flight:
+            return None
+        return self.nearest(spot)
+
+    # ── One re-centre at a time ───────────────────────────────────────────────
+
+    def begin(self) -> bool:
+        """Claim the re-centre slot; False when one is already running."""
+        with self._lock:
+            if self._in_flight:
+                return False
+            self._in_flight = True
+            return True
+
+    def finish(self, centre: Optional[float] = None) -> None:
+        """Release the slot; move the band to *centre* when the re-centre succeeded."""
+        with self._lock:
+            if centre is not None:
+                self._set_centre(centre)
+                self._recenters += 1
+            self._in_flight = False
+
+    # ── Delta ─────────────────────────────────────────────────────────────────
+
+    def delta(self, old: Iterable[str], new: Iterable[str],
+              keep: Iterable[str] = ()) -> Tuple[List[str], List[str]]:
+        """(added, dropped): *new* not in *old*, and *old* not in *new* or *keep*."""
+        old = list(old)
+        new = list(new)
+        old_set: Set[str] = set(old)
+        new_set: Set[str] = set(new) | {s for s in keep if s}
+        added = [s for s in new if s not in old_set]
+        dropped = [s for s in old if s not in new_set]
+        with self._lock:
+            self._added += len(added)
+            self._dropped += len(dropped)
+            self._retained += len(old_set) - len(dropped)
+        return added, dropped
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "centre": self.centre,
+                "band": (self._low, self._high) if self.centre is not None else None,
+                "recenters": self._recenters,
+                "added": self._added,
+                "dropped": self._dropped,
+                "resubscribes_avoided": self._retained,
+            }
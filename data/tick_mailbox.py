@@ -0,0 +1,112 @@
+"""
+data/tick_mailbox.py
+====================
+Conflating mailbox between the WebSocket thread (stage 1) and the stage-2
+decision worker.
+
+Stage 1 posts every tick under its symbol id (Utils.symbol_router); the
+mailbox keeps only the latest update per symbol and signals stage 2 once
+per batch, on the first post after the previous take.  Stage 2 takes the
+whole batch at once and decides from a fresh state snapshot, so:
+
+- it can never overflow — its size is bounded by the number of subscribed
+  symbols, and a burst only replaces entries;
+- stage 2 is never more than one cycle behind: whatever arrives while it
+  processes is folded into the single next batch.
+
+Counters: ticks posted, ticks conflated (an entry for that symbol was
+already pending), wake-ups, batches taken, the largest batch, and the
+wake-to-process latency (first post of a batch → stage 2 taking it).
+"""
+
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+
+
+class TickMailbox:
+    """Latest update per symbol key, with one wake-up per batch (see module docstring)."""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._pending: Dict[Hashable, Any] = {}
+        self._signalled_at: Optional[float] = None
+        self._woken = False
+        self.reset_stats()
+
+    # ── Producer (stage 1) ────────────────────────────────────────────────────
+
+    def post(self, key: Hashable, update: Any = None) -> None:
+        """Store *update* as the latest for *key*; wakes the consumer if it is idle."""
+        with self._cond:
+            self.posted += 1
+            if key in self._pending:
+                self.conflated += 1
+            self._pending[key] = update
+            if self._signalled_at is None:
+                self._signalled_at = time.perf_counter()
+                self.wakeups += 1
+                self._cond.notify()
+
+    # ── Consumer (stage 2) ────────────────────────────────────────────────────
+
+    def take(self, timeout: Optional[float] = None) -> Optional[Dict[Hashable, Any]]:
+        """
+        Block until something is pending (or *timeout* seconds pass) and
+        return every pending key → latest update; None on timeout or wake().
+        """
+        with self._cond:
+            if not self._pending:
+                self._cond.wait_for(lambda: self._pending or self._woken, timeout)
+            self._woken = False
+            if not self._pending:
+                return None
+            batch, self._pending = self._pending, {}
+            latency = time.perf_counter() - self._signalled_at
+            self._signalled_at = None
+            self.batches += 1
+            self.latency_s += latency
+            if latency > self.max_latency_s:
+                self.max_latency_s = latency
+            if len(batch) > self.max_batch:
+                self.max_batch = len(batch)
+            return batch
+
+    def wake(self) -> None:
+        """Make a waiting (or the next) take() return without posting (e.g. on shutdown)."""
+        with self._cond:
+            self._woken = True
+            self._cond.notify_all()
+
+    # ── Housekeeping ──────────────────────────────────────────────────────────
+
+    def clear(self) -> None:
+        with self._cond:
+            self._pending = {}
+            self._signalled_at = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def reset_stats(self) -> None:
+        self.posted = 0
+        self.conflated = 0
+        self.wakeups = 0
+        self.batches = 0
+        self.max_batch = 0
+        self.latency_s = 0.0
+        self.max_latency_s = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "posted": self.posted,
+                "conflated": self.conflated,
+                "conflation_rate": round(self.conflated / self.posted, 4) if self.posted else 0.0,
+                "wakeups": self.wakeups,
+                "batches": self.batches,
+                "max_batch": self.max_batch,
+                "pending": len(self._pending),
+                "avg_wake_latency_ms": round(self.latency_s / self.batches * 1000, 3) if self.batches else 0.0,
+                "max_wake_latency_ms": round(self.max_latency_s * 1000, 3),
+            }
@@ -38,6 +38,17 @@ DESIGN PRINCIPLES
 5. **Defensive Copying** - Collections and complex objects are returned as
    shallow copies so callers cannot mutate shared state.
 
+6. **Transactions** - ``with state.batch():`` holds the lock once for a group
+   of reads and writes, bumps ``version`` once and notifies observers
+   (``add_observer``) once.  The lock counts acquisitions, contention and
+   hold time; ``get_lock_stats()`` reports them.
+
+7. **Published Snapshots** - ``get_snapshot()`` / ``get_position_snapshot()``
+   return an immutable, versioned ``StateSnapshot``.  It is rebuilt only
+   after a write (any ``_field`` assignment marks the state changed), so
+   polling unchanged state is one attribute read with no lock; the option
+   chain is shared copy-on-write with the snapshot.
+
 SINGLETON PATTERN
 -----------------
 The TradeState is implemented as a thread-safe singleton to ensure a single
@@ -62,10 +73,13 @@ import logging
 import logging.handlers
 import threading
 import time
+from collections.abc import Mapping
+from contextlib import contextmanager
 from datetime import datetime
+from types import MappingProxyType
 # TZ-FIX: elapsed-time / cache comparisons must use ist_now() to match IST DB timestamps.
 from Utils.time_utils import ist_now, IST
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Union
 
 import pandas as pd
 
@@ -132,6 +146,109 @@ def _default_signal_result() -> Dict[str, Any]:
         return {}
 
 
+class _InstrumentedRLock:
+    """
+    threading.RLock that counts outermost acquisitions, contended acquires
+    (the lock was held by another thread), time spent waiting and time held.
+
+    Counters are only updated by the thread holding the lock, so they need
+    no lock of their own.  Nested (re-entrant) acquires are not counted.
+    """
+
+    __slots__ = ("_lock", "_depth", "_acquired_at",
+                 "acquisitions", "contended", "wait_s", "hold_s", "max_hold_s")
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._acquired_at = 0.0
+        self.reset_stats()
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if not self._lock.acquire(False):
+            if not blocking:
+                return False
+            t0 = time.perf_counter()
+            if not self._lock.acquire(True, timeout):
+                return False
+            self.contended += 1
+            self.wait_s += time.perf_counter() - t0
+        if self._depth == 0:
+            self.acquisitions += 1
+            self._acquired_at = time.perf_counter()
+        self._depth += 1
+        return True
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            held = time.perf_counter() - self._acquired_at
+            self.hold_s += held
+            if held > self.max_hold_s:
+                self.max_hold_s = held
+        self._lock.release()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    def reset_stats(self) -> None:
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_s = 0.0
+        self.hold_s = 0.0
+        self.max_hold_s = 0.0
+
+
+class StateSnapshot(Mapping):
+    """
+    Immutable, versioned view of TradeState published for lock-free readers.
+
+    Behaves as a read-only dict of the snapshot fields (``snap["stop_loss"]``,
+    ``snap.get(...)``, iteration) and carries the state ``version`` it was
+    taken at.  ``option_chain`` is a read-only view of the chain as of that
+    version; its dict is shared with the live state until the next chain
+    write copies it.  Nested lists / dicts are per-snapshot copies shared by
+    every reader of that version — treat them as read-only.
+    """
+
+    __slots__ = ("_data", "_seq", "version", "option_chain")
+
+    def __init__(self, version: int, data: Dict[str, Any],
+                 option_chain: Optional[Dict[str, Any]] = None, seq: int = 0):
+        self._data = data
+        self._seq = seq
+        self.version = version
+        self.option_chain = MappingProxyType(option_chain if option_chain is not None else {})
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def copy(self) -> Dict[str, Any]:
+        """Mutable dict copy of the fields."""
+        return dict(self._data)
+
+    def __reduce__(self):
+        # MappingProxyType does not pickle; rebuild the view from a plain dict.
+        return StateSnapshot, (self.version, self._data, dict(self.option_chain), self._seq)
+
+    def __repr__(self) -> str:
+        return f"StateSnapshot(version={self.version}, fields={len(self._data)})"
+
+
 # ---------------------------------------------------------------------------
 # TradeState (Singleton)
 # ---------------------------------------------------------------------------
@@ -174,6 +291,11 @@ class TradeState:
             has_position   = bool(state.current_position),
         )
 
+        # Several fields in one transaction (one lock, one version bump)
+        with state.batch():
+            state.put_current_close = price
+            state.current_price = price
+
         # Stage-2 (thread pool) — atomic snapshot for decisions
         snap = state.get_position_snapshot()
         if snap["current_price"] <= snap["stop_loss"]: ...
@@ -193,6 +315,22 @@ class TradeState:
     _singleton_lock = threading.RLock()
     _initialized = False
 
+    # Change tracking defaults (instance values are set in __init__).  Names
+    # in _UNTRACKED_ATTRS are bookkeeping, not state; writing any other
+    # underscore field counts as a change (see __setattr__).
+    _version = 0
+    _write_seq = 0
+    _batch_depth = 0
+    _batch_changes = None
+    _snap_full = None
+    _snap_position = None
+    _chain_shared = False
+    _UNTRACKED_ATTRS = frozenset({
+        "_lock", "_initialized", "_version", "_write_seq", "_observers",
+        "_batch_depth", "_batch_changes", "_batch_count",
+        "_snap_full", "_snap_position", "_chain_shared",
+    })
+
     # ------------------------------------------------------------------
     # Singleton Pattern Implementation
     # ------------------------------------------------------------------
@@ -221,7 +359,14 @@ class TradeState:
             try:
                 # _lock must be set via object.__setattr__ because our own
                 # __setattr__ references _lock before the instance is ready.
-                object.__setattr__(self, "_lock", threading.RLock())
+                object.__setattr__(self, "_lock", _InstrumentedRLock())
+
+                # ── Change tracking (see batch() / add_observer()) ──────────
+                self._version: int = 0
+                self._observers: List[Callable[[int, FrozenSet[str]], None]] = []
+                self._batch_depth: int = 0
+                self._batch_changes: set = set()
+                self._batch_count: int = 0
 
                 self._trading_mode: str = BaseEnums.PAPER   # default: paper (safe)
                 self._is_paper_mode: bool = True             # True = paper/sim, False = live
@@ -327,6 +472,7 @@ class TradeState:
                 self._current_pcr: float = 0.0
                 self._trend: Any = None
                 self._current_pcr_vol: Optional[float] = None
+                self._chain_metrics: Optional[Dict[str, Any]] = None  # ChainMetrics.fields()
 
                 # ── Dynamic signal result ────────────────────────────────────
                 self._option_signal_result: Optional[Dict[str, Any]] = None
@@ -377,7 +523,7 @@ class TradeState:
             except Exception as e:
                 logger.critical(f"[TradeState.__init__] Failed: {e}", exc_info=True)
                 # Bug #6 fix: Don't mark as initialized on failure
-                object.__setattr__(self, "_lock", threading.RLock())
+                object.__setattr__(self, "_lock", _InstrumentedRLock())
                 # self._initialized = True  # REMOVED - don't mask initialization failure
 
     @classmethod
@@ -453,15 +599,134 @@ class TradeState:
                 except AttributeError:
                     old_value = None
                 object.__setattr__(self, attr, value)
+                version = self._mark_changed(attr)
 
                 if logger.isEnabledFor(logging.DEBUG):
                     if old_value != value:
                         logger.debug(f"State update: {attr} = {value} (was: {old_value})")
+            if version is not None and self._observers:
+                self._notify(version, frozenset((attr,)))
         except AttributeError as e:
             logger.debug(f"[_set] Attribute {attr} not found: {e}")
         except Exception as e:
             logger.error(f"[_set] Failed for {attr}: {e}", exc_info=True)
 
+    # ------------------------------------------------------------------
+    # Transactions, version counter and observers
+    # ------------------------------------------------------------------
+
+    def _mark_changed(self, *attrs: str) -> Optional[int]:
+        """
+        Record a write made while holding self._lock.
+
+        Returns the new version for the caller to notify with (after it has
+        released the lock), or None inside a batch — the batch bumps the
+        version and notifies once when it ends.
+        """
+        self._write_seq += 1
+        if self._batch_depth:
+            self._batch_changes.update(attrs)
+            return None
+        self._version += 1
+        return self._version
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Direct field writes (``self._x = v`` in the atomic methods) mark the
+        # state changed so published snapshots are rebuilt; public names go
+        # through their property setters, which call _set().
+        object.__setattr__(self, name, value)
+        if name[0] == "_" and name not in self._UNTRACKED_ATTRS:
+            self._mark_changed(name)
+
+    def _notify(self, version: int, changed: FrozenSet[str]) -> None:
+        """Call every observer; always outside the lock (design principle #4)."""
+        for observer in list(self._observers):
+            try:
+                observer(version, changed)
+            except Exception as e:
+                logger.error(f"[TradeState] observer {observer!r} failed: {e}", exc_info=True)
+
+    @contextmanager
+    def batch(self) -> Iterator['TradeState']:
+        """
+        Apply several field updates under one lock acquisition.
+
+            with state.batch():
+                state.put_current_close = price
+                state.current_price = price
+
+        The lock is taken once for the whole block (property access inside
+        re-enters it without contention), other threads see either none or
+        all of the updates, the version is bumped once and observers are
+        notified once, after the lock is released, with the set of fields
+        written.  Batches nest; only the outermost one commits.
+        """
+        self._lock.acquire()
+        self._batch_depth += 1
+        version = changed = None
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._batch_count += 1
+                if self._batch_changes:
+                    self._version += 1
+                    self._write_seq += 1      # republish with the committed version
+                    version = self._version
+                    changed = frozenset(self._batch_changes)
+                    self._batch_changes = set()
+            self._lock.release()
+        if version is not None and self._observers:
+            self._notify(version, changed)
+
+    def apply(self, **fields: Any) -> None:
+        """Set several public fields in one batch: ``state.apply(current_price=p, ...)``."""
+        with self.batch():
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+    @property
+    def version(self) -> int:
+        """Incremented by every _set() write, price / chain update and committed batch."""
+        return self._version
+
+    def add_observer(self, callback: Callable[[int, FrozenSet[str]], None]) -> None:
+        """Register ``callback(version, changed_fields)``; called outside the lock."""
+        with self._lock:
+            if callback not in self._observers:
+                self._observers.append(callback)
+
+    def remove_observer(self, callback: Callable[[int, FrozenSet[str]], None]) -> None:
+        with self._lock:
+            if callback in self._observers:
+                self._observers.remove(callback)
+
+    def get_lock_stats(self) -> Dict[str, Any]:
+        """
+        Lock usage since the last reset: outermost acquisitions, how many had
+        to wait for another thread, total wait / hold time and the longest
+        single hold, plus committed batches and the current version.
+        """
+        lock = self._lock
+        acquisitions = lock.acquisitions
+        return {
+            "acquisitions": acquisitions,
+            "contended": lock.contended,
+            "contention_rate": round(lock.contended / acquisitions, 4) if acquisitions else 0.0,
+            "wait_ms": round(lock.wait_s * 1000, 3),
+            "hold_ms": round(lock.hold_s * 1000, 3),
+            "avg_hold_us": round(lock.hold_s / acquisitions * 1e6, 3) if acquisitions else 0.0,
+            "max_hold_ms": round(lock.max_hold_s * 1000, 3),
+            "batches": self._batch_count,
+            "version": self._version,
+        }
+
+    def reset_lock_stats(self) -> None:
+        with self._lock:
+            self._lock.reset_stats()
+            self._batch_count = 0
+
     # ==================================================================
     # PROPERTIES
     # Every public attribute is a property so the lock is always held.
@@ -767,7 +1032,8 @@ class TradeState:
             )
         """
         try:
-            with self._lock:
+            # One transaction: one version bump / notification for all legs.
+            with self.batch():
                 if derivative_ltp is not None:
                     self._derivative_current_price = derivative_ltp
 
@@ -775,20 +1041,14 @@ class TradeState:
                     self._current_price = current_price
 
                 # Call leg
-                if has_position:
-                    if call_ask is not None:
-                        self._call_current_close = call_ask
-                else:
-                    if call_bid is not None:
-                        self._call_current_close = call_bid
+                call_px = call_ask if has_position else call_bid
+                if call_px is not None:
+                    self._call_current_close = call_px
 
                 # Put leg
-                if has_position:
-                    if put_ask is not None:
-                        self._put_current_close = put_ask
-                else:
-                    if put_bid is not None:
-                        self._put_current_close = put_bid
+                put_px = put_ask if has_position else put_bid
+                if put_px is not None:
+                    self._put_current_close = put_px
 
         except Exception as e:
             logger.error(f"[TradeState.update_prices] Failed: {e}", exc_info=True)
@@ -892,6 +1152,7 @@ class TradeState:
         try:
             with self._lock:
                 self._orders.append(order)
+                self._mark_changed("_orders")
         except Exception as e:
             logger.error(f"[append_order] Failed: {e}", exc_info=True)
 
@@ -960,6 +1221,7 @@ class TradeState:
         try:
             with self._lock:
                 self._confirmed_orders.extend(orders)
+                self._mark_changed("_confirmed_orders")
         except Exception as e:
             logger.error(f"[extend_confirmed_orders] Failed: {e}", exc_info=True)
 
@@ -1725,6 +1987,16 @@ class TradeState:
         """Set volume-based PCR."""
         self._set("_current_pcr_vol", value)
 
+    @property
+    def chain_metrics(self) -> Optional[Dict[str, Any]]:
+        """Latest option-chain analytics (PCR, ATM IV, IV skew, max pain, OI change)."""
+        return self._get("_chain_metrics")
+
+    @chain_metrics.setter
+    def chain_metrics(self, value: Optional[Dict[str, Any]]) -> None:
+        """Set option-chain analytics."""
+        self._set("_chain_metrics", value)
+
     # ------------------------------------------------------------------
     # Session tracking
     # ------------------------------------------------------------------
@@ -1804,13 +2076,27 @@ class TradeState:
         try:
             with self._lock:
                 # Store the original, not a copy
-                object.__setattr__(self, "_option_chain", value)
+                self._option_chain = value
+                self._chain_shared = False
         except AttributeError:
             # If _option_chain doesn't exist yet, create it
             object.__setattr__(self, "_option_chain", value)
         except Exception as e:
             logger.error(f"[option_chain setter] Failed: {e}", exc_info=True)
 
+    def _writable_chain(self) -> Dict[str, Any]:
+        """
+        The chain dict, safe to write into (lock held).  Copy-on-write: when
+        a published snapshot still shares it, it is shallow-copied first —
+        entries are replaced whole, never mutated, so they stay shared.
+        """
+        if self._chain_shared:
+            self._option_chain = dict(self._option_chain)
+            self._chain_shared = False
+        else:
+            self._mark_changed("_option_chain")
+        return self._option_chain
+
     def update_option_chain_symbol(self, symbol: str, data: Dict[str, Optional[float]]) -> bool:
         """
         Update a single symbol in the option chain.
@@ -1818,20 +2104,26 @@ class TradeState:
 
         Args:
             symbol: The symbol to update
-            data: Dictionary with ltp, ask, bid values
+            data: Dictionary with ltp, ask, bid (and optionally oi, volume) values;
+                  oi / volume missing from a partial feed frame keep their
+                  previous values
 
         Returns:
             bool: True if updated, False if symbol not found
         """
         try:
-            with self._lock:
-                if symbol in self._option_chain:
-                    self._option_chain[symbol] = data
-                    logger.debug(f"Updated option chain for {symbol}: {data}")
-                    return True
-                else:
+            with self.batch():
+                previous = self._option_chain.get(symbol, False)
+                if previous is False:
                     logger.debug(f"Symbol {symbol} not in option chain")
                     return False
+                if previous:
+                    for key in ("oi", "volume"):
+                        if data.get(key) is None and previous.get(key) is not None:
+                            data = {**data, key: previous[key]}
+                self._writable_chain()[symbol] = data
+            logger.debug(f"Updated option chain for {symbol}: {data}")
+            return True
         except Exception as e:
             logger.error(f"[update_option_chain_symbol] Failed: {e}", exc_info=True)
             return False
@@ -1847,15 +2139,15 @@ class TradeState:
             int: Number of symbols successfully updated
         """
         try:
-            with self._lock:
+            with self.batch():
                 updated = 0
                 for symbol, data in updates.items():
                     if symbol in self._option_chain:
-                        self._option_chain[symbol] = data
+                        self._writable_chain()[symbol] = data
                         updated += 1
-                if updated > 0:
-                    logger.debug(f"Batch updated {updated} symbols in option chain")
-                return updated
+            if updated > 0:
+                logger.debug(f"Batch updated {updated} symbols in option chain")
+            return updated
         except Exception as e:
             logger.error(f"[update_option_chain_batch] Failed: {e}", exc_info=True)
             return 0
@@ -2050,10 +2342,33 @@ class TradeState:
     # the snapshot is guaranteed to be internally consistent.
     # ==================================================================
 
-    def get_position_snapshot(self) -> Dict[str, Any]:
+    def get_position_snapshot(self) -> StateSnapshot:
         """
         Atomically read every field needed for entry / exit decisions.
 
+        Returns the published StateSnapshot for the current state: while
+        nothing has been written since it was built, every caller gets the
+        same immutable object from one attribute read, without the lock.
+        The first call after a write rebuilds it (fields listed below).
+        Inside a batch the owning thread gets a private snapshot of its
+        uncommitted writes; it is never published to other threads.
+        """
+        snap = self._snap_position
+        if snap is not None and snap._seq == self._write_seq:
+            return snap
+        with self._lock:
+            snap = self._snap_position
+            if snap is None or snap._seq != self._write_seq:
+                snap = StateSnapshot(self._version, self._build_position_snapshot(),
+                                     seq=self._write_seq)
+                if not self._batch_depth:
+                    self._snap_position = snap
+            return snap
+
+    def _build_position_snapshot(self) -> Dict[str, Any]:
+        """
+        Fields for get_position_snapshot(), read under the lock.
+
         This method provides a consistent snapshot of all fields required
         for making trading decisions. Using this single call instead of
         multiple property reads ensures that all values are from the same
@@ -2140,7 +2455,7 @@ class TradeState:
                     "trading_mode": self._trading_mode,
                 }
         except Exception as e:
-            logger.error(f"[get_position_snapshot] Failed: {e}", exc_info=True)
+            logger.error(f"[_build_position_snapshot] Failed: {e}", exc_info=True)
             return {}
 
     def get_option_signal_snapshot(self) -> Dict[str, Any]:
@@ -2160,11 +2475,34 @@ class TradeState:
             logger.error(f"[get_option_signal_snapshot] Failed: {e}", exc_info=True)
             return _default_signal_result()
 
-    def get_snapshot(self) -> Dict[str, Any]:
+    def get_snapshot(self) -> StateSnapshot:
         """
         Full read-only snapshot of all state — safe to hand to the GUI
         thread without holding any lock.
 
+        Published copy-on-write like get_position_snapshot(): unchanged state
+        costs one attribute read.  ``snapshot.option_chain`` shares the chain
+        dict with the live state until the next chain write copies it, so the
+        chain is never copied just to be read.  As there, a snapshot taken
+        inside a batch is private to the owning thread and never published.
+        """
+        snap = self._snap_full
+        if snap is not None and snap._seq == self._write_seq:
+            return snap
+        with self._lock:
+            snap = self._snap_full
+            if snap is None or snap._seq != self._write_seq:
+                snap = StateSnapshot(self._version, self._build_snapshot(),
+                                     option_chain=self._option_chain, seq=self._write_seq)
+                self._chain_shared = True
+                if not self._batch_depth:
+                    self._snap_full = snap
+            return snap
+
+    def _build_snapshot(self) -> Dict[str, Any]:
+        """
+        Fields for get_snapshot(), read under the lock.
+
         NOTE: This snapshot contains only scalar trading state and DataFrame
         summaries. For actual OHLCV/candle data, use CandleStoreManager.
 
@@ -2183,7 +2521,7 @@ class TradeState:
                         return "None"
                     if not isinstance(df, pd.DataFrame):
                         logger.warning(
-                            f"[get_snapshot] _df_repr received unexpected type {type(df).__name__!r} "
+                            f"[_build_snapshot] _df_repr received unexpected type {type(df).__name__!r} "
                             f"(value={str(df)!r:.80}); treating as None"
                         )
                         return "None"
@@ -2290,6 +2628,7 @@ class TradeState:
                     "calculated_pcr": self._calculated_pcr,
                     "current_pcr": self._current_pcr,
                     "current_pcr_vol": self._current_pcr_vol,
+                    "chain_metrics": dict(self._chain_metrics) if self._chain_metrics else None,
 
                     # Misc
                     "market_trend": self._market_trend,
@@ -2322,7 +2661,7 @@ class TradeState:
                     "reentry_max_per_day": self._reentry_max_per_day,
                 }
         except Exception as e:
-            logger.error(f"[get_snapshot] Failed: {e}", exc_info=True)
+            logger.error(f"[_build_snapshot] Failed: {e}", exc_info=True)
             return {}
 
     # ==================================================================
@@ -2368,7 +2707,8 @@ class TradeState:
         skipped_count = 0
 
         try:
-            with self._lock:
+            # One transaction: observers see a single version bump for the restore.
+            with self.batch():
                 for key, value in data.items():
                     if key in computed_properties:
                         skipped_count += 1
@@ -2580,7 +2920,8 @@ class TradeState:
                 self._confirmed_orders.clear()
                 self._all_symbols.clear()
                 self._mtf_results.clear()
-                object.__setattr__(self, "_option_chain", {})
+                self._option_chain = {}
+                self._chain_shared = False
 
                 # Clear dictionaries
                 self._current_order_id.clear()
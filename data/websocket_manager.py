@@ -18,7 +18,9 @@ from functools import wraps
 from typing import Callable, List, Optional, Dict, Any
 
 from broker.BaseBroker import BaseBroker
-from Utils.OptionUtils import OptionUtils
+from Utils.event_tracer import EV_TICK_ROUTED, tracer
+from Utils.latency import STAGE_NORMALIZED, now_ns, tick_latency
+from Utils.symbol_router import SymbolRouter
 
 logger = logging.getLogger(__name__)
 
@@ -86,11 +88,26 @@ class WebSocketManager:
             logger.critical(f"[WebSocketManager.__init__] Failed: {e}", exc_info=True)
             self._safe_defaults_init()
 
+    # ── Subscribed symbols ─────────────────────────────────────────────────────
+
+    @property
+    def symbols(self) -> List[str]:
+        return self._symbols
+
+    @symbols.setter
+    def symbols(self, symbols: List[str]) -> None:
+        # Every assignment (subscribe, resubscribe, TradingApp) rebuilds this
+        # manager's tick routing table, so _wrap_callback only does a dict
+        # lookup; ids are process-wide (Utils.symbol_router.symbol_ids).
+        self._symbols = symbols
+        self.router.rebuild(symbols)
+
     # ── Safe defaults ──────────────────────────────────────────────────────────
 
     def _safe_defaults_init(self):
         self.broker = None
         self.on_message_callback = self._dummy_callback
+        self.router = SymbolRouter()
         self.symbols = []
         self.max_retries = 5
         self.retry_delay = 5
@@ -681,6 +698,7 @@ class WebSocketManager:
         @wraps(callback)
         def safe_callback(raw_tick):
             try:
+                recv_ns = now_ns()
                 self._last_message_time = time.time()
 
                 if raw_tick is None:
@@ -694,18 +712,24 @@ class WebSocketManager:
 
                 if normalized is None:
                     return  # heartbeat / unparseable frame — silently skip
+                tick_latency.record(STAGE_NORMALIZED, recv_ns)
 
+                # Remap to the subscribed spelling so downstream comparisons see
+                # one format; the routing table is rebuilt when symbols change.
                 tick_sym = normalized.get("symbol", "")
-                if tick_sym and self.symbols:
-                    for subscribed_sym in self.symbols:
-                        if subscribed_sym != tick_sym and OptionUtils.symbols_match(tick_sym, subscribed_sym):
-                            normalized = dict(normalized)  # shallow copy – don't mutate original
-                            normalized["symbol"] = subscribed_sym
-                            logger.debug(
-                                f"[WSManager] Symbol remapped: {tick_sym!r} → {subscribed_sym!r}"
-                            )
-                            break
+                if tick_sym:
+                    subscribed_sym = self.router.subscribed(tick_sym)
+                    if subscribed_sym is not None and subscribed_sym != tick_sym:
+                        normalized = dict(normalized)  # shallow copy – don't mutate original
+                        normalized["symbol"] = subscribed_sym
+                        logger.debug(
+                            f"[WSManager] Symbol remapped: {tick_sym!r} → {subscribed_sym!r}"
+                        )
 
+                # Receive stamp for the tick-to-decision histograms (Utils.latency)
+                normalized["recv_ns"] = recv_ns
+                tracer.emit(EV_TICK_ROUTED, self.router.intern(normalized.get("symbol")),
+                            normalized.get("ltp") or 0.0)
                 self._message_count += 1
                 callback(normalized)
 
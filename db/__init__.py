@@ -26,6 +26,10 @@ Quick start:
     orders.close_order(oid, exit_price=170.0, pnl=1500.0, reason="TP hit")
     sessions.close(sid, total_pnl=1500.0, total_trades=1, winning_trades=1)
 
+    # Backtest results (see backtest.backtest_results_store for the
+    # BacktestResult <-> row conversion and the run cache)
+    runs = backtest_runs.list_runs(strategy_slug="my-strat", order_by="sharpe")
+
 Migration (run once):
     python -m db.migrate
 """
@@ -40,6 +44,7 @@ from db.crud import (
     sessions,
     orders,
     kv,
+    backtest_runs,
 )
 from db.connector import get_db, reset_db
 
@@ -53,6 +58,7 @@ __all__ = [
     "sessions",
     "orders",
     "kv",
+    "backtest_runs",
     "get_db",
     "reset_db",
 ]
\ No newline at end of file
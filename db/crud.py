@@ -23,6 +23,7 @@ transactional / relational data stays in proper tables:
   SessionCRUD          → trade_sessions table
   OrderCRUD            → orders table
   KVCRUD               → app_kv table  (generic)
+  BacktestRunCRUD      → backtest_runs (+ backtest_trades, backtest_equity)
 
 Every CRUD class keeps the same public interface it had before — all callers
 (BrokerageSetting, DailyTradeSetting, TradingModeSetting, broker files, etc.)
@@ -632,6 +633,18 @@ class SessionCRUD:
         rows = db.fetchall(f"SELECT * FROM {self.TABLE} ORDER BY started_at DESC LIMIT ?", (limit,))
         return [_row_to_dict(r) for r in rows]
 
+    def list_between(self, start: str, end: str, derivative: str = None,
+                     db: DatabaseConnector = None) -> List[Dict[str, Any]]:
+        """Sessions started on dates start..end (YYYY-MM-DD, inclusive), oldest first."""
+        db = db or get_db()
+        sql = f"SELECT * FROM {self.TABLE} WHERE DATE(started_at) BETWEEN ? AND ?"
+        params: list = [start, end]
+        if derivative:
+            sql += " AND derivative=?"
+            params.append(derivative)
+        rows = db.fetchall(sql + " ORDER BY started_at", tuple(params))
+        return [_row_to_dict(r) for r in rows]
+
     def delete(self, session_id: int, db: DatabaseConnector = None) -> bool:
         db = db or get_db()
         try:
@@ -722,6 +735,19 @@ class OrderCRUD:
         rows = db.fetchall(f"SELECT * FROM {self.TABLE} WHERE session_id=? ORDER BY created_at", (session_id,))
         return [_row_to_dict(r) for r in rows]
 
+    def list_for_sessions(self, session_ids: List[int], db: DatabaseConnector = None) -> List[Dict[str, Any]]:
+        """Orders of several sessions in one query, by entry time."""
+        if not session_ids:
+            return []
+        db = db or get_db()
+        marks = ",".join("?" * len(session_ids))
+        rows = db.fetchall(
+            f"SELECT * FROM {self.TABLE} WHERE session_id IN ({marks}) "
+            "ORDER BY COALESCE(entered_at, created_at)",
+            tuple(session_ids),
+        )
+        return [_row_to_dict(r) for r in rows]
+
     def list_open(self, session_id: int = None, db: DatabaseConnector = None) -> List[Dict[str, Any]]:
         db = db or get_db()
         if session_id is not None:
@@ -973,4 +999,138 @@ class KVCRUD:
             return False
 
 
-kv = KVCRUD()
\ No newline at end of file
+kv = KVCRUD()
+
+# ══════════════════════════════════════════════════════════════════════════════
+# 12. Backtest runs  (backtest_runs + backtest_trades + backtest_equity)
+# ══════════════════════════════════════════════════════════════════════════════
+
+class BacktestRunCRUD:
+    """
+    Raw row access for persisted backtest results.
+
+    Rows are plain dicts / tuples; converting to and from BacktestResult is
+    done by backtest.backtest_results_store so this module stays free of
+    backtest imports.
+    """
+    TABLE = "backtest_runs"
+    TRADES_TABLE = "backtest_trades"
+    EQUITY_TABLE = "backtest_equity"
+
+    TRADE_COLUMNS = (
+        "trade_no", "direction", "entry_time", "exit_time", "spot_entry", "spot_exit",
+        "strike", "option_entry", "option_exit", "lots", "lot_size", "gross_pnl",
+        "slippage_cost", "brokerage", "net_pnl", "entry_source", "exit_source",
+        "exit_reason", "signal_name", "mae", "mfe",
+    )
+    # Summary columns that may be used for ORDER BY in list_runs()
+    SORTABLE = ("created_at", "total_net_pnl", "win_rate", "max_drawdown",
+                "profit_factor", "sharpe", "total_trades", "start_date")
+
+    def save(self, run: Dict[str, Any], trades: List[tuple], equity: List[tuple],
+             db: DatabaseConnector = None) -> int:
+        """
+        Insert one run with its trades and equity points in a single
+        transaction.  A run with the same cache_key is replaced.
+
+        *trades* rows follow TRADE_COLUMNS; *equity* rows are (ts, equity).
+        """
+        db = db or get_db()
+        cols = list(run.keys())
+        try:
+            with db.connection() as conn:
+                conn.execute(f"DELETE FROM {self.TABLE} WHERE cache_key=?", (run["cache_key"],))
+                cur = conn.execute(
+                    f"INSERT INTO {self.TABLE} ({', '.join(cols)}, created_at) "
+                    f"VALUES ({', '.join('?' * len(cols))}, ?)",
+                    (*[run[c] for c in cols], _NOW()),
+                )
+                run_id = cur.lastrowid
+                conn.executemany(
+                    f"INSERT INTO {self.TRADES_TABLE} (run_id, {', '.join(self.TRADE_COLUMNS)}) "
+                    f"VALUES (?, {', '.join('?' * len(self.TRADE_COLUMNS))})",
+                    ((run_id, *t) for t in trades),
+                )
+                conn.executemany(
+                    f"INSERT INTO {self.EQUITY_TABLE} (run_id, seq, ts, equity) VALUES (?, ?, ?, ?)",
+                    ((run_id, i, ts, eq) for i, (ts, eq) in enumerate(equity)),
+                )
+            return run_id
+        except Exception as e:
+            logger.error(f"[BacktestRunCRUD.save] {e}", exc_info=True)
+            return -1
+
+    def get(self, run_id: int, db: DatabaseConnector = None) -> Optional[Dict[str, Any]]:
+        db = db or get_db()
+        row = db.fetchone(f"SELECT * FROM {self.TABLE} WHERE id=?", (run_id,))
+        return _row_to_dict(row) or None
+
+    def get_by_cache_key(self, cache_key: str, db: DatabaseConnector = None) -> Optional[Dict[str, Any]]:
+        db = db or get_db()
+        row = db.fetchone(f"SELECT * FROM {self.TABLE} WHERE cache_key=?", (cache_key,))
+        return _row_to_dict(row) or None
+
+    def list_runs(self, strategy_slug: str = None, strategy_hash: str = None,
+                  derivative: str = None, start_date: str = None, end_date: str = None,
+                  order_by: str = "created_at", descending: bool = True, limit: int = 200,
+                  db: DatabaseConnector = None) -> List[Dict[str, Any]]:
+        """
+        Summary rows only (no config / metrics JSON, no trades or equity).
+
+        *start_date* / *end_date* ("YYYY-MM-DD") select runs whose tested
+        range overlaps the given window.
+        """
+        db = db or get_db()
+        if order_by not in self.SORTABLE:
+            order_by = "created_at"
+        where, params = [], []
+        for col, val in (("strategy_slug", strategy_slug), ("strategy_hash", strategy_hash),
+                         ("derivative", derivative)):
+            if val is not None:
+                where.append(f"{col}=?")
+                params.append(val)
+        if start_date:
+            where.append("end_date>=?")
+            params.append(start_date)
+        if end_date:
+            where.append("start_date<=?")
+            params.append(end_date)
+        sql = (f"SELECT id, cache_key, created_at, strategy_slug, strategy_hash, data_fingerprint, "
+               f"derivative, start_date, end_date, interval_minutes, total_trades, total_net_pnl, "
+               f"win_rate, max_drawdown, profit_factor, sharpe, notes FROM {self.TABLE}")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'} LIMIT ?"
+        params.append(limit)
+        return [_row_to_dict(r) for r in db.fetchall(sql, tuple(params))]
+
+    def get_trades(self, run_id: int, db: DatabaseConnector = None) -> List[Dict[str, Any]]:
+        db = db or get_db()
+        rows = db.fetchall(f"SELECT * FROM {self.TRADES_TABLE} WHERE run_id=? ORDER BY trade_no", (run_id,))
+        return [_row_to_dict(r) for r in rows]
+
+    def get_equity(self, run_id: int, db: DatabaseConnector = None) -> List[tuple]:
+        db = db or get_db()
+        rows = db.fetchall(f"SELECT ts, equity FROM {self.EQUITY_TABLE} WHERE run_id=? ORDER BY seq", (run_id,))
+        return [(r["ts"], r["equity"]) for r in rows]
+
+    def set_notes(self, run_id: int, notes: str, db: DatabaseConnector = None) -> bool:
+        db = db or get_db()
+        try:
+            db.execute(f"UPDATE {self.TABLE} SET notes=? WHERE id=?", (notes, run_id))
+            return True
+        except Exception as e:
+            logger.error(f"[BacktestRunCRUD.set_notes] {e}", exc_info=True)
+            return False
+
+    def delete(self, run_id: int, db: DatabaseConnector = None) -> bool:
+        db = db or get_db()
+        try:
+            db.execute(f"DELETE FROM {self.TABLE} WHERE id=?", (run_id,))
+            return True
+        except Exception as e:
+            logger.error(f"[BacktestRunCRUD.delete] {e}", exc_info=True)
+            return False
+
+
+backtest_runs = BacktestRunCRUD()
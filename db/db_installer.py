@@ -46,6 +46,8 @@ The following tables were removed and their data moved to app_kv:
   daily_pnl       — daily P&L cache
   ws_stats        — WebSocket monitoring
   app_kv          — generic key-value store
+  backtest_runs   — persisted backtest results (+ backtest_trades,
+                    backtest_equity child tables)
 
 Usage
 ──────────────────────────────────────────────────────────
@@ -185,6 +187,73 @@ CREATE TABLE IF NOT EXISTS ws_stats (
     reconnects_count  INTEGER NOT NULL DEFAULT 0,
     created_at        TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%S', 'now'))
 );
+
+-- ============================================================
+-- 7. Backtest runs  (persisted results — one row per run)
+--    cache_key = hash(config + strategy_hash + data_fingerprint);
+--    an identical run is served from here instead of replayed.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS backtest_runs (
+    id               INTEGER PRIMARY KEY AUTOINCREMENT,
+    cache_key        TEXT    NOT NULL UNIQUE,
+    created_at       TEXT    NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%S', 'now')),
+    strategy_slug    TEXT,
+    strategy_hash    TEXT    NOT NULL,
+    data_fingerprint TEXT    NOT NULL,
+    derivative       TEXT,
+    start_date       TEXT,
+    end_date         TEXT,
+    interval_minutes INTEGER,
+    total_trades     INTEGER NOT NULL DEFAULT 0,
+    total_net_pnl    REAL,
+    win_rate         REAL,
+    max_drawdown     REAL,
+    profit_factor    REAL,
+    sharpe           REAL,
+    config           TEXT    NOT NULL DEFAULT '{}',
+    metrics          TEXT    NOT NULL DEFAULT '{}',
+    notes            TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_bt_runs_strategy ON backtest_runs(strategy_hash, created_at);
+CREATE INDEX IF NOT EXISTS idx_bt_runs_slug     ON backtest_runs(strategy_slug, created_at);
+CREATE INDEX IF NOT EXISTS idx_bt_runs_range    ON backtest_runs(derivative, start_date, end_date);
+CREATE INDEX IF NOT EXISTS idx_bt_runs_pnl      ON backtest_runs(total_net_pnl);
+CREATE INDEX IF NOT EXISTS idx_bt_runs_sharpe   ON backtest_runs(sharpe);
+
+CREATE TABLE IF NOT EXISTS backtest_trades (
+    run_id        INTEGER NOT NULL REFERENCES backtest_runs(id) ON DELETE CASCADE,
+    trade_no      INTEGER NOT NULL,
+    direction     TEXT,
+    entry_time    TEXT,
+    exit_time     TEXT,
+    spot_entry    REAL,
+    spot_exit     REAL,
+    strike        INTEGER,
+    option_entry  REAL,
+    option_exit   REAL,
+    lots          INTEGER,
+    lot_size      INTEGER,
+    gross_pnl     REAL,
+    slippage_cost REAL,
+    brokerage     REAL,
+    net_pnl       REAL,
+    entry_source  TEXT,
+    exit_source   TEXT,
+    exit_reason   TEXT,
+    signal_name   TEXT,
+    mae           REAL,
+    mfe           REAL,
+    PRIMARY KEY (run_id, trade_no)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS backtest_equity (
+    run_id  INTEGER NOT NULL REFERENCES backtest_runs(id) ON DELETE CASCADE,
+    seq     INTEGER NOT NULL,
+    ts      TEXT    NOT NULL,
+    equity  REAL    NOT NULL,
+    PRIMARY KEY (run_id, seq)
+) WITHOUT ROWID;
 """
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -357,6 +426,19 @@ EXPECTED_TABLES: Dict[str, List[str]] = {
         "id", "session_id", "connected_at", "disconnected_at",
         "messages_received", "errors_count", "reconnects_count", "created_at",
     ],
+    "backtest_runs": [
+        "id", "cache_key", "created_at", "strategy_slug", "strategy_hash",
+        "data_fingerprint", "derivative", "start_date", "end_date",
+        "interval_minutes", "total_trades", "total_net_pnl", "win_rate",
+        "max_drawdown", "profit_factor", "sharpe", "config", "metrics", "notes",
+    ],
+    "backtest_trades": [
+        "run_id", "trade_no", "direction", "entry_time", "exit_time",
+        "spot_entry", "spot_exit", "strike", "option_entry", "option_exit",
+        "lots", "lot_size", "gross_pnl", "slippage_cost", "brokerage", "net_pnl",
+        "entry_source", "exit_source", "exit_reason", "signal_name", "mae", "mfe",
+    ],
+    "backtest_equity": ["run_id", "seq", "ts", "equity"],
 }
 
 
@@ -535,6 +617,9 @@ class DatabaseInstaller:
             "confirmed_at":    "TEXT",
             "cancelled_at":    "TEXT",
             "reason_to_exit":  "TEXT",
+            # backtest_trades columns
+            "mae":             "REAL",
+            "mfe":             "REAL",
         }
 
         for table, expected_cols in EXPECTED_TABLES.items():
@@ -668,9 +668,11 @@ class AppStatusBar(QFrame):
                 if (
                     safe_hasattr(self, "trading_app")
                     and self.trading_app
-                    and safe_hasattr(self.trading_app, "_tick_queue")
+                    and safe_hasattr(self.trading_app, "_tick_mailbox")
+                    and self.trading_app._tick_mailbox is not None
                 ):
-                    qsz = self.trading_app._tick_queue.qsize()
+                    # Symbols with a tick waiting for stage 2
+                    qsz = len(self.trading_app._tick_mailbox)
                     col = c.RED if qsz > 100 else (c.YELLOW if qsz > 50 else c.TEXT_DIM)
                     self._que.set_value(str(qsz), col)
             except Exception:
@@ -891,6 +891,11 @@ class StatsWidget(QWidget, ThemedMixin):
         self._create_metric_row(ind_grid, 0, "PCR:", "current_pcr")
         self._create_metric_row(ind_grid, 1, "PCR Vol:", "current_pcr_vol")
         self._create_metric_row(ind_grid, 2, "Trend:", "market_trend")
+        self._create_metric_row(ind_grid, 3, "ATM IV:", "chain_atm_iv")
+        self._create_metric_row(ind_grid, 4, "IV Skew:", "chain_iv_skew")
+        self._create_metric_row(ind_grid, 5, "Max Pain:", "chain_max_pain")
+        self._create_metric_row(ind_grid, 6, "OI Chg CE:", "chain_ce_oi_change")
+        self._create_metric_row(ind_grid, 7, "OI Chg PE:", "chain_pe_oi_change")
 
         ind_layout.addLayout(ind_grid)
         cards_layout.addWidget(ind_card)
@@ -1540,6 +1545,21 @@ class StatsWidget(QWidget, ThemedMixin):
             pcr_vol = snap.get('current_pcr_vol')
             self._update_label("current_pcr_vol", f"{pcr_vol:.3f}" if pcr_vol else "--")
 
+            chain = snap.get('chain_metrics') or {}
+            atm_iv = chain.get('atm_iv')
+            self._update_label("chain_atm_iv", f"{atm_iv * 100:.2f}%" if atm_iv is not None else "--")
+            skew = chain.get('iv_skew')
+            self._update_label("chain_iv_skew", f"{skew * 100:+.2f}%" if skew is not None else "--")
+            max_pain = chain.get('max_pain')
+            self._update_label("chain_max_pain", f"{max_pain:.0f}" if max_pain is not None else "--")
+            for side in ("ce", "pe"):
+                oi_chg = chain.get(f'{side}_oi_change')
+                if oi_chg is None:
+                    self._update_label(f"chain_{side}_oi_change", "--")
+                else:
+                    self._update_label(f"chain_{side}_oi_change", f"{oi_chg:+,.0f}",
+                                       "positive" if oi_chg > 0 else "negative" if oi_chg < 0 else "value")
+
             trend = snap.get('market_trend')
             if trend == 1:
                 self._update_label("market_trend", "▲ BULL", "positive")
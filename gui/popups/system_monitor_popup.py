@@ -17,6 +17,8 @@ from gui.dialog_base import ThemedDialog, ThemedMixin, ModernCard, make_separato
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QGroupBox, QGridLayout, QProgressBar, QTabWidget, QFrame, QWidget, QScrollArea
 from PyQt5.QtGui import QFont
 
+from Utils.event_tracer import tracer
+from Utils.latency import STAGES, tick_latency
 from Utils.safe_getattr import safe_hasattr
 # Import state manager
 from data.trade_state_manager import state_manager
@@ -260,6 +262,12 @@ class SystemMonitorPopup(ThemedDialog):
         self.net_packets_recv = None
         self.conn_list = None
 
+        # Latency tab widgets: {stage: {column: ValueLabel}}
+        self.latency_labels = {}
+        self.latency_dump_btn = None
+        self.latency_dump_path = None
+        self.trace_dump_btn = None
+
         # Cache
         self._last_snapshot = {}
         self._last_snapshot_time = None
@@ -572,6 +580,10 @@ class SystemMonitorPopup(ThemedDialog):
         network_tab = self._create_network_tab()
         tabs.addTab(network_tab, "🌐 Network")
 
+        # Tab 4: Tick-to-decision latency histograms (scrollable)
+        latency_tab = self._create_latency_tab()
+        tabs.addTab(latency_tab, "⏱ Latency")
+
         return tabs
 
     def _create_system_tab(self):
@@ -901,6 +913,55 @@ class SystemMonitorPopup(ThemedDialog):
         scrollable.add_stretch()
         return scrollable
 
+    def _create_latency_tab(self):
+        """Create tick-to-decision latency tab (Utils.latency histograms)"""
+        scrollable = ScrollableTabWidget()
+
+        lat_card = ModernCard()
+        lat_layout = QVBoxLayout(lat_card)
+        lat_layout.setSpacing(self._sp.GAP_MD)
+
+        lat_header = QLabel(f"⏱ Tick → Decision (µs since WS receive, last {tick_latency.window_s:.0f}s)")
+        lat_header.setStyleSheet(f"color: {self._c.BLUE}; font-size: {self._ty.SIZE_MD}pt; font-weight: {self._ty.WEIGHT_BOLD};")
+        lat_layout.addWidget(lat_header)
+
+        lat_grid = QGridLayout()
+        lat_grid.setVerticalSpacing(self._sp.GAP_SM)
+        lat_grid.setHorizontalSpacing(self._sp.GAP_MD)
+
+        columns = ("p50", "p90", "p99", "max", "count")
+        lat_grid.addWidget(QLabel("Stage"), 0, 0)
+        for col, name in enumerate(columns, start=1):
+            lat_grid.addWidget(QLabel(name), 0, col, alignment=Qt.AlignRight)
+
+        for row, stage in enumerate(STAGES, start=1):
+            lat_grid.addWidget(QLabel(stage.replace("_", " ").title() + ":"), row, 0)
+            self.latency_labels[stage] = {}
+            for col, name in enumerate(columns, start=1):
+                label = ValueLabel("-")
+                lat_grid.addWidget(label, row, col)
+                self.latency_labels[stage][name] = label
+
+        lat_layout.addLayout(lat_grid)
+
+        dump_row = QHBoxLayout()
+        self.latency_dump_btn = self._create_modern_button("Dump to File", primary=False, icon="💾")
+        self.latency_dump_btn.clicked.connect(self._dump_latency)
+        self.latency_dump_path = QLabel("")
+        self.latency_dump_path.setWordWrap(True)
+        self.latency_dump_path.setStyleSheet(f"color: {self._c.TEXT_DIM};")
+        self.trace_dump_btn = self._create_modern_button("Dump Event Trace", primary=False, icon="🧾")
+        self.trace_dump_btn.clicked.connect(self._dump_trace)
+        dump_row.addWidget(self.latency_dump_btn)
+        dump_row.addWidget(self.trace_dump_btn)
+        dump_row.addWidget(self.latency_dump_path, 1)
+        lat_layout.addLayout(dump_row)
+
+        scrollable.add_widget(lat_card)
+
+        scrollable.add_stretch()
+        return scrollable
+
     def _init_timer(self):
         """Initialize refresh timer"""
         self.timer = QTimer(self)
@@ -1011,6 +1072,7 @@ class SystemMonitorPopup(ThemedDialog):
             self._refresh_system_metrics()
             self._refresh_app_metrics()
             self._refresh_network_metrics()
+            self._refresh_latency_metrics()
 
             # Update progress bar colors based on new values
             self._update_progress_bar_colors()
@@ -1154,8 +1216,8 @@ class SystemMonitorPopup(ThemedDialog):
             # Trading stats from state_manager
             if self.trading_app:
                 # Queue size (still from trading_app)
-                if safe_hasattr(self.trading_app, '_tick_queue'):
-                    self.trading_queue_size.setText(str(self.trading_app._tick_queue.qsize()))
+                if safe_hasattr(self.trading_app, '_tick_mailbox') and self.trading_app._tick_mailbox is not None:
+                    self.trading_queue_size.setText(str(len(self.trading_app._tick_mailbox)))
 
                 # Symbols from snapshot
                 symbols = snapshot.get('all_symbols', [])
@@ -1271,6 +1333,37 @@ class SystemMonitorPopup(ThemedDialog):
         except Exception as e:
             logger.error(f"[SystemMonitorPopup._refresh_network_metrics] Failed: {e}")
 
+    def _refresh_latency_metrics(self):
+        """Refresh tick-to-decision latency histograms"""
+        try:
+            for stage, stats in tick_latency.stats().items():
+                labels = self.latency_labels.get(stage)
+                if not labels:
+                    continue
+                for name, label in labels.items():
+                    value = stats.get(name, 0)
+                    label.setText(str(value) if name == "count" else (f"{value:,.1f}" if stats.get("count") else "-"))
+        except Exception as e:
+            logger.error(f"[SystemMonitorPopup._refresh_latency_metrics] Failed: {e}")
+
+    def _dump_latency(self):
+        """Write the latency histograms to Data/latency/"""
+        try:
+            path = tick_latency.dump()
+            if self.latency_dump_path:
+                self.latency_dump_path.setText(path or "Dump failed - see logs")
+        except Exception as e:
+            logger.error(f"[SystemMonitorPopup._dump_latency] Failed: {e}")
+
+    def _dump_trace(self):
+        """Write the last minute of pipeline events to Data/traces/ (see Utils.trace_viewer)"""
+        try:
+            path = tracer.dump(reason="manual")
+            if self.latency_dump_path:
+                self.latency_dump_path.setText(path or "Dump failed - see logs")
+        except Exception as e:
+            logger.error(f"[SystemMonitorPopup._dump_trace] Failed: {e}")
+
     def closeEvent(self, event):
         """Handle close event - Rule 7"""
         try:
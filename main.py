@@ -5,6 +5,7 @@ FIXED: Added global exception handler for uncaught exceptions.
 """
 
 import logging.handlers
+import multiprocessing
 import os
 import sys
 import threading
@@ -865,6 +866,8 @@ def get_session_id() -> Optional[int]:
 
 
 if __name__ == "__main__":
+    # Backtest analysis workers are spawned processes; needed in the frozen build.
+    multiprocessing.freeze_support()
     try:
         sys.exit(main())
     except Exception as e:
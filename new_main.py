@@ -7,12 +7,12 @@ REFACTORED: Thread-safe, snapshot-based processing, proper error handling.
 import concurrent.futures
 import logging
 import logging.handlers
-import queue
 import threading
 import time
 import random
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Optional, Any, Dict, List
+from typing import Optional, Any, Dict, List, Set
 from threading import Timer
 
 import pandas as pd
@@ -20,12 +20,21 @@ import pandas as pd
 import BaseEnums
 from Utils.OptionUtils import OptionUtils
 from Utils.Utils import Utils
+from Utils.event_tracer import (EV_BAR_FLUSHED, EV_FETCH_DONE, EV_FETCH_START, EV_GATE_BLOCKED,
+                                EV_GATE_PASSED, EV_SIGNAL, EV_STAGE2_BATCH, tracer)
+from Utils.latency import (STAGE_DECISION, STAGE_DEQUEUE, STAGE_MARKET_STATE,
+                           tick_latency)
 from Utils.notifier import Notifier
 from Utils.safe_getattr import safe_getattr, safe_hasattr
+from Utils.symbol_router import symbol_ids
 from Utils.time_utils import ist_now
 from broker.BaseBroker import TokenExpiredError
 from broker.BrokerFactory import BrokerFactory
 from data.candle_store_manager import candle_store_manager
+from data.chain_analytics import ChainAnalytics
+from data.chain_recenter import ChainRecenter
+from data.tick_mailbox import TickMailbox
+from data.async_websocket_manager import AsyncWebSocketManager
 from data.websocket_manager import WebSocketManager
 from gui.daily_trade.DailyTradeSetting import DailyTradeSetting
 from gui.profit_loss.ProfitStoplossSetting import ProfitStoplossSetting
@@ -67,7 +76,8 @@ class TradingApp:
             self.trading_mode_setting = trading_mode_var
             self._broker_setting = broker_setting  # stored for initialize()
 
-            self._tick_queue = queue.Queue(maxsize=500)
+            # Latest tick per symbol id; one wake-up per batch for stage 2
+            self._tick_mailbox = TickMailbox()
             self._stage2_thread = threading.Thread(
                 target=self._stage2_worker,
                 daemon=True,
@@ -86,6 +96,14 @@ class TradingApp:
             # Number of ITM and OTM strikes to subscribe on each side of ATM
             self._chain_itm = 2
             self._chain_otm = 2
+            # Moves that window with spot (hysteresis band, delta resubscription)
+            self._chain_recenter = ChainRecenter()
+            # ATM legs switched in by a re-centre; entries on them wait for
+            # live bars in their CandleStore (see _leg_warm)
+            self._warming_legs: Set[str] = set()
+            self._leg_warmup_bars = 1
+            # PCR / IV / Greeks / max pain over that window (stage 2, ≤ 1 Hz)
+            self._chain_analytics = ChainAnalytics()
 
             # Add should_stop flag and event for graceful shutdown
             self.should_stop = False
@@ -130,11 +148,15 @@ class TradingApp:
         self._fetch_executor = None
         self._fetch_lock = threading.Lock()
         self._fetch_in_progress: bool = False
-        self._tick_queue = None
+        self._tick_mailbox = None
         self._stage2_thread = None
         self._option_chain_lock = None
         self._chain_itm = 5
         self._chain_otm = 5
+        self._chain_recenter = None
+        self._warming_legs = set()
+        self._leg_warmup_bars = 1
+        self._chain_analytics = None
         self.trading_mode_setting = None  # TradingModeSetting — holds paper/live/backtest flag
         self.should_stop = False
         self._stop_event = threading.Event()
@@ -235,7 +257,10 @@ class TradingApp:
             # Initialize candle store manager with broker
             candle_store_manager.initialize(self.broker)
 
-            self.ws = WebSocketManager(
+            # "ws_transport": "asyncio" runs connect / heartbeat / reconnect on one event loop
+            ws_transport = self.config.get('ws_transport', 'threads') if self.config else 'threads'
+            ws_cls = AsyncWebSocketManager if ws_transport == 'asyncio' else WebSocketManager
+            self.ws = ws_cls(
                 broker=self.broker,
                 on_message_callback=self.on_message,
                 symbols=state_manager.get_state().all_symbols or [],
@@ -766,6 +791,8 @@ class TradingApp:
                                 full_sym, {"ltp": None, "ask": None, "bid": None}
                             )
                     state.option_chain = new_chain
+            if self._chain_recenter is not None:
+                self._chain_recenter.reset(derivative, spot)
 
             logger.info(
                 f"[subscribe_market_data] Chain built: {len(call_chain)} CE + {len(put_chain)} PE "
@@ -884,11 +911,178 @@ class TradingApp:
             logger.error(f"[ensure_symbol_subscribed] Unexpected error: {e}", exc_info=True)
             return False
 
+    def _schedule_chain_recenter(self, centre: float) -> None:
+        """Hand a chain re-centre to the fetch executor (one in flight at a time)."""
+        if self._backtest_mode or self._fetch_executor is None or not self._chain_recenter.begin():
+            return
+        try:
+            self._fetch_executor.submit(self._recenter_chain, centre)
+        except Exception as e:
+            logger.error(f"[_schedule_chain_recenter] Submit failed: {e}", exc_info=True)
+            self._chain_recenter.finish()
+
+    def _recenter_chain(self, centre: float) -> None:
+        """
+        Move the subscribed chain window to *centre* with a delta resubscription.
+
+        Only the strikes entering the window are subscribed — before the ones
+        leaving it are unsubscribed, so no retained strike sees a tick gap —
+        and retained chain entries keep their quotes.  The ATM legs follow the
+        window only while flat with no order pending; the current legs stay
+        subscribed until that is re-checked under the state batch, and are
+        dropped only once they have actually been replaced.  A switched-in
+        leg's CandleStore starts empty, so entries on it wait in _leg_warm()
+        until it has live bars.  If the incremental
+        subscribe fails the whole list is resubscribed, as
+        ensure_symbol_subscribed() does.
+        """
+        moved_to = None
+        try:
+            state = state_manager.get_state()
+            derivative = state.derivative
+            if not derivative or self.broker is None or self.should_stop:
+                return
+            old_centre = self._chain_recenter.centre
+
+            new_chain: List[str] = []
+            for option_type in ("CE", "PE"):
+                for sym in self.broker.build_option_chain(
+                        underlying=derivative, spot_price=centre,
+                        option_type=option_type, weeks_offset=state.expiry,
+                        itm=self._chain_itm, otm=self._chain_otm):
+                    full_sym = self.symbol_full(sym)
+                    if full_sym:
+                        new_chain.append(full_sym)
+            if not new_chain:
+                logger.warning(f"[_recenter_chain] Empty chain at {centre}; keeping the current window")
+                return
+
+            call_option, put_option = state.call_option, state.put_option
+            legs_follow = not state.current_position and not state.order_pending
+            if legs_follow:
+                call_option = self.broker.build_option_symbol(
+                    underlying=derivative, spot_price=centre, option_type="CE",
+                    weeks_offset=state.expiry, lookback_strikes=state.call_lookback) or call_option
+                put_option = self.broker.build_option_symbol(
+                    underlying=derivative, spot_price=centre, option_type="PE",
+                    weeks_offset=state.expiry, lookback_strikes=state.put_lookback) or put_option
+            # The current legs are kept even when they should follow: an entry can
+            # start before step 3 re-checks the flat condition and keep them live
+            old_legs = [self.symbol_full(s) for s in (state.call_option, state.put_option) if s]
+            keep = old_legs + [self.symbol_full(s) for s in (call_option, put_option) if s]
+
+            old_symbols = list(state.all_symbols or [])
+            new_symbols = list(dict.fromkeys(filter(None, [self.symbol_full(derivative), *new_chain])))
+            added, dropped = self._chain_recenter.delta(old_symbols, new_symbols, keep)
+
+            # ── 1. Register and subscribe the entering strikes ────────────────
+            with self._option_chain_lock:
+                chain = dict(state.option_chain or {})
+                for sym in new_chain:
+                    if sym not in chain:
+                        chain[sym] = {"ltp": None, "ask": None, "bid": None}
+                state.option_chain = chain
+            transition = old_symbols + added
+            state.all_symbols = transition
+
+            connected = self.ws is not None and self.ws.is_connected() and self.ws._ws_obj is not None
+            if self.ws:
+                self.ws.symbols = transition
+            if added and connected:
+                try:
+                    self.broker.ws_subscribe(self.ws._ws_obj, added)
+                except Exception as e:
+                    logger.warning(f"[_recenter_chain] Incremental subscribe failed ({e}); resubscribing all")
+                    self.ws.subscribe(transition)
+
+            # ── 2. Drop the leaving strikes ───────────────────────────────────
+            final = self._drop_chain_symbols(state, transition, dropped, connected)
+
+            # ── 3. ATM legs follow the window while flat ──────────────────────
+            switched = False
+            if legs_follow:
+                with state.batch():
+                    if not state.current_position and not state.order_pending:
+                        switched = True
+                        # Seed the leg price from the chain (ask while flat); None makes the
+                        # executor fetch a live price until the leg's first tick arrives
+                        chain = state.option_chain or {}
+                        # The new leg's CandleStore holds only live ticks, so it starts
+                        # empty: entries on it are blocked until it has warmed up
+                        if call_option != state.call_option:
+                            quote = chain.get(self.symbol_full(call_option)) or {}
+                            self._warming_legs.discard(state.call_option)
+                            self._warming_legs.add(call_option)
+                            state.call_option = call_option
+                            state.call_current_close = quote.get("ask") or quote.get("ltp")
+                        if put_option != state.put_option:
+                            quote = chain.get(self.symbol_full(put_option)) or {}
+                            self._warming_legs.discard(state.put_option)
+                            self._warming_legs.add(put_option)
+                            state.put_option = put_option
+                            state.put_current_close = quote.get("ask") or quote.get("ltp")
+
+            # ── 4. Drop the replaced legs once they are no longer traded ──────
+            if switched:
+                live = set(new_symbols) | {self.symbol_full(s) for s in (state.call_option, state.put_option) if s}
+                stale = [s for s in dict.fromkeys(old_legs) if s and s not in live]
+                final = self._drop_chain_symbols(state, final, stale, connected)
+                dropped += stale
+
+            moved_to = centre
+            logger.info(
+                f"[_recenter_chain] Window {old_centre} → {centre}: +{len(added)} / -{len(dropped)} "
+                f"symbols, {len(final) - len(added)} kept | ATM CE: {state.call_option} | ATM PE: {state.put_option}"
+            )
+
+        except Exception as e:
+            logger.error(f"[_recenter_chain] Failed: {e}", exc_info=True)
+        finally:
+            self._chain_recenter.finish(moved_to)
+
+    def _leg_warm(self, option: Optional[str]) -> bool:
+        """
+        False while *option* is an ATM leg switched in by a chain re-centre
+        and its CandleStore has fewer than _leg_warmup_bars live 1-min bars;
+        the entry price would otherwise come from a chain quote, not a tick.
+        """
+        if option not in self._warming_legs:
+            return True
+        bars = candle_store_manager.bar_count(option)
+        if bars < self._leg_warmup_bars:
+            logger.info(f"[Recenter] {option} warming up ({bars}/{self._leg_warmup_bars} bars) — blocking entry")
+            return False
+        self._warming_legs.discard(option)
+        return True
+
+    def _drop_chain_symbols(self, state, symbols: List[str], dropped: List[str],
+                            connected: bool) -> List[str]:
+        """Unsubscribe *dropped*, remove them from the chain and return the rest of *symbols*."""
+        if not dropped:
+            return symbols
+        if connected:
+            try:
+                self.broker.ws_unsubscribe(self.ws._ws_obj, dropped)
+            except Exception as e:
+                # Extra ticks for dropped strikes are ignored by routing
+                logger.warning(f"[_recenter_chain] Unsubscribe failed (continuing): {e}")
+        dropped_set = set(dropped)
+        final = [s for s in symbols if s not in dropped_set]
+        with self._option_chain_lock:
+            chain = dict(state.option_chain or {})
+            for sym in dropped:
+                chain.pop(sym, None)
+            state.option_chain = chain
+        state.all_symbols = final
+        if self.ws:
+            self.ws.symbols = final
+        return final
+
     def on_message(self, message: dict) -> None:
         """
         Two-stage message processing:
         Stage 1 (fast): Update market state immediately on WS thread
-        Stage 2 (slow): Push to queue for background processing
+        Stage 2 (slow): Post to the conflating mailbox for background processing
         """
         try:
             # Rule 6: Input validation
@@ -919,7 +1113,10 @@ class TradingApp:
             if not self._validate_tick(symbol, ltp, sequence):
                 return
 
-            self.update_market_state(symbol, ltp, ask_price, bid_price, volume, sequence)
+            self.update_market_state(symbol, ltp, ask_price, bid_price, volume, sequence,
+                                     oi=message.get("oi"), day_volume=message.get("volume"))
+            recv_ns = message.get("recv_ns")
+            tick_latency.record(STAGE_MARKET_STATE, recv_ns)
 
             # BUG-A fix: Record tick heartbeat timestamp for connection monitoring
             self._last_tick_received = ist_now()
@@ -934,15 +1131,13 @@ class TradingApp:
                 except Exception:
                     pass  # Never let GUI callback crash the WS thread
 
-            # Push to queue for Stage 2 processing (non-blocking)
-            try:
-                self._tick_queue.put_nowait('tick')
-            except queue.Full:
-                # Queue is bounded - if full, we drop the tick (oldest will be processed)
-                logger.debug("Tick queue full, dropping tick")
+            # Post for Stage 2 processing (non-blocking). The mailbox keeps only
+            # the latest tick per symbol, so bursts are conflated, never dropped.
+            self._tick_mailbox.post(symbol_ids.intern(symbol), (ltp, ask_price, bid_price, volume, recv_ns))
 
         except Exception as e:
             logger.error(f"Exception in on_message stage 1: {e!r}, Message: {message}", exc_info=True)
+            tracer.dump_on_error("stage1")
 
     def _validate_tick(self, symbol: str, ltp: float, sequence: Optional[int] = None) -> bool:
         """
@@ -973,7 +1168,7 @@ class TradingApp:
 
             # Price sanity check (can't move >20% in one tick)
             state = state_manager.get_state()
-            if OptionUtils.symbols_match(symbol, self.symbol_full(state.derivative)):
+            if symbol_ids.same(symbol, self.symbol_full(state.derivative)):
                 last_price = state.derivative_current_price
                 if last_price > 0 and abs(ltp - last_price) / last_price > 0.2:
                     logger.warning(f"Price spike detected: {last_price:.2f} -> {ltp:.2f}")
@@ -1001,31 +1196,25 @@ class TradingApp:
                 if self._backtest_mode:
                     time.sleep(0.5)  # Backtest mode - process slower
 
-                # Wait for a tick with timeout (allows checking should_stop)
-                tick_received = False
-                try:
-                    self._tick_queue.get(timeout=1.0)
-                    tick_received = True
-                    empty_tick_count = 0  # Reset counter on successful tick
-                except queue.Empty:
+                # Wait for ticks with timeout (allows checking should_stop). The
+                # batch holds the latest tick of every symbol that moved since the
+                # last cycle; everything arriving meanwhile lands in the next one.
+                batch = self._tick_mailbox.take(timeout=1.0)
+                if batch is None:
+                    if self.should_stop:
+                        break
                     empty_tick_count += 1
 
                     # If market is closed and we're getting no ticks, slow down polling
                     if not self._backtest_mode and not self._check_market_status() and empty_tick_count > max_empty_ticks:
                         time.sleep(5.0)  # Sleep longer when market closed and no data
                     continue
+                empty_tick_count = 0  # Reset counter on successful tick
+                tracer.emit(EV_STAGE2_BATCH, len(batch))
 
-                # Drain any queued ticks - process only the latest state once
-                drained = 0
-                while not self._tick_queue.empty():
-                    try:
-                        self._tick_queue.get_nowait()
-                        drained += 1
-                    except queue.Empty:
-                        break
-
-                if drained > 0:
-                    logger.debug(f"Drained {drained} queued ticks")
+                # Latency is measured from the oldest tick still in the batch
+                recv_ns = min((u[4] for u in batch.values() if u[4]), default=None)
+                tick_latency.record(STAGE_DEQUEUE, recv_ns)
 
                 # Skip processing if market is closed and we're not in backtest
                 if not self._backtest_mode and not self._check_market_status():
@@ -1035,12 +1224,18 @@ class TradingApp:
                 # FIX: Take a snapshot BEFORE any processing - this is the ONLY lock acquisition
                 snapshot = state_manager.get_position_snapshot()
 
-                # Process using snapshot (no locks needed)
-                self._process_snapshot_stage2(snapshot)
+                # Process using snapshot (no locks needed); orders placed from
+                # here are timed against the batch's receive stamp.
+                tick_latency.begin(recv_ns)
+                try:
+                    self._process_snapshot_stage2(snapshot)
+                finally:
+                    tick_latency.end()
+
+                # Chain analytics after the decision, outside its latency window
+                if self._chain_analytics is not None and self._chain_analytics.due():
+                    self._update_chain_analytics()
 
-            except queue.Empty:
-                # Timeout - just continue loop
-                continue
             except TokenExpiredError:
                 logger.critical("Token expired in stage 2 worker")
                 self._token_expired_error = TokenExpiredError("Token expired")
@@ -1049,11 +1244,33 @@ class TradingApp:
                 break
             except Exception as e:
                 logger.error(f"Stage2Worker error: {e}", exc_info=True)
+                tracer.dump_on_error("stage2")
                 # Brief pause to avoid tight error loop
                 time.sleep(0.1)
 
         logger.info("Stage 2 worker thread stopped")
 
+    def _update_chain_analytics(self) -> None:
+        """PCR, IV, Greeks and max pain over the live option chain, into state."""
+        try:
+            snap = state_manager.get_snapshot()
+            metrics = self._chain_analytics.update(
+                snap.option_chain, snap.get("derivative_current_price"),
+                snap.get("derivative"), snap.get("expiry") or 0,
+            )
+            if metrics is None:
+                return
+            state = state_manager.get_state()
+            with state.batch():
+                state.chain_metrics = metrics.fields()
+                if metrics.pcr_oi is not None:
+                    state.current_pcr = metrics.pcr_oi
+                if metrics.pcr_volume is not None:
+                    state.current_pcr_vol = metrics.pcr_volume
+            logger.debug(f"[_update_chain_analytics] {len(metrics.strikes)} strikes in {metrics.compute_ms:.2f} ms")
+        except Exception as e:
+            logger.error(f"[_update_chain_analytics] Failed: {e}", exc_info=True)
+
     def _process_snapshot_stage2(self, snapshot: Dict[str, Any]) -> None:
         """
         Process using a snapshot - no locks needed.
@@ -1078,6 +1295,7 @@ class TradingApp:
 
             try:
                 self.evaluate_trend_from_snapshot(snapshot)
+                tick_latency.record_since_origin(STAGE_DECISION)
             except Exception as trend_error:
                 logger.error(f"Error in evaluate_trend_and_decision: {trend_error}", exc_info=True)
 
@@ -1319,8 +1537,31 @@ class TradingApp:
             logger.error(f"[_check_reentry_allowed] {e}", exc_info=True)
             return True  # fail open — never silently block trading on an exception
 
+    @staticmethod
+    def _push_option_tick(option: str, tick_price: float, option_price: Optional[float],
+                          volume: float) -> Optional[float]:
+        """
+        Push an ATM leg tick into its CandleStore and return the store's
+        current close (the tick price if it has none).  On a store error the
+        store's last price, else the raw option price, else None.
+        """
+        try:
+            candle_store_manager.push_tick(option, tick_price, volume=volume)
+            store_price = candle_store_manager.get_store(option).get_current_close()
+            return store_price if store_price is not None else tick_price
+        except Exception as e:
+            logger.debug(f"CandleStore push/read error for {option}: {e}")
+            try:
+                recovered = candle_store_manager.get_current_price(option)
+                if recovered is not None:
+                    return recovered
+            except Exception:
+                pass
+            return option_price
+
     def update_market_state(self, symbol: str, ltp: float, ask_price: float, bid_price: float,
-                            volume: float = 0.0, sequence: Optional[int] = None) -> None:
+                            volume: float = 0.0, sequence: Optional[int] = None,
+                            oi: Optional[float] = None, day_volume: Optional[float] = None) -> None:
         """
         Single source of truth: every price in state is read back from the
         CandleStore after the tick is pushed there.  Nothing reads raw ltp
@@ -1328,9 +1569,10 @@ class TradingApp:
 
         Flow per tick
         ─────────────
-        1. Push the tick into the appropriate CandleStore.
+        1. Push the tick into the appropriate CandleStore (no lock held).
         2. Read the current close back from that store.
-        3. Write the store-sourced price into state.
+        3. Write the store-sourced price into state, in one state batch with
+           the option-chain update.
 
         For option ticks the tick price used to push is the mid/ask/bid that
         the broker supplies (same as before), but state.put/call_current_close
@@ -1340,6 +1582,9 @@ class TradingApp:
         push_tick() returns bar_completed=True when a new 1-min bar is sealed.
         We surface this via _last_bar_completed so evaluate_trend_and_decision
         knows whether to schedule a heavy (indicator) recomputation.
+
+        Chain entries also keep the contract's open interest and day volume
+        (``oi`` / ``day_volume``) for the chain analytics.
         """
         try:
             state = state_manager.get_state()
@@ -1351,145 +1596,134 @@ class TradingApp:
             full_symbol = self.symbol_full(symbol)
             logger.debug(f"Tick received - Symbol: {full_symbol}, LTP: {ltp}, Ask: {ask_price}, Bid: {bid_price}")
 
+            # The CandleStore push runs before, and outside, the state
+            # transaction: bar sealing never holds the state or chain lock.
+            # The store-sourced prices are then written in one batch (state
+            # lock taken once; the chain lock first, as in the chain rebuild).
+            # symbol_ids interns every broker spelling of an instrument to
+            # one id (same result as OptionUtils.symbols_match()), so each check
+            # below is a cached dict lookup plus an int compare.
+            tick_id = symbol_ids.intern(full_symbol)
+
             # ── Derivative (index) tick ────────────────────────────────────────
-            # Use OptionUtils.symbols_match() which normalises both sides to a
-            # canonical form, handling all broker prefix variants across Fyers,
-            # Zerodha, Upstox, Dhan, AngelOne, Shoonya, Flattrade, etc.
-            # After WebSocketManager remaps tick symbols, this will be a plain ==
-            # in the common case; symbols_match() is the safety net for any tick
-            # that bypasses the WebSocket remapping path.
-            if OptionUtils.symbols_match(full_symbol, self.symbol_full(state.derivative)):
-                derivative = state.derivative
-                if derivative:
+            derivative = state.derivative
+            if tick_id == symbol_ids.intern(self.symbol_full(derivative)):
+                if not derivative:
+                    return
+                try:
+                    bar_completed = candle_store_manager.push_tick(
+                        derivative, ltp, volume=volume
+                    )
+                    # Signal the evaluate loop that a new bar just closed
+                    if bar_completed:
+                        self._last_bar_completed = True
+                        tracer.emit(EV_BAR_FLUSHED, tick_id, ltp)
+
+                    # Read authoritative price back from the store
+                    store_price = candle_store_manager.get_store(derivative).get_current_close()
+                    spot = store_price if store_price is not None else ltp
+                except Exception as e:
+                    logger.debug(f"CandleStore push/read error for derivative: {e}")
+                    bar_completed = False
                     try:
-                        bar_completed = candle_store_manager.push_tick(
-                            derivative, ltp, volume=volume
-                        )
-                        # Signal the evaluate loop that a new bar just closed
-                        if bar_completed:
-                            self._last_bar_completed = True
-
-                        # Read authoritative price back from the store
-                        store = candle_store_manager.get_store(derivative)
-                        store_price = store.get_current_close()
-                        old_price = state.derivative_current_price
-                        state.derivative_current_price = store_price if store_price is not None else ltp
-                        logger.debug(
-                            f"✅ Derivative price (from store): {old_price} -> "
-                            f"{state.derivative_current_price}"
-                            + (" [BAR CLOSED]" if bar_completed else "")
-                        )
-                    except Exception as e:
-                        logger.debug(f"CandleStore push/read error for derivative: {e}")
-                        try:
-                            candle_store_manager.push_tick(derivative, ltp)
-                            store = candle_store_manager.get_store(derivative)
-                            state.derivative_current_price = store.get_current_close() or ltp
-                        except Exception:
-                            # Last resort only — store is completely broken
-                            state.derivative_current_price = ltp
+                        candle_store_manager.push_tick(derivative, ltp)
+                        spot = candle_store_manager.get_store(derivative).get_current_close() or ltp
+                    except Exception:
+                        # Last resort only — store is completely broken
+                        spot = ltp
+
+                old_price = state.derivative_current_price
+                state.derivative_current_price = spot
+                logger.debug(
+                    f"✅ Derivative price (from store): {old_price} -> {spot}"
+                    + (" [BAR CLOSED]" if bar_completed else "")
+                )
+
+                # Two float compares unless spot has left the chain window's band
+                if self._chain_recenter is not None:
+                    centre = self._chain_recenter.check(spot)
+                    if centre is not None:
+                        self._schedule_chain_recenter(centre)
                 return
 
-            # ── Option chain tick ──────────────────────────────────────────────
-            if self._option_chain_lock and safe_hasattr(state, "option_chain"):
-                with self._option_chain_lock:
-                    # Fast path: exact key match (works after WebSocketManager remapping)
-                    chain_key = full_symbol if full_symbol in state.option_chain else None
-                    # Fallback: broker-format mismatch — scan using symbols_match()
-                    if chain_key is None:
-                        for k in state.option_chain:
-                            if OptionUtils.symbols_match(full_symbol, k):
-                                chain_key = k
-                                break
+            # ── ATM call / put option ticks: push first ────────────────────────
+            put_option, call_option = state.put_option, state.call_option
+            use_ask = not bool(state.current_position)
+            option_price = ask_price if use_ask else bid_price
+            tick_price = option_price if option_price is not None else ltp
+
+            leg = leg_price = None
+            if put_option and tick_id == symbol_ids.intern(self.symbol_full(put_option)):
+                leg = put_option
+            elif call_option and tick_id == symbol_ids.intern(self.symbol_full(call_option)):
+                leg = call_option
+            if leg is not None:
+                leg_price = self._push_option_tick(leg, tick_price, option_price, volume)
+
+            with (self._option_chain_lock or nullcontext()), state.batch():
+                # ── Option chain tick ──────────────────────────────────────────────
+                # update_option_chain_symbol() returns False for a symbol not in the
+                # chain, so no copy of the chain is taken to test membership.
+                if self._option_chain_lock:
+                    # Exact key after WebSocketManager remapping; otherwise the
+                    # subscribed spelling from that manager's routing table
+                    # (chain keys are the subscribed symbols).
+                    quote = {"ltp": ltp, "ask": ask_price, "bid": bid_price,
+                             "oi": oi, "volume": day_volume}
+                    chain_key = full_symbol
+                    if not state.update_option_chain_symbol(chain_key, quote):
+                        chain_key = self.ws.router.subscribed(full_symbol) if self.ws else None
+                        if chain_key in (None, full_symbol) or \
+                                not state.update_option_chain_symbol(chain_key, quote):
+                            chain_key = None
                     if chain_key is not None:
-                        state.update_option_chain_symbol(chain_key, {
-                            "ltp": ltp,
-                            "ask": ask_price,
-                            "bid": bid_price,
-                        })
+                        if self._chain_analytics is not None:
+                            self._chain_analytics.record(chain_key, ltp, bid_price, ask_price,
+                                                         oi, day_volume)
                         logger.debug(f"✅ Updated option chain for {chain_key}: LTP={ltp}")
                     else:
-                        logger.debug(
-                            f"Symbol {full_symbol} not in option chain. "
-                            f"Available: {list(state.option_chain.keys())}"
-                        )
-
-            # ── ATM call / put option ticks ────────────────────────────────────
-            use_ask = not bool(state.current_position)
-            atm_put_sym = self.symbol_full(state.put_option)
-            atm_call_sym = self.symbol_full(state.call_option)
-
-            option_price = ask_price if use_ask else bid_price
-
-            if OptionUtils.symbols_match(full_symbol, atm_put_sym) and state.put_option:
-                try:
-                    tick_price = option_price if option_price is not None else ltp
-                    candle_store_manager.push_tick(state.put_option, tick_price, volume=volume)
-                    store = candle_store_manager.get_store(state.put_option)
-                    store_price = store.get_current_close()
-                    old_put = state.put_current_close
-                    state.put_current_close = store_price if store_price is not None else tick_price
-                    logger.debug(f"✅ PUT price (from store): {old_put} -> {state.put_current_close}")
-                except Exception as e:
-                    logger.debug(f"CandleStore push/read error for PUT: {e}")
-                    try:
-                        recovered = candle_store_manager.get_current_price(state.put_option)
-                        if recovered is not None:
-                            state.put_current_close = recovered
-                        elif option_price is not None:
-                            state.put_current_close = option_price
-                    except Exception:
-                        if option_price is not None:
-                            state.put_current_close = option_price
-
-            elif OptionUtils.symbols_match(full_symbol, atm_call_sym) and state.call_option:
-                try:
-                    tick_price = option_price if option_price is not None else ltp
-                    candle_store_manager.push_tick(state.call_option, tick_price, volume=volume)
-                    store = candle_store_manager.get_store(state.call_option)
-                    store_price = store.get_current_close()
-                    old_call = state.call_current_close
-                    state.call_current_close = store_price if store_price is not None else tick_price
-                    logger.debug(f"✅ CALL price (from store): {old_call} -> {state.call_current_close}")
-                except Exception as e:
-                    logger.debug(f"CandleStore push/read error for CALL: {e}")
-                    try:
-                        recovered = candle_store_manager.get_current_price(state.call_option)
-                        if recovered is not None:
-                            state.call_current_close = recovered
-                        elif option_price is not None:
-                            state.call_current_close = option_price
-                    except Exception:
-                        if option_price is not None:
-                            state.call_current_close = option_price
-
-            # ── Sync current_price for open position P&L ──────────────────────
-            # current_price is always sourced from the relevant option store,
-            # already updated above.
-            #
-            # BUG FIX: Do NOT overwrite current_price while the trade is still
-            # unconfirmed.  record_trade_state() sets current_price = fill_price
-            # (e.g. 41.75 mid-price).  The very first WS tick that arrives after
-            # entry often carries the pre-entry ask/LTP (e.g. 83.45) still queued
-            # in the candle store, because the store hasn't received a post-fill
-            # tick yet.  Writing that stale value here would make the trailing-SL
-            # logic think the position is already +99 % in profit, immediately
-            # activating the trail and then hitting TP — all within 200 ms of
-            # entry.  We hold off until current_trade_confirmed=True, at which
-            # point the broker has acknowledged the fill and the WS stream has had
-            # at least one clean post-fill tick.
-            if state.current_position and state.current_trade_confirmed:
-                cp = state.current_position
-                if cp == BaseEnums.CALL and state.call_current_close is not None:
-                    old_current = state.current_price
-                    state.current_price = state.call_current_close
-                    if old_current != state.current_price:
-                        logger.debug(f"current_price (CALL): {old_current} -> {state.current_price}")
-                elif cp == BaseEnums.PUT and state.put_current_close is not None:
-                    old_current = state.current_price
-                    state.current_price = state.put_current_close
-                    if old_current != state.current_price:
-                        logger.debug(f"current_price (PUT): {old_current} -> {state.current_price}")
+                        logger.debug(f"Symbol {full_symbol} not in option chain")
+
+                # ── ATM leg price from its store ───────────────────────────────────
+                # Re-checked under the batch: a leg switched since the push keeps
+                # its own price.
+                if leg_price is not None:
+                    if leg == state.put_option:
+                        old_put = state.put_current_close
+                        state.put_current_close = leg_price
+                        logger.debug(f"✅ PUT price (from store): {old_put} -> {leg_price}")
+                    elif leg == state.call_option:
+                        old_call = state.call_current_close
+                        state.call_current_close = leg_price
+                        logger.debug(f"✅ CALL price (from store): {old_call} -> {leg_price}")
+
+                # ── Sync current_price for open position P&L ──────────────────────
+                # current_price is always sourced from the relevant option store,
+                # already updated above.
+                #
+                # BUG FIX: Do NOT overwrite current_price while the trade is still
+                # unconfirmed.  record_trade_state() sets current_price = fill_price
+                # (e.g. 41.75 mid-price).  The very first WS tick that arrives after
+                # entry often carries the pre-entry ask/LTP (e.g. 83.45) still queued
+                # in the candle store, because the store hasn't received a post-fill
+                # tick yet.  Writing that stale value here would make the trailing-SL
+                # logic think the position is already +99 % in profit, immediately
+                # activating the trail and then hitting TP — all within 200 ms of
+                # entry.  We hold off until current_trade_confirmed=True, at which
+                # point the broker has acknowledged the fill and the WS stream has had
+                # at least one clean post-fill tick.
+                if state.current_position and state.current_trade_confirmed:
+                    cp = state.current_position
+                    if cp == BaseEnums.CALL and state.call_current_close is not None:
+                        old_current = state.current_price
+                        state.current_price = state.call_current_close
+                        if old_current != state.current_price:
+                            logger.debug(f"current_price (CALL): {old_current} -> {state.current_price}")
+                    elif cp == BaseEnums.PUT and state.put_current_close is not None:
+                        old_current = state.current_price
+                        state.current_price = state.put_current_close
+                        if old_current != state.current_price:
+                            logger.debug(f"current_price (PUT): {old_current} -> {state.current_price}")
 
         except Exception as e:
             logger.error(f"[TradingApp.update_market_state] Failed for symbol {symbol}: {e}", exc_info=True)
@@ -1581,6 +1815,7 @@ class TradingApp:
             self._evaluate_tick_close_gate(state)
 
             state.trend = self.determine_trend_from_signals()
+            tracer.emit(EV_SIGNAL, tracer.tag(str(state.trend)))
 
             if safe_hasattr(self, 'executor') and self.executor:
                 self.execute_based_on_trend()
@@ -1644,6 +1879,7 @@ class TradingApp:
             result = self.signal_engine.evaluate_tick(
                 current_close=current_close,
                 current_position=state.current_position,
+                extra_columns=self._chain_analytics.columns() if self._chain_analytics is not None else None,
             )
 
             if result and result.get("available"):
@@ -1694,6 +1930,8 @@ class TradingApp:
 
         FIX: Added timeout protection and caching.
         """
+        fetch_t0 = time.perf_counter()
+        tracer.emit(EV_FETCH_START)
         try:
             if self.should_stop:
                 logger.debug("Stop requested, skipping history fetch")
@@ -1776,6 +2014,10 @@ class TradingApp:
                     except (KeyError, IndexError, AttributeError) as e:
                         logger.error(f"Failed to get last index time: {e}", exc_info=True)
 
+                    # Option-chain analytics as per-bar columns (pcr_oi, atm_iv, …) for rules
+                    if self._chain_analytics is not None:
+                        deriv_df = self._chain_analytics.attach(deriv_df, target_minutes)
+
                     # ── Run trend detection ───────────────────────────────────
                     # FIX-4: Call _run_trend_detection_safe() directly instead of
                     # submitting to _fetch_executor.  We are ALREADY running inside
@@ -1849,10 +2091,12 @@ class TradingApp:
                 self._stop_event.set()
         except Exception as e:
             logger.error(f"Error in _fetch_history_and_detect: {e!r}", exc_info=True)
+            tracer.dump_on_error("history_fetch")
         finally:
             # FIX-5: Release the fetch lock so the next bar can schedule a fetch.
             with self._fetch_lock:
                 self._fetch_in_progress = False
+            tracer.emit(EV_FETCH_DONE, 0, (time.perf_counter() - fetch_t0) * 1000)
 
     def _run_trend_detection_safe(self, df, symbol, position):
         """Run trend detection in isolated context."""
@@ -2272,13 +2516,19 @@ class TradingApp:
             if state.current_position is None:
                 if trend == BaseEnums.ENTER_CALL and state.should_buy_call:
                     logger.info("🎯 ENTER_CALL confirmed by BUY_CALL")
+                    tracer.emit(EV_GATE_PASSED, tracer.tag("signal_call"))
 
                     # ── Re-entry guard ────────────────────────────────────────
                     _was_reentry = getattr(self, '_reentry_exit_time', None) is None
                     if not _was_reentry and not self._check_reentry_allowed(BaseEnums.CALL, state):
+                        tracer.emit(EV_GATE_BLOCKED, tracer.tag("reentry"))
                         return
                     # ─────────────────────────────────────────────────────────
 
+                    if not self._leg_warm(state.call_option):
+                        tracer.emit(EV_GATE_BLOCKED, tracer.tag("leg_warmup"))
+                        return
+
                     # FEATURE 6: Multi-Timeframe Filter check
                     if self.config.get('use_mtf_filter', False):
                         allowed, summary = self.mtf_filter.should_allow_entry(
@@ -2287,8 +2537,10 @@ class TradingApp:
                         state.last_mtf_summary = summary
                         if not allowed:
                             logger.info(f'[MTF] Entry blocked: {summary}')
+                            tracer.emit(EV_GATE_BLOCKED, tracer.tag("mtf"))
                             return
                         logger.info(f'[MTF] Entry allowed: {summary}')
+                        tracer.emit(EV_GATE_PASSED, tracer.tag("mtf"))
 
                     try:
                         self.ensure_symbol_subscribed(state.call_option)
@@ -2305,13 +2557,19 @@ class TradingApp:
 
                 elif trend == BaseEnums.ENTER_PUT and state.should_buy_put:
                     logger.info("🎯 ENTER_PUT confirmed by BUY_PUT")
+                    tracer.emit(EV_GATE_PASSED, tracer.tag("signal_put"))
 
                     # ── Re-entry guard ────────────────────────────────────────
                     _was_reentry = getattr(self, '_reentry_exit_time', None) is None
                     if not _was_reentry and not self._check_reentry_allowed(BaseEnums.PUT, state):
+                        tracer.emit(EV_GATE_BLOCKED, tracer.tag("reentry"))
                         return
                     # ─────────────────────────────────────────────────────────
 
+                    if not self._leg_warm(state.put_option):
+                        tracer.emit(EV_GATE_BLOCKED, tracer.tag("leg_warmup"))
+                        return
+
                     # FEATURE 6: Multi-Timeframe Filter check
                     if self.config.get('use_mtf_filter', False):
                         allowed, summary = self.mtf_filter.should_allow_entry(
@@ -2320,8 +2578,10 @@ class TradingApp:
                         state.last_mtf_summary = summary
                         if not allowed:
                             logger.info(f'[MTF] Entry blocked: {summary}')
+                            tracer.emit(EV_GATE_BLOCKED, tracer.tag("mtf"))
                             return
                         logger.info(f'[MTF] Entry allowed: {summary}')
+                        tracer.emit(EV_GATE_PASSED, tracer.tag("mtf"))
 
                     try:
                         self.ensure_symbol_subscribed(state.put_option)
@@ -2618,6 +2878,8 @@ class TradingApp:
             self.should_stop = True
             if safe_hasattr(self, '_stop_event') and self._stop_event:
                 self._stop_event.set()  # Wake up the keep-alive loop immediately
+            if safe_hasattr(self, '_tick_mailbox') and self._tick_mailbox is not None:
+                self._tick_mailbox.wake()  # ...and the stage 2 worker
 
             # Wait for stage 2 worker thread to finish (with timeout)
             if safe_hasattr(self, '_stage2_thread') and self._stage2_thread and self._stage2_thread.is_alive():
@@ -31,7 +31,6 @@ import numpy as np
 import pandas as pd
 
 from Utils.safe_getattr import safe_hasattr, safe_getattr
-from gui.theme_manager import theme_manager
 
 # Rule 4: Structured logging
 logger = logging.getLogger(__name__)
@@ -79,8 +78,10 @@ SIGNAL_LABELS: Dict[str, str] = {
     "EXIT_CALL": "🔴  Exit Call", "EXIT_PUT": "🔵  Exit Put", "HOLD": "⏸   Hold",
 }
 
-# Color codes for UI theming — sourced from theme_manager so they follow dark/light switching
+# Color codes for UI theming — sourced from theme_manager so they follow dark/light switching.
+# theme_manager (PyQt5) is imported lazily so the engine runs headless.
 def _signal_colors() -> Dict[str, str]:
+    from gui.theme_manager import theme_manager
     c = theme_manager.palette
     return {
         "BUY_CALL":  c.GREEN,
@@ -91,7 +92,13 @@ def _signal_colors() -> Dict[str, str]:
         "WAIT":      c.TEXT_DIM,
     }
 
-SIGNAL_COLORS: Dict[str, str] = _signal_colors()
+def __getattr__(name: str):
+    # SIGNAL_COLORS is built on first access (GUI code only)
+    if name == "SIGNAL_COLORS":
+        colors = _signal_colors()
+        globals()["SIGNAL_COLORS"] = colors
+        return colors
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Signal priorities for resolution (lower number = higher priority)
 SIGNAL_PRIORITY = {
@@ -1975,6 +1982,7 @@ class DynamicSignalEngine:
         self,
         current_close: float,
         current_position: Optional[str] = None,
+        extra_columns: Optional[Dict[str, float]] = None,
     ) -> Optional[Dict[str, Any]]:
         """
         Tier-2 / tick-level evaluation.
@@ -1992,6 +2000,10 @@ class DynamicSignalEngine:
         - A column comparison such as ``close > RSI`` is checked on every tick
           so entries/exits fire as soon as price crosses the level.
 
+        ``extra_columns`` adds live non-OHLCV columns to the proxy row (e.g.
+        the option-chain analytics ``pcr_oi``, ``atm_iv``), so column sides
+        that name them resolve on ticks as they do at bar close.
+
         Returns ``None`` (caller should keep the previous result) when:
         - No frozen cache is available yet (Tier-1 has not run once).
         - ``current_close`` is not a valid finite number.
@@ -2067,6 +2079,9 @@ class DynamicSignalEngine:
                     else:
                         _proxy_row[_col] = 0.0
 
+                for _col, _val in (extra_columns or {}).items():
+                    _proxy_row[_col] = float(_val) if _val is not None else np.nan
+
                 # Always override close with the live tick price
                 _proxy_row["close"] = float(current_close)
 
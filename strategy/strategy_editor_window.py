@@ -52,6 +52,7 @@ from PyQt5.QtWidgets import (
 )
 
 from Utils.time_utils import ist_now, fmt_display
+from data.chain_analytics import CHAIN_COLUMNS
 from gui.dialog_base import ThemedDialog
 from strategy.strategy_presets import get_preset_names, get_preset_rules
 
@@ -207,7 +208,8 @@ except ImportError:
 
 OPERATORS = [">", "<", ">=", "<=", "==", "!=", "between"]
 SIDE_TYPES = ["indicator", "scalar", "column"]
-COLUMNS = ["close", "open", "high", "low", "volume", "hl2", "hlc3", "ohlc4"]
+# Live option-chain analytics (data/chain_analytics.py) follow the price columns
+COLUMNS = ["close", "open", "high", "low", "volume", "hl2", "hlc3", "ohlc4"] + list(CHAIN_COLUMNS)
 TIMEFRAMES = ["1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d", "3d", "1w", "1M"]
 
 SIGNAL_GROUPS = [
@@ -0,0 +1,136 @@
+"""
+tests/test_expiry_calendar.py
+=============================
+ExpiryCalendar lookups against the date arithmetic they replaced: weekday
+stepping with the holiday roll-back, last-weekday-of-month expiries, and
+trading minutes counted day by day.
+"""
+
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from Utils.expiry_calendar import (
+    SESSION_MINUTES,
+    SESSION_OPEN_MINUTE,
+    TRADING_MINUTES_PER_YEAR,
+    ExpiryCalendar,
+)
+from Utils.time_utils import IST
+
+START, END = date(2024, 1, 1), date(2025, 12, 31)
+# A Tuesday, a Thursday, a last-Tuesday-of-month and a plain weekday holiday
+HOLIDAYS = ["2024-01-26", "2024-03-26", "2024-08-15", "2024-10-31", "2025-03-25",
+            "2025-05-01", "2025-08-14", "2025-12-25"]
+UNDERLYINGS = {"NIFTY": 1, "SENSEX": 3}
+
+
+@pytest.fixture(scope="module")
+def cal():
+    return ExpiryCalendar(START, END, HOLIDAYS)
+
+
+def _closed(d: date) -> bool:
+    return d.weekday() >= 5 or d.isoformat() in HOLIDAYS
+
+
+def _roll_back(d: date) -> date:
+    """The old _adjust_for_holiday: walk back to the previous trading day."""
+    for _ in range(10):
+        if not _closed(d):
+            return d
+        d -= timedelta(days=1)
+    return d
+
+
+def _old_weekly(d: date, weekday: int, offset: int = 0) -> date:
+    return _roll_back(d + timedelta(days=(weekday - d.weekday()) % 7 + 7 * offset))
+
+
+def _old_monthly(d: date, weekday: int) -> date:
+    def last_weekday(y, m):
+        nxt = date(y + (m == 12), m % 12 + 1, 1)
+        last = nxt - timedelta(days=1)
+        return _roll_back(last - timedelta(days=(last.weekday() - weekday) % 7))
+
+    exp = last_weekday(d.year, d.month)
+    if exp < d:
+        exp = last_weekday(d.year + (d.month == 12), d.month % 12 + 1)
+    return exp
+
+
+def _trading_days(start: date, end: date):
+    d = start
+    while d <= END - timedelta(days=40) and d <= end:
+        if not _closed(d):
+            yield d
+        d += timedelta(days=1)
+
+
+def _minutes_brute(start: datetime, end: datetime) -> float:
+    """Trading minutes in [start, end], summed one calendar day at a time."""
+    total, d = 0.0, start.date()
+    while d <= end.date():
+        if not _closed(d):
+            open_ = IST.localize(datetime(d.year, d.month, d.day)) + timedelta(minutes=SESSION_OPEN_MINUTE)
+            close = open_ + timedelta(minutes=SESSION_MINUTES)
+            lo, hi = max(open_, start), min(close, end)
+            if hi > lo:
+                total += (hi - lo).total_seconds() / 60
+        d += timedelta(days=1)
+    return total
+
+
+@pytest.mark.parametrize("underlying", sorted(UNDERLYINGS))
+def test_weekly_expiry_matches_weekday_rollback(cal, underlying):
+    wd = UNDERLYINGS[underlying]
+    for d in _trading_days(START, END):
+        assert cal.expiry(underlying, d) == _old_weekly(d, wd), d
+        assert cal.expiry(underlying, d, offset=1) == _old_weekly(d, wd, offset=1), d
+
+
+@pytest.mark.parametrize("underlying", sorted(UNDERLYINGS))
+def test_monthly_expiry_matches_last_weekday_rollback(cal, underlying):
+    wd = UNDERLYINGS[underlying]
+    for d in _trading_days(START, END):
+        assert cal.expiry(underlying, d, "monthly") == _old_monthly(d, wd), d
+
+
+def test_holiday_expiry_rolls_back(cal):
+    # 2024-03-26 (last Tuesday of March) is a holiday: expiry moves to Monday
+    assert cal.expiry("NIFTY", date(2024, 3, 20), "monthly") == date(2024, 3, 25)
+    assert cal.is_monthly_expiry("NIFTY", date(2024, 3, 25))
+    assert not cal.is_trading_day(date(2024, 3, 26))
+
+
+def test_vectorised_expiries_match_scalar(cal):
+    days = list(_trading_days(START, date(2024, 12, 31)))
+    ords = [d.toordinal() for d in days]
+    out = cal.expiries("SENSEX", ords)
+    assert [date.fromordinal(int(o)) for o in out] == [cal.expiry("SENSEX", d) for d in days]
+
+
+def test_trading_minutes_match_day_by_day_count(cal):
+    rng = random.Random(7)
+    base = IST.localize(datetime(2024, 1, 1))
+    for _ in range(300):
+        start = base + timedelta(minutes=rng.randrange(0, 600 * 24 * 60))
+        end = start + timedelta(minutes=rng.randrange(0, 20 * 24 * 60))
+        assert cal.trading_minutes_between(start, end) == pytest.approx(_minutes_brute(start, end)), start
+        assert cal.years_to_expiry(start, end) == pytest.approx(
+            _minutes_brute(start, end) / TRADING_MINUTES_PER_YEAR)
+
+
+def test_days_to_expiry_counts_sessions(cal):
+    for d in _trading_days(date(2024, 3, 1), date(2024, 4, 30)):
+        exp = cal.expiry("NIFTY", d, "monthly")
+        sessions = sum(1 for k in range(1, (exp - d).days + 1) if not _closed(d + timedelta(days=k)))
+        assert cal.days_to_expiry(d, exp) == sessions
+
+
+def test_calendar_vol_converts_by_sessions_per_year(cal):
+    d = date(2025, 6, 2)
+    n = sum(1 for k in range(365) if not _closed(d - timedelta(days=k)))
+    assert cal.sessions_per_year(d) == n
+    assert cal.calendar_to_trading_vol(0.15, d) == pytest.approx(0.15 * (252 / n) ** 0.5)
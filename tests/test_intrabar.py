@@ -0,0 +1,91 @@
+"""
+tests/test_intrabar.py
+======================
+IntrabarPathModel path shapes and first-exit ordering along the path.
+"""
+
+import numpy as np
+import pytest
+
+from backtest.backtest_intrabar import IntrabarPathModel
+
+first_exit = IntrabarPathModel.first_exit
+
+BULLISH = (100.0, 110.0, 95.0, 108.0)        # o, h, low, c — dips first
+BEARISH = (100.0, 110.0, 95.0, 97.0)         # rallies first
+
+
+def _ohlc(bar):
+    return IntrabarPathModel("ohlc").path(*bar)
+
+
+def test_ohlc_path_visits_nearer_extreme_first():
+    assert list(_ohlc(BULLISH)) == [100.0, 95.0, 110.0, 108.0]
+    assert list(_ohlc(BEARISH)) == [100.0, 110.0, 95.0, 97.0]
+
+
+@pytest.mark.parametrize("bar, expected", [(BULLISH, ("SL", 96.0)), (BEARISH, ("TP", 109.0))])
+def test_tp_and_sl_in_one_bar_resolve_by_path_order(bar, expected):
+    path = _ohlc(bar)
+    reason, price, _ = first_exit(path, path, tp=109.0, sl=96.0)
+    assert (reason, price) == expected
+
+
+def test_trailing_stop_uses_high_reached_before_the_low():
+    # Dip first: the stop is still trailing the open when the low is hit
+    path = _ohlc(BULLISH)
+    assert first_exit(path, path, trail_pct=0.05) == ("TRAILING_SL", 95.0, 100.0)
+    # Rally first: the stop is raised to the high, then hit on the way down
+    path = _ohlc(BEARISH)
+    assert first_exit(path, path, trail_pct=0.05) == ("TRAILING_SL", pytest.approx(104.5), 110.0)
+
+
+def test_same_point_ties_keep_bar_priority():
+    path = np.array([100.0, 90.0])
+    reason, price, _ = first_exit(path, path, sl=90.0, trail_pct=0.10, index_level=95.0)
+    assert (reason, price) == ("SL", 90.0)
+
+
+def test_index_sl_fills_at_option_price_on_the_spot_hit():
+    opt = np.array([50.0, 48.0, 45.0, 47.0])
+    spot = np.array([200.0, 198.0, 195.0, 197.0])
+    assert first_exit(opt, spot, index_level=196.0) == ("INDEX_SL", 45.0, None)
+    assert first_exit(opt, spot, index_level=201.0, index_below=False) == (None, None, None)
+
+
+def test_no_hit_reports_running_high():
+    path = _ohlc(BEARISH)
+    assert first_exit(path, path, tp=120.0, sl=80.0, trail_pct=0.5) == (None, None, 110.0)
+
+
+def test_bridge_paths_touch_both_extremes_and_stay_in_range():
+    model = IntrabarPathModel("bridge", steps=30, seed=3)
+    for bar in (BULLISH, BEARISH) * 50:
+        path = model.path(*bar)
+        assert path[0] == bar[0] and path[-1] == pytest.approx(bar[3])
+        assert path.max() == bar[1] and path.min() == bar[2]
+
+
+def test_bridge_sequence_restores_from_checkpoint():
+    model = IntrabarPathModel("bridge", seed=11)
+    for _ in range(5):
+        model.path(*BULLISH)
+    state = model.get_state()
+    expected = [model.path(*BEARISH) for _ in range(3)]
+
+    restored = IntrabarPathModel("bridge", seed=99)
+    restored.set_state(state)
+    for want in expected:
+        np.testing.assert_array_equal(restored.path(*BEARISH), want)
+
+
+@pytest.mark.parametrize("opt_type", ["CE", "PE"])
+def test_secondary_path_is_mapped_monotonically(opt_type):
+    model = IntrabarPathModel("ohlc")
+    opt_bar = {"open": 50.0, "high": 60.0, "low": 40.0, "close": 55.0}
+    opt_path, spot_path = model.paths(BULLISH, opt_bar, opt_type, primary_option=True)
+    assert list(opt_path) == [50.0, 40.0, 60.0, 55.0]
+    order = np.argsort(opt_path)
+    ranks = spot_path[order]
+    assert np.all(np.diff(ranks) >= 0) if opt_type == "CE" else np.all(np.diff(ranks) <= 0)
+    assert spot_path.min() == 95.0 and spot_path.max() == 110.0
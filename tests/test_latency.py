@@ -0,0 +1,79 @@
+"""
+tests/test_latency.py
+=====================
+LatencyHistogram percentiles, rolling window and lifetime counters.
+"""
+
+import random
+
+import pytest
+
+from Utils.latency import LatencyHistogram, TickLatency, now_ns
+
+RESOLUTION = 0.035                # 32 sub-buckets per power of two ≈ 3 %
+
+
+def _exact_percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[max(int(q * len(ordered) + 0.5) - 1, 0)]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_percentiles_match_exact_within_bucket_resolution(seed):
+    rng = random.Random(seed)
+    samples = [int(rng.lognormvariate(11, 1.2)) for _ in range(20_000)]    # ~60 µs median
+    hist = LatencyHistogram()
+    at = now_ns()
+    for ns in samples:
+        hist.record(ns, at)
+
+    stats = hist.stats()
+    assert stats["count"] == stats["total_count"] == len(samples)
+    assert stats["max"] == round(max(samples) / 1000, 1)
+    for name, q in (("p50", 0.50), ("p90", 0.90), ("p99", 0.99)):
+        exact = _exact_percentile(samples, q) / 1000
+        assert stats[name] == pytest.approx(exact, rel=RESOLUTION, abs=0.1), name
+    assert stats["mean"] == pytest.approx(sum(samples) / len(samples) / 1000, rel=RESOLUTION)
+
+
+def test_small_values_are_exact():
+    hist = LatencyHistogram()
+    at = now_ns()
+    for ns in range(1, 64):
+        hist.record(ns, at)
+    assert hist.buckets() == dict.fromkeys(range(1, 64), 1)
+
+
+def test_samples_older_than_the_window_drop_out():
+    hist = LatencyHistogram(window_s=60.0, slots=6)
+    now = now_ns()
+    hist.record(5_000_000, now - 120 * 10**9)          # two windows ago
+    hist.record(1_000, now)
+
+    stats = hist.stats()
+    assert stats["count"] == 1
+    assert stats["max"] == 1.0
+    assert stats["total_count"] == 2
+    assert stats["total_max"] == 5000.0
+
+
+def test_reset_clears_window_and_lifetime():
+    hist = LatencyHistogram()
+    hist.record(10_000, now_ns())
+    hist.reset()
+    stats = hist.stats()
+    assert stats["count"] == stats["total_count"] == 0
+    assert stats["p99"] == 0.0 and stats["total_max"] == 0.0
+
+
+def test_tick_latency_origin_is_per_thread():
+    lat = TickLatency(stages=("decision",))
+    lat.record_since_origin("decision")                # no origin: nothing recorded
+    lat.begin(now_ns() - 2_000_000)
+    lat.record_since_origin("decision")
+    lat.end()
+    lat.record_since_origin("decision")
+
+    stats = lat.stats()["decision"]
+    assert stats["count"] == 1
+    assert stats["max"] >= 2000.0
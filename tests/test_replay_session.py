@@ -0,0 +1,125 @@
+"""
+tests/test_replay_session.py
+============================
+ReplaySession against the single-loop replay it was split out of: the
+engine's _replay, a session stepped bar by bar on its own SessionState, and
+a session resumed from a mid-run checkpoint must all produce the same trades.
+"""
+
+import collections
+import dataclasses
+from datetime import datetime
+
+import pytest
+
+from backtest.backtest_checkpoint import ReplayCheckpoint
+from backtest.backtest_engine import BacktestConfig, BacktestEngine, ReplaySession, SessionState
+from backtest.backtest_option_pricer import OptionPricer
+from benchmarks.synthetic_market import SyntheticMarket
+from data.candle_store_manager import candle_store_manager
+from data.trade_state_manager import state_manager
+
+# Trades the single-loop _replay produced on this market before the split
+# (exit reasons and total net P&L), so a drift in the session code shows up
+# even when every path through it drifts the same way.
+LOOP_TRADES = 103
+LOOP_REASONS = {"TRAILING_SL": 80, "SL": 15, "TP": 7, "MARKET_CLOSE": 1}
+LOOP_NET_PNL = -32870.0
+
+
+class _CrossSignal:
+    """Deterministic fast/slow mean crossover in the SignalEngine result shape."""
+
+    def evaluate(self, df, current_position=None):
+        close = df["close"]
+        if len(close) < 12:
+            return {"available": False}
+        fast, slow = close.iloc[-4:].mean(), close.iloc[-12:].mean()
+        signal = ("BUY_CALL" if fast > slow * 1.0005 else
+                  "BUY_PUT" if fast < slow * 0.9995 else "HOLD")
+        return {"available": True, "signal_value": signal, "confidence": {}, "threshold": 0.6}
+
+
+@pytest.fixture(scope="module")
+def market():
+    market = SyntheticMarket(seed=5, days=6, holidays=[])
+    sessions = market.sessions()
+    cfg = BacktestConfig(
+        start_date=datetime.combine(sessions[0], datetime.min.time()),
+        end_date=datetime.combine(sessions[-1], datetime.min.time()),
+        derivative="NIFTY", tp_pct=0.30, sl_pct=0.20, trailing_sl_pct=0.10,
+        execution_interval_minutes=5, use_vix=False,
+    )
+    spot_df = BacktestEngine._filter_spot_df(market.spot_bars(5), sessions[0], sessions[-1])
+    return cfg, spot_df
+
+
+@pytest.fixture
+def engine(market):
+    engine = BacktestEngine(broker=None, config=market[0])
+    yield engine
+    state_manager.restore_state(engine._saved_state)
+    candle_store_manager.clear()
+
+
+def _pricer():
+    return OptionPricer(derivative="NIFTY", expiry_type="weekly", broker=None, use_vix=False)
+
+
+def _trades(result):
+    return [dataclasses.astuple(t) for t in result.trades]
+
+
+def _session(engine, spot_df, checkpoint=None):
+    return ReplaySession(engine, spot_df, _pricer(), _CrossSignal(), None, SessionState(),
+                         checkpoint=checkpoint)
+
+
+def test_engine_replay_matches_single_loop(engine, market):
+    result = engine._replay(market[1], _pricer(), _CrossSignal(), None)
+
+    assert result.error_msg is None
+    assert len(result.trades) == LOOP_TRADES
+    assert collections.Counter(t.exit_reason for t in result.trades) == LOOP_REASONS
+    assert sum(t.net_pnl for t in result.trades) == pytest.approx(LOOP_NET_PNL)
+
+
+def test_stepped_session_matches_engine_replay(engine, market):
+    spot_df = market[1]
+    expected = engine._replay(spot_df, _pricer(), _CrossSignal(), None)
+
+    session = _session(engine, spot_df)
+    for i, row in session.rows():                 # the portfolio clock's call sequence
+        if session.begin_bar(i, row):
+            session.evaluate()
+            session.finish_bar(lambda s: True)
+    result = session.finish()
+
+    assert _trades(result) == _trades(expected)
+    assert result.equity_curve == expected.equity_curve
+
+
+def test_resumed_session_matches_uninterrupted_run(engine, market, tmp_path):
+    spot_df = market[1]
+    expected = _session(engine, spot_df)
+    for i, row in expected.rows():
+        expected.step(i, row)
+    expected = expected.finish()
+
+    checkpoint = ReplayCheckpoint("resume", directory=str(tmp_path))
+    first = _session(engine, spot_df, checkpoint)
+    cut = len(spot_df) // 2
+    for i, row in first.rows():
+        if i == cut:
+            first.save_checkpoint(i)
+            break
+        first.step(i, row)
+
+    resumed = _session(engine, spot_df, ReplayCheckpoint("resume", directory=str(tmp_path)))
+    assert resumed.start_pos == cut
+    for i, row in resumed.rows():
+        resumed.step(i, row)
+    result = resumed.finish()
+
+    assert _trades(result) == _trades(expected)
+    assert result.equity_curve == expected.equity_curve
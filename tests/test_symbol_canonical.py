@@ -0,0 +1,94 @@
+"""
+tests/test_symbol_canonical.py
+==============================
+Memoised canonical_symbol() against the uncached reference scan, and the
+SymbolRouter ids built on it.
+"""
+
+import itertools
+
+import pytest
+
+from Utils.OptionUtils import OptionUtils
+from Utils.symbol_canonicalizer import symbol_canonicalizer
+from Utils.symbol_router import KIND_CE, KIND_INDEX, KIND_PE, SymbolIds, SymbolRouter
+
+
+def _corpus():
+    """Every broker's index spellings and option / future cores under every prefix."""
+    bases = set(OptionUtils.SYMBOL_MAP) | set(OptionUtils.SYMBOL_MAP.values())
+    for idx_map in OptionUtils._INDEX_SYMBOL_MAP.values():
+        for broker_sym in idx_map.values():
+            bases.add(broker_sym)
+            bases.add(broker_sym.split("|")[-1].split(":")[-1])
+    for underlying in ("NIFTY", "BANKNIFTY", "FINNIFTY", "SENSEX"):
+        bases.update({f"{underlying}2531825000CE", f"{underlying}25N0625050PE",
+                      f"{underlying}25MAR48000CE", f"{underlying}25MARFUT"})
+    bases.update({"12345", "RELIANCE", "M&M25MAR3000CE", "Nifty 50", "NSE:NSE:NIFTY", ""})
+    corpus = set(bases)
+    for pfx in OptionUtils.EXCHANGE_PREFIXES:
+        corpus.update(pfx + b for b in bases)
+    return sorted(corpus)
+
+
+CORPUS = _corpus()
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    symbol_canonicalizer.clear()
+    yield
+    symbol_canonicalizer.clear()
+
+
+def test_canonical_matches_scan_cold_and_warm():
+    for _ in range(2):                       # second pass is served from the cache
+        mismatched = [s for s in CORPUS
+                      if OptionUtils.canonical_symbol(s) != OptionUtils._canonical_symbol_scan(s)]
+        assert not mismatched
+
+
+def test_symbols_match_agrees_with_scan():
+    sample = CORPUS[::7]
+    for a, b in itertools.combinations(sample, 2):
+        expected = bool(a and b) and (a == b or OptionUtils._canonical_symbol_scan(a)
+                                      == OptionUtils._canonical_symbol_scan(b))
+        assert OptionUtils.symbols_match(a, b) == expected, (a, b)
+
+
+def test_parse_symbol_fields():
+    parsed = OptionUtils.parse_symbol("NFO:NIFTY2531825000CE")
+    assert parsed.canonical == "NIFTY2531825000CE"
+    assert (parsed.underlying, parsed.expiry, parsed.strike, parsed.option_type) == \
+        ("NIFTY", "25318", 25000.0, "CE")
+    assert OptionUtils.parse_symbol("NSE:NIFTY50-INDEX").canonical == "NIFTY"
+
+
+def test_router_ids_follow_symbols_match():
+    ids = SymbolIds()
+    sample = CORPUS[::5]
+    for a, b in itertools.combinations(sample, 2):
+        assert ids.same(a, b) == OptionUtils.symbols_match(a, b), (a, b)
+
+
+def test_router_remaps_to_subscribed_spelling():
+    router = SymbolRouter(SymbolIds())
+    router.rebuild(["NSE:NIFTY50-INDEX", "NSE:NIFTY2531825000CE", "NSE:NIFTY2531825000PE"])
+
+    assert router.subscribed("NFO:NIFTY2531825000CE") == "NSE:NIFTY2531825000CE"
+    assert router.subscribed("NSE_INDEX|Nifty 50") == "NSE:NIFTY50-INDEX"
+    assert router.subscribed("NFO:NIFTY2531825100CE") is None
+    assert router.route("NIFTY2531825000PE").kind == KIND_PE
+    assert router.route("NSE:NIFTY2531825000CE").kind == KIND_CE
+    assert router.route("NIFTY50").kind == KIND_INDEX
+
+
+def test_routers_share_ids_but_not_routes():
+    ids = SymbolIds()
+    first, second = SymbolRouter(ids), SymbolRouter(ids)
+    first.rebuild(["NSE:NIFTY2531825000CE"])
+    second.rebuild(["NSE:NIFTY2531825000PE"])
+
+    assert first.subscribed("NIFTY2531825000CE") == "NSE:NIFTY2531825000CE"
+    assert second.subscribed("NIFTY2531825000CE") is None
+    assert first.intern("NFO:NIFTY2531825000PE") == second.intern("NSE:NIFTY2531825000PE")
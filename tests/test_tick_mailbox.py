@@ -0,0 +1,74 @@
+"""
+tests/test_tick_mailbox.py
+==========================
+TickMailbox conflation and wake-ups between stage 1 and stage 2.
+"""
+
+import threading
+
+from data.tick_mailbox import TickMailbox
+
+
+def test_keeps_latest_update_per_key():
+    box = TickMailbox()
+    box.post(1, "a1")
+    box.post(2, "b1")
+    box.post(1, "a2")
+    box.post(1, "a3")
+
+    assert box.take(timeout=0) == {1: "a3", 2: "b1"}
+    assert box.posted == 4
+    assert box.conflated == 2
+    assert len(box) == 0
+
+
+def test_one_wakeup_per_batch():
+    box = TickMailbox()
+    for i in range(10):
+        box.post(i % 3, i)
+    assert box.wakeups == 1
+    assert box.take(timeout=0) == {0: 9, 1: 7, 2: 8}
+
+    box.post(0, "next")
+    assert box.wakeups == 2
+    assert box.take(timeout=0) == {0: "next"}
+    assert box.batches == 2
+    assert box.max_batch == 3
+
+
+def test_take_returns_none_on_timeout_and_wake():
+    box = TickMailbox()
+    assert box.take(timeout=0) is None
+
+    out = []
+    t = threading.Thread(target=lambda: out.append(box.take(timeout=5)))
+    t.start()
+    box.wake()
+    t.join(timeout=5)
+    assert not t.is_alive()
+    assert out == [None]
+
+
+def test_burst_while_consumer_busy_folds_into_next_batch():
+    box = TickMailbox()
+    box.post(1, 0)
+    first = box.take(timeout=0)
+    for i in range(1, 1001):                 # stage 2 still processing *first*
+        box.post(i % 5, i)
+    second = box.take(timeout=0)
+
+    assert first == {1: 0}
+    assert second == {0: 1000, 1: 996, 2: 997, 3: 998, 4: 999}
+    assert box.take(timeout=0) is None
+    assert box.stats()["conflated"] == 995
+
+
+def test_blocked_consumer_wakes_on_post():
+    box = TickMailbox()
+    out = []
+    t = threading.Thread(target=lambda: out.append(box.take(timeout=5)))
+    t.start()
+    box.post("NIFTY", (100.0, 100.5, 99.5))
+    t.join(timeout=5)
+    assert not t.is_alive()
+    assert out == [{"NIFTY": (100.0, 100.5, 99.5)}]
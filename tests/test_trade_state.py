@@ -0,0 +1,133 @@
+"""
+tests/test_trade_state.py
+=========================
+TradeState transactions and published snapshots.
+"""
+
+import threading
+
+import pytest
+
+from data.trade_state import TradeState
+
+
+@pytest.fixture
+def state():
+    TradeState.reset_instance()
+    st = TradeState.get_instance()
+    yield st
+    TradeState.reset_instance()
+
+
+def _in_thread(fn):
+    out = []
+    t = threading.Thread(target=lambda: out.append(fn()))
+    t.start()
+    t.join(timeout=5)
+    assert not t.is_alive(), "reader blocked past the batch"
+    return out[0]
+
+
+def test_snapshot_inside_batch_is_not_published(state):
+    """A snapshot taken by the batch owner must not leak uncommitted writes."""
+    state.apply(current_price=1.0, stop_loss=1.0)
+    before = state.get_position_snapshot()
+    committed = []
+
+    def reader():
+        snap = state.get_position_snapshot()
+        committed.append(snap)
+        return snap
+
+    with state.batch():
+        state.current_price = 2.0
+        own = state.get_position_snapshot()
+        own_full = state.get_snapshot()
+        assert own["current_price"] == 2.0 and own["stop_loss"] == 1.0
+        assert own_full["current_price"] == 2.0
+        # The reader blocks on the lock until commit, then sees the whole batch
+        t = threading.Thread(target=reader)
+        t.start()
+        t.join(timeout=0.2)
+        assert t.is_alive()
+        state.stop_loss = 1.5
+    t.join(timeout=5)
+
+    snap = committed[0]
+    assert snap["current_price"] == 2.0 and snap["stop_loss"] == 1.5
+    assert snap.version == before.version + 1
+    assert state.get_position_snapshot() is snap
+
+
+def test_reader_never_sees_partial_batch(state):
+    """Readers interleaved with many batches see either none or all of each."""
+    state.apply(current_price=0.0, stop_loss=0.0)
+    stop = threading.Event()
+    torn = []
+
+    def reader():
+        while not stop.is_set():
+            for snap in (state.get_position_snapshot(), state.get_snapshot()):
+                if snap["current_price"] != snap["stop_loss"]:
+                    torn.append((snap["current_price"], snap["stop_loss"]))
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    for t in readers:
+        t.start()
+    try:
+        for i in range(1, 500):
+            with state.batch():
+                state.current_price = float(i)
+                state.get_position_snapshot()     # owner peeks mid-batch
+                state.get_snapshot()
+                state.stop_loss = float(i)
+    finally:
+        stop.set()
+        for t in readers:
+            t.join(timeout=5)
+    assert torn == []
+
+
+def test_batch_bumps_version_once_and_notifies_once(state):
+    calls = []
+    state.add_observer(lambda version, changed: calls.append((version, changed)))
+    v0 = state.version
+    with state.batch():
+        state.current_price = 3.0
+        state.stop_loss = 2.0
+    assert state.version == v0 + 1
+    assert len(calls) == 1
+    assert calls[0][0] == v0 + 1
+
+
+def test_nested_batches_commit_once_at_the_outermost(state):
+    calls = []
+    state.add_observer(lambda version, changed: calls.append((version, changed)))
+    v0 = state.version
+    seen = []
+    t = threading.Thread(target=lambda: seen.append(state.get_position_snapshot()))
+    with state.batch():
+        state.current_price = 6.0
+        with state.batch():
+            state.stop_loss = 5.0
+            t.start()
+        # Inner exit commits nothing: no version bump, no notification, reader still waiting
+        t.join(timeout=0.2)
+        assert t.is_alive()
+        assert calls == [] and state.version == v0
+    t.join(timeout=5)
+
+    assert state.version == v0 + 1
+    assert len(calls) == 1
+    assert {"_current_price", "_stop_loss"} <= calls[0][1]
+    assert seen[0]["current_price"] == 6.0 and seen[0]["stop_loss"] == 5.0
+    assert seen[0].version == v0 + 1
+
+
+def test_unchanged_state_returns_same_snapshot(state):
+    state.current_price = 4.0
+    first = state.get_position_snapshot()
+    assert state.get_position_snapshot() is first
+    assert _in_thread(state.get_position_snapshot) is first
+    state.current_price = 5.0
+    assert state.get_position_snapshot() is not first
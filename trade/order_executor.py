@@ -17,7 +17,10 @@ from enum import Enum, auto
 import BaseEnums
 from Utils.OptionUtils import OptionUtils
 from Utils.Utils import Utils
+from Utils.event_tracer import EV_EXIT_SENT, EV_FILL, EV_ORDER_SENT, tracer
+from Utils.latency import STAGE_ORDER, tick_latency
 from Utils.safe_getattr import safe_getattr, safe_hasattr
+from Utils.symbol_router import symbol_ids
 # TZ-FIX: use ist_now() everywhere instead of ist_now() so in-memory
 # trade objects (OrderRecord timestamps, current_trade_started_time) are
 # always in IST regardless of the server's system timezone.
@@ -588,6 +591,7 @@ class OrderExecutor:
         if not live_orders:
             if not state.current_buy_price:
                 state.current_buy_price = orders[0].get('price')
+            tracer.emit(EV_FILL, len(orders), orders[0].get('price') or 0.0)
             return True
 
         if not self.api:
@@ -613,6 +617,7 @@ class OrderExecutor:
                 if all_filled:
                     if not state.current_buy_price:
                         state.current_buy_price = live_orders[0].get('price')
+                    tracer.emit(EV_FILL, len(live_orders), live_orders[0].get('price') or 0.0)
                     return True
                 time.sleep(0.5)
             except Exception as e:
@@ -704,6 +709,8 @@ class OrderExecutor:
 
             session_id = safe_getattr(state, 'session_id', None)
             position_type = str(option_type) if option_type else (state.current_position or "UNKNOWN")
+            tick_latency.record_since_origin(STAGE_ORDER)
+            tracer.emit(EV_ORDER_SENT, symbol_ids.intern(symbol), price)
 
             # Check if we're in paper mode (reads state.is_paper_mode set by TradingApp)
             is_live = not self._is_paper_mode()
@@ -797,6 +804,7 @@ class OrderExecutor:
 
         except Exception as e:
             logger.exception(f"[place_orders] Failed: {e}")
+            tracer.dump_on_error("place_orders")
             return []
 
     # ------------------------------------------------------------------
@@ -1119,6 +1127,9 @@ class OrderExecutor:
             total_qty = 0
             failed_orders = []  # track orders whose broker sell failed
 
+            tick_latency.record_since_origin(STAGE_ORDER)
+            tracer.emit(EV_EXIT_SENT, tracer.tag(str(exit_reason)), sell_price)
+
             # Use single source of truth for mode (reads state.is_paper_mode)
             is_live = not self._is_paper_mode()
 
@@ -1250,6 +1261,7 @@ class OrderExecutor:
 
         except Exception as e:
             logger.exception(f"[EXIT] Exception: {e}")
+            tracer.dump_on_error("exit_position")
             return False
 
         finally: